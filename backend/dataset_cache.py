@@ -0,0 +1,193 @@
+"""
+Process-wide cache of analysis outputs for the API.
+
+Each registered output is loaded once into an immutable snapshot holding
+the parsed data and its pre-serialised JSON response body. A background
+watcher polls file mtimes and swaps in a new snapshot when the pipeline
+rewrites an output, so requests never read from disk or run pandas.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+# Seconds between mtime checks of the watched output files
+DEFAULT_POLL_INTERVAL_S = 2.0
+
+
+def read_dataset(csv_path: Path) -> pd.DataFrame:
+    """Read an output table, preferring its memory-mapped Feather copy over the CSV export"""
+    feather_path = csv_path.with_suffix(".feather")
+    if feather_path.exists() and (not csv_path.exists() or feather_path.stat().st_mtime >= csv_path.stat().st_mtime):
+        return feather.read_table(feather_path, memory_map=True).to_pandas()
+    return pd.read_csv(csv_path)
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame rows as JSON-safe dicts (NaN becomes null)"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def serialize(payload: Any) -> bytes:
+    """Serialise a payload the way JSONResponse does"""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One loaded version of an output, replaced as a whole on reload"""
+    data: Any  # parsed DataFrame, text or JSON
+    payload: Any  # JSON-ready response content
+    body: bytes  # serialised payload
+    etag: str
+    last_modified: str  # HTTP date of the newest source file
+    signature: Tuple  # (name, mtime_ns, size) of each source file
+
+
+@dataclass
+class _Entry:
+    name: str
+    paths: List[Path]
+    kind: str  # 'table', 'text', 'json' or 'derived'
+    build: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+class DatasetRegistry:
+    """Registry of cached outputs with mtime-based hot reload"""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+        self._entries: Dict[str, _Entry] = {}
+        self._snapshots: Dict[str, Optional[Snapshot]] = {}
+        self._signatures: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def register_table(self, name: str, filename: str, build: Callable[[pd.DataFrame], Any]) -> None:
+        """Register a CSV/Feather output; build turns the DataFrame into response content"""
+        csv_path = self.base_dir / filename
+        self._entries[name] = _Entry(name, [csv_path, csv_path.with_suffix(".feather")], "table", build)
+
+    def register_text(self, name: str, filename: str, build: Callable[[str], Any]) -> None:
+        """Register a text output; build turns its content into response content"""
+        self._entries[name] = _Entry(name, [self.base_dir / filename], "text", build)
+
+    def register_json(self, name: str, filename: str, build: Callable[[Any], Any]) -> None:
+        """Register a JSON output (filename may be absolute); build turns the parsed document into response content"""
+        self._entries[name] = _Entry(name, [self.base_dir / filename], "json", build)
+
+    def register_derived(self, name: str, depends_on: List[str],
+                         build: Callable[..., Any]) -> None:
+        """
+        Register content computed from other entries' data.
+
+        build receives each dependency's data (None for missing ones) and may
+        return None to mark the derived output itself as missing.
+        """
+        self._entries[name] = _Entry(name, [], "derived", build, tuple(depends_on))
+
+    def get(self, name: str) -> Optional[Snapshot]:
+        """Current snapshot for an output, or None if its file does not exist"""
+        return self._snapshots.get(name)
+
+    def _signature(self, entry: _Entry) -> Tuple:
+        if entry.kind == "derived":
+            return tuple(
+                self._signatures.get(dep, (dep, None))
+                for dep in entry.depends_on
+            )
+        signature = []
+        for path in entry.paths:
+            try:
+                stat = path.stat()
+                signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                continue
+        return tuple(signature)
+
+    def _load(self, entry: _Entry, signature: Tuple) -> Optional[Snapshot]:
+        if entry.kind == "derived":
+            deps = [self._snapshots.get(dep) for dep in entry.depends_on]
+            data = None
+            payload = entry.build(*[snap.data if snap else None for snap in deps])
+            if payload is None:
+                return None
+            newest_ns = max((s[1] for snap in deps if snap for s in snap.signature), default=0)
+        else:
+            if not signature:
+                return None
+            if entry.kind == "table":
+                data = read_dataset(entry.paths[0])
+            elif entry.kind == "json":
+                data = json.loads(entry.paths[0].read_text())
+            else:
+                data = entry.paths[0].read_text()
+            payload = entry.build(data)
+            newest_ns = max(s[1] for s in signature)
+
+        body = serialize(payload)
+        return Snapshot(
+            data=data,
+            payload=payload,
+            body=body,
+            etag='"' + hashlib.sha1(body).hexdigest() + '"',
+            last_modified=formatdate(newest_ns / 1e9, usegmt=True) if newest_ns else formatdate(usegmt=True),
+            signature=signature
+        )
+
+    def refresh(self) -> List[str]:
+        """
+        Reload every output whose files changed since the last load.
+
+        A snapshot is only replaced after its new version loads successfully,
+        so a half-written file keeps the previous version in service.
+
+        Returns:
+            Names of the outputs that were reloaded
+        """
+        changed = []
+        with self._lock:
+            # Derived entries come last so they see their dependencies' new data
+            ordered = sorted(self._entries.values(), key=lambda e: e.kind == "derived")
+            for entry in ordered:
+                signature = self._signature(entry)
+                if self._signatures.get(entry.name) == signature:
+                    continue
+                try:
+                    snapshot = self._load(entry, signature)
+                except Exception as e:
+                    logger.warning(f"Keeping previous '{entry.name}' after failed reload: {e}")
+                    continue
+
+                # Re-check the files did not change mid-read; retry on the next poll if so
+                if entry.kind != "derived" and self._signature(entry) != signature:
+                    continue
+
+                self._snapshots[entry.name] = snapshot
+                self._signatures[entry.name] = signature
+                changed.append(entry.name)
+
+        if changed:
+            self.reloads += 1
+            logger.info(f"Reloaded outputs: {', '.join(changed)}")
+        return changed
+
+    async def watch(self, interval_s: float = DEFAULT_POLL_INTERVAL_S) -> None:
+        """Poll for changed outputs until cancelled"""
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Output reload failed: {e}")
@@ -2,15 +2,18 @@
 FastAPI backend for LA Healthcare Access Mapping
 Serves analysis outputs and provides API endpoints for the frontend
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
-import pandas as pd
+from fastapi.responses import FileResponse, JSONResponse, Response
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+import asyncio
 import sys
 import os
 
+from dataset_cache import DatasetRegistry, Snapshot, frame_records, DEFAULT_POLL_INTERVAL_S
+
 # Add parent directory to path to import src modules
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -33,6 +36,169 @@ app.add_middleware(
 # Base paths
 BASE_DIR = Path(__file__).parent.parent
 OUTPUTS_DIR = BASE_DIR / "outputs" / "policy_recommendations"
+# Pre-rendered map tiles (built with la-healthcare-build-tiles)
+TILES_DIR = BASE_DIR / "outputs" / "tiles"
+EMPTY_TILE = b'{"type":"FeatureCollection","features":[]}'
+
+# Seconds between checks for outputs rewritten by the analysis pipeline
+POLL_INTERVAL_S = float(os.getenv("OUTPUT_POLL_INTERVAL_S", DEFAULT_POLL_INTERVAL_S))
+
+
+def build_recommendations(df):
+    # Rename columns for better frontend compatibility
+    if 'Implementation_Timeframe' in df.columns:
+        df = df.rename(columns={'Implementation_Timeframe': 'Timeline'})
+    recommendations = frame_records(df)
+    return {"count": len(recommendations), "recommendations": recommendations}
+
+
+def build_facilities(df):
+    facilities = frame_records(df)
+    return {"count": len(facilities), "facilities": facilities}
+
+
+def abbreviate_dollars(val: float, million_decimals: int = 1) -> str:
+    """Format a dollar amount as $X.XB / $XM for dashboard cards"""
+    if val >= 1000000000:
+        return f"${val / 1000000000:.1f}B"
+    if val >= 1000000:
+        return f"${val / 1000000:.{million_decimals}f}M"
+    return f"${val:,.0f}"
+
+
+def summarize_cost_benefit_results(results: dict) -> dict:
+    """Summary fields from COST_BENEFIT_ANALYSIS.json, formatted like the text report"""
+    totals = results['totals']
+    return {
+        'total_investment': f"{totals['total_investment']:,.0f}",
+        'total_savings': f"{totals['total_savings']:,.0f}",
+        'net_benefit': f"{totals['net_benefit']:,.0f}",
+        'roi': f"{totals['roi_percentage']:.1f}%"
+    }
+
+
+def parse_cost_benefit_summary(content: str) -> dict:
+    """Parse key metrics from the summary section of a text report without a JSON companion"""
+    summary = {}
+    for line in content.split('\n'):
+        if '10-year total investment:' in line:
+            summary['total_investment'] = line.split('$')[1].strip()
+        elif '10-year total savings:' in line:
+            summary['total_savings'] = line.split('$')[1].strip()
+        elif '10-year net benefit:' in line:
+            summary['net_benefit'] = line.split('$')[1].strip()
+        elif '10-year ROI:' in line:
+            summary['roi'] = line.split(':')[1].strip()
+    return summary
+
+
+def build_cost_benefit(content, results):
+    """/api/cost-benefit payload: summary from the JSON results when present, else the text"""
+    if results is not None:
+        summary = summarize_cost_benefit_results(results)
+    elif content is not None:
+        summary = parse_cost_benefit_summary(content)
+    else:
+        return None
+    return {"summary": summary, "full_text": content, "results": results}
+
+
+def build_stats(rec_df, fac_df, results, cost_benefit_text):
+    """Key dashboard statistics from the cached outputs (None for missing ones)"""
+    if rec_df is not None:
+        total_affected = rec_df['Affected_Population'].sum() if 'Affected_Population' in rec_df.columns else 0
+        num_recommendations = len(rec_df)
+    else:
+        total_affected = 0
+        num_recommendations = 0
+
+    if fac_df is not None:
+        num_facilities = len(fac_df)
+        total_served = fac_df['estimated_impact'].sum() if 'estimated_impact' in fac_df.columns else 0
+    else:
+        num_facilities = 0
+        total_served = 0
+
+    roi = "540%"  # Default
+    net_benefit = "$3.5B"  # Default
+    total_investment = "$645M"  # Default
+
+    if results is not None:
+        totals = results['totals']
+        roi = f"{totals['roi_percentage']:.1f}%"
+        net_benefit = abbreviate_dollars(totals['net_benefit'], million_decimals=0)
+        total_investment = abbreviate_dollars(totals['total_investment'])
+    elif cost_benefit_text is not None:
+        # Older outputs only have the text report
+        for line in cost_benefit_text.split('\n'):
+            if '10-year ROI:' in line:
+                roi = line.split(':')[-1].strip()
+            elif '10-year net benefit:' in line and '$' in line:
+                val = float(line.split('$')[1].strip().split()[0].replace(',', ''))
+                net_benefit = abbreviate_dollars(val, million_decimals=0)
+            elif '10-year total investment:' in line and '$' in line:
+                val = float(line.split('$')[1].strip().split()[0].replace(',', ''))
+                total_investment = abbreviate_dollars(val)
+
+    return {
+        "population_affected": int(total_affected),
+        "population_served_by_facilities": int(total_served),
+        "num_recommendations": num_recommendations,
+        "num_facilities": num_facilities,
+        "roi": roi,
+        "net_benefit": net_benefit,
+        "total_investment": total_investment
+    }
+
+
+def text_content(content: str) -> dict:
+    return {"content": content}
+
+
+# Outputs are parsed once and served from memory; the watcher reloads them when rewritten
+registry = DatasetRegistry(OUTPUTS_DIR)
+registry.register_table("recommendations", "recommendations.csv", build_recommendations)
+registry.register_table("facilities", "recommended_facility_locations.csv", build_facilities)
+registry.register_text("executive", "EXECUTIVE_SUMMARY.txt", text_content)
+registry.register_text("community", "COMMUNITY_SUMMARY.txt", text_content)
+registry.register_text("cost_benefit_full", "COST_BENEFIT_ANALYSIS.txt", text_content)
+registry.register_json("cost_benefit_results", "COST_BENEFIT_ANALYSIS.json", lambda results: results)
+registry.register_derived("cost_benefit", ["cost_benefit_full", "cost_benefit_results"], build_cost_benefit)
+registry.register_derived("stats", ["recommendations", "facilities", "cost_benefit_results", "cost_benefit_full"],
+                          build_stats)
+registry.register_json("tiles", str(TILES_DIR / "manifest.json"), lambda manifest: manifest)
+
+
+def not_modified(request: Request, snapshot: Snapshot) -> bool:
+    """Whether the client's conditional headers match the cached snapshot"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or snapshot.etag in tags or f"W/{snapshot.etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(snapshot.last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cached_response(request: Request, name: str, missing_detail: str) -> Response:
+    """Serve a cached output's pre-serialised body, or 304 if the client copy is current"""
+    snapshot = registry.get(name)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=missing_detail)
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": snapshot.last_modified,
+        "Cache-Control": "no-cache"
+    }
+    if not_modified(request, snapshot):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 # Serve static outputs
 try:
@@ -54,7 +220,8 @@ async def root():
             "cost_benefit": "/api/cost-benefit",
             "maps": {
                 "facility_locations": "/api/maps/facility-locations",
-                "access_desert": "/api/maps/access-desert"
+                "access_desert": "/api/maps/access-desert",
+                "tiles": "/api/tiles/{layer}/{z}/{x}/{y}.geojson"
             },
             "reports": {
                 "executive": "/api/reports/executive",
@@ -78,6 +245,18 @@ async def startup_event():
         print(f"Files in outputs: {list(OUTPUTS_DIR.iterdir())}")
     print("=" * 60)
 
+    loaded = await asyncio.to_thread(registry.refresh)
+    print(f"Cached outputs: {loaded}")
+    app.state.output_watcher = asyncio.create_task(registry.watch(POLL_INTERVAL_S))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the output watcher"""
+    watcher = getattr(app.state, "output_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+
 
 @app.get("/health")
 async def health_check():
@@ -91,79 +270,21 @@ async def health_check():
 
 
 @app.get("/api/recommendations")
-async def get_recommendations():
+async def get_recommendations(request: Request):
     """Get all policy recommendations as JSON"""
-    try:
-        csv_path = OUTPUTS_DIR / "recommendations.csv"
-        if not csv_path.exists():
-            raise HTTPException(status_code=404, detail="Recommendations file not found")
-
-        df = pd.read_csv(csv_path)
-
-        # Rename columns for better frontend compatibility
-        if 'Implementation_Timeframe' in df.columns:
-            df = df.rename(columns={'Implementation_Timeframe': 'Timeline'})
-
-        recommendations = df.to_dict(orient="records")
-
-        return JSONResponse(content={
-            "count": len(recommendations),
-            "recommendations": recommendations
-        })
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading recommendations: {str(e)}")
+    return cached_response(request, "recommendations", "Recommendations file not found")
 
 
 @app.get("/api/facilities")
-async def get_facilities():
+async def get_facilities(request: Request):
     """Get recommended facility locations with coordinates"""
-    try:
-        csv_path = OUTPUTS_DIR / "recommended_facility_locations.csv"
-        if not csv_path.exists():
-            raise HTTPException(status_code=404, detail="Facility locations file not found")
-
-        df = pd.read_csv(csv_path)
-        facilities = df.to_dict(orient="records")
-
-        return JSONResponse(content={
-            "count": len(facilities),
-            "facilities": facilities
-        })
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading facilities: {str(e)}")
+    return cached_response(request, "facilities", "Facility locations file not found")
 
 
 @app.get("/api/cost-benefit")
-async def get_cost_benefit_summary():
+async def get_cost_benefit_summary(request: Request):
     """Get cost-benefit analysis summary"""
-    try:
-        txt_path = OUTPUTS_DIR / "COST_BENEFIT_ANALYSIS.txt"
-        if not txt_path.exists():
-            raise HTTPException(status_code=404, detail="Cost-benefit analysis file not found")
-
-        with open(txt_path, 'r') as f:
-            content = f.read()
-
-        # Parse key metrics from the summary section
-        lines = content.split('\n')
-        summary = {}
-
-        for line in lines:
-            if '10-year total investment:' in line:
-                summary['total_investment'] = line.split('$')[1].strip()
-            elif '10-year total savings:' in line:
-                summary['total_savings'] = line.split('$')[1].strip()
-            elif '10-year net benefit:' in line:
-                summary['net_benefit'] = line.split('$')[1].strip()
-            elif '10-year ROI:' in line:
-                summary['roi'] = line.split(':')[1].strip()
-
-        return JSONResponse(content={
-            "summary": summary,
-            "full_text": content
-        })
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading cost-benefit analysis: {str(e)}")
+    return cached_response(request, "cost_benefit", "Cost-benefit analysis file not found")
 
 
 @app.get("/api/maps/facility-locations")
@@ -198,52 +319,55 @@ async def get_access_desert_map():
         raise HTTPException(status_code=500, detail=f"Error serving map: {str(e)}")
 
 
-@app.get("/api/reports/executive")
-async def get_executive_summary():
-    """Get executive summary text"""
-    try:
-        txt_path = OUTPUTS_DIR / "EXECUTIVE_SUMMARY.txt"
-        if not txt_path.exists():
-            raise HTTPException(status_code=404, detail="Executive summary not found")
+@app.get("/api/tiles")
+async def get_tile_manifest(request: Request):
+    """Get the tile layers with their zoom range, bounds and feature properties"""
+    return cached_response(request, "tiles", "Tile pyramid not built")
 
-        with open(txt_path, 'r') as f:
-            content = f.read()
 
-        return JSONResponse(content={"content": content})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading executive summary: {str(e)}")
+@app.get("/api/tiles/{layer}/{z}/{x}/{y}.geojson")
+async def get_tile(request: Request, layer: str, z: int, x: int, y: int):
+    """Get one GeoJSON tile of a map layer"""
+    snapshot = registry.get("tiles")
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Tile pyramid not built")
+    meta = snapshot.data["layers"].get(layer)
+    if meta is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tile layer: {layer}")
+    if not meta["min_zoom"] <= z <= meta["max_zoom"]:
+        raise HTTPException(status_code=404, detail=f"Zoom {z} outside {meta['min_zoom']}-{meta['max_zoom']}")
 
+    # Tiles only change when the layer is rebuilt, which changes its digest
+    etag = f'"{meta["digest"][:16]}-{z}-{x}-{y}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
 
-@app.get("/api/reports/community")
-async def get_community_summary():
-    """Get community summary text"""
+    tile_path = TILES_DIR / layer / str(z) / str(x) / f"{y}.geojson"
     try:
-        txt_path = OUTPUTS_DIR / "COMMUNITY_SUMMARY.txt"
-        if not txt_path.exists():
-            raise HTTPException(status_code=404, detail="Community summary not found")
+        body = await asyncio.to_thread(tile_path.read_bytes)
+    except FileNotFoundError:
+        # Tiles without features are not written
+        body = EMPTY_TILE
+    return Response(content=body, media_type="application/geo+json", headers=headers)
 
-        with open(txt_path, 'r') as f:
-            content = f.read()
 
-        return JSONResponse(content={"content": content})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading community summary: {str(e)}")
+@app.get("/api/reports/executive")
+async def get_executive_summary(request: Request):
+    """Get executive summary text"""
+    return cached_response(request, "executive", "Executive summary not found")
 
 
-@app.get("/api/reports/cost-benefit")
-async def get_cost_benefit_full():
-    """Get full cost-benefit analysis text"""
-    try:
-        txt_path = OUTPUTS_DIR / "COST_BENEFIT_ANALYSIS.txt"
-        if not txt_path.exists():
-            raise HTTPException(status_code=404, detail="Cost-benefit analysis not found")
+@app.get("/api/reports/community")
+async def get_community_summary(request: Request):
+    """Get community summary text"""
+    return cached_response(request, "community", "Community summary not found")
 
-        with open(txt_path, 'r') as f:
-            content = f.read()
 
-        return JSONResponse(content={"content": content})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading cost-benefit analysis: {str(e)}")
+@app.get("/api/reports/cost-benefit")
+async def get_cost_benefit_full(request: Request):
+    """Get full cost-benefit analysis text"""
+    return cached_response(request, "cost_benefit_full", "Cost-benefit analysis not found")
 
 
 @app.post("/api/run-analysis")
@@ -263,71 +387,12 @@ async def trigger_analysis(background_tasks: BackgroundTasks):
 
 
 @app.get("/api/stats")
-async def get_statistics():
+async def get_statistics(request: Request):
     """Get key statistics for dashboard"""
-    try:
-        # Read recommendations
-        rec_path = OUTPUTS_DIR / "recommendations.csv"
-        if rec_path.exists():
-            rec_df = pd.read_csv(rec_path)
-            total_affected = rec_df['Affected_Population'].sum() if 'Affected_Population' in rec_df.columns else 0
-            num_recommendations = len(rec_df)
-        else:
-            total_affected = 0
-            num_recommendations = 0
-
-        # Read facilities
-        fac_path = OUTPUTS_DIR / "recommended_facility_locations.csv"
-        if fac_path.exists():
-            fac_df = pd.read_csv(fac_path)
-            num_facilities = len(fac_df)
-            total_served = fac_df['estimated_impact'].sum() if 'estimated_impact' in fac_df.columns else 0
-        else:
-            num_facilities = 0
-            total_served = 0
-
-        # Read cost-benefit for ROI
-        cb_path = OUTPUTS_DIR / "COST_BENEFIT_ANALYSIS.txt"
-        roi = "540%"  # Default
-        net_benefit = "$3.5B"  # Default
-        total_investment = "$645M"  # Default
-
-        if cb_path.exists():
-            with open(cb_path, 'r') as f:
-                content = f.read()
-                for line in content.split('\n'):
-                    if '10-year ROI:' in line or '• 10-year ROI:' in line:
-                        roi = line.split(':')[-1].strip()
-                    elif '10-year net benefit:' in line or '• 10-year net benefit:' in line:
-                        if '$' in line:
-                            net_benefit = '$' + line.split('$')[1].strip().split()[0].replace(',', '')
-                            # Convert to billions if over 1B
-                            val = float(net_benefit.replace('$', '').replace(',', ''))
-                            if val >= 1000000000:
-                                net_benefit = f"${val / 1000000000:.1f}B"
-                            elif val >= 1000000:
-                                net_benefit = f"${val / 1000000:.0f}M"
-                    elif '10-year total investment:' in line or '• 10-year total investment:' in line:
-                        if '$' in line:
-                            total_investment = '$' + line.split('$')[1].strip().split()[0].replace(',', '')
-                            # Convert to millions/billions with 1 decimal precision
-                            val = float(total_investment.replace('$', '').replace(',', ''))
-                            if val >= 1000000000:
-                                total_investment = f"${val / 1000000000:.1f}B"
-                            elif val >= 1000000:
-                                total_investment = f"${val / 1000000:.1f}M"
-
-        return JSONResponse(content={
-            "population_affected": int(total_affected),
-            "population_served_by_facilities": int(total_served),
-            "num_recommendations": num_recommendations,
-            "num_facilities": num_facilities,
-            "roi": roi,
-            "net_benefit": net_benefit,
-            "total_investment": total_investment
-        })
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error calculating statistics: {str(e)}")
+    snapshot = registry.get("stats")
+    if snapshot is None:
+        return JSONResponse(content=build_stats(None, None, None, None))
+    return cached_response(request, "stats", "Statistics not available")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+"""
+Benchmark block-level demand distances against a per-tract Python loop.
+
+Generates synthetic census blocks clustered inside LA County-sized tracts
+and times the vectorised path (one KD-tree query over every block, then
+sorted group aggregation to weighted tract percentiles) against looping
+over tracts and calling np.percentile-style weighted helpers per tract.
+
+Run with:
+    PYTHONPATH=src python benchmarks/benchmark_demand_points.py
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis.demand_points import DemandPoints
+from analysis.spatial_index import SpatialIndex
+
+# Approximate LA County bounding box (matches FacilityDataCleaner.validate_coordinates)
+LAT_RANGE = (33.7, 34.8)
+LON_RANGE = (-118.7, -117.6)
+
+
+def make_blocks(n_blocks: int, n_tracts: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Blocks scattered around random tract centres with skewed populations."""
+    centre_lat = rng.uniform(*LAT_RANGE, n_tracts)
+    centre_lon = rng.uniform(*LON_RANGE, n_tracts)
+    tract = rng.integers(0, n_tracts, n_blocks)
+    return pd.DataFrame({
+        'tract_geoid': [f'06037{code:06d}' for code in tract],
+        'population': rng.lognormal(3.0, 1.0, n_blocks).round() + 1,
+        'lat': centre_lat[tract] + rng.normal(0, 0.01, n_blocks),
+        'lon': centre_lon[tract] + rng.normal(0, 0.01, n_blocks),
+    })
+
+
+def loop_percentiles(demand: DemandPoints, distances_km: np.ndarray, geoids: pd.Series) -> pd.DataFrame:
+    """Per-tract groupby loop computing the same weighted statistics."""
+    rows = []
+    frame = demand.blocks.assign(distance=distances_km)
+    groups = dict(tuple(frame.groupby('tract_geoid')))
+    for geoid in geoids:
+        group = groups.get(geoid)
+        if group is None:
+            rows.append((np.nan, np.nan, np.nan))
+            continue
+        group = group.sort_values('distance')
+        cdf = group['population'].cumsum().to_numpy() / group['population'].sum()
+        values = group['distance'].to_numpy()
+        rows.append((np.average(values, weights=group['population']),
+                     values[np.searchsorted(cdf, 0.5)], values[np.searchsorted(cdf, 0.9)]))
+    return pd.DataFrame(rows, columns=['demand_mean_km', 'demand_p50_km', 'demand_p90_km'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+    parser.add_argument('--tracts', type=int, default=2500)
+    parser.add_argument('--facilities', type=int, default=4000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    facilities = SpatialIndex(rng.uniform(*LAT_RANGE, args.facilities), rng.uniform(*LON_RANGE, args.facilities))
+    geoids = pd.Series([f'06037{code:06d}' for code in range(args.tracts)])
+
+    print(f"{'blocks':>10} {'query (s)':>10} {'aggregate (s)':>14} {'loop (s)':>10} {'speedup':>8}")
+    for n in args.sizes:
+        demand = DemandPoints(make_blocks(n, args.tracts, rng))
+
+        start = time.perf_counter()
+        distances_km = demand.nearest_distances(facilities)
+        query_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorised = demand.aggregate(distances_km, geoids)
+        aggregate_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        looped = loop_percentiles(demand, distances_km, geoids)
+        loop_s = time.perf_counter() - start
+
+        for column in looped.columns:
+            assert np.allclose(vectorised[column], looped[column], equal_nan=True)
+        print(f"{n:>10,} {query_s:>10.3f} {aggregate_s:>14.3f} {loop_s:>10.2f} {loop_s / aggregate_s:>7.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
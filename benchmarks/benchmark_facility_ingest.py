@@ -0,0 +1,83 @@
+"""
+Benchmark peak memory of streaming vs whole-file facility ingestion.
+
+Writes a synthetic statewide facility CSV (CHHS-like columns, ~1/4 of
+rows in LA County) and measures, with tracemalloc, the peak Python heap of:
+
+- the previous path: read the whole body into a string, parse it with
+  StringIO, write the statewide file out, then filter to LA County
+- FacilityDataCollector.stream_la_county_facilities over the same file,
+  keeping FACILITY_COLUMNS as the command line ingest does
+
+Run with:
+    PYTHONPATH=src python benchmarks/benchmark_facility_ingest.py
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_collection.fetch_facilities import DEFAULT_CHUNK_ROWS, FACILITY_COLUMNS, FacilityDataCollector
+
+
+def write_statewide(path: Path, n_rows: int, rng: np.random.Generator) -> Path:
+    counties = np.array(['Los Angeles', 'San Diego', 'Orange', 'Fresno'])
+    pd.DataFrame({
+        'FACILITY_NAME': [f'Facility {i}' for i in range(n_rows)],
+        'LICENSE_TYPE_DESC': rng.choice(['General Acute Care Hospital', 'Clinic', 'Home Health Agency'], n_rows),
+        'DBA_ADDRESS1': [f'{i} Main Street' for i in range(n_rows)],
+        'COUNTY_CODE': rng.integers(1, 59, n_rows),
+        'COUNTY_NAME': counties[rng.integers(0, 4, n_rows)],
+        'LATITUDE': rng.uniform(32.5, 42.0, n_rows),
+        'LONGITUDE': rng.uniform(-124.4, -114.1, n_rows),
+    }).to_csv(path, index=False)
+    return path
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 400_000])
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'rows':>9} {'file (MB)':>10} {'method':<12} {'seconds':>8} {'peak (MB)':>10} {'LA rows':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        collector = FacilityDataCollector(output_dir=tmp / 'raw')
+        for n_rows in args.rows:
+            source = write_statewide(tmp / 'statewide.csv', n_rows, rng)
+            size_mb = source.stat().st_size / 1024 / 1024
+
+            def whole_file():
+                df = pd.read_csv(StringIO(source.read_text()))
+                df.to_csv(tmp / 'raw' / 'ca_health_facilities.csv', index=False)
+                return collector.filter_to_la_county(df)
+
+            for name, fn in [('whole file', whole_file),
+                             ('streaming', lambda: collector.stream_la_county_facilities(
+                                 source, columns=FACILITY_COLUMNS, chunksize=args.chunk_rows))]:
+                result, seconds, peak = measure(fn)
+                print(f"{n_rows:>9,} {size_mb:>10.1f} {name:<12} {seconds:>8.2f} {peak:>10.1f} {len(result):>9,}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
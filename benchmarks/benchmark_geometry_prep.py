@@ -0,0 +1,97 @@
+"""
+Benchmark choropleth payload size and render time per tract geometry level.
+
+For each prepared level (see data_processing.geometry_prep), builds the
+access-score choropleth the way HealthcareMapper.create_choropleth_map does
+and reports vertex count, HTML size and the time to render the map HTML.
+The HTML size is what the browser downloads and parses on load.
+
+Uses the TIGER tract file when it is present; otherwise a synthetic
+county-sized coverage of Voronoi tracts with TIGER-like vertex density
+(one vertex every 5 m along each border).
+
+Run with:
+    PYTHONPATH=src python benchmarks/benchmark_geometry_prep.py
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import folium
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from data_processing.geometry_prep import SIMPLIFY_LEVELS_M, TractGeometries
+from visualization.tiles import LA_COUNTY_BOUNDS
+
+
+def synthetic_tracts(n_tracts: int, path: Path, seed: int = 42) -> Path:
+    """Write a Voronoi coverage of the LA County box as a shapefile."""
+    rng = np.random.default_rng(seed)
+    west, south, east, north = LA_COUNTY_BOUNDS
+    points = shapely.MultiPoint(np.column_stack([rng.uniform(west, east, n_tracts),
+                                                 rng.uniform(south, north, n_tracts)]))
+    extent = shapely.box(west, south, east, north)
+    cells = shapely.intersection(shapely.get_parts(shapely.voronoi_polygons(points, extend_to=extent)), extent)
+
+    tracts = gpd.GeoDataFrame({
+        'GEOID': [f'06037{i:06d}' for i in range(len(cells))],
+        'COUNTYFP': '037'
+    }, geometry=cells, crs='EPSG:4326').to_crs(epsg=3310)
+    tracts['geometry'] = shapely.segmentize(tracts.geometry.values, 5.0)
+    tracts.to_crs(epsg=4269).to_file(path)
+    return path
+
+
+def render_choropleth(tracts: gpd.GeoDataFrame) -> str:
+    """Choropleth HTML as create_choropleth_map builds it."""
+    m = folium.Map(location=[34.0522, -118.2437], zoom_start=10, tiles=None)
+    folium.Choropleth(
+        geo_data=tracts,
+        data=tracts[['GEOID', 'access_score']],
+        columns=['GEOID', 'access_score'],
+        key_on='feature.properties.GEOID',
+        fill_color='RdYlGn'
+    ).add_to(m)
+    return m.get_root().render()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boundaries', type=Path, default=Path('data/external/tl_2023_06_tract.shp'))
+    parser.add_argument('--synthetic-tracts', type=int, default=2500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        boundaries = args.boundaries
+        if not boundaries.exists():
+            print(f"{boundaries} not found, using {args.synthetic_tracts} synthetic tracts")
+            boundaries = synthetic_tracts(args.synthetic_tracts, Path(tmp) / 'tracts.shp')
+
+        geometries = TractGeometries(boundaries, cache_dir=Path(tmp) / 'cache')
+        start = time.perf_counter()
+        geometries.prepare()
+        print(f"Prepared {len(SIMPLIFY_LEVELS_M)} levels in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        geometries.level('full')
+        print(f"Cached county load: {time.perf_counter() - start:.3f}s\n")
+
+        print(f"{'level':>8} {'tol (m)':>8} {'vertices':>11} {'HTML (MB)':>10} {'render (s)':>11}")
+        for level, tolerance in SIMPLIFY_LEVELS_M.items():
+            tracts = geometries.level(level)
+            tracts['access_score'] = np.linspace(0, 100, len(tracts))
+            vertices = shapely.get_num_coordinates(tracts.geometry.values).sum()
+
+            start = time.perf_counter()
+            html = render_choropleth(tracts)
+            elapsed = time.perf_counter() - start
+            print(f"{level:>8} {tolerance:>8g} {vertices:>11,} {len(html) / 1e6:>10.2f} {elapsed:>11.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark isochrone generation, cache hits and catchment population counts.
+
+Builds a synthetic street grid (one intersection every ~200 m, 40 km/h) and
+a Voronoi coverage of tracts over the same area, then times for a batch of
+sites:
+
+- cold isochrones (bounded Dijkstra + concave hull for 10/20/30 minutes)
+- warm isochrones served from the on-disk polygon cache
+- catchment population via one bulk STRtree query, against intersecting
+  every tract with every polygon
+
+Run with:
+    PYTHONPATH=src python benchmarks/benchmark_isochrones.py
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from analysis.areal_interpolation import ArealInterpolator
+from analysis.isochrones import DEFAULT_ISOCHRONE_MINUTES, IsochroneEngine, IsochroneStore
+from analysis.road_network import RoadNetwork
+from analysis.spatial_index import project_points
+
+
+def grid_network(size: int, spacing: float, speed_kph: float = 40.0) -> RoadNetwork:
+    """Two-way street grid centred on downtown LA."""
+    lat0, lon0 = 34.05 - spacing * size / 2, -118.25 - spacing * size / 2
+    rows, cols = np.divmod(np.arange(size * size), size)
+    lat, lon = lat0 + rows * spacing, lon0 + cols * spacing
+    right = np.flatnonzero(cols < size - 1)
+    up = np.flatnonzero(rows < size - 1)
+    u = np.concatenate([right, right + 1, up, up + size])
+    v = np.concatenate([right + 1, right, up + size, up])
+    xy = project_points(lat, lon)
+    length = np.linalg.norm(xy[u] - xy[v], axis=1)
+    return RoadNetwork(lat, lon, u, v, length, length / (speed_kph / 3.6))
+
+
+def voronoi_tracts(n_tracts: int, bounds, rng: np.random.Generator) -> gpd.GeoDataFrame:
+    west, south, east, north = bounds
+    points = shapely.MultiPoint(np.column_stack([rng.uniform(west, east, n_tracts),
+                                                 rng.uniform(south, north, n_tracts)]))
+    extent = shapely.box(*bounds)
+    cells = shapely.intersection(shapely.get_parts(shapely.voronoi_polygons(points, extend_to=extent)), extent)
+    return gpd.GeoDataFrame(geometry=cells, crs=4326)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grid', type=int, default=300, help='Intersections per side')
+    parser.add_argument('--sites', type=int, default=10)
+    parser.add_argument('--tracts', type=int, default=2500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    spacing = 0.002
+    network = grid_network(args.grid, spacing)
+    half = spacing * args.grid / 2
+    bounds = (-118.25 - half, 34.05 - half, -118.25 + half, 34.05 + half)
+    tracts = voronoi_tracts(args.tracts, bounds, rng)
+    population = ArealInterpolator(tracts, rng.integers(500, 8000, len(tracts)))
+    sites = np.column_stack([rng.uniform(34.05 - half / 2, 34.05 + half / 2, args.sites),
+                             rng.uniform(-118.25 - half / 2, -118.25 + half / 2, args.sites)])
+    minutes = DEFAULT_ISOCHRONE_MINUTES
+    print(f"{network.n_nodes:,} road nodes, {len(tracts):,} tracts, {args.sites} sites x {len(minutes)} thresholds\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = IsochroneEngine(network, IsochroneStore(Path(tmp)))
+
+        start = time.perf_counter()
+        polygons = [p for lat, lon in sites for p in engine.isochrones(lat, lon, minutes).values()]
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for lat, lon in sites:
+            engine.isochrones(lat, lon, minutes)
+        warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = population.population_within(polygons)
+    bulk_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tracts_3310 = tracts.to_crs(epsg=3310)
+    polygons_3310 = gpd.GeoSeries(polygons, crs=4326).to_crs(epsg=3310)
+    naive = np.array([(shapely.area(shapely.intersection(tracts_3310.geometry.values, polygon))
+                       / tracts_3310.area.to_numpy() * population.population).sum()
+                      for polygon in polygons_3310])
+    naive_s = time.perf_counter() - start
+    assert np.allclose(bulk, naive)
+
+    print(f"{'step':<34} {'total (s)':>10} {'per site (ms)':>14}")
+    for name, seconds in [('isochrones, cold', cold), ('isochrones, cached', warm),
+                          ('population, STRtree bulk query', bulk_s), ('population, all tracts', naive_s)]:
+        print(f"{name:<34} {seconds:>10.3f} {seconds / args.sites * 1000:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
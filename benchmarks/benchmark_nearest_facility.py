@@ -0,0 +1,92 @@
+"""
+Benchmark batch nearest-facility queries against the legacy per-row path.
+
+Generates synthetic tract centroids and facilities inside the LA County
+bounding box and times both approaches at several problem sizes.
+
+Run with:
+    PYTHONPATH=src python benchmarks/benchmark_nearest_facility.py
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from analysis.calculate_access_metrics import AccessMetricsCalculator
+
+# Approximate LA County bounding box (matches FacilityDataCleaner.validate_coordinates)
+LAT_RANGE = (33.7, 34.8)
+LON_RANGE = (-118.7, -117.6)
+
+
+def make_points(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Uniform random points inside the LA County bounding box."""
+    return pd.DataFrame({
+        'lat': rng.uniform(*LAT_RANGE, n),
+        'lon': rng.uniform(*LON_RANGE, n),
+    })
+
+
+def legacy_nearest_distance(facilities: pd.DataFrame, tracts: pd.DataFrame) -> pd.Series:
+    """Per-row iterrows() + cKDTree.query path the calculator used originally."""
+    tree = cKDTree(facilities[['lat', 'lon']].values)
+    distances = []
+    for _, tract in tracts.iterrows():
+        if pd.notna(tract['centroid_lat']) and pd.notna(tract['centroid_lon']):
+            dist, _ = tree.query([tract['centroid_lat'], tract['centroid_lon']])
+            distances.append(dist * 111.0)
+        else:
+            distances.append(np.nan)
+    return pd.Series(distances, index=tracts.index)
+
+
+def run(sizes, n_facilities: int, legacy_max: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    facilities = make_points(n_facilities, rng)
+    facilities['category'] = 'clinic'
+
+    output_dir = tempfile.mkdtemp()
+
+    print(f"{'tracts':>10} {'legacy (s)':>12} {'batch (s)':>12} {'speedup':>10}")
+    for n in sizes:
+        points = make_points(n, rng)
+        tracts = pd.DataFrame({'centroid_lat': points['lat'], 'centroid_lon': points['lon']})
+
+        calculator = AccessMetricsCalculator('facilities.csv', 'census.csv', output_dir=output_dir)
+        calculator.facilities = facilities
+        calculator.census_tracts = tracts
+
+        start = time.perf_counter()
+        calculator.calculate_nearest_facilities(k=3)
+        batch_time = time.perf_counter() - start
+
+        if n <= legacy_max:
+            start = time.perf_counter()
+            legacy_nearest_distance(facilities, tracts)
+            legacy_time = time.perf_counter() - start
+            print(f"{n:>10,} {legacy_time:>12.3f} {batch_time:>12.3f} {legacy_time / batch_time:>9.0f}x")
+        else:
+            print(f"{n:>10,} {'skipped':>12} {batch_time:>12.3f} {'-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2_500, 50_000, 500_000],
+                        help='Numbers of synthetic tract points to query')
+    parser.add_argument('--facilities', type=int, default=4_500,
+                        help='Number of synthetic facilities')
+    parser.add_argument('--legacy-max', type=int, default=500_000,
+                        help='Skip the slow per-row path above this many points')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    run(args.sizes, args.facilities, args.legacy_max, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,47 @@
+"""
+Benchmark Monte Carlo cost-benefit sensitivity analysis.
+
+Times MonteCarloSensitivity.run for increasing scenario counts with the
+default parameter distributions and LA-scale program populations.
+
+Run with:
+    PYTHONPATH=src python benchmarks/benchmark_sensitivity.py
+"""
+
+import argparse
+import time
+
+from impact.sensitivity import MonteCarloSensitivity
+
+# Roughly the populations in outputs/policy_recommendations/recommendations.csv
+POPULATIONS = {
+    'New Healthcare Facilities': 32_000,
+    'Mobile Clinics': 850_000,
+    'Transportation': 1_000_000,
+    'Telehealth': 500_000,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-scenarios', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=250_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    simulation = MonteCarloSensitivity(seed=args.seed)
+
+    print(f"{'scenarios':>10} {'time (s)':>10} {'ROI p5':>9} {'ROI p50':>9} {'ROI p95':>9}")
+    n = 10_000
+    while n <= args.max_scenarios:
+        start = time.perf_counter()
+        result = simulation.run(POPULATIONS, n_facilities=10, n_scenarios=n, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        roi = result.bands.loc[('Portfolio', 'roi_percentage')]
+        print(f"{n:>10,} {elapsed:>10.3f} {roi['p5']:>8.0f}% {roi['p50']:>8.0f}% {roi['p95']:>8.0f}%")
+        n *= 10
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
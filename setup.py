@@ -41,6 +41,7 @@ setup(
     },
     packages=find_packages(where='src'),
     package_dir={'': 'src'},
+    package_data={'data_processing': ['facility_categories.json']},
     python_requires='>=3.8',
     install_requires=requirements,
     extras_require={
@@ -64,6 +65,7 @@ setup(
             'la-healthcare-merge-census=data_processing.fix_census_merge:main',
             'la-healthcare-policy-recommendations=impact.policy_recommendations:main',
             'la-healthcare-generate-impact-package=impact.generate_all_outputs:main',
+            'la-healthcare-build-tiles=visualization.tiles:main',
         ],
     },
     classifiers=[
@@ -1,5 +1,11 @@
 """Analysis module for calculating healthcare access metrics."""
 
+from .areal_interpolation import ArealInterpolator
 from .calculate_access_metrics import AccessMetricsCalculator
+from .demand_points import DemandPoints
+from .incremental import IncrementalAccessModel
+from .isochrones import IsochroneEngine
+from .road_network import RoadNetwork
+from .spatial_index import SpatialIndex
 
-__all__ = ['AccessMetricsCalculator']
+__all__ = ['AccessMetricsCalculator', 'ArealInterpolator', 'DemandPoints', 'IncrementalAccessModel', 'IsochroneEngine', 'RoadNetwork', 'SpatialIndex']
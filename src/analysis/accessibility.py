@@ -0,0 +1,111 @@
+"""
+Enhanced two-step floating catchment area (E2SFCA) accessibility.
+
+Unlike nearest-distance metrics, E2SFCA accounts for facility capacity and
+for competition between tracts that share the same facilities:
+
+1. Each facility's supply-to-demand ratio is its capacity divided by the
+   distance-weighted population of all tracts inside its catchment.
+2. Each tract's accessibility is the distance-weighted sum of the ratios
+   of all facilities inside its catchment.
+
+Tract-facility pairs are kept in a sparse matrix limited to the catchment
+radius, so no dense tracts x facilities array is ever allocated.
+"""
+
+import numpy as np
+import logging
+from scipy.sparse import csr_matrix
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Catchment radius (km) beyond which a facility is not considered reachable
+DEFAULT_CATCHMENT_KM = 15.0
+
+# Stepwise zone weights from Luo & Qi (2009): three equal-width distance
+# bands with Gaussian-derived weights
+STEPWISE_WEIGHTS = (1.0, 0.68, 0.22)
+
+# Exponent for the gravity (inverse power) kernel
+GRAVITY_BETA = 1.5
+
+
+def _uniform(ratio: np.ndarray) -> np.ndarray:
+    """Original 2SFCA: every facility inside the catchment counts fully."""
+    return np.ones_like(ratio)
+
+
+def _stepwise(ratio: np.ndarray) -> np.ndarray:
+    """Luo & Qi E2SFCA: constant weight per distance band."""
+    zone = np.minimum((ratio * len(STEPWISE_WEIGHTS)).astype(np.int64), len(STEPWISE_WEIGHTS) - 1)
+    return np.asarray(STEPWISE_WEIGHTS)[zone]
+
+
+def _gaussian(ratio: np.ndarray) -> np.ndarray:
+    """Dai (2010) Gaussian decay, rescaled to 1 at distance 0 and 0 at the catchment edge."""
+    edge = np.exp(-0.5)
+    return (np.exp(-0.5 * ratio ** 2) - edge) / (1.0 - edge)
+
+
+def _gravity(ratio: np.ndarray) -> np.ndarray:
+    """Inverse power decay, capped at 1 inside the first tenth of the catchment."""
+    return np.minimum(1.0, (np.maximum(ratio, 0.1) / 0.1) ** -GRAVITY_BETA)
+
+
+DECAY_KERNELS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'uniform': _uniform,
+    'stepwise': _stepwise,
+    'gaussian': _gaussian,
+    'gravity': _gravity,
+}
+
+
+def decay_weights(distance_m: np.ndarray, catchment_m: float, kernel: str = 'gaussian') -> np.ndarray:
+    """
+    Compute distance-decay weights for tract-facility pairs.
+
+    Args:
+        distance_m: Pair distances in metres (all within the catchment)
+        catchment_m: Catchment radius in metres
+        kernel: One of DECAY_KERNELS ('uniform', 'stepwise', 'gaussian', 'gravity')
+
+    Returns:
+        Weights in [0, 1], one per pair
+    """
+    if kernel not in DECAY_KERNELS:
+        raise ValueError(f"Unknown decay kernel '{kernel}', expected one of {sorted(DECAY_KERNELS)}")
+    ratio = np.clip(np.asarray(distance_m, dtype=float) / catchment_m, 0.0, 1.0)
+    return DECAY_KERNELS[kernel](ratio)
+
+
+def e2sfca(tract_rows: np.ndarray, facility_cols: np.ndarray, weights: np.ndarray,
+           population: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """
+    Run both E2SFCA steps over a sparse set of weighted tract-facility pairs.
+
+    Args:
+        tract_rows: Tract position of each pair
+        facility_cols: Facility position of each pair
+        weights: Distance-decay weight of each pair
+        population: Population per tract (length n_tracts)
+        capacity: Capacity per facility (length n_facilities)
+
+    Returns:
+        Accessibility per tract, in capacity units per resident
+    """
+    population = np.nan_to_num(np.asarray(population, dtype=float))
+    capacity = np.nan_to_num(np.asarray(capacity, dtype=float))
+
+    W = csr_matrix((weights, (tract_rows, facility_cols)), shape=(len(population), len(capacity)))
+
+    # Step 1: supply-to-demand ratio per facility
+    demand = W.T @ population
+    ratio = np.divide(capacity, demand, out=np.zeros_like(capacity), where=demand > 0)
+
+    # Step 2: sum the reachable ratios per tract
+    accessibility = W @ ratio
+
+    logger.info(f"E2SFCA over {W.nnz:,} tract-facility pairs "
+                f"({len(population):,} tracts x {len(capacity):,} facilities)")
+    return accessibility
@@ -0,0 +1,179 @@
+"""
+Areal interpolation of tract populations into arbitrary polygons.
+
+Service-area estimates used to multiply the host tract's density by the
+area of a circle, which ignores that the circle may reach into empty
+hills, the ocean or a much denser neighbour. Areal weighting instead
+intersects the polygon with every tract it overlaps and counts each
+tract's population by the share of its area inside, assuming residents
+are spread evenly within a tract.
+
+The work is vectorised over many polygons at once:
+
+1. One bulk STRtree query finds the overlapping (polygon, tract) pairs.
+2. A second bulk query finds tracts lying entirely inside a polygon;
+   their share is 1 without computing an intersection.
+3. Only the remaining boundary pairs go through one bulk shapely
+   intersection and area call.
+
+Shares come back as a sparse polygon x tract matrix, so the same result
+serves population counts (a matrix-vector product) and optimizer inner
+loops that need per-tract shares.
+"""
+
+import logging
+from typing import Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.sparse import csr_matrix
+
+from analysis.spatial_index import CA_ALBERS_EPSG, project_points
+from data_processing.columnar_store import normalize_geoid
+
+logger = logging.getLogger(__name__)
+
+# Polygons intersected per batch, bounding the memory held by pair arrays
+DEFAULT_CHUNK_SIZE = 1000
+
+# Segments per quarter circle for radius buffers (0.1% area error)
+BUFFER_QUAD_SEGS = 16
+
+
+class ArealInterpolator:
+    """Tract polygons and populations, projected and indexed once for areal weighting."""
+
+    def __init__(self, tracts: gpd.GeoDataFrame, population: np.ndarray,
+                 geoids: Optional[Sequence[str]] = None):
+        """
+        Args:
+            tracts: Tract polygons (any CRS)
+            population: Residents per tract, aligned with tracts
+            geoids: Tract GEOIDs, aligned with tracts (needed for columns=)
+        """
+        self.geoids = pd.Index(normalize_geoid(pd.Series(list(geoids)))) if geoids is not None else None
+        self.geometries = tracts.geometry.to_crs(epsg=CA_ALBERS_EPSG).values
+        self.population = np.nan_to_num(np.asarray(population, dtype=float))
+        self.areas = shapely.area(self.geometries)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_census(cls, boundaries: gpd.GeoDataFrame, census: pd.DataFrame,
+                    population_col: str = 'total_population') -> 'ArealInterpolator':
+        """
+        Join census populations onto tract polygons by GEOID.
+
+        Args:
+            boundaries: Tract polygons with a GEOID column
+            census: Census table with GEOID and population_col
+            population_col: Name of population column
+
+        Returns:
+            ArealInterpolator over the tracts found in both tables
+        """
+        population = census.assign(GEOID=normalize_geoid(census['GEOID'])).groupby('GEOID')[population_col].sum()
+        geoids = normalize_geoid(boundaries['GEOID'])
+        matched = geoids.isin(population.index).to_numpy()
+        return cls(boundaries[matched], population.loc[geoids[matched]].to_numpy(), geoids[matched])
+
+    def __len__(self) -> int:
+        return len(self.geometries)
+
+    def shares(self, polygons: Sequence[shapely.Geometry], crs=4326,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, columns: Optional[Sequence[str]] = None) -> csr_matrix:
+        """
+        Share of each tract's area inside each polygon.
+
+        Args:
+            polygons: Polygons to interpolate into
+            crs: CRS of the polygons
+            chunk_size: Polygons intersected per batch
+            columns: Tract GEOIDs to return columns for, in this order
+                (default: every tract in interpolator order)
+
+        Returns:
+            Sparse matrix of shape (n_polygons, n_tracts) with values in (0, 1]
+        """
+        projected = gpd.GeoSeries(list(polygons), crs=crs).to_crs(epsg=CA_ALBERS_EPSG).values
+        return self._select_columns(self._projected_shares(projected, chunk_size), columns)
+
+    def _select_columns(self, shares: csr_matrix, columns: Optional[Sequence[str]]) -> csr_matrix:
+        """Reorder share columns to the given GEOIDs; tracts not in the interpolator get empty columns."""
+        if columns is None:
+            return shares
+        if self.geoids is None:
+            raise ValueError("columns= needs an interpolator built with tract GEOIDs")
+        positions = self.geoids.get_indexer(normalize_geoid(pd.Series(list(columns))))
+        found = np.flatnonzero(positions >= 0)
+        selector = csr_matrix((np.ones(len(found)), (positions[found], found)), shape=(len(self), len(positions)))
+        return (shares @ selector).tocsr()
+
+    def _projected_shares(self, polygons: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> csr_matrix:
+        """shares() for polygons already in California Albers."""
+        rows, cols, values = [], [], []
+        for start in range(0, len(polygons), chunk_size):
+            chunk = polygons[start:start + chunk_size]
+            poly_idx, tract_idx = self.tree.query(chunk, predicate='intersects')
+
+            # Tracts entirely inside the polygon count fully, without an intersection
+            inner_poly, inner_tract = self.tree.query(chunk, predicate='contains_properly')
+            inner = np.isin(poly_idx * len(self) + tract_idx, inner_poly * len(self) + inner_tract)
+
+            share = np.ones(len(poly_idx))
+            edge = ~inner & (self.areas[tract_idx] > 0)
+            overlap = shapely.area(shapely.intersection(self.geometries[tract_idx[edge]], chunk[poly_idx[edge]]))
+            share[edge] = np.clip(overlap / self.areas[tract_idx[edge]], 0.0, 1.0)
+            share[~inner & ~edge] = 0.0
+
+            keep = share > 0
+            rows.append(poly_idx[keep] + start)
+            cols.append(tract_idx[keep])
+            values.append(share[keep])
+
+        if not rows:
+            return csr_matrix((len(polygons), len(self)))
+        return csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(len(polygons), len(self)))
+
+    def population_within(self, polygons: Sequence[shapely.Geometry], crs=4326) -> np.ndarray:
+        """
+        Residents inside each polygon.
+
+        Args:
+            polygons: Polygons to count
+            crs: CRS of the polygons
+
+        Returns:
+            Area-weighted population per polygon
+        """
+        return self.shares(polygons, crs) @ self.population
+
+    def radius_shares(self, lat: np.ndarray, lon: np.ndarray, radius_km: float,
+                      columns: Optional[Sequence[str]] = None) -> csr_matrix:
+        """
+        Share of each tract within radius_km of each point.
+
+        Circles are buffered in California Albers, so the radius is in true
+        metres rather than degrees.
+
+        Args:
+            lat: Point latitudes
+            lon: Point longitudes
+            radius_km: Circle radius
+            columns: Tract GEOIDs to return columns for (see shares)
+
+        Returns:
+            Sparse matrix of shape (n_points, n_tracts); rows of points with
+            missing coordinates are empty
+        """
+        xy = project_points(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        circles = shapely.buffer(shapely.points(xy), radius_km * 1000.0, quad_segs=BUFFER_QUAD_SEGS)
+        circles = np.where(np.isnan(xy).any(axis=1), shapely.from_wkt('POLYGON EMPTY'), circles)
+        return self._select_columns(self._projected_shares(circles), columns)
+
+    def population_within_radius(self, lat: np.ndarray, lon: np.ndarray, radius_km: float) -> np.ndarray:
+        """Residents within radius_km of each point (see radius_shares)."""
+        return self.radius_shares(lat, lon, radius_km) @ self.population
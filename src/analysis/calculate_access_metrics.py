@@ -10,8 +10,15 @@ import geopandas as gpd
 import numpy as np
 import logging
 from pathlib import Path
-from scipy.spatial import cKDTree
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, Union, Sequence
+from dataclasses import dataclass
+
+from analysis.accessibility import DEFAULT_CATCHMENT_KM, decay_weights, e2sfca
+from analysis.demand_points import DEFAULT_BLOCKS_FILE, DEMAND_PERCENTILES, DemandPoints
+from analysis.metric_cache import MetricCache, fingerprint_frames
+from analysis.road_network import DEFAULT_ROAD_NETWORK_FILE, RoadNetwork
+from analysis.spatial_index import SpatialIndex, project_points
+from data_processing.columnar_store import dataset_exists, normalize_geoid, read_table, write_table
 
 # Configure logging
 logging.basicConfig(
@@ -20,13 +27,133 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Neighbours fetched per nearest-facility query; nearest distance and the
+# 3-nearest average share one cached query
+NEAREST_K = 3
+
+# Speed (km/h) for the leg between a tract centroid and its snapped road node
+CONNECTOR_SPEED_KPH = 20.0
+
+# Radii (km) reported for facility counts
+REPORTING_RADII_KM = (1.0, 2.0, 5.0, 10.0, 20.0)
+
+# Composite access score component weights (points out of 100). The E2SFCA
+# component is off by default so scores match the original 50/30/20 split.
+ACCESS_SCORE_WEIGHTS = {
+    'distance': 50.0,
+    'nearby': 30.0,
+    'density': 20.0,
+    'e2sfca': 0.0,
+}
+
+
+def radius_column(radius_km: float, category: Optional[str] = None) -> str:
+    """Column name for a facility count within a radius, e.g. 'facilities_within_5km'."""
+    return f"{category or 'facilities'}_within_{radius_km:g}km"
+
+
+@dataclass
+class AccessScoreScale:
+    """Maxima each composite score component is normalized against."""
+    max_distance_km: float
+    max_nearby: float
+    max_density: float
+    max_e2sfca: float = 0.0
+
+    @classmethod
+    def from_components(cls, nearest_km, nearby=None, density=None, e2sfca=None) -> 'AccessScoreScale':
+        """Take the normalizing maxima from full component arrays (NaN ignored)."""
+        def peak(values):
+            if values is None or len(values) == 0 or np.isnan(values).all():
+                return 0.0
+            return float(np.nanmax(values))
+        return cls(peak(nearest_km), peak(nearby), peak(density), peak(e2sfca))
+
+
+def combine_access_score(nearest_km: np.ndarray, nearby: Optional[np.ndarray],
+                         density: Optional[np.ndarray], scale: AccessScoreScale,
+                         weights: Dict[str, float] = ACCESS_SCORE_WEIGHTS,
+                         e2sfca: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Combine per-tract components into the 0-100 composite access score.
+
+    Shared by AccessMetricsCalculator and the incremental what-if model so
+    both score tracts identically.
+
+    Args:
+        nearest_km: Distance to the nearest facility
+        nearby: Facilities within 5km (None if unavailable)
+        density: Population density (None if unavailable)
+        scale: Normalizing maxima for each component
+        weights: Points per component, keyed like ACCESS_SCORE_WEIGHTS
+        e2sfca: E2SFCA accessibility (None if unavailable)
+
+    Returns:
+        Array of access scores clipped to 0-100, higher is better
+    """
+    nearest_km = np.asarray(nearest_km, dtype=float)
+
+    # Component 1: Distance to nearest facility (inverse, 50% weight)
+    # Normalize: lower distance = higher score (inverse relationship)
+    if scale.max_distance_km > 0:
+        distance_score = (1 - (nearest_km / scale.max_distance_km)) * weights['distance']
+    else:
+        distance_score = np.full(len(nearest_km), float(weights['distance']))
+
+    # Component 2: Facilities within 5km (30% weight)
+    if nearby is not None and scale.max_nearby > 0:
+        nearby_score = (np.asarray(nearby, dtype=float) / scale.max_nearby) * weights['nearby']
+    else:
+        nearby_score = np.zeros(len(nearest_km))
+
+    # Component 3: Population density factor (20% weight)
+    # Higher density = potentially more need; default to half weight if unavailable
+    if density is not None and scale.max_density > 0:
+        density_score = (np.asarray(density, dtype=float) / scale.max_density) * weights['density']
+    else:
+        density_score = np.full(len(nearest_km), weights['density'] / 2)
+
+    # Component 4: E2SFCA accessibility (capacity and competition aware)
+    if e2sfca is not None and weights['e2sfca'] > 0 and scale.max_e2sfca > 0:
+        e2sfca_score = (np.asarray(e2sfca, dtype=float) / scale.max_e2sfca) * weights['e2sfca']
+    else:
+        e2sfca_score = np.zeros(len(nearest_km))
+
+    # Ensure scores are between 0-100
+    return np.clip(distance_score + nearby_score + density_score + e2sfca_score, 0, 100)
+
+
+@dataclass
+class NearestFacilityResult:
+    """K-nearest facility distances and indices for every census tract."""
+    distances_km: np.ndarray  # (n_tracts, k), NaN for tracts without coordinates
+    indices: np.ndarray  # (n_tracts, k) facility row labels, -1 where missing
+    index: pd.Index  # census tract index the rows align with
+
+    @property
+    def nearest_km(self) -> pd.Series:
+        """Distance to the nearest facility."""
+        return pd.Series(self.distances_km[:, 0], index=self.index)
+
+    @property
+    def nearest_index(self) -> pd.Series:
+        """Row label of the nearest facility."""
+        return pd.Series(self.indices[:, 0], index=self.index)
+
+    @property
+    def mean_km(self) -> pd.Series:
+        """Average distance to the k nearest facilities."""
+        return pd.Series(self.distances_km.mean(axis=1), index=self.index)
+
 
 class AccessMetricsCalculator:
     """Calculate various healthcare access metrics."""
 
     def __init__(self, facilities_file: Union[str, Path],
                  census_file: Union[str, Path],
-                 output_dir: Union[str, Path] = 'outputs/reports'):
+                 output_dir: Union[str, Path] = 'outputs/reports',
+                 road_network: Optional[RoadNetwork] = None,
+                 demand_points: Optional[DemandPoints] = None):
         """
         Initialize the metrics calculator.
 
@@ -34,15 +161,28 @@ class AccessMetricsCalculator:
             facilities_file: Path to cleaned facilities data
             census_file: Path to census/demographic data with geometries
             output_dir: Directory to save results
+            road_network: Optional road graph; when given, nearest-facility
+                distances are measured along roads instead of straight lines
+            demand_points: Optional block-level demand points; when given,
+                tracts are measured from their population-weighted centroid
+                and block distance percentiles are reported per tract
         """
         self.facilities_file = Path(facilities_file)
         self.census_file = Path(census_file)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        self.road_network = road_network
+        self.demand_points = demand_points
+
         self.facilities = None
         self.census_tracts = None
 
+        # Per-run memoization of indexes and metrics, keyed by input fingerprint
+        self.cache = MetricCache()
+        self._fingerprint = None
+        self._fingerprint_source = None
+
     def load_data(self) -> bool:
         """
         Load facility and census tract data.
@@ -54,27 +194,175 @@ class AccessMetricsCalculator:
             logger.info("Loading data...")
 
             # Load facilities
-            if not self.facilities_file.exists():
+            if not dataset_exists(self.facilities_file):
                 logger.error(f"Facilities file not found: {self.facilities_file}")
                 return False
 
-            self.facilities = pd.read_csv(self.facilities_file)
+            self.facilities = read_table(self.facilities_file)
             logger.info(f"Loaded {len(self.facilities)} facilities")
 
             # Load census tracts
-            if not self.census_file.exists():
+            if not dataset_exists(self.census_file):
                 logger.error(f"Census file not found: {self.census_file}")
                 return False
 
-            self.census_tracts = pd.read_csv(self.census_file)
+            self.census_tracts = read_table(self.census_file)
             logger.info(f"Loaded {len(self.census_tracts)} census tracts")
 
+            # Anything cached was derived from the previous inputs
+            self.cache.clear()
+            self._fingerprint_source = None
+
             return True
 
         except Exception as e:
             logger.error(f"Error loading data: {e}")
             return False
 
+    def _data_key(self) -> str:
+        """
+        Fingerprint the loaded inputs for use in cache keys.
+
+        The fingerprint is recomputed (and stale entries dropped) whenever the
+        facilities or census_tracts frames are replaced.
+
+        Returns:
+            Content fingerprint of the current facility and tract tables
+        """
+        source = (id(self.facilities), id(self.census_tracts))
+        if source != self._fingerprint_source:
+            if self._fingerprint_source is not None:
+                self.cache.clear()
+            self._fingerprint = fingerprint_frames(self.facilities, self.census_tracts)
+            self._fingerprint_source = source
+        return self._fingerprint
+
+    def _tract_coordinates(self) -> np.ndarray:
+        """
+        Collect tract reference points projected to California Albers.
+
+        Uses the centroid columns when present, otherwise falls back to
+        generic lat/lon columns. With demand points configured, tracts that
+        have populated blocks use their population-weighted centroid instead.
+        The projection is computed once per load.
+
+        Returns:
+            Array of shape (n_tracts, 2) with [x, y] rows in metres, NaN where unavailable
+        """
+        def project():
+            columns = self.census_tracts.columns
+            if 'centroid_lat' in columns and 'centroid_lon' in columns:
+                lat_col, lon_col = 'centroid_lat', 'centroid_lon'
+            elif 'lat' in columns and 'lon' in columns:
+                lat_col, lon_col = 'lat', 'lon'
+            else:
+                lat_col = lon_col = None
+
+            if lat_col is not None:
+                lat = self.census_tracts[lat_col].to_numpy(dtype=float)
+                lon = self.census_tracts[lon_col].to_numpy(dtype=float)
+            else:
+                lat = np.full(len(self.census_tracts), np.nan)
+                lon = np.full(len(self.census_tracts), np.nan)
+
+            weighted = self._weighted_centroids()
+            if weighted is not None:
+                has_blocks = weighted['pw_centroid_lat'].notna().to_numpy()
+                lat = np.where(has_blocks, weighted['pw_centroid_lat'].to_numpy(), lat)
+                lon = np.where(has_blocks, weighted['pw_centroid_lon'].to_numpy(), lon)
+                logger.info(f"Using population-weighted centroids for {int(has_blocks.sum())}/"
+                            f"{len(self.census_tracts)} tracts")
+
+            return project_points(lat, lon)
+
+        return self.cache.get_or_compute('tract_xy', self._data_key(), project)
+
+    def _weighted_centroids(self) -> Optional[pd.DataFrame]:
+        """
+        Population-weighted centroids aligned with census_tracts.
+
+        Returns:
+            DataFrame indexed like census_tracts with pw_centroid_lat,
+            pw_centroid_lon and block_population (NaN for tracts without
+            populated blocks), or None without demand points or tract GEOIDs
+        """
+        if self.demand_points is None or 'GEOID' not in self.census_tracts.columns:
+            return None
+
+        centroids = self.demand_points.centroids()
+        geoids = normalize_geoid(self.census_tracts['GEOID'])
+        aligned = centroids.reindex(geoids.to_numpy())[['pw_centroid_lat', 'pw_centroid_lon', 'block_population']]
+        aligned.index = self.census_tracts.index
+        return aligned
+
+    def _filter_facilities(self, facility_type: Optional[str] = None) -> pd.DataFrame:
+        """Return the facility table, optionally restricted to one category."""
+        if facility_type:
+            facilities = self.facilities[self.facilities['category'] == facility_type]
+            logger.info(f"Filtered to {len(facilities)} {facility_type} facilities")
+            return facilities
+        return self.facilities
+
+    def _facility_index(self, facility_type: Optional[str] = None) -> Optional[SpatialIndex]:
+        """
+        Get the projected KD-tree for a facility category, building it once per run.
+
+        Args:
+            facility_type: Filter by facility type (None for all facilities)
+
+        Returns:
+            SpatialIndex over the matching facilities, or None if there are none
+        """
+        def build():
+            facilities = self._filter_facilities(facility_type)
+            if len(facilities) == 0:
+                logger.warning(f"No facilities found for type: {facility_type}")
+                return None
+            return SpatialIndex.from_frame(facilities)
+
+        return self.cache.get_or_compute('index', (facility_type, self._data_key()), build)
+
+    def calculate_nearest_facilities(self, k: int = NEAREST_K,
+                                     facility_type: Optional[str] = None,
+                                     workers: int = -1) -> Optional[NearestFacilityResult]:
+        """
+        Find the k nearest facilities for every census tract in one batch query.
+
+        All tract points are queried against the KD-tree at once instead of
+        row by row, so nearest distance, nearest index and the k-nearest
+        average come from the same search. Results are cached per run.
+
+        Args:
+            k: Number of nearest facilities to return per tract
+            facility_type: Filter by facility type (e.g., 'urgent_care')
+            workers: Worker threads for the KD-tree query (-1 uses all cores)
+
+        Returns:
+            NearestFacilityResult for all tracts, or None if calculation fails
+        """
+        if self.facilities is None or self.census_tracts is None:
+            logger.error("Data not loaded. Call load_data() first.")
+            return None
+
+        def query():
+            index = self._facility_index(facility_type)
+            if index is None:
+                return None
+
+            tract_points = self._tract_coordinates()
+            distances_m, indices = index.nearest(tract_points, k=k, workers=workers)
+            valid = ~np.isnan(distances_m[:, 0])
+
+            logger.info(f"Calculated distances for {int(valid.sum())}/{len(tract_points)} tracts")
+
+            return NearestFacilityResult(
+                distances_km=distances_m / 1000.0,
+                indices=indices,
+                index=self.census_tracts.index
+            )
+
+        return self.cache.get_or_compute('nearest', (facility_type, k, self._data_key()), query)
+
     def calculate_nearest_facility_distance(self, facility_type: Optional[str] = None) -> Optional[pd.Series]:
         """
         Calculate distance from each census tract to nearest facility.
@@ -87,59 +375,134 @@ class AccessMetricsCalculator:
         """
         logger.info(f"Calculating nearest facility distances...")
 
+        if self.road_network is not None:
+            network_access = self.calculate_network_access(facility_type=facility_type)
+            if network_access is None:
+                return None
+            return network_access['nearest_facility_km']
+
+        nearest = self.calculate_nearest_facilities(k=NEAREST_K, facility_type=facility_type)
+        if nearest is None:
+            return None
+
+        return nearest.nearest_km
+
+    def calculate_network_access(self, facility_type: Optional[str] = None,
+                                 connector_speed_kph: float = CONNECTOR_SPEED_KPH) -> Optional[pd.DataFrame]:
+        """
+        Calculate road-network distance and travel time to the nearest facility.
+
+        Facilities and tract centroids are snapped to road nodes with a KD-tree,
+        then one multi-source travel-time Dijkstra pass gives every node the
+        facility it reaches fastest, so cost does not grow with the number of
+        tracts. Distance is the road length of that same fastest route, so
+        every column of a row describes one facility.
+
+        Args:
+            facility_type: Filter by facility type (e.g., 'urgent_care')
+            connector_speed_kph: Speed for the centroid-to-road connector leg
+
+        Returns:
+            DataFrame indexed like census_tracts with nearest_facility_km (road
+            distance along the fastest route), nearest_facility_minutes,
+            nearest_facility_index and snap_distance_km (NaN where no facility
+            is reachable), or None if calculation fails
+        """
+        if self.road_network is None:
+            logger.error("No road network configured for network access metrics")
+            return None
+
         if self.facilities is None or self.census_tracts is None:
             logger.error("Data not loaded. Call load_data() first.")
             return None
 
-        # Filter facilities if type specified
-        if facility_type:
-            facilities = self.facilities[
-                self.facilities['category'] == facility_type
-            ].copy()
-            logger.info(f"Filtered to {len(facilities)} {facility_type} facilities")
-        else:
-            facilities = self.facilities.copy()
+        def route():
+            facilities = self._filter_facilities(facility_type)
+            if len(facilities) == 0:
+                logger.warning(f"No facilities found for type: {facility_type}")
+                return None
+
+            network = self.road_network
+            logger.info(f"Routing {len(self.census_tracts)} tracts to {len(facilities)} facilities over road network...")
+
+            facility_nodes, _ = network.snap(facilities['lat'].to_numpy(), facilities['lon'].to_numpy())
+            node_to_facility = pd.Series(facilities.index.to_numpy(), index=facility_nodes)
+            node_to_facility = node_to_facility[~node_to_facility.index.duplicated()]
+
+            tract_nodes, snap_m = network.snap_projected(self._tract_coordinates())
+            snapped = tract_nodes >= 0
+
+            travel_s, length_m, reached_from = network.nearest_source_routes(facility_nodes)
 
-        if len(facilities) == 0:
-            logger.warning(f"No facilities found for type: {facility_type}")
+            result = pd.DataFrame(index=self.census_tracts.index)
+            result['nearest_facility_km'] = np.nan
+            result['nearest_facility_minutes'] = np.nan
+            result['nearest_facility_index'] = -1
+            result['snap_distance_km'] = snap_m / 1000.0
+
+            nodes = tract_nodes[snapped]
+            reachable = np.isfinite(travel_s[nodes]) & np.isfinite(length_m[nodes])
+            rows = result.index[snapped][reachable]
+            nodes = nodes[reachable]
+            connector_m = snap_m[snapped][reachable]
+
+            result.loc[rows, 'nearest_facility_km'] = (length_m[nodes] + connector_m) / 1000.0
+            result.loc[rows, 'nearest_facility_minutes'] = (
+                travel_s[nodes] / 60.0 + connector_m / (connector_speed_kph / 3.6) / 60.0
+            )
+            result.loc[rows, 'nearest_facility_index'] = node_to_facility.loc[reached_from[nodes]].to_numpy()
+
+            logger.info(f"Routed {len(rows)}/{len(result)} tracts to a facility over the road network")
+            return result
+
+        key = (facility_type, id(self.road_network), connector_speed_kph, self._data_key())
+        result = self.cache.get_or_compute('network', key, route)
+        return result.copy() if result is not None else None
+
+    def calculate_demand_distances(self, facility_type: Optional[str] = None,
+                                   percentiles: Sequence[float] = DEMAND_PERCENTILES,
+                                   workers: int = -1) -> Optional[pd.DataFrame]:
+        """
+        Population-weighted distance distribution from each tract's blocks.
+
+        Every demand point is queried against the facility KD-tree in one
+        batch, then the distances are aggregated back to tracts, so a tract
+        with a town at one end and empty desert at the other reports where
+        its residents actually are. Distances are straight-line.
+
+        Args:
+            facility_type: Filter by facility type (e.g., 'urgent_care')
+            percentiles: Percentiles of the weighted distribution to report
+            workers: Worker threads for the KD-tree query (-1 uses all cores)
+
+        Returns:
+            DataFrame indexed like census_tracts with demand_mean_km,
+            demand_p{q}_km per percentile and demand_max_km (NaN for tracts
+            without populated blocks), or None if calculation fails
+        """
+        if self.facilities is None or self.census_tracts is None:
+            logger.error("Data not loaded. Call load_data() first.")
             return None
 
-        # Build KD-tree for fast nearest neighbor search
-        facility_coords = facilities[['lat', 'lon']].values
-        tree = cKDTree(facility_coords)
-
-        # Calculate distances
-        distances = []
-        for idx, tract in self.census_tracts.iterrows():
-            # Use centroid coordinates from census data
-            if 'centroid_lat' in tract and 'centroid_lon' in tract:
-                if pd.notna(tract['centroid_lat']) and pd.notna(tract['centroid_lon']):
-                    tract_point = [tract['centroid_lat'], tract['centroid_lon']]
-                    dist, _ = tree.query(tract_point)
-
-                    # Convert degrees to approximate km (rough conversion for small distances)
-                    # More accurate: use haversine formula, but this is sufficient for local analysis
-                    dist_km = dist * 111.0  # 1 degree ≈ 111 km at equator
-                    distances.append(dist_km)
-                else:
-                    distances.append(np.nan)
-            else:
-                # If no centroid, try to use tract center from lat/lon columns
-                if 'lat' in tract and 'lon' in tract:
-                    if pd.notna(tract['lat']) and pd.notna(tract['lon']):
-                        tract_point = [tract['lat'], tract['lon']]
-                        dist, _ = tree.query(tract_point)
-                        dist_km = dist * 111.0
-                        distances.append(dist_km)
-                    else:
-                        distances.append(np.nan)
-                else:
-                    distances.append(np.nan)
-
-        valid_distances = sum(pd.notna(distances))
-        logger.info(f"Calculated distances for {valid_distances}/{len(distances)} tracts")
-
-        return pd.Series(distances, index=self.census_tracts.index)
+        if self.demand_points is None or 'GEOID' not in self.census_tracts.columns:
+            return None
+
+        def query():
+            index = self._facility_index(facility_type)
+            if index is None:
+                return None
+
+            distances_km = self.demand_points.nearest_distances(index, workers=workers)
+            result = self.demand_points.aggregate(distances_km, self.census_tracts['GEOID'], percentiles)
+            result.index = self.census_tracts.index
+
+            logger.info(f"Calculated distances for {len(self.demand_points):,} demand points "
+                        f"in {int(result['demand_mean_km'].notna().sum())}/{len(result)} tracts")
+            return result
+
+        key = (facility_type, tuple(percentiles), id(self.demand_points), self._data_key())
+        result = self.cache.get_or_compute('demand', key, query)
+        return None if result is None else result.copy()
 
     def calculate_facilities_within_radius(self, radius_km: float = 5.0) -> pd.Series:
         """
@@ -153,42 +516,124 @@ class AccessMetricsCalculator:
         """
         logger.info(f"Calculating facilities within {radius_km} km...")
 
+        # Radii in the standard sweep share its cached single-pass result
+        radii = REPORTING_RADII_KM if radius_km in REPORTING_RADII_KM else (radius_km,)
+        counts = self.calculate_facilities_within_radii(radii)
+        if counts is None:
+            return None
+
+        counts = counts[radius_column(radius_km)]
+        logger.info(f"Average facilities within {radius_km} km: {counts.mean():.2f}")
+        return counts
+
+    def calculate_facilities_within_radii(self, radii_km: Sequence[float] = REPORTING_RADII_KM,
+                                          by_category: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Count facilities within several radii of each tract in a single pass.
+
+        Args:
+            radii_km: Radii in kilometers
+            by_category: Also break counts down by facility category
+
+        Returns:
+            DataFrame (tracts x radii) with 'facilities_within_{r}km' columns, plus
+            '{category}_within_{r}km' columns when by_category is True
+        """
+        if self.facilities is None or self.census_tracts is None:
+            logger.error("Data not loaded. Call load_data() first.")
+            return None
+
+        radii_km = tuple(float(r) for r in radii_km)
+
+        index = self._facility_index()
+        if index is None:
+            return pd.DataFrame(
+                0, index=self.census_tracts.index, columns=[radius_column(r) for r in radii_km]
+            )
+
+        def count():
+            tract_points = self._tract_coordinates()
+            radii_m = [r * 1000.0 for r in radii_km]
+
+            if by_category and 'category' in self.facilities.columns:
+                categories = pd.Categorical(self.facilities.loc[index.labels, 'category'].astype(object).fillna('other'))
+                by_group = index.count_within_radii(
+                    tract_points, radii_m,
+                    groups=categories.codes, n_groups=len(categories.categories)
+                )
+                totals = by_group.sum(axis=1)
+            else:
+                categories = None
+                totals = index.count_within_radii(tract_points, radii_m)
+
+            result = pd.DataFrame(
+                totals,
+                index=self.census_tracts.index,
+                columns=[radius_column(r) for r in radii_km]
+            )
+            if categories is not None:
+                for code, category in enumerate(categories.categories):
+                    for pos, r in enumerate(radii_km):
+                        result[radius_column(r, category)] = by_group[:, code, pos]
+            return result
+
+        counts = self.cache.get_or_compute(
+            'within_radii', (radii_km, by_category, self._data_key()), count
+        )
+        return counts.copy()
+
+    def calculate_facilities_by_tract(self, population_col: str = 'Total Population') -> Optional[pd.DataFrame]:
+        """
+        Count the facilities located inside each census tract.
+
+        Uses the tract_geoid assigned to each facility during cleaning
+        (point-in-polygon), so counts are exact rather than approximated by
+        a radius around the tract centroid.
+
+        Args:
+            population_col: Name of population column
+
+        Returns:
+            DataFrame aligned with census_tracts with 'facilities_in_tract'
+            and 'facilities_per_10k' (NaN for unpopulated tracts), or None if
+            facilities have no tract_geoid or tracts have no GEOID
+        """
         if self.facilities is None or self.census_tracts is None:
             logger.error("Data not loaded. Call load_data() first.")
             return None
 
-        # Build KD-tree for facilities
-        facility_coords = self.facilities[['lat', 'lon']].values
-        tree = cKDTree(facility_coords)
-
-        # Convert km to degrees (approximate)
-        radius_deg = radius_km / 111.0
-
-        counts = []
-        for idx, tract in self.census_tracts.iterrows():
-            if 'centroid_lat' in tract and 'centroid_lon' in tract:
-                if pd.notna(tract['centroid_lat']) and pd.notna(tract['centroid_lon']):
-                    tract_point = [tract['centroid_lat'], tract['centroid_lon']]
-                    # Query all facilities within radius
-                    indices = tree.query_ball_point(tract_point, radius_deg)
-                    counts.append(len(indices))
-                else:
-                    counts.append(0)
+        if 'tract_geoid' not in self.facilities.columns or 'GEOID' not in self.census_tracts.columns:
+            return None
+
+        def compute():
+            counts = normalize_geoid(self.facilities['tract_geoid']).dropna().value_counts()
+            in_tract = normalize_geoid(self.census_tracts['GEOID']).map(counts).fillna(0).astype(int)
+
+            if population_col in self.census_tracts.columns:
+                population = self.census_tracts[population_col].to_numpy(dtype=float)
             else:
-                counts.append(0)
+                population = np.full(len(self.census_tracts), np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                per_10k = np.where(population > 0, in_tract.to_numpy() / population * 10000, np.nan)
 
-        logger.info(f"Average facilities within {radius_km} km: {np.mean(counts):.2f}")
-        return pd.Series(counts, index=self.census_tracts.index)
+            return pd.DataFrame({
+                'facilities_in_tract': in_tract.to_numpy(),
+                'facilities_per_10k': per_10k
+            }, index=self.census_tracts.index)
+
+        by_tract = self.cache.get_or_compute('by_tract', (population_col, self._data_key()), compute)
+        return by_tract.copy()
 
     def calculate_facilities_per_capita(self, population_col: str = 'Total Population') -> Dict[str, float]:
         """
-        Calculate facilities per capita by census tract.
+        Calculate facilities per capita, county-wide and by census tract.
 
         Args:
             population_col: Name of population column
 
         Returns:
-            Dictionary with per capita metrics
+            Dictionary with per capita metrics; the tract-level entries are
+            only present when facilities carry a tract_geoid
         """
         logger.info("Calculating facilities per capita...")
 
@@ -214,13 +659,83 @@ class AccessMetricsCalculator:
         logger.info(f"Overall: {facilities_per_10k:.2f} facilities per 10,000 residents")
         logger.info(f"Overall: {facilities_per_100k:.2f} facilities per 100,000 residents")
 
-        return {
+        per_capita = {
             'total_facilities': total_facilities,
             'total_population': total_population,
             'per_10k': facilities_per_10k,
             'per_100k': facilities_per_100k
         }
 
+        by_tract = self.calculate_facilities_by_tract(population_col)
+        if by_tract is not None:
+            without = by_tract['facilities_in_tract'] == 0
+            per_capita.update({
+                'tracts_with_facility': int((~without).sum()),
+                'tracts_without_facility': int(without.sum()),
+                'population_in_tracts_without_facility': float(self.census_tracts.loc[without, population_col].sum()),
+                'median_tract_per_10k': float(by_tract['facilities_per_10k'].median())
+            })
+            logger.info(f"By tract: {per_capita['tracts_with_facility']} tracts contain a facility, "
+                        f"{per_capita['tracts_without_facility']} contain none")
+
+        return per_capita
+
+    def calculate_e2sfca(self, catchment_km: float = DEFAULT_CATCHMENT_KM,
+                         kernel: str = 'gaussian',
+                         facility_type: Optional[str] = None,
+                         population_col: str = 'Total Population',
+                         capacity_col: str = 'capacity') -> Optional[pd.Series]:
+        """
+        Calculate enhanced two-step floating catchment area (E2SFCA) accessibility.
+
+        Tract-facility pairs within the catchment come from a sparse KD-tree
+        join, so memory grows with the number of nearby pairs rather than
+        tracts x facilities.
+
+        Args:
+            catchment_km: Catchment radius in kilometers
+            kernel: Distance-decay kernel ('uniform', 'stepwise', 'gaussian', 'gravity')
+            facility_type: Filter by facility type (e.g., 'urgent_care')
+            population_col: Name of population column
+            capacity_col: Facility capacity column; each facility counts as 1 if absent
+
+        Returns:
+            Series with facility capacity per 1,000 residents reachable from
+            each tract, or None if calculation fails
+        """
+        if self.facilities is None or self.census_tracts is None:
+            logger.error("Data not loaded. Call load_data() first.")
+            return None
+
+        if population_col not in self.census_tracts.columns:
+            logger.error(f"Population column '{population_col}' not found")
+            return None
+
+        def compute():
+            index = self._facility_index(facility_type)
+            if index is None:
+                return None
+
+            logger.info(f"Calculating E2SFCA accessibility ({kernel}, {catchment_km} km catchment)...")
+
+            catchment_m = catchment_km * 1000.0
+            tract_rows, facility_cols, distance_m = index.pairs_within(self._tract_coordinates(), catchment_m)
+            weights = decay_weights(distance_m, catchment_m, kernel)
+
+            if capacity_col in self.facilities.columns:
+                capacity = self.facilities.loc[index.labels, capacity_col].fillna(1.0).to_numpy()
+            else:
+                capacity = np.ones(len(index))
+
+            population = self.census_tracts[population_col].to_numpy()
+            accessibility = e2sfca(tract_rows, facility_cols, weights, population, capacity)
+
+            return pd.Series(accessibility * 1000.0, index=self.census_tracts.index)
+
+        key = (catchment_km, kernel, facility_type, population_col, capacity_col, self._data_key())
+        scores = self.cache.get_or_compute('e2sfca', key, compute)
+        return scores.copy() if scores is not None else None
+
     def identify_coverage_gaps(self, threshold_km: float = 5.0) -> Optional[pd.DataFrame]:
         """
         Identify areas beyond threshold distance from any facility.
@@ -251,71 +766,82 @@ class AccessMetricsCalculator:
 
         return gaps
 
-    def calculate_composite_access_score(self) -> Optional[pd.Series]:
+    def calculate_composite_access_score(self, weights: Optional[Dict[str, float]] = None) -> Optional[pd.Series]:
         """
         Calculate composite access score (0-100).
 
-        Combines multiple metrics into a single score:
+        Combines multiple metrics into a single score (default weights):
         - Distance to nearest facility (50% weight)
         - Number of facilities within 5km (30% weight)
         - Population density consideration (20% weight)
+        - E2SFCA capacity-adjusted accessibility (0% weight, opt-in)
+
+        Args:
+            weights: Points per component, keyed like ACCESS_SCORE_WEIGHTS;
+                missing keys keep their default (weights should total 100)
 
         Returns:
             Series with access scores (0-100), higher is better
         """
-        logger.info("Calculating composite access scores...")
-
         if self.facilities is None or self.census_tracts is None:
             logger.error("Data not loaded. Call load_data() first.")
             return None
 
-        # Component 1: Distance to nearest facility (inverse, 50% weight)
+        weights = {**ACCESS_SCORE_WEIGHTS, **(weights or {})}
+        key = (tuple(sorted(weights.items())), self._data_key())
+        scores = self.cache.get_or_compute(
+            'access_score', key, lambda: self._compute_composite_access_score(weights)
+        )
+        return scores.copy() if scores is not None else None
+
+    def _compute_composite_access_score(self, weights: Dict[str, float]) -> Optional[pd.Series]:
+        """Compute the composite access score (uncached, see calculate_composite_access_score)."""
+        logger.info("Calculating composite access scores...")
+
+        components = self._access_score_components(weights)
+        if components is None:
+            return None
+
+        scale = AccessScoreScale.from_components(**components)
+        access_score = pd.Series(
+            combine_access_score(scale=scale, weights=weights, **components),
+            index=self.census_tracts.index
+        )
+
+        logger.info(f"Access score range: {access_score.min():.2f} - {access_score.max():.2f}")
+        logger.info(f"Mean access score: {access_score.mean():.2f}")
+
+        return access_score
+
+    def _access_score_components(self, weights: Dict[str, float] = ACCESS_SCORE_WEIGHTS) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Gather the per-tract inputs of the composite access score.
+
+        Args:
+            weights: Score weights (the E2SFCA component is only computed when weighted)
+
+        Returns:
+            Dictionary of nearest_km, nearby, density and e2sfca arrays (None for
+            unavailable components), or None if distances cannot be calculated
+        """
         nearest_dist = self.calculate_nearest_facility_distance()
         if nearest_dist is None:
             return None
 
-        # Normalize: lower distance = higher score (inverse relationship)
-        max_dist = nearest_dist.max()
-        if max_dist > 0:
-            distance_score = (1 - (nearest_dist / max_dist)) * 50
-        else:
-            distance_score = pd.Series([50.0] * len(nearest_dist), index=nearest_dist.index)
-
-        # Component 2: Facilities within 5km (30% weight)
         facilities_nearby = self.calculate_facilities_within_radius(radius_km=5.0)
-        if facilities_nearby is not None:
-            max_nearby = facilities_nearby.max()
-            if max_nearby > 0:
-                nearby_score = (facilities_nearby / max_nearby) * 30
-            else:
-                nearby_score = pd.Series([0.0] * len(facilities_nearby), index=facilities_nearby.index)
-        else:
-            nearby_score = pd.Series([0.0] * len(nearest_dist), index=nearest_dist.index)
 
-        # Component 3: Population density factor (20% weight)
-        # Lower density areas may need more facilities per capita
+        density = None
         if 'Total Population' in self.census_tracts.columns and 'area_sqkm' in self.census_tracts.columns:
-            density = self.census_tracts['Total Population'] / self.census_tracts['area_sqkm']
-            # Normalize density score (higher density = potentially more need)
-            max_density = density.max()
-            if max_density > 0:
-                density_score = (density / max_density) * 20
-            else:
-                density_score = pd.Series([10.0] * len(self.census_tracts), index=self.census_tracts.index)
-        else:
-            # Default density score if data not available
-            density_score = pd.Series([10.0] * len(self.census_tracts), index=self.census_tracts.index)
-
-        # Combine scores
-        access_score = distance_score + nearby_score + density_score
+            density = (self.census_tracts['Total Population'] / self.census_tracts['area_sqkm']).to_numpy(dtype=float)
 
-        # Ensure scores are between 0-100
-        access_score = access_score.clip(0, 100)
+        accessibility = self.calculate_e2sfca() if weights['e2sfca'] > 0 else None
 
-        logger.info(f"Access score range: {access_score.min():.2f} - {access_score.max():.2f}")
-        logger.info(f"Mean access score: {access_score.mean():.2f}")
-
-        return access_score
+        return {
+            'nearest_km': nearest_dist.to_numpy(dtype=float),
+            'nearby': facilities_nearby.to_numpy(dtype=float) if facilities_nearby is not None else None,
+            'density': density,
+            'e2sfca': accessibility.to_numpy(dtype=float) if accessibility is not None else None,
+        }
 
     def generate_summary_report(self) -> Dict[str, any]:
         """
@@ -337,6 +863,9 @@ class AccessMetricsCalculator:
         logger.info(f"\nTotal Facilities: {per_capita.get('total_facilities', 0)}")
         logger.info(f"Total Population: {per_capita.get('total_population', 0):,}")
         logger.info(f"Facilities per 10,000: {per_capita.get('per_10k', 0):.2f}")
+        if 'tracts_without_facility' in per_capita:
+            logger.info(f"Tracts without a facility: {per_capita['tracts_without_facility']} "
+                        f"({per_capita['population_in_tracts_without_facility']:,.0f} residents)")
 
         # Distance metrics
         distances = self.calculate_nearest_facility_distance()
@@ -353,6 +882,14 @@ class AccessMetricsCalculator:
             logger.info(f"  Min: {distances.min():.2f} km")
             logger.info(f"  Max: {distances.max():.2f} km")
 
+        # Block-level distances (where residents live rather than tract centres)
+        demand = self.calculate_demand_distances()
+        if demand is not None:
+            summary['demand_distances'] = demand.median().to_dict()
+            logger.info(f"\nResident Distance to Nearest Facility (median tract):")
+            for column, value in summary['demand_distances'].items():
+                logger.info(f"  {column}: {value:.2f} km")
+
         # Coverage gaps
         gaps = self.identify_coverage_gaps(threshold_km=5.0)
         if gaps is not None:
@@ -385,10 +922,11 @@ class AccessMetricsCalculator:
 
     def save_metrics(self, output_file: str = 'access_metrics.csv') -> bool:
         """
-        Save calculated metrics to CSV file.
+        Save calculated metrics to the columnar store, with a CSV export.
 
         Args:
-            output_file: Output filename
+            output_file: Output filename (a '.csv' name also writes the
+                '.feather' file that downstream stages read)
 
         Returns:
             True if saved successfully, False otherwise
@@ -399,24 +937,62 @@ class AccessMetricsCalculator:
             # Calculate all metrics
             result_df = self.census_tracts.copy()
 
-            # Add distance to nearest facility
-            distances = self.calculate_nearest_facility_distance()
-            if distances is not None:
-                result_df['nearest_facility_km'] = distances
-
-            # Add facilities within 5km
-            nearby = self.calculate_facilities_within_radius(5.0)
+            # Add distance to nearest facility (and 3-nearest average from the same query)
+            nearest = self.calculate_nearest_facilities(k=3)
+            if nearest is not None:
+                result_df['nearest_facility_km'] = nearest.nearest_km
+                result_df['nearest_facility_index'] = nearest.nearest_index
+                result_df['avg_3_nearest_km'] = nearest.mean_km
+
+            # In network mode the policy-facing columns carry road distances;
+            # the straight-line figures keep straight_line_ names so a row
+            # never mixes the two distance types
+            if self.road_network is not None:
+                network_access = self.calculate_network_access()
+                if network_access is not None:
+                    result_df['straight_line_km'] = result_df.get('nearest_facility_km')
+                    if 'avg_3_nearest_km' in result_df.columns:
+                        result_df['straight_line_avg_3_km'] = result_df.pop('avg_3_nearest_km')
+                    result_df['nearest_facility_km'] = network_access['nearest_facility_km']
+                    result_df['nearest_facility_index'] = network_access['nearest_facility_index']
+                    result_df['nearest_facility_minutes'] = network_access['nearest_facility_minutes']
+
+            # Add population-weighted centroids and block distance percentiles
+            centroids = self._weighted_centroids()
+            if centroids is not None:
+                for column in centroids.columns:
+                    result_df[column] = centroids[column]
+
+            demand = self.calculate_demand_distances()
+            if demand is not None:
+                for column in demand.columns:
+                    result_df[column] = demand[column]
+
+            # Add facility counts for the standard radius sweep (includes 5km)
+            nearby = self.calculate_facilities_within_radii(REPORTING_RADII_KM)
             if nearby is not None:
-                result_df['facilities_within_5km'] = nearby
+                for column in nearby.columns:
+                    result_df[column] = nearby[column]
+
+            # Add exact facility counts inside each tract
+            by_tract = self.calculate_facilities_by_tract()
+            if by_tract is not None:
+                for column in by_tract.columns:
+                    result_df[column] = by_tract[column]
+
+            # Add capacity-adjusted accessibility
+            accessibility = self.calculate_e2sfca()
+            if accessibility is not None:
+                result_df['e2sfca_per_1k'] = accessibility
 
             # Add composite access score
             scores = self.calculate_composite_access_score()
             if scores is not None:
                 result_df['access_score'] = scores
 
-            # Save to file
+            # Save to the columnar store, with a CSV copy for export
             output_path = self.output_dir / output_file
-            result_df.to_csv(output_path, index=False)
+            write_table(result_df, output_path, export_csv=True)
             logger.info(f"Metrics saved to {output_path}")
 
             return True
@@ -432,12 +1008,30 @@ def main():
     # Define file paths
     facilities_file = 'data/processed/facilities_cleaned.csv'
     census_file = 'data/processed/census_with_tracts.csv'
+    road_network_file = DEFAULT_ROAD_NETWORK_FILE
+    blocks_file = DEFAULT_BLOCKS_FILE
+
+    # Use road-network travel when a local graph extract is available
+    road_network = None
+    if road_network_file.exists():
+        road_network = RoadNetwork.from_file(road_network_file)
+    else:
+        logger.info(f"No road graph at {road_network_file}, using straight-line distances")
+
+    # Measure from where residents live when block population is available
+    demand_points = None
+    if blocks_file.exists():
+        demand_points = DemandPoints.from_file(blocks_file)
+    else:
+        logger.info(f"No block population at {blocks_file}, using geometric tract centroids")
 
     # Initialize calculator
     calculator = AccessMetricsCalculator(
         facilities_file=facilities_file,
         census_file=census_file,
-        output_dir='outputs/reports'
+        output_dir='outputs/reports',
+        road_network=road_network,
+        demand_points=demand_points
     )
 
     # Load data
@@ -458,6 +1052,10 @@ def main():
         for idx, row in gaps.head(10).iterrows():
             logger.info(f"  GEOID {row.get('GEOID', 'N/A')}: {row['distance_to_nearest_km']:.2f} km")
 
+    # Confirm KD-trees were built once per facility category
+    for kind, counts in calculator.cache.stats().items():
+        logger.info(f"Metric cache [{kind}]: {counts['misses']} computed, {counts['hits']} reused")
+
     logger.info("\nAccess metrics calculation complete!")
     return 0
 
@@ -0,0 +1,296 @@
+"""
+Block-level demand points for population-weighted access metrics.
+
+Tract centroids are a poor stand-in for where people live in large tracts
+(the Antelope Valley, the San Gabriel Mountains): the geometric centre can
+sit kilometres from any home. Census blocks are small enough that their
+internal points track settlement, so this module loads block population
+from a local file and offers two ways to use it:
+
+- Population-weighted tract centroids, a drop-in replacement for the
+  geometric centroid as each tract's single reference point.
+- Multi-point demand, where every populated block is a demand point and
+  tract metrics are population-weighted distributions of block distances.
+
+Demand points are projected once into California Albers, so the distance
+engine answers every block in a single KD-tree query and aggregates back
+to tracts with sorted, vectorised group operations.
+"""
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import logging
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from analysis.spatial_index import SpatialIndex, project_points, unproject_points
+from data_processing.columnar_store import COLUMNAR_SUFFIXES, GEOID_WIDTH, normalize_geoid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKS_FILE = Path('data/external/la_county_blocks.csv')
+
+LA_COUNTY_FIPS = '06037'
+
+# Census block GEOIDs: state (2) + county (3) + tract (6) + block (4)
+BLOCK_GEOID_WIDTH = 15
+
+# Accepted source column names, in order of preference. Covers the TIGER/Line
+# tabblock20 attributes, the 2020 PL 94-171 extract and already-tidy files.
+BLOCK_COLUMN_ALIASES = {
+    'block_geoid': ('block_geoid', 'GEOID20', 'GEOID', 'GEOCODE'),
+    'population': ('population', 'POP20', 'P1_001N', 'POP100', 'POP'),
+    'lat': ('lat', 'INTPTLAT20', 'INTPTLAT'),
+    'lon': ('lon', 'INTPTLON20', 'INTPTLON'),
+}
+
+# Percentiles of the population-weighted distance distribution reported per tract
+DEMAND_PERCENTILES = (50.0, 90.0)
+
+
+def _find_column(columns: Sequence[str], field: str) -> Optional[str]:
+    for candidate in BLOCK_COLUMN_ALIASES[field]:
+        if candidate in columns:
+            return candidate
+    return None
+
+
+def load_blocks(blocks_file: Union[str, Path], county_fips: str = LA_COUNTY_FIPS,
+                min_population: float = 1.0) -> Optional[pd.DataFrame]:
+    """
+    Load block population and internal points from a local file.
+
+    CSV and columnar files need a block GEOID, a population column and
+    lat/lon internal points (see BLOCK_COLUMN_ALIASES). Block shapefiles
+    and GeoPackages without internal-point columns use a point guaranteed
+    to lie inside each block polygon.
+
+    Args:
+        blocks_file: Block population file (CSV, Feather/Parquet, or a
+            geospatial format readable by geopandas)
+        county_fips: Five-digit state+county FIPS prefix to keep (None keeps all)
+        min_population: Blocks with fewer residents are dropped
+
+    Returns:
+        DataFrame with block_geoid, tract_geoid, population, lat and lon,
+        or None if the file cannot be read
+    """
+    blocks_file = Path(blocks_file)
+    if not blocks_file.exists():
+        logger.error(f"Block population file not found: {blocks_file}")
+        return None
+
+    try:
+        suffix = blocks_file.suffix.lower()
+        if suffix == '.csv':
+            raw = pd.read_csv(blocks_file, dtype={name: str for name in BLOCK_COLUMN_ALIASES['block_geoid']})
+        elif suffix in COLUMNAR_SUFFIXES:
+            raw = pd.read_feather(blocks_file) if suffix != '.parquet' else pd.read_parquet(blocks_file)
+        else:
+            raw = gpd.read_file(blocks_file)
+
+        columns = {field: _find_column(raw.columns, field) for field in BLOCK_COLUMN_ALIASES}
+        if columns['lat'] is None and isinstance(raw, gpd.GeoDataFrame):
+            points = raw.geometry.to_crs(epsg=4326).representative_point()
+            raw = raw.assign(lat=points.y, lon=points.x)
+            columns['lat'], columns['lon'] = 'lat', 'lon'
+
+        missing = [field for field, column in columns.items() if column is None]
+        if missing:
+            logger.error(f"Block population file {blocks_file} has no column for: {', '.join(missing)}")
+            return None
+
+        block_geoid = raw[columns['block_geoid']].astype(str).str.strip().str.zfill(BLOCK_GEOID_WIDTH)
+        blocks = pd.DataFrame({
+            'block_geoid': block_geoid,
+            'tract_geoid': normalize_geoid(block_geoid.str[:GEOID_WIDTH]),
+            'population': pd.to_numeric(raw[columns['population']], errors='coerce').fillna(0.0),
+            'lat': pd.to_numeric(raw[columns['lat']], errors='coerce'),
+            'lon': pd.to_numeric(raw[columns['lon']], errors='coerce'),
+        })
+
+        if county_fips:
+            blocks = blocks[blocks['block_geoid'].str.startswith(county_fips)]
+        blocks = blocks[(blocks['population'] >= min_population)
+                        & blocks['lat'].notna() & blocks['lon'].notna()]
+        blocks = blocks.reset_index(drop=True)
+
+        logger.info(f"Loaded {len(blocks):,} populated blocks ({blocks['population'].sum():,.0f} residents) "
+                    f"in {blocks['tract_geoid'].nunique():,} tracts")
+        return blocks
+
+    except Exception as e:
+        logger.error(f"Error loading block population from {blocks_file}: {e}")
+        return None
+
+
+def weighted_group_percentiles(values: np.ndarray, weights: np.ndarray, groups: np.ndarray,
+                               n_groups: int, percentiles: Sequence[float]) -> np.ndarray:
+    """
+    Weighted percentiles of values within each group, without a Python loop.
+
+    Values are sorted once by (group, value). A percentile is the first
+    value whose cumulative weight within its group reaches that share of
+    the group's total weight (the inverted weighted CDF), so a 90th
+    percentile of 4 km means 90% of the group's weight is within 4 km.
+
+    Args:
+        values: Values to summarise (NaN entries are ignored)
+        weights: Non-negative weight per value
+        groups: Group code per value, in [0, n_groups)
+        n_groups: Number of groups
+        percentiles: Percentiles to compute, 0-100
+
+    Returns:
+        Array of shape (n_groups, len(percentiles)), NaN for groups
+        without weighted values
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    groups = np.asarray(groups, dtype=np.int64)
+    result = np.full((n_groups, len(percentiles)), np.nan)
+
+    keep = ~np.isnan(values) & (weights > 0) & (groups >= 0)
+    values, weights, groups = values[keep], weights[keep], groups[keep]
+    if len(values) == 0:
+        return result
+
+    order = np.lexsort((values, groups))
+    values, weights, groups = values[order], weights[order], groups[order]
+
+    cumulative = np.cumsum(weights)
+    present, starts = np.unique(groups, return_index=True)
+    ends = np.append(starts[1:], len(values))
+    before = np.where(starts > 0, cumulative[starts - 1], 0.0)
+    totals = cumulative[ends - 1] - before
+
+    for column, q in enumerate(percentiles):
+        target = before + totals * (q / 100.0)
+        positions = np.searchsorted(cumulative, target, side='left')
+        # Guard against floating-point overshoot at the end of a group
+        positions = np.clip(positions, starts, ends - 1)
+        result[present, column] = values[positions]
+
+    return result
+
+
+def population_weighted_centroids(blocks: pd.DataFrame) -> pd.DataFrame:
+    """
+    Population-weighted centroid of each tract's blocks.
+
+    Block points are averaged in California Albers so the weighting is in
+    metres, then converted back to lon/lat.
+
+    Args:
+        blocks: Blocks as returned by load_blocks
+
+    Returns:
+        DataFrame indexed by tract_geoid with pw_centroid_lat,
+        pw_centroid_lon, block_population and demand_blocks
+    """
+    xy = project_points(blocks['lat'].to_numpy(), blocks['lon'].to_numpy())
+    weights = blocks['population'].to_numpy(dtype=float)
+    codes, tracts = pd.factorize(blocks['tract_geoid'])
+
+    total = np.bincount(codes, weights=weights, minlength=len(tracts))
+    x = np.bincount(codes, weights=xy[:, 0] * weights, minlength=len(tracts)) / total
+    y = np.bincount(codes, weights=xy[:, 1] * weights, minlength=len(tracts)) / total
+    lat, lon = unproject_points(np.column_stack([x, y]))
+
+    return pd.DataFrame({
+        'pw_centroid_lat': lat,
+        'pw_centroid_lon': lon,
+        'block_population': total,
+        'demand_blocks': np.bincount(codes, minlength=len(tracts)),
+    }, index=pd.Index(tracts, name='tract_geoid'))
+
+
+class DemandPoints:
+    """Populated census blocks as demand points, projected once to California Albers."""
+
+    def __init__(self, blocks: pd.DataFrame):
+        """
+        Args:
+            blocks: Blocks with tract_geoid, population, lat and lon columns
+                (see load_blocks)
+        """
+        self.blocks = blocks.reset_index(drop=True)
+        self.xy = project_points(self.blocks['lat'].to_numpy(), self.blocks['lon'].to_numpy())
+        self.population = self.blocks['population'].to_numpy(dtype=float)
+        self._centroids: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_file(cls, blocks_file: Union[str, Path] = DEFAULT_BLOCKS_FILE,
+                  county_fips: str = LA_COUNTY_FIPS) -> Optional['DemandPoints']:
+        """Load demand points from a block population file (see load_blocks)."""
+        blocks = load_blocks(blocks_file, county_fips=county_fips)
+        if blocks is None:
+            return None
+        return cls(blocks)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def centroids(self) -> pd.DataFrame:
+        """Population-weighted tract centroids, computed once."""
+        if self._centroids is None:
+            self._centroids = population_weighted_centroids(self.blocks)
+        return self._centroids
+
+    def tract_codes(self, tract_geoids: pd.Series) -> np.ndarray:
+        """
+        Position of each demand point's tract in a list of tract GEOIDs.
+
+        Args:
+            tract_geoids: Tract GEOIDs in the order results are wanted
+
+        Returns:
+            Position per demand point, -1 for blocks in tracts not listed
+        """
+        positions = pd.Index(normalize_geoid(pd.Series(tract_geoids)))
+        return positions.get_indexer(self.blocks['tract_geoid'])
+
+    def nearest_distances(self, index: SpatialIndex, workers: int = -1) -> np.ndarray:
+        """Straight-line distance (km) from every demand point to its nearest indexed point."""
+        distances_m, _ = index.nearest(self.xy, k=1, workers=workers)
+        return distances_m[:, 0] / 1000.0
+
+    def aggregate(self, values: np.ndarray, tract_geoids: pd.Series,
+                  percentiles: Sequence[float] = DEMAND_PERCENTILES,
+                  prefix: str = 'demand') -> pd.DataFrame:
+        """
+        Summarise a per-demand-point value as population-weighted tract statistics.
+
+        Args:
+            values: One value per demand point (e.g. distance in km)
+            tract_geoids: Tract GEOIDs in the order results are wanted
+            percentiles: Percentiles of the weighted distribution to report
+            prefix: Column name prefix
+
+        Returns:
+            DataFrame with one row per listed tract: '{prefix}_mean_km',
+            '{prefix}_p{q}_km' per percentile and '{prefix}_max_km'
+            (NaN for tracts without demand points)
+        """
+        codes = self.tract_codes(tract_geoids)
+        n_tracts = len(tract_geoids)
+        values = np.asarray(values, dtype=float)
+
+        valid = (codes >= 0) & ~np.isnan(values)
+        weights = np.where(valid, self.population, 0.0)
+        group = np.where(valid, codes, 0)
+        weight_sum = np.bincount(group, weights=weights, minlength=n_tracts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.bincount(group, weights=np.where(valid, values, 0.0) * weights,
+                               minlength=n_tracts) / weight_sum
+
+        maximum = np.full(n_tracts, -np.inf)
+        np.maximum.at(maximum, codes[valid], values[valid])
+
+        result = pd.DataFrame({f'{prefix}_mean_km': np.where(weight_sum > 0, mean, np.nan)})
+        quantiles = weighted_group_percentiles(values, weights, codes, n_tracts, percentiles)
+        for column, q in enumerate(percentiles):
+            result[f'{prefix}_p{q:g}_km'] = quantiles[:, column]
+        result[f'{prefix}_max_km'] = np.where(np.isfinite(maximum), maximum, np.nan)
+        return result
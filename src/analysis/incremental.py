@@ -0,0 +1,389 @@
+"""
+Incremental access re-scoring for facility what-if edits.
+
+Keeps each tract's nearest and second-nearest facility so that opening or
+closing a single facility only touches the tracts it can affect, instead
+of rerunning AccessMetricsCalculator end to end:
+
+- Adding a facility updates tracts for which it is closer than their
+  current second-nearest (its Voronoi influence region).
+- Removing a facility updates only tracts whose nearest or second-nearest
+  it was.
+
+Distances are straight-line metres in California Albers, matching the
+calculator's default (non-network) mode.
+"""
+
+import numpy as np
+import pandas as pd
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from scipy.spatial import cKDTree
+from typing import Dict, Hashable, Optional, Set
+
+from analysis.calculate_access_metrics import (
+    ACCESS_SCORE_WEIGHTS,
+    AccessMetricsCalculator,
+    AccessScoreScale,
+    combine_access_score,
+)
+from analysis.spatial_index import project_points
+
+logger = logging.getLogger(__name__)
+
+# Distance (km) beyond which a tract counts as an access desert
+DESERT_THRESHOLD_KM = 5.0
+
+# Radius (km) of the "facilities nearby" score component
+NEARBY_RADIUS_KM = 5.0
+
+# Tracts are grouped by second-nearest distance so a new facility only
+# searches each group as far as that group can be influenced
+N_INFLUENCE_TIERS = 8
+
+# Stand-in search radius for tracts with fewer than two facilities
+UNBOUNDED_M = 1e12
+
+
+@dataclass
+class FacilityEdit:
+    """Outcome of adding or removing one facility."""
+    facility_id: Hashable
+    affected_tracts: pd.Index  # census tract labels whose metrics changed
+    desert_count: int  # tracts beyond the desert threshold after the edit
+    desert_population: float  # population of those tracts
+
+
+class IncrementalAccessModel:
+    """Nearest/second-nearest facility state supporting O(affected) edits."""
+
+    def __init__(self, tract_xy: np.ndarray, facility_xy: np.ndarray,
+                 facility_ids: np.ndarray, tract_index: pd.Index,
+                 population: Optional[np.ndarray] = None,
+                 density: Optional[np.ndarray] = None,
+                 e2sfca: Optional[np.ndarray] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 desert_threshold_km: float = DESERT_THRESHOLD_KM,
+                 nearby_radius_km: float = NEARBY_RADIUS_KM):
+        """
+        Build the baseline state from projected tract and facility points.
+
+        Args:
+            tract_xy: Projected tract points, shape (n_tracts, 2), NaN where missing
+            facility_xy: Projected facility points, shape (n_facilities, 2)
+            facility_ids: Label of each facility (used to remove it later)
+            tract_index: Census tract labels aligned with tract_xy
+            population: Population per tract (for desert population)
+            density: Population density per tract (score component)
+            e2sfca: E2SFCA accessibility per tract, held at its baseline value
+            weights: Score weights, keyed like ACCESS_SCORE_WEIGHTS
+            desert_threshold_km: Distance beyond which a tract is an access desert
+            nearby_radius_km: Radius of the facilities-nearby component
+        """
+        self.tract_index = tract_index
+        self.weights = {**ACCESS_SCORE_WEIGHTS, **(weights or {})}
+        self.desert_threshold_m = desert_threshold_km * 1000.0
+        self.nearby_radius_m = nearby_radius_km * 1000.0
+
+        # Only tracts with coordinates take part; positions below index these
+        self._rows = np.flatnonzero(~np.isnan(tract_xy).any(axis=1))
+        self._xy = tract_xy[self._rows]
+        self._tree = cKDTree(self._xy)
+
+        n_tracts = len(tract_index)
+        self._population = np.zeros(len(self._rows)) if population is None else \
+            np.nan_to_num(np.asarray(population, dtype=float)[self._rows])
+        self._density = None if density is None else np.asarray(density, dtype=float)[self._rows]
+        self._e2sfca = None if e2sfca is None else np.asarray(e2sfca, dtype=float)[self._rows]
+        self._n_tracts = n_tracts
+
+        # Baseline facilities live in a static KD-tree; closures are masked out
+        self._base_ids = np.asarray(facility_ids)
+        self._base_xy = np.asarray(facility_xy, dtype=float)
+        self._base_tree = cKDTree(self._base_xy) if len(self._base_xy) else None
+        self._base_active = np.ones(len(self._base_ids), dtype=bool)
+        self._base_pos = {fid: pos for pos, fid in enumerate(self._base_ids)}
+        self._n_closed = 0
+
+        # Facilities opened since the baseline (few, searched directly)
+        self._added_ids = []
+        self._added_xy = np.empty((0, 2))
+
+        # Nearest / second-nearest state per tract position
+        self._d1, self._id1, self._d2, self._id2 = self._two_nearest(self._xy)
+        self._served_first: Dict[Hashable, Set[int]] = defaultdict(set)
+        self._served_second: Dict[Hashable, Set[int]] = defaultdict(set)
+        for pos in range(len(self._rows)):
+            self._link(pos)
+
+        self._nearby = np.zeros(len(self._rows), dtype=np.int64)
+        if len(self._base_xy):
+            hits = self._tree.query_ball_point(self._base_xy, self.nearby_radius_m, return_sorted=False)
+            np.add.at(self._nearby, np.concatenate([np.asarray(h, dtype=np.int64) for h in hits]), 1)
+
+        # Score normalization is frozen at the baseline so edits stay comparable
+        self.scale = AccessScoreScale.from_components(
+            self._d1 / 1000.0, self._nearby, self._density, self._e2sfca
+        )
+        self._scores = self._score(np.arange(len(self._rows)))
+        self._desert = self._d1 > self.desert_threshold_m
+        self._build_tiers()
+
+        logger.info(f"Incremental access model: {len(self._rows):,} tracts, "
+                    f"{len(self._base_ids):,} facilities, {self.desert_count} deserts")
+
+    @classmethod
+    def from_calculator(cls, calculator: AccessMetricsCalculator,
+                        weights: Optional[Dict[str, float]] = None,
+                        desert_threshold_km: float = DESERT_THRESHOLD_KM) -> Optional['IncrementalAccessModel']:
+        """
+        Build a model from a loaded AccessMetricsCalculator, reusing its cached index.
+
+        Args:
+            calculator: Calculator with data loaded
+            weights: Score weights, keyed like ACCESS_SCORE_WEIGHTS
+            desert_threshold_km: Distance beyond which a tract is an access desert
+
+        Returns:
+            IncrementalAccessModel, or None if the calculator has no data
+        """
+        if calculator.facilities is None or calculator.census_tracts is None:
+            logger.error("Data not loaded. Call load_data() first.")
+            return None
+
+        if calculator.road_network is not None:
+            logger.warning("Incremental model uses straight-line distances; road network is ignored")
+
+        weights = {**ACCESS_SCORE_WEIGHTS, **(weights or {})}
+        index = calculator._facility_index()
+        census = calculator.census_tracts
+
+        density = None
+        if 'Total Population' in census.columns and 'area_sqkm' in census.columns:
+            density = (census['Total Population'] / census['area_sqkm']).to_numpy(dtype=float)
+        e2sfca = calculator.calculate_e2sfca() if weights['e2sfca'] > 0 else None
+
+        return cls(
+            tract_xy=calculator._tract_coordinates(),
+            facility_xy=index.xy if index is not None else np.empty((0, 2)),
+            facility_ids=index.labels if index is not None else np.array([], dtype=np.int64),
+            tract_index=census.index,
+            population=census['Total Population'].to_numpy() if 'Total Population' in census.columns else None,
+            density=density,
+            e2sfca=e2sfca.to_numpy() if e2sfca is not None else None,
+            weights=weights,
+            desert_threshold_km=desert_threshold_km
+        )
+
+    def _two_nearest(self, xy: np.ndarray):
+        """Distances and ids of the two nearest open facilities for each point."""
+        n = len(xy)
+        dists = [np.full((n, 0), np.inf)]
+        ids = [np.empty((n, 0), dtype=object)]
+
+        if self._base_tree is not None:
+            # Enough neighbours that two open facilities remain after masking closures
+            k = min(2 + self._n_closed, len(self._base_ids))
+            d, idx = self._base_tree.query(xy, k=list(range(1, k + 1)))
+            d = np.where(self._base_active[idx], d, np.inf)
+            dists.append(d)
+            ids.append(self._base_ids[idx].astype(object))
+
+        if len(self._added_ids):
+            d = np.linalg.norm(xy[:, None, :] - self._added_xy[None, :, :], axis=2)
+            dists.append(d)
+            ids.append(np.broadcast_to(np.array(self._added_ids, dtype=object), d.shape))
+
+        dists = np.concatenate(dists, axis=1)
+        ids = np.concatenate(ids, axis=1)
+        if dists.shape[1] < 2:
+            dists = np.pad(dists, ((0, 0), (0, 2 - dists.shape[1])), constant_values=np.inf)
+            ids = np.pad(ids, ((0, 0), (0, 2 - ids.shape[1])), constant_values=None)
+
+        order = np.argsort(dists, axis=1)[:, :2]
+        d_best = np.take_along_axis(dists, order, axis=1)
+        id_best = np.take_along_axis(ids, order, axis=1)
+        id_best[~np.isfinite(d_best)] = None
+        return d_best[:, 0].copy(), id_best[:, 0].copy(), d_best[:, 1].copy(), id_best[:, 1].copy()
+
+    def _build_tiers(self) -> None:
+        """Group tracts by second-nearest distance, one KD-tree per group."""
+        reach = np.where(np.isfinite(self._d2), self._d2, UNBOUNDED_M)
+        groups = np.array_split(np.argsort(reach), min(N_INFLUENCE_TIERS, max(len(reach), 1)))
+
+        self._tiers = []
+        self._tier_of = np.zeros(len(reach), dtype=np.int64)
+        self._tier_reach = np.zeros(len(groups))
+        for members in groups:
+            if len(members) == 0:
+                continue
+            self._tiers.append((members, cKDTree(self._xy[members])))
+            self._tier_of[members] = len(self._tiers) - 1
+            self._tier_reach[len(self._tiers) - 1] = reach[members].max()
+
+    def _link(self, pos: int) -> None:
+        if self._id1[pos] is not None:
+            self._served_first[self._id1[pos]].add(pos)
+        if self._id2[pos] is not None:
+            self._served_second[self._id2[pos]].add(pos)
+
+    def _unlink(self, pos: int) -> None:
+        self._served_first.get(self._id1[pos], set()).discard(pos)
+        self._served_second.get(self._id2[pos], set()).discard(pos)
+
+    def _score(self, positions: np.ndarray) -> np.ndarray:
+        """Composite access score for tract positions with the frozen scale."""
+        return combine_access_score(
+            self._d1[positions] / 1000.0,
+            self._nearby[positions],
+            None if self._density is None else self._density[positions],
+            self.scale,
+            self.weights,
+            None if self._e2sfca is None else self._e2sfca[positions]
+        )
+
+    def _commit(self, facility_id: Hashable, positions: np.ndarray) -> FacilityEdit:
+        """Refresh scores and desert flags for changed tract positions."""
+        positions = np.unique(positions)
+        if len(positions):
+            self._scores[positions] = self._score(positions)
+            self._desert[positions] = self._d1[positions] > self.desert_threshold_m
+
+        return FacilityEdit(
+            facility_id=facility_id,
+            affected_tracts=self.tract_index[self._rows[positions]],
+            desert_count=self.desert_count,
+            desert_population=self.desert_population
+        )
+
+    def add_facility(self, lat: float, lon: float,
+                     facility_id: Optional[Hashable] = None) -> FacilityEdit:
+        """
+        Open a facility and update the tracts inside its influence region.
+
+        Args:
+            lat: Facility latitude in degrees
+            lon: Facility longitude in degrees
+            facility_id: Label for the new facility (defaults to a fresh integer)
+
+        Returns:
+            FacilityEdit with the affected tracts and updated desert totals
+        """
+        if facility_id is None:
+            known = [fid for fid in list(self._base_ids) + self._added_ids if isinstance(fid, (int, np.integer))]
+            facility_id = int(max(known, default=-1)) + 1
+        if facility_id in self._base_pos and self._base_active[self._base_pos[facility_id]] \
+                or facility_id in self._added_ids:
+            raise ValueError(f"Facility {facility_id} is already open")
+
+        point = project_points(np.array([lat]), np.array([lon]))[0]
+        self._added_ids.append(facility_id)
+        self._added_xy = np.vstack([self._added_xy, point])
+
+        # Candidates: per tier, tracts within that tier's largest second-nearest distance
+        candidates = [members[tree.query_ball_point(point, reach)]
+                      for (members, tree), reach in zip(self._tiers, self._tier_reach)]
+        candidates = np.concatenate(candidates) if candidates else np.array([], dtype=np.int64)
+        candidates = candidates.astype(np.int64)
+
+        d = np.linalg.norm(self._xy[candidates] - point, axis=1)
+        first = candidates[d < self._d1[candidates]]
+        second = candidates[(d >= self._d1[candidates]) & (d < self._d2[candidates])]
+        d_by_pos = dict(zip(candidates, d))
+
+        for pos in first:
+            self._unlink(pos)
+            self._d2[pos], self._id2[pos] = self._d1[pos], self._id1[pos]
+            self._d1[pos], self._id1[pos] = d_by_pos[pos], facility_id
+            self._link(pos)
+        for pos in second:
+            self._unlink(pos)
+            self._d2[pos], self._id2[pos] = d_by_pos[pos], facility_id
+            self._link(pos)
+
+        nearby = np.asarray(self._tree.query_ball_point(point, self.nearby_radius_m), dtype=np.int64)
+        self._nearby[nearby] += 1
+
+        edit = self._commit(facility_id, np.concatenate([first, second, nearby]))
+        logger.info(f"Opened facility {facility_id}: {len(edit.affected_tracts)} tracts affected")
+        return edit
+
+    def remove_facility(self, facility_id: Hashable) -> FacilityEdit:
+        """
+        Close a facility and update only the tracts it served.
+
+        Args:
+            facility_id: Label of an open facility
+
+        Returns:
+            FacilityEdit with the affected tracts and updated desert totals
+        """
+        if facility_id in self._added_ids:
+            slot = self._added_ids.index(facility_id)
+            point = self._added_xy[slot]
+            del self._added_ids[slot]
+            self._added_xy = np.delete(self._added_xy, slot, axis=0)
+        elif facility_id in self._base_pos and self._base_active[self._base_pos[facility_id]]:
+            pos = self._base_pos[facility_id]
+            point = self._base_xy[pos]
+            self._base_active[pos] = False
+            self._n_closed += 1
+        else:
+            raise KeyError(f"Facility {facility_id} is not open")
+
+        served = np.array(sorted(self._served_first.pop(facility_id, set()) |
+                                 self._served_second.pop(facility_id, set())), dtype=np.int64)
+        if len(served):
+            for pos in served:
+                self._unlink(pos)
+            d1, id1, d2, id2 = self._two_nearest(self._xy[served])
+            self._d1[served], self._id1[served] = d1, id1
+            self._d2[served], self._id2[served] = d2, id2
+            for pos in served:
+                self._link(pos)
+
+            # Second-nearest distances can grow; widen the affected tiers' reach
+            reach = np.where(np.isfinite(d2), d2, UNBOUNDED_M)
+            np.maximum.at(self._tier_reach, self._tier_of[served], reach)
+
+        nearby = np.asarray(self._tree.query_ball_point(point, self.nearby_radius_m), dtype=np.int64)
+        self._nearby[nearby] -= 1
+
+        edit = self._commit(facility_id, np.concatenate([served, nearby]))
+        logger.info(f"Closed facility {facility_id}: {len(edit.affected_tracts)} tracts affected")
+        return edit
+
+    def _series(self, values: np.ndarray, fill=np.nan) -> pd.Series:
+        result = np.full(self._n_tracts, fill, dtype=float)
+        result[self._rows] = values
+        return pd.Series(result, index=self.tract_index)
+
+    @property
+    def nearest_km(self) -> pd.Series:
+        """Distance to the nearest open facility (inf if none, NaN without coordinates)."""
+        return self._series(self._d1 / 1000.0)
+
+    @property
+    def second_nearest_km(self) -> pd.Series:
+        """Distance to the second-nearest open facility."""
+        return self._series(self._d2 / 1000.0)
+
+    @property
+    def facilities_nearby(self) -> pd.Series:
+        """Open facilities within the nearby radius of each tract."""
+        return self._series(self._nearby, fill=0)
+
+    def access_scores(self) -> pd.Series:
+        """Composite access scores (0-100) on the baseline normalization."""
+        return self._series(self._scores)
+
+    @property
+    def desert_count(self) -> int:
+        """Number of tracts farther than the desert threshold from any facility."""
+        return int(self._desert.sum())
+
+    @property
+    def desert_population(self) -> float:
+        """Population living in access desert tracts."""
+        return float(self._population[self._desert].sum())
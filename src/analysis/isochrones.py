@@ -0,0 +1,308 @@
+"""
+Travel-time catchments (isochrones) for facility sites.
+
+A fixed-radius circle treats a site across a freeway or at the end of a
+canyon road the same as one on a grid of through streets. An isochrone
+instead covers the area whose residents can reach the site within a time
+budget over the road graph:
+
+1. The site is snapped to its nearest road node, and the connector leg
+   is charged against the budget.
+2. One bounded Dijkstra pass on the reversed graph (travel *to* the site,
+   respecting one-way streets) finds every node within the largest
+   budget; smaller budgets are subsets of the same result.
+3. The reachable nodes are wrapped in a concave hull and buffered by how
+   far residents are assumed to live from the nearest road. Each polygon
+   is unioned with the smaller ones so catchments nest.
+
+Polygons are cached on disk per (road graph, site, mode, threshold), with
+least recently used entries evicted above a size limit, so the recommendation
+and map stages only route each site once. Catchment population comes from
+areal interpolation of tract populations (see analysis.areal_interpolation).
+"""
+
+import hashlib
+import json
+import os
+import time
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.sparse.csgraph import dijkstra
+
+from analysis.areal_interpolation import ArealInterpolator
+from analysis.road_network import DEFAULT_ROAD_NETWORK_FILE, RoadNetwork
+from analysis.spatial_index import project_points, unproject_points
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ISOCHRONE_MINUTES = (10, 20, 30)
+
+DEFAULT_STORE_DIR = Path('outputs/.cache/isochrones')
+
+DEFAULT_MAX_ENTRIES = 5000
+
+# Share of max_entries freed by each eviction, so the full directory scan
+# only runs once per that many new polygons
+EVICT_FRACTION = 0.1
+
+# Concave hull ratio: 0 follows the reachable nodes tightly, 1 is the convex hull
+CONCAVE_RATIO = 0.3
+
+# Residents within this distance of a reached road node count as reached
+ROAD_BUFFER_M = 300.0
+
+# Bump to invalidate polygons cached by an older version
+ISOCHRONE_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class TravelMode:
+    """How travel cost is measured on the road graph."""
+    weight: str  # RoadNetwork weight: 'travel_time' (seconds) or 'length' (metres)
+    connector_speed_kph: float  # Speed between the site and its snapped road node
+    speed_kph: Optional[float] = None  # Converts 'length' weights to time
+
+    def budget(self, seconds: np.ndarray) -> np.ndarray:
+        """Time budgets in the units of this mode's graph weight."""
+        seconds = np.asarray(seconds, dtype=float)
+        if self.weight == 'length':
+            return seconds * self.speed_kph / 3.6
+        return seconds
+
+
+TRAVEL_MODES = {
+    'drive': TravelMode(weight='travel_time', connector_speed_kph=20.0),
+    'walk': TravelMode(weight='length', connector_speed_kph=5.0, speed_kph=5.0),
+}
+
+
+class IsochroneStore:
+    """On-disk cache of catchment polygons as WKB, evicted least recently used first."""
+
+    def __init__(self, store_dir: Union[str, Path] = DEFAULT_STORE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            store_dir: Cache directory (created if missing)
+            max_entries: Polygons kept before the least recently used are evicted
+        """
+        self.store_dir = Path(store_dir)
+        self.max_entries = max_entries
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        # Polygons on disk as of the last count, plus those this store added since
+        self._entries: Optional[int] = None
+
+    @staticmethod
+    def key(network_digest: str, lat: float, lon: float, mode: str, minutes: float,
+            ratio: float, buffer_m: float) -> str:
+        """Cache key for one site, mode and threshold on one road graph."""
+        material = json.dumps({
+            'format': ISOCHRONE_FORMAT,
+            'network': network_digest,
+            # ~10 cm, so the same site read back from CSV hits the cache
+            'site': [round(float(lat), 6), round(float(lon), 6)],
+            'mode': mode,
+            'minutes': float(minutes),
+            'ratio': ratio,
+            'buffer_m': buffer_m
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.store_dir / key[:2] / f'{key}.wkb'
+
+    def get(self, key: str) -> Optional[shapely.Geometry]:
+        """Cached polygon, or None on a miss. A hit marks the entry as recently used."""
+        path = self._path(key)
+        try:
+            polygon = shapely.from_wkb(path.read_bytes())
+        except (FileNotFoundError, shapely.errors.GEOSException):
+            return None
+        now = time.time()
+        os.utime(path, (now, now))
+        return polygon
+
+    def put(self, key: str, polygon: shapely.Geometry) -> None:
+        """Store a polygon under its key, evicting once the store holds more than max_entries."""
+        path = self._path(key)
+        if self._entries is None:
+            self._entries = len(self)
+        if not path.exists():
+            self._entries += 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f'.tmp{os.getpid()}')
+        tmp.write_bytes(shapely.to_wkb(polygon))
+        tmp.replace(path)
+        if self._entries > self.max_entries:
+            self.evict()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.store_dir.glob('*/*.wkb'))
+
+    def evict(self) -> int:
+        """
+        Delete the least recently used polygons once there are more than max_entries.
+
+        Down to EVICT_FRACTION below the limit, so put() does not rescan
+        the store for every new polygon once it is full.
+
+        Returns:
+            Number of polygons deleted
+        """
+        entries = sorted(self.store_dir.glob('*/*.wkb'), key=lambda path: path.stat().st_mtime)
+        keep = self.max_entries - int(self.max_entries * EVICT_FRACTION)
+        stale = entries[:len(entries) - keep] if len(entries) > self.max_entries else []
+        for path in stale:
+            path.unlink(missing_ok=True)
+        self._entries = len(entries) - len(stale)
+        if stale:
+            logger.info(f"Evicted {len(stale)} least recently used isochrones")
+        return len(stale)
+
+
+class IsochroneEngine:
+    """Travel-time catchment polygons over a road graph, cached per site."""
+
+    def __init__(self, network: RoadNetwork, store: Optional[IsochroneStore] = None,
+                 ratio: float = CONCAVE_RATIO, buffer_m: float = ROAD_BUFFER_M):
+        """
+        Args:
+            network: Road graph to route over
+            store: Polygon cache (None computes every request)
+            ratio: Concave hull ratio (0-1)
+            buffer_m: Distance from reached road nodes counted as reached
+        """
+        self.network = network
+        self.store = store
+        self.ratio = ratio
+        self.buffer_m = buffer_m
+
+    def isochrones(self, lat: float, lon: float,
+                   minutes: Sequence[float] = DEFAULT_ISOCHRONE_MINUTES,
+                   mode: str = 'drive') -> Dict[float, shapely.Geometry]:
+        """
+        Catchment polygons for one site, from the cache where possible.
+
+        Args:
+            lat: Site latitude
+            lon: Site longitude
+            minutes: Travel-time thresholds in minutes
+            mode: Key of TRAVEL_MODES
+
+        Returns:
+            Polygon in EPSG:4326 per threshold
+        """
+        if mode not in TRAVEL_MODES:
+            raise ValueError(f"Unknown travel mode '{mode}', expected one of {sorted(TRAVEL_MODES)}")
+
+        keys = {m: IsochroneStore.key(self.network.digest, lat, lon, mode, m, self.ratio, self.buffer_m)
+                for m in minutes}
+        polygons = {}
+        if self.store is not None:
+            for m, key in keys.items():
+                polygon = self.store.get(key)
+                if polygon is not None:
+                    polygons[m] = polygon
+
+        missing = [m for m in minutes if m not in polygons]
+        if missing:
+            computed = self._compute(lat, lon, missing, TRAVEL_MODES[mode])
+            polygons.update(computed)
+            if self.store is not None:
+                for m, polygon in computed.items():
+                    self.store.put(keys[m], polygon)
+
+        return {m: polygons[m] for m in minutes}
+
+    def _compute(self, lat: float, lon: float, minutes: Sequence[float],
+                 mode: TravelMode) -> Dict[float, shapely.Geometry]:
+        """Route one site and build its polygons (see module docstring)."""
+        site_xy = project_points(np.array([lat]), np.array([lon]))
+        nodes, snap_m = self.network.snap_projected(site_xy)
+        site = shapely.points(site_xy[0])
+
+        thresholds = np.sort(np.asarray(minutes, dtype=float))
+        connector_s = snap_m[0] / (mode.connector_speed_kph / 3.6) if nodes[0] >= 0 else np.inf
+        budgets = mode.budget(np.maximum(thresholds * 60.0 - connector_s, 0.0))
+
+        if nodes[0] >= 0 and budgets[-1] > 0:
+            costs = dijkstra(self.network.graph(mode.weight, reverse=True), directed=True,
+                             indices=nodes[0], limit=budgets[-1])
+        else:
+            costs = np.full(self.network.n_nodes, np.inf)
+
+        polygons = {}
+        previous = site.buffer(self.buffer_m)
+        for threshold, budget in zip(thresholds, budgets):
+            reached = self.network.node_xy[costs <= budget] if budget > 0 else np.empty((0, 2))
+            if len(reached):
+                hull = shapely.concave_hull(shapely.multipoints(np.vstack([reached, site_xy])), ratio=self.ratio)
+                previous = shapely.union(previous, hull.buffer(self.buffer_m))
+            polygons[float(threshold)] = _to_wgs84(previous)
+
+        return {m: polygons[float(m)] for m in minutes}
+
+
+def load_isochrone_engine(road_network_file: Union[str, Path] = DEFAULT_ROAD_NETWORK_FILE,
+                          store_dir: Union[str, Path] = DEFAULT_STORE_DIR) -> Optional[IsochroneEngine]:
+    """
+    Isochrone engine over a local road graph with the default polygon cache.
+
+    Args:
+        road_network_file: Road graph extract (see RoadNetwork.from_file)
+        store_dir: Polygon cache directory
+
+    Returns:
+        IsochroneEngine, or None if the road graph is not available
+    """
+    road_network_file = Path(road_network_file)
+    if not road_network_file.exists():
+        logger.info(f"No road graph at {road_network_file}, using fixed-radius service areas")
+        return None
+    return IsochroneEngine(RoadNetwork.from_file(road_network_file), IsochroneStore(store_dir))
+
+
+def _to_wgs84(geometry: shapely.Geometry) -> shapely.Geometry:
+    """Reproject a California Albers geometry to EPSG:4326."""
+    def transform(xy):
+        lat, lon = unproject_points(xy)
+        return np.column_stack([lon, lat])
+    return shapely.transform(geometry, transform)
+
+
+def catchment_column(minutes: float) -> str:
+    """Column name for a catchment population, e.g. 'catchment_population_10min'."""
+    return f"catchment_population_{minutes:g}min"
+
+
+def site_catchments(engine: IsochroneEngine, population: ArealInterpolator,
+                    lat: Sequence[float], lon: Sequence[float],
+                    minutes: Sequence[float] = DEFAULT_ISOCHRONE_MINUTES,
+                    mode: str = 'drive') -> pd.DataFrame:
+    """
+    Catchment populations for several sites.
+
+    Args:
+        engine: Isochrone engine
+        population: Tract populations to count
+        lat: Site latitudes
+        lon: Site longitudes
+        minutes: Travel-time thresholds in minutes
+        mode: Key of TRAVEL_MODES
+
+    Returns:
+        DataFrame with one catchment_population_{m}min column per threshold
+    """
+    polygons: List[shapely.Geometry] = []
+    for site_lat, site_lon in zip(lat, lon):
+        catchments = engine.isochrones(site_lat, site_lon, minutes, mode)
+        polygons.extend(catchments[m] for m in minutes)
+
+    counts = population.population_within(polygons).reshape(-1, len(minutes))
+    return pd.DataFrame({catchment_column(m): counts[:, i].round().astype(int) for i, m in enumerate(minutes)})
@@ -0,0 +1,88 @@
+"""
+Per-run memoization for access metric calculations.
+
+Holds spatial indexes, distance series and counts so that one report run
+builds each KD-tree once, no matter how many metrics reuse it.
+"""
+
+import pandas as pd
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_frames(*frames: Optional[pd.DataFrame]) -> str:
+    """
+    Compute a content fingerprint for one or more DataFrames.
+
+    Args:
+        frames: DataFrames to fingerprint (None entries are allowed)
+
+    Returns:
+        Hex digest that changes whenever any frame's values or index change
+    """
+    parts = []
+    for df in frames:
+        if df is None:
+            parts.append('none')
+        else:
+            row_hash = int(pd.util.hash_pandas_object(df, index=True).sum())
+            column_hash = int(pd.util.hash_pandas_object(pd.Index(df.columns.astype(str))).sum())
+            parts.append(f"{len(df)}:{row_hash & 0xFFFFFFFFFFFFFFFF:x}:{column_hash & 0xFFFFFFFFFFFFFFFF:x}")
+    return '|'.join(parts)
+
+
+class MetricCache:
+    """Memoize metric results by kind and key, with hit/miss counters."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._store: Dict[Tuple[str, Hashable], Any] = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get_or_compute(self, kind: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for (kind, key), computing it on a miss.
+
+        Results of None are not cached so failed calculations are retried.
+
+        Args:
+            kind: Metric family, e.g. 'index' or 'nearest'
+            key: Hashable key identifying the inputs within that family
+            compute: Zero-argument callable producing the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        store_key = (kind, key)
+        if store_key in self._store:
+            self.hits[kind] += 1
+            return self._store[store_key]
+
+        self.misses[kind] += 1
+        value = compute()
+        if value is not None:
+            self._store[store_key] = value
+        return value
+
+    def clear(self) -> None:
+        """Drop all cached values (counters are kept)."""
+        if self._store:
+            logger.info(f"Clearing {len(self._store)} cached metric results")
+        self._store.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Summarize cache activity per metric family.
+
+        Returns:
+            Dictionary mapping kind to {'hits': int, 'misses': int}
+        """
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return {kind: {'hits': self.hits[kind], 'misses': self.misses[kind]} for kind in kinds}
+
+    def __len__(self) -> int:
+        return len(self._store)
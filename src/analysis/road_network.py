@@ -0,0 +1,374 @@
+"""
+Road-network travel-time engine for healthcare access metrics.
+
+Loads a local road graph extract (OSMnx-style GraphML, or an OSM PBF file
+when pyrosm is installed) into compact CSR adjacency matrices and answers
+nearest-facility travel costs for every node with one multi-source
+Dijkstra pass.
+"""
+
+import hashlib
+import numpy as np
+import pandas as pd
+import logging
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from typing import Dict, Optional, Tuple, Union
+
+from analysis.spatial_index import project_points
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROAD_NETWORK_FILE = Path('data/external/la_county_roads.graphml')
+
+# Speed assumed for edges without a travel time or speed attribute
+DEFAULT_SPEED_KPH = 40.0
+
+# Smallest edge weight kept, so zero-length edges stay in the sparse graph
+MIN_EDGE_WEIGHT = 1e-6
+
+
+class RoadNetwork:
+    """Directed road graph stored as CSR adjacency matrices."""
+
+    WEIGHTS = ('length', 'travel_time')
+
+    def __init__(self, node_lat: np.ndarray, node_lon: np.ndarray,
+                 edge_from: np.ndarray, edge_to: np.ndarray,
+                 length_m: np.ndarray, travel_time_s: Optional[np.ndarray] = None,
+                 node_ids: Optional[np.ndarray] = None):
+        """
+        Build the graph from node coordinates and an edge list.
+
+        Args:
+            node_lat: Node latitudes in degrees
+            node_lon: Node longitudes in degrees
+            edge_from: Source node position of each directed edge
+            edge_to: Target node position of each directed edge
+            length_m: Edge lengths in metres
+            travel_time_s: Edge travel times in seconds (derived from
+                DEFAULT_SPEED_KPH when omitted)
+            node_ids: Original node identifiers (defaults to positions)
+        """
+        n_nodes = len(node_lat)
+        self.node_ids = np.asarray(node_ids) if node_ids is not None else np.arange(n_nodes)
+        self.node_xy = project_points(node_lat, node_lon)
+
+        length_m = np.asarray(length_m, dtype=float)
+        if travel_time_s is None:
+            travel_time_s = length_m / (DEFAULT_SPEED_KPH / 3.6)
+
+        edges = pd.DataFrame({
+            'u': np.asarray(edge_from, dtype=np.int64),
+            'v': np.asarray(edge_to, dtype=np.int64),
+            'length': length_m,
+            'travel_time': np.asarray(travel_time_s, dtype=float),
+        })
+        edges = edges[edges['u'] != edges['v']]
+
+        # Parallel edges collapse to their cheapest option per weight
+        self._graphs: Dict[str, csr_matrix] = {}
+        for weight in self.WEIGHTS:
+            cheapest = edges.groupby(['u', 'v'], sort=False)[weight].min().reset_index()
+            self._graphs[weight] = csr_matrix(
+                (np.maximum(cheapest[weight].to_numpy(), MIN_EDGE_WEIGHT),
+                 (cheapest['u'].to_numpy(), cheapest['v'].to_numpy())),
+                shape=(n_nodes, n_nodes)
+            )
+        self._reversed: Dict[str, csr_matrix] = {}
+
+        # Length of the fastest edge between each node pair, for distances along time-optimal routes
+        fastest = edges.sort_values('travel_time', kind='stable').drop_duplicates(['u', 'v'])
+        self._fastest_length = csr_matrix(
+            (fastest['length'].to_numpy(), (fastest['u'].to_numpy(), fastest['v'].to_numpy())),
+            shape=(n_nodes, n_nodes)
+        )
+        self._node_tree = cKDTree(self.node_xy)
+        self._digest: Optional[str] = None
+
+        logger.info(f"Road network: {n_nodes:,} nodes, {self._graphs['length'].nnz:,} directed edges")
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the node coordinates and edge weights, for keying derived results."""
+        if self._digest is None:
+            digest = hashlib.sha256(np.ascontiguousarray(self.node_xy).tobytes())
+            for weight in self.WEIGHTS:
+                graph = self._graphs[weight]
+                for array in (graph.indptr, graph.indices, graph.data):
+                    digest.update(np.ascontiguousarray(array).tobytes())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def graph(self, weight: str = 'travel_time', reverse: bool = False) -> csr_matrix:
+        """
+        Get the CSR adjacency matrix for a weight.
+
+        Args:
+            weight: 'length' (metres) or 'travel_time' (seconds)
+            reverse: Return the transposed graph (edges pointing backwards)
+
+        Returns:
+            Sparse adjacency matrix with edge weights
+        """
+        if weight not in self._graphs:
+            raise ValueError(f"Unknown weight '{weight}', expected one of {self.WEIGHTS}")
+        if not reverse:
+            return self._graphs[weight]
+        if weight not in self._reversed:
+            self._reversed[weight] = self._graphs[weight].T.tocsr()
+        return self._reversed[weight]
+
+    def snap(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Snap points to their nearest graph node with a KD-tree.
+
+        Args:
+            lat: Point latitudes in degrees
+            lon: Point longitudes in degrees
+
+        Returns:
+            Tuple of (node positions, snap distances in metres); points with
+            missing coordinates get node -1 and distance NaN
+        """
+        return self.snap_projected(project_points(lat, lon))
+
+    def snap_projected(self, xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Snap points already projected to California Albers (see snap)."""
+        nodes = np.full(len(xy), -1, dtype=np.int64)
+        snap_m = np.full(len(xy), np.nan)
+
+        valid = ~np.isnan(xy).any(axis=1)
+        if valid.any():
+            snap_m[valid], nodes[valid] = self._node_tree.query(xy[valid], workers=-1)
+        return nodes, snap_m
+
+    def nearest_source_costs(self, source_nodes: np.ndarray, weight: str = 'travel_time',
+                             limit: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cost from every node to its cheapest source in one multi-source Dijkstra.
+
+        Runs on the reversed graph so costs are for travelling *to* the
+        sources (e.g. residents driving to a facility), respecting one-way
+        streets.
+
+        Args:
+            source_nodes: Node positions of the sources (duplicates allowed)
+            weight: 'length' (metres) or 'travel_time' (seconds)
+            limit: Stop expanding beyond this cost
+
+        Returns:
+            Tuple of (cost per node, source node reached per node); unreachable
+            nodes get inf / -1
+        """
+        sources = np.unique(np.asarray(source_nodes, dtype=np.int64))
+        sources = sources[sources >= 0]
+        if len(sources) == 0:
+            return np.full(self.n_nodes, np.inf), np.full(self.n_nodes, -1, dtype=np.int64)
+
+        costs, _, reached_from = dijkstra(
+            self.graph(weight, reverse=True),
+            directed=True,
+            indices=sources,
+            min_only=True,
+            return_predecessors=True,
+            limit=limit
+        )
+        return costs, reached_from.astype(np.int64)
+
+    def nearest_source_routes(self, source_nodes: np.ndarray,
+                              limit: float = np.inf) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Travel time from every node to its fastest-reached source, and the road length of that route.
+
+        Unlike running nearest_source_costs once per weight, the length is
+        measured along the same time-optimal route, so both describe the
+        same source. Lengths are summed up the Dijkstra predecessor tree by
+        pointer jumping (log of the tree depth vectorised steps).
+
+        Args:
+            source_nodes: Node positions of the sources (duplicates allowed)
+            limit: Stop expanding beyond this travel time (seconds)
+
+        Returns:
+            Tuple of (travel time in seconds, route length in metres, source
+            node reached) per node; unreachable nodes get inf / inf / -1
+        """
+        sources = np.unique(np.asarray(source_nodes, dtype=np.int64))
+        sources = sources[sources >= 0]
+        if len(sources) == 0:
+            unreachable = np.full(self.n_nodes, np.inf)
+            return unreachable, unreachable.copy(), np.full(self.n_nodes, -1, dtype=np.int64)
+
+        costs, predecessors, reached_from = dijkstra(
+            self.graph('travel_time', reverse=True),
+            directed=True,
+            indices=sources,
+            min_only=True,
+            return_predecessors=True,
+            limit=limit
+        )
+
+        # A predecessor p of v on the reversed graph is the next node on v's route: edge v -> p
+        pointer = np.where(predecessors >= 0, predecessors, -1).astype(np.int64)
+        lengths = np.zeros(self.n_nodes)
+        hops = np.flatnonzero(pointer >= 0)
+        lengths[hops] = np.asarray(self._fastest_length[hops, pointer[hops]]).ravel()
+
+        active = hops
+        while len(active):
+            lengths[active] += lengths[pointer[active]]
+            pointer[active] = pointer[pointer[active]]
+            active = active[pointer[active] >= 0]
+
+        lengths[~np.isfinite(costs)] = np.inf
+        return costs, lengths, reached_from.astype(np.int64)
+
+    @classmethod
+    def from_graphml(cls, path: Union[str, Path]) -> 'RoadNetwork':
+        """
+        Load an OSMnx-style GraphML extract.
+
+        Nodes need 'x' (longitude) and 'y' (latitude) attributes; edges use
+        'length' (metres) and, when present, 'travel_time' (seconds) or
+        'speed_kph'. Undirected graphs get edges in both directions.
+
+        Args:
+            path: Path to the .graphml file
+
+        Returns:
+            RoadNetwork built from the file
+        """
+        path = Path(path)
+        logger.info(f"Loading road graph from {path}...")
+
+        keys = {}
+        directed = True
+        node_index = {}
+        node_x, node_y = [], []
+        edges = {'u': [], 'v': [], 'length': [], 'travel_time': [], 'speed_kph': []}
+
+        def local(tag):
+            return tag.rsplit('}', 1)[-1]
+
+        def float_or_nan(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return np.nan
+
+        for _, elem in ET.iterparse(str(path), events=('end',)):
+            tag = local(elem.tag)
+            if tag == 'key':
+                keys[elem.get('id')] = elem.get('attr.name')
+            elif tag == 'graph':
+                directed = elem.get('edgedefault', 'directed') == 'directed'
+            elif tag == 'node':
+                data = {keys.get(d.get('key')): d.text for d in elem if local(d.tag) == 'data'}
+                node_index[elem.get('id')] = len(node_x)
+                node_x.append(float_or_nan(data.get('x')))
+                node_y.append(float_or_nan(data.get('y')))
+                elem.clear()
+            elif tag == 'edge':
+                data = {keys.get(d.get('key')): d.text for d in elem if local(d.tag) == 'data'}
+                edges['u'].append(elem.get('source'))
+                edges['v'].append(elem.get('target'))
+                edges['length'].append(float_or_nan(data.get('length')))
+                edges['travel_time'].append(float_or_nan(data.get('travel_time')))
+                edges['speed_kph'].append(float_or_nan(data.get('speed_kph')))
+                elem.clear()
+
+        edge_df = pd.DataFrame(edges)
+        edge_df['u'] = edge_df['u'].map(node_index)
+        edge_df['v'] = edge_df['v'].map(node_index)
+        edge_df = edge_df.dropna(subset=['u', 'v'])
+
+        node_ids = np.array(list(node_index.keys()))
+        return cls._from_edge_frame(np.array(node_y), np.array(node_x), edge_df, directed, node_ids)
+
+    @classmethod
+    def from_osm_pbf(cls, path: Union[str, Path], network_type: str = 'driving') -> 'RoadNetwork':
+        """
+        Load a road network from an OSM PBF extract (requires pyrosm).
+
+        Args:
+            path: Path to the .osm.pbf file
+            network_type: pyrosm network type ('driving', 'walking', ...)
+
+        Returns:
+            RoadNetwork built from the extract
+        """
+        try:
+            from pyrosm import OSM
+        except ImportError as e:
+            raise ImportError("Reading OSM PBF files requires pyrosm: pip install pyrosm") from e
+
+        logger.info(f"Loading {network_type} network from {path}...")
+        nodes, edges = OSM(str(path)).get_network(nodes=True, network_type=network_type)
+
+        node_index = pd.Series(np.arange(len(nodes)), index=nodes['id'].to_numpy())
+        if 'maxspeed' in edges.columns:
+            speed_kph = pd.to_numeric(edges['maxspeed'], errors='coerce')
+        else:
+            speed_kph = np.nan
+        edge_df = pd.DataFrame({
+            'u': edges['u'].map(node_index),
+            'v': edges['v'].map(node_index),
+            'length': edges['length'].astype(float),
+            'travel_time': np.nan,
+            'speed_kph': speed_kph,
+        })
+
+        # pyrosm returns one row per way segment; add reverse edges for two-way streets
+        if 'oneway' in edges.columns:
+            oneway = edges['oneway'].isin(['yes', 'true', '1'])
+        else:
+            oneway = pd.Series(False, index=edges.index)
+        reverse = edge_df[~oneway].rename(columns={'u': 'v', 'v': 'u'})
+        edge_df = pd.concat([edge_df, reverse], ignore_index=True).dropna(subset=['u', 'v'])
+
+        return cls._from_edge_frame(nodes['lat'].to_numpy(), nodes['lon'].to_numpy(),
+                                    edge_df, True, nodes['id'].to_numpy())
+
+    @classmethod
+    def _from_edge_frame(cls, node_lat: np.ndarray, node_lon: np.ndarray,
+                         edge_df: pd.DataFrame, directed: bool,
+                         node_ids: np.ndarray) -> 'RoadNetwork':
+        """Fill missing edge attributes and build the network."""
+        if not directed:
+            reverse = edge_df.rename(columns={'u': 'v', 'v': 'u'})
+            edge_df = pd.concat([edge_df, reverse], ignore_index=True)
+
+        u = edge_df['u'].to_numpy(dtype=np.int64)
+        v = edge_df['v'].to_numpy(dtype=np.int64)
+
+        # Fall back to straight-line length between the edge's end nodes
+        length = edge_df['length'].to_numpy(dtype=float, copy=True)
+        missing = np.isnan(length)
+        if missing.any():
+            xy = project_points(node_lat, node_lon)
+            length[missing] = np.linalg.norm(xy[u[missing]] - xy[v[missing]], axis=1)
+
+        speed_kph = edge_df['speed_kph'].fillna(DEFAULT_SPEED_KPH).to_numpy(dtype=float)
+        travel_time = edge_df['travel_time'].to_numpy(dtype=float, copy=True)
+        missing = np.isnan(travel_time)
+        travel_time[missing] = length[missing] / (speed_kph[missing] / 3.6)
+
+        return cls(node_lat, node_lon, u, v, length, travel_time, node_ids=node_ids)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'RoadNetwork':
+        """Load a road network, choosing the reader from the file extension."""
+        path = Path(path)
+        if path.name.endswith('.pbf'):
+            return cls.from_osm_pbf(path)
+        if path.suffix == '.graphml':
+            return cls.from_graphml(path)
+        raise ValueError(f"Unsupported road network format: {path}")
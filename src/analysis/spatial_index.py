@@ -0,0 +1,245 @@
+"""
+Projected-coordinate spatial index for facility and tract queries.
+
+Points are projected once into California Albers (EPSG:3310), the same
+equal-area CRS used for tract areas in fix_census_merge, so KD-tree
+distances are true metres instead of scaled lat/lon degrees.
+"""
+
+import numpy as np
+import pandas as pd
+import logging
+from pyproj import Transformer
+from scipy.spatial import cKDTree
+from typing import Optional, Tuple, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# California Albers (NAD83) - equal-area projection in metres
+CA_ALBERS_EPSG = 3310
+
+_TO_ALBERS = Transformer.from_crs(4326, CA_ALBERS_EPSG, always_xy=True)
+_FROM_ALBERS = Transformer.from_crs(CA_ALBERS_EPSG, 4326, always_xy=True)
+
+
+def project_points(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Project WGS84 lat/lon arrays into California Albers metres.
+
+    Args:
+        lat: Latitudes in degrees
+        lon: Longitudes in degrees
+
+    Returns:
+        Array of shape (n, 2) with [x, y] rows in metres, NaN where input is missing
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    x, y = _TO_ALBERS.transform(lon, lat)
+    return np.column_stack([x, y])
+
+
+def unproject_points(xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert California Albers metres back to WGS84.
+
+    Args:
+        xy: Projected points, shape (n, 2)
+
+    Returns:
+        Tuple of (latitudes, longitudes) in degrees
+    """
+    xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+    lon, lat = _FROM_ALBERS.transform(xy[:, 0], xy[:, 1])
+    return np.asarray(lat), np.asarray(lon)
+
+
+class SpatialIndex:
+    """KD-tree over points projected to California Albers (metres)."""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray,
+                 labels: Optional[np.ndarray] = None):
+        """
+        Project the points and build the tree.
+
+        Args:
+            lat: Point latitudes in degrees
+            lon: Point longitudes in degrees
+            labels: Label returned for each point (defaults to its position)
+        """
+        xy = project_points(lat, lon)
+        valid = ~np.isnan(xy).any(axis=1)
+        if not valid.all():
+            logger.warning(f"Dropping {int((~valid).sum())} points without coordinates from spatial index")
+
+        self.xy = xy[valid]
+        if labels is None:
+            labels = np.arange(len(xy))
+        self.labels = np.asarray(labels)[valid]
+        self.tree = cKDTree(self.xy)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, lat_col: str = 'lat',
+                   lon_col: str = 'lon') -> 'SpatialIndex':
+        """Build an index over a DataFrame, labelling points by its index."""
+        return cls(df[lat_col].to_numpy(), df[lon_col].to_numpy(), labels=df.index.to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def nearest(self, xy: np.ndarray, k: int = 1,
+                workers: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest indexed points for each query point.
+
+        Args:
+            xy: Projected query points, shape (n, 2)
+            k: Number of neighbours (clamped to the index size)
+            workers: Worker threads for the query (-1 uses all cores)
+
+        Returns:
+            Tuple of (distances in metres, labels), each of shape (n, k).
+            Rows for query points with NaN coordinates hold NaN / -1.
+        """
+        k = max(1, min(k, len(self)))
+        distances = np.full((len(xy), k), np.nan)
+        labels = np.full((len(xy), k), -1, dtype=np.int64)
+
+        valid = ~np.isnan(xy).any(axis=1)
+        if valid.any() and len(self) > 0:
+            dist, idx = self.tree.query(xy[valid], k=list(range(1, k + 1)), workers=workers)
+            distances[valid] = dist
+            labels[valid] = self.labels[idx]
+
+        return distances, labels
+
+    def count_within(self, xy: np.ndarray, radius_m: float, workers: int = -1) -> np.ndarray:
+        """
+        Count indexed points within an exact radius of each query point.
+
+        Args:
+            xy: Projected query points, shape (n, 2)
+            radius_m: Search radius in metres
+            workers: Worker threads for the query (-1 uses all cores)
+
+        Returns:
+            Integer counts per query point (0 for points with NaN coordinates)
+        """
+        counts = np.zeros(len(xy), dtype=np.int64)
+        valid = ~np.isnan(xy).any(axis=1)
+        if valid.any() and len(self) > 0:
+            counts[valid] = self.tree.query_ball_point(
+                xy[valid], radius_m, workers=workers, return_length=True
+            )
+        return counts
+
+    def query_radius(self, xy: np.ndarray, radius_m: float) -> List[np.ndarray]:
+        """
+        Return the labels of indexed points within a radius of each query point.
+
+        Args:
+            xy: Projected query points, shape (n, 2)
+            radius_m: Search radius in metres
+
+        Returns:
+            List with one label array per query point
+        """
+        results = [np.array([], dtype=self.labels.dtype) for _ in range(len(xy))]
+        valid = ~np.isnan(xy).any(axis=1)
+        if valid.any() and len(self) > 0:
+            hits = self.tree.query_ball_point(xy[valid], radius_m)
+            for row, hit in zip(np.flatnonzero(valid), hits):
+                results[row] = self.labels[hit]
+        return results
+
+    def count_within_radii(self, xy: np.ndarray, radii_m: Sequence[float],
+                           groups: Optional[np.ndarray] = None,
+                           n_groups: Optional[int] = None,
+                           chunk_size: int = 2048) -> np.ndarray:
+        """
+        Count indexed points within several radii of each query point in one pass.
+
+        Query points are indexed in their own KD-tree and joined to this index
+        with a dual-tree traversal at the largest radius. Each pair's distance
+        is bucketed against the sorted radii once, and a cumulative sum over
+        buckets yields every radius, so no per-point index lists are built.
+
+        Args:
+            xy: Projected query points, shape (n, 2)
+            radii_m: Search radii in metres
+            groups: Optional integer group code per indexed point (e.g. facility category)
+            n_groups: Number of distinct group codes (defaults to max code + 1)
+            chunk_size: Query points joined per traversal, bounding pair memory
+
+        Returns:
+            Integer counts of shape (n, len(radii_m)), or (n, n_groups, len(radii_m))
+            when groups are given. Points with NaN coordinates count 0.
+        """
+        radii = np.asarray(radii_m, dtype=float)
+        order = np.argsort(radii)
+        sorted_radii = radii[order]
+
+        if groups is None:
+            codes = np.zeros(len(self), dtype=np.int64)
+            n_groups = 1
+        else:
+            codes = np.asarray(groups, dtype=np.int64)
+            n_groups = n_groups if n_groups is not None else int(codes.max(initial=-1)) + 1
+
+        n_bins = len(radii)
+        counts = np.zeros((len(xy), n_groups, n_bins), dtype=np.int64)
+        valid_rows = np.flatnonzero(~np.isnan(xy).any(axis=1))
+
+        if len(valid_rows) and len(self) and n_bins:
+            for start in range(0, len(valid_rows), chunk_size):
+                rows = valid_rows[start:start + chunk_size]
+                pairs = cKDTree(xy[rows]).sparse_distance_matrix(
+                    self.tree, sorted_radii[-1], output_type='ndarray'
+                )
+                # Smallest radius bucket each pair falls inside
+                bucket = np.searchsorted(sorted_radii, pairs['v'], side='left')
+                flat = (pairs['i'] * n_groups + codes[pairs['j']]) * n_bins + bucket
+                binned = np.bincount(flat, minlength=len(rows) * n_groups * n_bins)
+                counts[rows] = binned.reshape(len(rows), n_groups, n_bins)
+
+            counts = np.cumsum(counts, axis=2)
+
+        # Restore the caller's radius order
+        unsorted = np.empty_like(counts)
+        unsorted[:, :, order] = counts
+        return unsorted[:, 0, :] if groups is None else unsorted
+
+    def pairs_within(self, xy: np.ndarray, radius_m: float,
+                     chunk_size: int = 2048) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        List every (query point, indexed point) pair closer than a radius.
+
+        Uses the same chunked dual-tree join as count_within_radii, so only
+        pairs inside the radius are ever materialised.
+
+        Args:
+            xy: Projected query points, shape (n, 2)
+            radius_m: Search radius in metres
+            chunk_size: Query points joined per traversal
+
+        Returns:
+            Tuple of (query row positions, index positions, distances in metres)
+            as flat arrays of equal length. Positions refer to rows of xy and
+            to self.labels respectively.
+        """
+        rows_out, cols_out, dist_out = [], [], []
+        valid_rows = np.flatnonzero(~np.isnan(xy).any(axis=1))
+
+        if len(valid_rows) and len(self):
+            for start in range(0, len(valid_rows), chunk_size):
+                rows = valid_rows[start:start + chunk_size]
+                pairs = cKDTree(xy[rows]).sparse_distance_matrix(
+                    self.tree, radius_m, output_type='ndarray'
+                )
+                rows_out.append(rows[pairs['i']])
+                cols_out.append(pairs['j'].astype(np.int64))
+                dist_out.append(pairs['v'])
+
+        if not rows_out:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=float)
+        return np.concatenate(rows_out), np.concatenate(cols_out), np.concatenate(dist_out)
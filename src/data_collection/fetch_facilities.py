@@ -5,13 +5,15 @@ This script collects healthcare facility location data and saves it to the raw d
 Properly handles API requests, retries, and data validation.
 """
 
+import argparse
 import requests
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import time
 import logging
-from typing import Optional
+from typing import BinaryIO, Optional, Sequence, Union
+from urllib3.exceptions import HTTPError
 
 # Set up logging
 logging.basicConfig(
@@ -20,6 +22,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Direct CSV download URL - verified working
+CA_DHHS_URL = "https://data.chhs.ca.gov/dataset/3b5b80e8-6b8d-4715-b3c0-2699af6e72e5/resource/f0ae5731-fef8-417f-839d-54a0ed3a126e/download/health_facility_locations.csv"
+
+LA_COUNTY_NAME = 'Los Angeles'
+
+# Rows parsed per chunk when streaming; bounds memory independently of file size
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Statewide columns kept by default: name, type, address and coordinates,
+# under both the current CHHS headers and the older ones the cleaner maps
+FACILITY_COLUMNS = (
+    'FACILITY_NAME', 'FACNAME',
+    'LICENSE_TYPE_DESC', 'LICENSE_CATEGORY_DESC', 'FACTYPE',
+    'DBA_ADDRESS1', 'DBA_CITY', 'DBA_ZIP_CODE', 'ADDRESS', 'CITY', 'ZIP',
+    'LATITUDE', 'LONGITUDE', 'LAT', 'LON',
+)
+
+
+def find_county_column(columns: Sequence[str]) -> Optional[str]:
+    """County column of a facility table, preferring a name over a code column."""
+    county_cols = [col for col in columns if 'county' in col.lower()]
+    named = [col for col in county_cols if 'name' in col.lower()]
+    return (named or county_cols or [None])[0]
+
 
 class FacilityDataCollector:
     """Collect healthcare facility data from verified sources."""
@@ -50,8 +76,7 @@ class FacilityDataCollector:
         Returns:
             DataFrame with facility data, or None if failed
         """
-        # Direct CSV download URL - verified working
-        url = "https://data.chhs.ca.gov/dataset/3b5b80e8-6b8d-4715-b3c0-2699af6e72e5/resource/f0ae5731-fef8-417f-839d-54a0ed3a126e/download/health_facility_locations.csv"
+        url = CA_DHHS_URL
 
         for attempt in range(max_retries):
             try:
@@ -81,6 +106,97 @@ class FacilityDataCollector:
                     logger.error(f"Failed to fetch CA DHHS data after {max_retries} attempts")
                     return None
 
+    def stream_la_county_facilities(self, source: Optional[Union[str, Path]] = None,
+                                    columns: Optional[Sequence[str]] = None,
+                                    chunksize: int = DEFAULT_CHUNK_ROWS,
+                                    max_retries: int = 3) -> Optional[pd.DataFrame]:
+        """
+        Stream the statewide facility CSV and keep only LA County rows.
+
+        The source is parsed chunksize rows at a time; each chunk is
+        filtered to LA County and appended to the LA County output file
+        before the next is read, so memory use does not grow with the size
+        of the statewide file and the statewide file is never written out.
+
+        Args:
+            source: CSV URL or local file path (default: the CHHS download)
+            columns: Columns to keep, matched case-insensitively (the county
+                column is always kept); None keeps every column
+            chunksize: Rows parsed per chunk
+            max_retries: Maximum number of attempts for a URL source
+
+        Returns:
+            DataFrame with LA County facilities, or None if failed
+        """
+        source = CA_DHHS_URL if source is None else source
+        remote = isinstance(source, str) and source.startswith(('http://', 'https://'))
+        attempts = max_retries if remote else 1
+
+        for attempt in range(attempts):
+            try:
+                if not remote:
+                    with open(source, 'rb') as handle:
+                        return self._filter_stream(handle, columns, chunksize)
+
+                logger.info(f"Streaming facility data from {source} (attempt {attempt + 1}/{attempts})...")
+                with requests.get(source, headers=self.headers, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    return self._filter_stream(response.raw, columns, chunksize)
+
+            except (requests.exceptions.RequestException, HTTPError) as e:
+                logger.warning(f"Attempt {attempt + 1} failed: {e}")
+                if attempt < attempts - 1:
+                    time.sleep(2 ** attempt)  # Exponential backoff
+                else:
+                    logger.error(f"Failed to stream facility data after {attempts} attempts")
+                    return None
+
+            except Exception as e:
+                logger.error(f"Error streaming facility data from {source}: {e}")
+                return None
+
+    def _filter_stream(self, handle: BinaryIO, columns: Optional[Sequence[str]],
+                       chunksize: int) -> Optional[pd.DataFrame]:
+        """Filter a CSV stream to LA County chunk by chunk, appending to the output file."""
+        usecols = None
+        if columns is not None:
+            wanted = {col.lower() for col in columns}
+            usecols = lambda col: col.lower() in wanted or 'county' in col.lower()
+
+        output_file = self.output_dir / f'la_health_facilities_{self.timestamp}.csv'
+        partial = output_file.with_name(output_file.name + '.part')
+        scanned = kept = 0
+        county_col = None
+
+        try:
+            with open(partial, 'w', newline='') as out:
+                for chunk in pd.read_csv(handle, chunksize=chunksize, usecols=usecols, encoding_errors='replace'):
+                    if county_col is None:
+                        county_col = find_county_column(chunk.columns)
+                        if county_col is None:
+                            logger.error("No county column found in data")
+                            return None
+                        logger.info(f"Using county column: {county_col}")
+
+                    la_rows = chunk[chunk[county_col].astype(str).str.contains(LA_COUNTY_NAME, case=False, na=False)]
+                    la_rows.to_csv(out, index=False, header=scanned == 0)
+                    scanned += len(chunk)
+                    kept += len(la_rows)
+
+            if scanned == 0:
+                logger.error("No facility records in source")
+                return None
+            partial.replace(output_file)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        logger.info(f"✓ Scanned {scanned:,} California facilities, kept {kept:,} in LA County")
+        logger.info(f"✓ Saved to {output_file}")
+
+        # Read back the (small) LA subset so dtypes match a plain read of the file
+        return pd.read_csv(output_file)
+
     def filter_to_la_county(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
         Filter facility data to LA County only.
@@ -97,18 +213,17 @@ class FacilityDataCollector:
 
         try:
             # Check for county column (various possible names)
-            county_cols = [col for col in df.columns if 'county' in col.lower()]
+            county_col = find_county_column(df.columns)
 
-            if not county_cols:
+            if county_col is None:
                 logger.error("No county column found in data")
                 return None
 
-            county_col = county_cols[0]
             logger.info(f"Using county column: {county_col}")
 
             # Filter to LA County
             la_facilities = df[
-                df[county_col].str.contains('Los Angeles', case=False, na=False)
+                df[county_col].astype(str).str.contains(LA_COUNTY_NAME, case=False, na=False)
             ].copy()
 
             logger.info(f"✓ Filtered to {len(la_facilities):,} LA County facilities")
@@ -187,8 +302,18 @@ class FacilityDataCollector:
         return results
 
 
-def main():
+def main(argv=None):
     """Main function to run data collection."""
+    parser = argparse.ArgumentParser(description="Collect LA County healthcare facility data")
+    parser.add_argument('--source', default=None,
+                        help='Statewide facility CSV URL or local file (default: the CHHS download)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f'Rows parsed per chunk while streaming (default: {DEFAULT_CHUNK_ROWS:,})')
+    parser.add_argument('--columns', nargs='+', default=list(FACILITY_COLUMNS), metavar='COLUMN',
+                        help='Statewide columns to keep, case-insensitive; the county columns are always kept '
+                             '(default: name, type, address and coordinate columns)')
+    parser.add_argument('--all-columns', action='store_true', help='Keep every statewide column')
+    args = parser.parse_args(argv)
 
     logger.info("="*70)
     logger.info("HEALTHCARE FACILITY DATA COLLECTION")
@@ -197,35 +322,31 @@ def main():
     # Initialize collector
     collector = FacilityDataCollector()
 
-    # Fetch California facility data
-    ca_data = collector.fetch_ca_dhhs_facilities()
-
-    if ca_data is not None:
-        # Filter to LA County
-        la_data = collector.filter_to_la_county(ca_data)
+    # Stream California facility data, keeping only LA County rows
+    la_data = collector.stream_la_county_facilities(args.source, columns=None if args.all_columns else args.columns,
+                                                    chunksize=args.chunk_rows)
 
-        if la_data is not None:
-            # Validate data
-            validation = collector.validate_facility_data(la_data)
+    if la_data is not None:
+        # Validate data
+        validation = collector.validate_facility_data(la_data)
 
-            logger.info("\n" + "="*70)
-            logger.info("DATA COLLECTION COMPLETE")
-            logger.info("="*70)
-            logger.info(f"Total California facilities: {len(ca_data):,}")
-            logger.info(f"LA County facilities: {len(la_data):,}")
-            logger.info(f"Validation status: {'✓ PASS' if validation['valid'] else '⚠ ISSUES FOUND'}")
+        logger.info("\n" + "="*70)
+        logger.info("DATA COLLECTION COMPLETE")
+        logger.info("="*70)
+        logger.info(f"LA County facilities: {len(la_data):,}")
+        logger.info(f"Validation status: {'✓ PASS' if validation['valid'] else '⚠ ISSUES FOUND'}")
 
-            if validation['issues']:
-                logger.info("\nData quality issues:")
-                for issue in validation['issues']:
-                    logger.info(f"  - {issue}")
+        if validation['issues']:
+            logger.info("\nData quality issues:")
+            for issue in validation['issues']:
+                logger.info(f"  - {issue}")
 
-            logger.info("\nNext steps:")
-            logger.info("1. Review data in data/raw/")
-            logger.info("2. Run data cleaning: python src/data_processing/clean_facilities.py")
-            logger.info("3. Verify coordinate quality")
+        logger.info("\nNext steps:")
+        logger.info("1. Review data in data/raw/")
+        logger.info("2. Run data cleaning: python src/data_processing/clean_facilities.py")
+        logger.info("3. Verify coordinate quality")
 
-            return 0
+        return 0
 
     logger.error("Data collection failed")
     return 1
@@ -0,0 +1,104 @@
+"""
+Rule-based facility categorization.
+
+Source files describe facility types in free text ("General Acute Care
+Hospital", "CHRONIC DIALYSIS CLINIC", "Urgent Care - Walk In"). Each
+category is a list of keywords in a JSON config; a type belongs to the
+first category in config order with a keyword anywhere in it, so more
+specific rules go first.
+
+All rules compile into one case-insensitive pattern with one lookahead
+branch per category, tried in order. Matching runs through pandas'
+vectorised string methods on the distinct type values only (a facility
+file has thousands of rows but a few dozen types), and results are
+memoised across calls.
+"""
+
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Shipped with the package (see package_data in setup.py)
+DEFAULT_CATEGORY_RULES = Path(__file__).with_name('facility_categories.json')
+
+
+class FacilityCategorizer:
+    """Maps free-text facility types to categories with one compiled pattern."""
+
+    def __init__(self, categories: Sequence[Dict], default: str = 'other'):
+        """
+        Args:
+            categories: Rules in priority order, each {'name': ..., 'keywords': [...]}
+            default: Category for types matching no rule (and missing types)
+        """
+        self.names: List[str] = [rule['name'] for rule in categories]
+        self.default = default
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Duplicate category names in rules: {self.names}")
+
+        # Branch i succeeds, capturing an empty group ci, if any keyword of rule i occurs
+        branches = []
+        for i, rule in enumerate(categories):
+            keywords = [re.escape(str(keyword).lower()) for keyword in rule['keywords'] if str(keyword)]
+            if not keywords:
+                raise ValueError(f"Category '{rule['name']}' has no keywords")
+            branches.append(f"(?=.*?(?:{'|'.join(keywords)}))(?P<c{i}>)")
+        self.pattern = re.compile('^(?:' + '|'.join(branches) + ')', re.IGNORECASE | re.DOTALL)
+        self._cache: Dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, rules_file: Union[str, Path] = DEFAULT_CATEGORY_RULES) -> 'FacilityCategorizer':
+        """
+        Load rules from a JSON config.
+
+        The file holds {"default": "other", "categories": [{"name": ...,
+        "keywords": [...]}, ...]} with categories in priority order.
+
+        Args:
+            rules_file: Path to the rules file
+
+        Returns:
+            FacilityCategorizer for the rules
+        """
+        config = json.loads(Path(rules_file).read_text())
+        logger.info(f"Loaded {len(config['categories'])} facility category rules from {rules_file}")
+        return cls(config['categories'], default=config.get('default', 'other'))
+
+    @property
+    def categories(self) -> List[str]:
+        """Every category this categorizer can return, in priority order."""
+        return self.names + [self.default]
+
+    def _match(self, values: pd.Series) -> pd.Series:
+        """Category of each (distinct) string through the compiled pattern."""
+        if not self.names:
+            return pd.Series(self.default, index=values.index, dtype=object)
+        matched = values.str.extract(self.pattern).notna().to_numpy()
+        names = np.array(self.names, dtype=object)[matched.argmax(axis=1)]
+        return pd.Series(np.where(matched.any(axis=1), names, self.default), index=values.index, dtype=object)
+
+    def categorize(self, types: pd.Series) -> pd.Series:
+        """
+        Category of each facility type.
+
+        Args:
+            types: Free-text facility types
+
+        Returns:
+            Series of category names aligned with types
+        """
+        codes, uniques = pd.factorize(types)
+        uniques = [str(value) for value in uniques]
+        unseen = [value for value in uniques if value not in self._cache]
+        if unseen:
+            self._cache.update(zip(unseen, self._match(pd.Series(unseen, dtype=object))))
+
+        lookup = np.array([self._cache[value] for value in uniques] + [self.default], dtype=object)
+        return pd.Series(lookup[codes], index=types.index)
@@ -12,6 +12,11 @@ from pathlib import Path
 from typing import Optional, Union, List
 import json
 
+from data_processing.categorize import DEFAULT_CATEGORY_RULES, FacilityCategorizer
+from data_processing.columnar_store import write_table
+from data_processing.deduplication import DEFAULT_NAME_SIMILARITY, DEFAULT_RADIUS_M, deduplicate
+from data_processing.tract_store import DEFAULT_BOUNDARIES_FILE, TractStore
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,18 +29,30 @@ class FacilityDataCleaner:
     """Clean and standardize facility data from multiple sources."""
 
     def __init__(self, input_dir: Union[str, Path] = 'data/raw',
-                 output_dir: Union[str, Path] = 'data/processed'):
+                 output_dir: Union[str, Path] = 'data/processed',
+                 boundaries_file: Optional[Union[str, Path]] = DEFAULT_BOUNDARIES_FILE,
+                 category_rules: Union[str, Path] = DEFAULT_CATEGORY_RULES):
         """
         Initialize the data cleaner.
 
         Args:
             input_dir: Directory containing raw data files
             output_dir: Directory to save cleaned data
+            boundaries_file: TIGER tract file used to assign each facility
+                its census tract (skipped if None or missing)
+            category_rules: JSON keyword rules mapping facility types to
+                categories (see data_processing.categorize)
         """
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        self.categorizer = FacilityCategorizer.from_file(category_rules)
+
+        self.tract_store = None
+        if boundaries_file and Path(boundaries_file).exists():
+            self.tract_store = TractStore(boundaries_file, store_dir=self.output_dir / 'geometry')
+
     def load_facility_data(self, filename: str) -> Optional[pd.DataFrame]:
         """
         Load raw facility data from JSON or CSV.
@@ -123,45 +140,29 @@ class FacilityDataCleaner:
 
         return df
 
-    def remove_duplicates(self, df: pd.DataFrame, threshold: float = 0.0001) -> pd.DataFrame:
+    def remove_duplicates(self, df: pd.DataFrame, radius_m: float = DEFAULT_RADIUS_M,
+                          min_similarity: float = DEFAULT_NAME_SIMILARITY) -> pd.DataFrame:
         """
         Remove duplicate facilities based on location and name.
 
+        Records within radius_m of each other whose names are similar
+        (see data_processing.deduplication) are merged, keeping the one
+        with the most complete information.
+
         Args:
             df: DataFrame with facility data
-            threshold: Distance threshold for coordinate duplicates (degrees)
+            radius_m: Largest distance between duplicate records (metres)
+            min_similarity: Smallest name trigram similarity (0-1) of duplicates
 
         Returns:
             DataFrame with duplicates removed
         """
         initial_count = len(df)
 
-        # Remove exact coordinate duplicates
-        df = df.drop_duplicates(subset=['lat', 'lon'], keep='first')
-
-        # Remove near-duplicates using coordinate proximity
-        # For facilities within threshold distance, keep the one with more complete data
-        if 'name' in df.columns:
-            # Group by approximate location (rounded coordinates)
-            df['lat_round'] = df['lat'].round(4)
-            df['lon_round'] = df['lon'].round(4)
-
-            # For each location group, remove duplicates with similar names
-            deduplicated = []
-            for (lat_r, lon_r), group in df.groupby(['lat_round', 'lon_round']):
-                if len(group) > 1:
-                    # Keep the facility with the most complete information
-                    group['completeness'] = group.notna().sum(axis=1)
-                    best = group.nlargest(1, 'completeness')
-                    deduplicated.append(best)
-                else:
-                    deduplicated.append(group)
-
-            df = pd.concat(deduplicated, ignore_index=True)
-            df = df.drop(columns=['lat_round', 'lon_round', 'completeness'])
+        df = deduplicate(df, radius_m=radius_m, min_similarity=min_similarity)
 
         removed = initial_count - len(df)
-        logger.info(f"Removed {removed} duplicate facilities ({removed/initial_count*100:.1f}%)")
+        logger.info(f"Removed {removed} duplicate facilities ({removed/max(initial_count, 1)*100:.1f}%)")
 
         return df
 
@@ -210,36 +211,44 @@ class FacilityDataCleaner:
         Returns:
             DataFrame with standardized facility categories
         """
-        # Define facility type mappings
-        urgent_care_keywords = ['urgent care', 'urgent', 'walk-in', 'walk in']
-        hospital_keywords = ['hospital', 'medical center', 'emergency', 'trauma']
-        clinic_keywords = ['clinic', 'health center', 'community health', 'primary care']
-
-        def categorize(facility_type):
-            if pd.isna(facility_type):
-                return 'other'
-
-            facility_type = str(facility_type).lower()
-
-            if any(keyword in facility_type for keyword in urgent_care_keywords):
-                return 'urgent_care'
-            elif any(keyword in facility_type for keyword in hospital_keywords):
-                return 'hospital'
-            elif any(keyword in facility_type for keyword in clinic_keywords):
-                return 'clinic'
-            else:
-                return 'other'
-
         if 'type' in df.columns:
-            df['category'] = df['type'].apply(categorize)
+            df['category'] = self.categorizer.categorize(df['type'])
         else:
-            df['category'] = 'other'
+            df['category'] = self.categorizer.default
 
         category_counts = df['category'].value_counts()
         logger.info(f"Facility categories:\n{category_counts.to_string()}")
 
         return df
 
+    def assign_tracts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the GEOID of the census tract containing each facility.
+
+        All facilities are joined to the tract polygons in one vectorized
+        spatial index query. Facilities outside every tract get no GEOID.
+
+        Args:
+            df: DataFrame with lat/lon columns
+
+        Returns:
+            DataFrame with a tract_geoid column (unchanged if no tract
+            boundaries are available)
+        """
+        if self.tract_store is None:
+            logger.info("No tract boundaries available, skipping tract assignment")
+            return df
+
+        df['tract_geoid'] = self.tract_store.tract_geoids(df['lon'].to_numpy(), df['lat'].to_numpy())
+
+        unassigned = df['tract_geoid'].isna().sum()
+        logger.info(f"Assigned {len(df) - unassigned} facilities to "
+                    f"{df['tract_geoid'].nunique()} census tracts")
+        if unassigned > 0:
+            logger.warning(f"{unassigned} facilities fall outside every census tract")
+
+        return df
+
     def clean_dataset(self, df: pd.DataFrame, source: str = 'lacounty') -> Optional[pd.DataFrame]:
         """
         Run full cleaning pipeline on facility dataset.
@@ -281,6 +290,9 @@ class FacilityDataCleaner:
             # Categorize facilities
             df = self.categorize_facilities(df)
 
+            # Record the census tract each facility sits in
+            df = self.assign_tracts(df)
+
             # Add data source column
             df['source'] = source
 
@@ -337,7 +349,7 @@ class FacilityDataCleaner:
         """
         try:
             output_path = self.output_dir / filename
-            df.to_csv(output_path, index=False)
+            write_table(df, output_path, export_csv=True)
             logger.info(f"Saved cleaned data to {output_path}")
 
             # Log summary statistics
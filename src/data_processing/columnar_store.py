@@ -0,0 +1,175 @@
+"""
+Columnar storage for processed datasets.
+
+Processed tables are stored as uncompressed Arrow IPC (Feather v2) files,
+which can be memory-mapped and read column by column, or as Parquet for
+archival. Types are fixed on write instead of re-inferred on every CSV parse:
+
+- GEOID columns are 11-character zero-padded strings (no lost leading zeros)
+- 'category' is dictionary encoded (pandas categorical)
+- distance, score and rate metrics are float32
+
+CSV stays available as an export-only format for spreadsheets and sharing.
+Readers still accept a CSV path, and prefer a columnar file with the same
+stem when one exists next to it.
+"""
+
+import re
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Census tract GEOIDs: 2-digit state + 3-digit county + 6-digit tract
+GEOID_WIDTH = 11
+GEOID_COLUMNS = ('GEOID', 'geoid', 'tract_geoid')
+
+CATEGORICAL_COLUMNS = ('category',)
+
+# Metric columns stored as float32 (coordinates, populations and money stay float64)
+METRIC_COLUMN = re.compile(r'(_km|_minutes|_score|_per_1k|_per_sqkm|_rate)$|^pct_')
+
+COLUMNAR_SUFFIXES = ('.feather', '.arrow', '.parquet')
+
+# Preferred sibling format when a CSV path is given
+DEFAULT_SUFFIX = '.feather'
+
+
+def normalize_geoid(values: pd.Series) -> pd.Series:
+    """
+    Format GEOIDs as zero-padded strings.
+
+    Args:
+        values: GEOIDs as strings or numbers (e.g. 6037101110 parsed from CSV)
+
+    Returns:
+        Series of 11-character strings, with missing values preserved
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.astype('Int64')
+    text = values.astype('string').str.strip()
+    return text.str.zfill(GEOID_WIDTH).astype(object).where(text.notna(), None)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast a DataFrame to the store's column types.
+
+    Args:
+        df: DataFrame to cast
+
+    Returns:
+        Copy with GEOID strings, categorical categories and float32 metrics
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in GEOID_COLUMNS:
+            df[col] = normalize_geoid(df[col])
+        elif col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        elif METRIC_COLUMN.search(str(col)) and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype('float32')
+    return df
+
+
+def columnar_path(path: Union[str, Path], suffix: str = DEFAULT_SUFFIX) -> Path:
+    """Columnar file path for a dataset path (CSV paths map to their sibling)."""
+    path = Path(path)
+    return path if path.suffix in COLUMNAR_SUFFIXES else path.with_suffix(suffix)
+
+
+def write_table(df: pd.DataFrame, path: Union[str, Path], export_csv: bool = False) -> Path:
+    """
+    Write a DataFrame to the columnar store.
+
+    Args:
+        df: DataFrame to save (the index is not stored)
+        path: Output path; '.parquet' writes Parquet, '.feather'/'.arrow'
+            write Arrow IPC, and a '.csv' path writes the Arrow sibling
+        export_csv: Also write a CSV copy for export
+
+    Returns:
+        Path of the columnar file written
+    """
+    path = Path(path)
+    target = columnar_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    typed = apply_schema(df)
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+
+    # Export first so the columnar file is never older than its CSV copy
+    if export_csv:
+        csv_path = path if path.suffix == '.csv' else path.with_suffix('.csv')
+        typed.to_csv(csv_path, index=False)
+
+    if target.suffix == '.parquet':
+        pq.write_table(table, target, compression='zstd')
+    else:
+        # Uncompressed so readers can memory-map columns without decoding
+        feather.write_feather(table, target, compression='uncompressed')
+
+    logger.info(f"Wrote {len(df)} rows x {len(df.columns)} columns to {target}")
+    return target
+
+
+def read_table(path: Union[str, Path], columns: Optional[List[str]] = None,
+               memory_map: bool = True) -> pd.DataFrame:
+    """
+    Read a dataset, preferring its columnar file.
+
+    Args:
+        path: Dataset path; for a '.csv' path, a newer columnar sibling
+            (.feather/.arrow/.parquet) is read instead when present
+        columns: Only read these columns
+        memory_map: Memory-map Arrow IPC files instead of reading them into memory
+
+    Returns:
+        DataFrame with the store's column types applied
+    """
+    path = resolve_path(path)
+
+    if path.suffix == '.parquet':
+        table = pq.read_table(path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+
+    if path.suffix in ('.feather', '.arrow'):
+        table = feather.read_table(path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+
+    # CSV compatibility path: fix types the parser guesses wrong
+    dtype = {col: str for col in GEOID_COLUMNS}
+    df = pd.read_csv(path, usecols=columns, dtype=dtype)
+    return apply_schema(df)
+
+
+def resolve_path(path: Union[str, Path]) -> Path:
+    """
+    Choose the file to read for a dataset path.
+
+    Args:
+        path: Requested dataset path
+
+    Returns:
+        The columnar sibling of a CSV path if it exists and is at least as new,
+        otherwise the path itself
+    """
+    path = Path(path)
+    if path.suffix != '.csv':
+        return path
+
+    for suffix in COLUMNAR_SUFFIXES:
+        sibling = path.with_suffix(suffix)
+        if sibling.exists() and (not path.exists() or sibling.stat().st_mtime >= path.stat().st_mtime):
+            return sibling
+    return path
+
+
+def dataset_exists(path: Union[str, Path]) -> bool:
+    """Check whether a dataset exists in CSV or columnar form."""
+    return resolve_path(path).exists()
@@ -0,0 +1,212 @@
+"""
+Fuzzy deduplication of facility records by location and name.
+
+The same facility often appears more than once, across sources or within
+one, with coordinates a few dozen metres apart (parcel centroid vs
+rooftop geocode) and names that differ in punctuation, suffixes or
+abbreviations ("St. Mary Med. Ctr" vs "ST MARY MEDICAL CENTER, INC").
+Matching is done in three vectorised steps:
+
+1. Blocking: one KD-tree pair query in California Albers lists every pair
+   of records within radius_m metres, so names are only compared between
+   neighbours.
+2. Scoring: names are normalised (case, punctuation, legal suffixes,
+   common abbreviations) and compared by the Jaccard similarity of their
+   character trigrams, computed for all candidate pairs at once from a
+   sparse record x trigram matrix.
+3. Resolution: matching pairs are merged into clusters by connected
+   components (union-find over the pair graph), and the most complete
+   record of each cluster is kept.
+
+Records without a name can only match records at essentially the same
+point (SAME_SITE_M), as the old rounded-coordinate grouping did.
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from pyproj import Transformer
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+# California Albers, so the blocking radius is in true metres
+DISTANCE_EPSG = 3310
+
+_TO_METRES = Transformer.from_crs(4326, DISTANCE_EPSG, always_xy=True)
+
+# Records further apart than this (metres) are never the same facility
+DEFAULT_RADIUS_M = 150.0
+
+# Trigram Jaccard similarity at or above which nearby names match
+DEFAULT_NAME_SIMILARITY = 0.5
+
+# Records this close (metres) match even without comparable names
+SAME_SITE_M = 10.0
+
+# Tokens that carry no identity: legal suffixes and filler words
+NAME_STOPWORDS = ('inc', 'llc', 'llp', 'ltd', 'corp', 'corporation', 'co', 'pc', 'apc',
+                  'dba', 'the', 'of', 'and', 'at')
+
+# Common abbreviations in facility registries, expanded before comparison
+NAME_ABBREVIATIONS = {
+    'ctr': 'center', 'cntr': 'center', 'centre': 'center',
+    'med': 'medical', 'hosp': 'hospital', 'hlth': 'health',
+    'comm': 'community', 'cmty': 'community', 'mt': 'mount',
+    'svcs': 'services', 'svc': 'services', 'ucc': 'urgent care',
+}
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """
+    Lower-case facility names and strip punctuation, stopwords and abbreviations.
+
+    Args:
+        names: Facility names (missing values become empty strings)
+
+    Returns:
+        Normalised names, single-spaced
+    """
+    normalized = names.fillna('').astype(str).str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True)
+    normalized = normalized.str.replace(r'\b(?:' + '|'.join(NAME_STOPWORDS) + r')\b', ' ', regex=True)
+    for short, full in NAME_ABBREVIATIONS.items():
+        normalized = normalized.str.replace(rf'\b{short}\b', full, regex=True)
+    return normalized.str.split().str.join(' ')
+
+
+def trigram_matrix(names: pd.Series) -> csr_matrix:
+    """
+    Binary record x character-trigram matrix of normalised names.
+
+    Names are padded with two leading spaces and one trailing space so
+    word starts weigh more. Trigrams are extracted for all names at once
+    from a fixed-width code-point array rather than per string.
+
+    Args:
+        names: Normalised names (see normalize_names)
+
+    Returns:
+        Sparse matrix with a 1 for each distinct trigram of each name;
+        empty names have empty rows
+    """
+    names = names.fillna('').astype(str)
+    lengths = names.str.len().to_numpy()
+    padded = ('  ' + names + ' ').to_numpy(dtype=str)
+    width = max(int(lengths.max(initial=0)) + 3, 3)
+    codes = padded.astype(f'<U{width}').view(np.uint32).reshape(len(padded), width).astype(np.uint64)
+
+    # Code points fit in 21 bits, so three pack into one 64-bit key
+    grams = (codes[:, :-2] << np.uint64(42)) | (codes[:, 1:-1] << np.uint64(21)) | codes[:, 2:]
+    valid = (np.arange(width - 2)[None, :] < (lengths + 1)[:, None]) & (lengths > 0)[:, None]
+
+    rows = np.nonzero(valid)[0]
+    cols, vocabulary = pd.factorize(grams[valid])
+    matrix = coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(names), len(vocabulary))).tocsr()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def pair_similarity(trigrams: csr_matrix, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Trigram Jaccard similarity for many record pairs at once.
+
+    Args:
+        trigrams: Matrix from trigram_matrix
+        left: Positions of the first record of each pair
+        right: Positions of the second record of each pair
+
+    Returns:
+        Similarity in [0, 1] per pair, NaN where either name is empty
+    """
+    shared = np.asarray(trigrams[left].multiply(trigrams[right]).sum(axis=1)).ravel()
+    sizes = np.diff(trigrams.indptr)
+    union = sizes[left] + sizes[right] - shared
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarity = shared / union
+    return np.where((sizes[left] > 0) & (sizes[right] > 0), similarity, np.nan)
+
+
+def candidate_pairs(lat: np.ndarray, lon: np.ndarray,
+                    radius_m: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Every pair of records within radius_m of each other.
+
+    Args:
+        lat: Record latitudes (records without coordinates never pair)
+        lon: Record longitudes
+        radius_m: Blocking radius in metres
+
+    Returns:
+        Tuple of (first positions, second positions, distances in metres)
+        with first < second
+    """
+    x, y = _TO_METRES.transform(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+    xy = np.column_stack([x, y])
+    located = np.flatnonzero(np.isfinite(xy).all(axis=1))
+
+    pairs = cKDTree(xy[located]).query_pairs(radius_m, output_type='ndarray')
+    left, right = located[pairs[:, 0]], located[pairs[:, 1]]
+    return left, right, np.linalg.norm(xy[left] - xy[right], axis=1)
+
+
+def duplicate_clusters(df: pd.DataFrame, radius_m: float = DEFAULT_RADIUS_M,
+                       min_similarity: float = DEFAULT_NAME_SIMILARITY,
+                       name_col: str = 'name') -> np.ndarray:
+    """
+    Label records that describe the same facility.
+
+    Args:
+        df: Records with lat/lon columns and optionally names
+        radius_m: Largest distance between matching records (metres)
+        min_similarity: Smallest trigram Jaccard similarity of matching names
+        name_col: Name column (without it, only records within SAME_SITE_M match)
+
+    Returns:
+        Cluster label per row of df; rows sharing a label are duplicates
+    """
+    left, right, distance = candidate_pairs(df['lat'].to_numpy(), df['lon'].to_numpy(), radius_m)
+
+    if name_col in df.columns:
+        similarity = pair_similarity(trigram_matrix(normalize_names(df[name_col])), left, right)
+    else:
+        similarity = np.full(len(left), np.nan)
+
+    match = np.where(np.isnan(similarity), distance <= SAME_SITE_M, similarity >= min_similarity)
+    graph = coo_matrix((np.ones(int(match.sum())), (left[match], right[match])), shape=(len(df), len(df)))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def deduplicate(df: pd.DataFrame, radius_m: float = DEFAULT_RADIUS_M,
+                min_similarity: float = DEFAULT_NAME_SIMILARITY,
+                name_col: str = 'name') -> pd.DataFrame:
+    """
+    Keep the most complete record of each duplicate cluster.
+
+    Ties go to the first record, and kept records stay in their original order.
+
+    Args:
+        df: Records with lat/lon columns
+        radius_m: Largest distance between matching records (metres)
+        min_similarity: Smallest trigram Jaccard similarity of matching names
+        name_col: Name column
+
+    Returns:
+        Deduplicated copy of df with a fresh index
+    """
+    if len(df) == 0:
+        return df.reset_index(drop=True)
+
+    labels = duplicate_clusters(df, radius_m, min_similarity, name_col)
+    completeness = df.notna().sum(axis=1).to_numpy()
+    position = np.arange(len(df))
+
+    order = np.lexsort((position, -completeness, labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = labels[order][1:] != labels[order][:-1]
+    keep = np.sort(order[first])
+    return df.iloc[keep].reset_index(drop=True)
@@ -6,11 +6,13 @@ empty demographic columns despite raw data being available.
 """
 
 import pandas as pd
-import geopandas as gpd
 import logging
 from pathlib import Path
 from datetime import datetime
 
+from data_processing.columnar_store import read_table, write_table
+from data_processing.tract_store import TractStore
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -66,34 +68,10 @@ def fix_census_merge():
 
     shapefile_path = data_external / 'tl_2023_06_tract.shp'
     if shapefile_path.exists():
-        gdf = gpd.read_file(shapefile_path)
-        logger.info(f"   ✓ Loaded {len(gdf)} California census tracts")
-
-        # Filter to LA County (COUNTYFP = 037)
-        la_tracts = gdf[gdf['COUNTYFP'] == '037'].copy()
-        logger.info(f"   ✓ Filtered to {len(la_tracts)} LA County tracts")
-
-        # Calculate centroids using proper projected CRS
-        logger.info("   Calculating centroids...")
-
-        # Use California State Plane Zone 5 (NAD83) - EPSG:2229 (feet) or EPSG:26945 (meters)
-        # This is the proper projection for LA County
-        la_tracts_projected = la_tracts.to_crs(epsg=2229)  # CA State Plane Zone 5 (feet)
-
-        # Calculate centroids in projected coordinates (avoids warning)
-        centroids_projected = la_tracts_projected.geometry.centroid
-
-        # Convert centroids back to WGS84 for lat/lon
-        centroids_wgs84 = centroids_projected.to_crs(epsg=4326)
-        la_tracts['centroid_lat'] = centroids_wgs84.y
-        la_tracts['centroid_lon'] = centroids_wgs84.x
-
-        # Calculate area in sq km using equal-area projection
-        # Use California Albers (EPSG:3310) for accurate area calculation
-        la_tracts_albers = la_tracts.to_crs(epsg=3310)  # California Albers
-        la_tracts['area_sqkm'] = la_tracts_albers.geometry.area / 1_000_000  # m^2 to km^2
-
-        logger.info(f"   ✓ Centroids and areas calculated (proper projections used)")
+        # LA County (COUNTYFP = 037) tracts with centroids and areas, prepared once
+        # from the statewide file and reused until it changes
+        la_tracts = TractStore(shapefile_path, store_dir=data_processed / 'geometry').open().copy()
+        logger.info(f"   ✓ Loaded {len(la_tracts)} LA County tracts with centroids and areas")
     else:
         logger.info(f"   ⚠ Shapefile not found at {shapefile_path}")
         logger.info("   Continuing with census data only...")
@@ -195,16 +173,21 @@ def fix_census_merge():
 
     timestamp = datetime.now().strftime('%Y%m%d')
     output_file = data_processed / f'census_tracts_data_{timestamp}.csv'
-    final_data_csv.to_csv(output_file, index=False)
+    write_table(final_data_csv, output_file, export_csv=True)
 
     logger.info(f"   ✓ Saved to: {output_file}")
 
     # Verify the fix
     logger.info("\n8. Verifying fix...")
 
-    verification = pd.read_csv(output_file)
-
     critical_columns = ['GEOID', 'total_population', 'median_income', 'median_age']
+    summary_columns = ['centroid_lat', 'pop_density_per_sqkm']
+
+    # Read back only the columns checked below (memory-mapped, no CSV re-parse)
+    verification = read_table(
+        output_file,
+        columns=[c for c in critical_columns + summary_columns if c in final_data_csv.columns]
+    )
     for col in critical_columns:
         if col in verification.columns:
             non_null = verification[col].notna().sum()
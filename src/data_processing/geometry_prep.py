@@ -0,0 +1,193 @@
+"""
+Prepared census tract geometries for web maps.
+
+The TIGER tract file (tl_2023_06_tract.shp) holds tracts at full survey
+resolution, but at city zoom levels maps only need a fraction of the
+vertices. Starting from the county tracts in the TractStore, this module
+derives several simplified levels:
+
+- Coverage simplification: tracts tile the county, so each shared border
+  is simplified once for both neighbours. This keeps the borders free of
+  the gaps and slivers that simplifying polygons one by one creates.
+- Quantization: coordinates are snapped to a grid matched to the level's
+  tolerance (as TopoJSON does), so serialised coordinates carry no more
+  digits than the map can show.
+
+Levels are derived from the TractStore and cached as GeoParquet keyed by
+the store's source hash; the 'full' level is the store itself.
+"""
+
+import hashlib
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from data_processing.tract_store import DEFAULT_STORE_DIR, LA_COUNTY_FP, TractStore
+
+logger = logging.getLogger(__name__)
+
+# California Albers, an equal-area projection in metres
+ALBERS_EPSG = 3310
+
+DEFAULT_CACHE_DIR = DEFAULT_STORE_DIR
+
+# Simplification tolerance in metres per level
+SIMPLIFY_LEVELS_M = {
+    'full': 0.0,
+    'fine': 10.0,
+    'medium': 40.0,
+    'coarse': 150.0,
+}
+
+DEFAULT_LEVEL = 'medium'
+
+# Metres per degree of latitude
+METRES_PER_DEGREE = 111_320.0
+
+# Bump to invalidate prepared files written by an older version
+PREP_FORMAT = 2
+
+# shapely.coverage_simplify needs shapely >= 2.1 (GEOS >= 3.12)
+HAS_COVERAGE_SIMPLIFY = hasattr(shapely, 'coverage_simplify')
+
+
+def simplify_coverage(geoms: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplify polygons that tile an area without overlaps.
+
+    Shared borders are simplified once for both neighbours, so the result
+    has no gaps or overlaps between them. On shapely < 2.1, which has no
+    coverage simplification, each polygon is simplified on its own with
+    preserve_topology; shapes stay valid but shared borders may drift apart
+    by up to the tolerance.
+
+    Args:
+        geoms: Polygon array forming a coverage
+        tolerance: Simplification tolerance in the geometries' units
+
+    Returns:
+        Simplified geometries in the same order
+    """
+    if tolerance <= 0:
+        return geoms
+    if not HAS_COVERAGE_SIMPLIFY:
+        logger.warning(f"shapely {shapely.__version__} has no coverage_simplify (needs >= 2.1); "
+                       "simplifying tracts one by one")
+        return shapely.simplify(geoms, tolerance, preserve_topology=True)
+    return shapely.coverage_simplify(geoms, tolerance, simplify_boundary=True)
+
+
+def quantize(geoms: np.ndarray, grid_size: float) -> np.ndarray:
+    """Snap coordinates to a grid_size grid, repairing any geometry this makes invalid."""
+    return shapely.set_precision(geoms, grid_size)
+
+
+def grid_for_tolerance(tolerance_m: float) -> float:
+    """
+    Quantization grid in degrees for a simplification tolerance.
+
+    A tenth of the tolerance, rounded down to a power of ten; full-resolution
+    geometries keep TIGER's own 1e-7 degree precision.
+    """
+    if tolerance_m <= 0:
+        return 1e-7
+    return 10.0 ** math.floor(math.log10(tolerance_m / 10 / METRES_PER_DEGREE))
+
+
+def simplify_tracts(tracts: gpd.GeoDataFrame, tolerance_m: float) -> gpd.GeoDataFrame:
+    """
+    Coverage-simplify and quantize tracts for display.
+
+    Simplification runs in California Albers so the tolerance is in metres;
+    the result is returned in EPSG:4326.
+    """
+    crs = tracts.crs or 'EPSG:4326'
+    prepared = tracts.set_crs(crs).copy()
+    if tolerance_m > 0:
+        projected = prepared.geometry.to_crs(epsg=ALBERS_EPSG)
+        simplified = simplify_coverage(projected.values, tolerance_m)
+        prepared = prepared.set_geometry(gpd.GeoSeries(simplified, index=prepared.index, crs=ALBERS_EPSG))
+    prepared = prepared.to_crs(epsg=4326)
+    prepared.geometry.values[:] = quantize(prepared.geometry.values, grid_for_tolerance(tolerance_m))
+    return prepared
+
+
+class TractGeometries:
+    """County tract geometries at several simplification levels, cached as GeoParquet."""
+
+    def __init__(self, boundaries_file: Union[str, Path],
+                 county_fp: str = LA_COUNTY_FP,
+                 cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+                 levels: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            boundaries_file: TIGER tract file (Shapefile/GeoJSON/GeoParquet)
+            county_fp: Three-digit county FIPS code to keep
+            cache_dir: Directory for the tract store and the prepared levels
+            levels: Simplification tolerance in metres by level name
+                (default: SIMPLIFY_LEVELS_M)
+        """
+        self.store = TractStore(boundaries_file, county_fp, cache_dir)
+        self.cache_dir = Path(cache_dir)
+        self.levels = dict(SIMPLIFY_LEVELS_M if levels is None else levels)
+
+    def _prefix(self) -> str:
+        return f"{self.store.boundaries_file.stem}_{self.store.county_fp}_"
+
+    def cache_path(self, level: str) -> Path:
+        """GeoParquet file holding one level for the current source file."""
+        if self.levels[level] <= 0:
+            return self.store.path
+        material = json.dumps({'format': PREP_FORMAT, 'source': self.store.source_hash,
+                               'tolerance_m': self.levels[level], 'coverage': HAS_COVERAGE_SIMPLIFY},
+                              sort_keys=True)
+        key = hashlib.sha256(material.encode()).hexdigest()[:16]
+        return self.cache_dir / f"{self._prefix()}{level}_{key}.parquet"
+
+    def prepare(self, levels: Optional[Iterable[str]] = None) -> Dict[str, Path]:
+        """
+        Build every missing level from the tract store.
+
+        Args:
+            levels: Level names to prepare (default: all)
+
+        Returns:
+            Cached file path per level
+        """
+        levels = list(self.levels if levels is None else levels)
+        unknown = set(levels) - set(self.levels)
+        if unknown:
+            raise ValueError(f"Unknown simplification levels: {sorted(unknown)}")
+
+        self.store.build()
+        paths = {level: self.cache_path(level) for level in levels}
+        missing = [level for level, path in paths.items() if not path.exists()]
+        if not missing:
+            return paths
+
+        tracts = self.store.open()
+        logger.info(f"Preparing {len(tracts)} tract geometries: {', '.join(missing)}")
+        for level in missing:
+            for stale in self.cache_dir.glob(f"{self._prefix()}{level}_*.parquet"):
+                stale.unlink()
+            prepared = simplify_tracts(tracts, self.levels[level])
+            tmp = paths[level].with_suffix('.tmp')
+            prepared.to_parquet(tmp)
+            tmp.replace(paths[level])
+
+            vertices = shapely.get_num_coordinates(prepared.geometry.values).sum()
+            logger.info(f"  {level} ({self.levels[level]:g} m): {vertices:,} vertices")
+        return paths
+
+    def level(self, name: str = DEFAULT_LEVEL) -> gpd.GeoDataFrame:
+        """Tracts at one simplification level in EPSG:4326."""
+        path = self.prepare([name])[name]
+        if path == self.store.path:
+            return self.store.open().copy()
+        return gpd.read_parquet(path, memory_map=True)
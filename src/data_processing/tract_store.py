@@ -0,0 +1,243 @@
+"""
+Prepared store of one county's census tracts.
+
+The TIGER tract file covers all of California. Every stage that needs LA
+County tracts used to read the whole file, filter it and reproject it
+twice for centroids and areas. The store does that once and writes the
+result as GeoParquet in EPSG:4326, with centroid_lat/centroid_lon and
+area_sqkm already computed. Later opens are a memory-mapped read.
+
+A JSON manifest next to the store records the size, mtime and SHA-256 of
+each source file. An unchanged signature is trusted. A changed one is
+re-hashed, so a touched but identical file does not trigger a rebuild.
+
+Point-in-tract lookups go through a shapely STRtree built on open. At
+county scale (about 2,500 tracts) it builds in about a millisecond.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOUNDARIES_FILE = Path('data/external/tl_2023_06_tract.shp')
+
+DEFAULT_STORE_DIR = Path('data/processed/geometry')
+
+LA_COUNTY_FP = '037'
+
+# CA State Plane Zone 5 (feet) for centroids, California Albers (equal-area) for areas
+CENTROID_EPSG = 2229
+AREA_EPSG = 3310
+
+# Bump to rebuild stores written by an older version
+STORE_FORMAT = 1
+
+
+def source_files(boundaries_file: Union[str, Path]) -> List[Path]:
+    """The boundaries file plus, for a shapefile, the sidecars holding its attributes and index."""
+    boundaries_file = Path(boundaries_file)
+    if boundaries_file.suffix.lower() != '.shp':
+        return [boundaries_file]
+    sidecars = [boundaries_file.with_suffix(suffix) for suffix in ('.shp', '.shx', '.dbf', '.prj')]
+    return [path for path in sidecars if path.exists()]
+
+
+def _sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_county_tracts(boundaries_file: Union[str, Path],
+                       county_fp: str = LA_COUNTY_FP) -> gpd.GeoDataFrame:
+    """
+    Read one county's tracts from a TIGER tract file.
+
+    Statewide files are filtered while reading, so the other counties'
+    geometries are never decoded. Files without a COUNTYFP column are
+    returned whole.
+    """
+    try:
+        tracts = gpd.read_file(boundaries_file, where=f"COUNTYFP = '{county_fp}'")
+    except Exception:
+        tracts = gpd.read_file(boundaries_file)
+        if 'COUNTYFP' in tracts.columns:
+            tracts = tracts[tracts['COUNTYFP'].astype(str).str.zfill(3) == county_fp]
+    return tracts.reset_index(drop=True)
+
+
+class TractStore:
+    """County tracts with centroids and areas, built once from the TIGER file."""
+
+    def __init__(self, boundaries_file: Union[str, Path] = DEFAULT_BOUNDARIES_FILE,
+                 county_fp: str = LA_COUNTY_FP,
+                 store_dir: Union[str, Path] = DEFAULT_STORE_DIR):
+        """
+        Args:
+            boundaries_file: TIGER tract file (Shapefile/GeoJSON/GeoParquet)
+            county_fp: Three-digit county FIPS code to keep
+            store_dir: Directory for the store and its manifest
+        """
+        self.boundaries_file = Path(boundaries_file)
+        self.county_fp = county_fp
+        self.store_dir = Path(store_dir)
+        self.path = self.store_dir / f"{self.boundaries_file.stem}_{county_fp}_tracts.parquet"
+        self.manifest_path = self.path.with_suffix('.json')
+
+        self._tracts: Optional[gpd.GeoDataFrame] = None
+        self._tree: Optional[shapely.STRtree] = None
+
+    def _signature(self) -> List[Dict]:
+        return [{'name': path.name, 'size': path.stat().st_size, 'mtime_ns': path.stat().st_mtime_ns}
+                for path in source_files(self.boundaries_file)]
+
+    def manifest(self) -> Optional[Dict]:
+        """Manifest of the built store, or None if there is none."""
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        tmp = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        tmp.write_text(json.dumps(manifest, indent=2))
+        tmp.replace(self.manifest_path)
+
+    def is_current(self) -> bool:
+        """
+        Whether the store was built from the current source files.
+
+        Files whose size or mtime changed are re-hashed; if their content is
+        unchanged the manifest is updated and the store kept.
+        """
+        manifest = self.manifest()
+        if (manifest is None or manifest.get('format') != STORE_FORMAT
+                or manifest.get('county') != self.county_fp or not self.path.exists()):
+            return False
+
+        signature = self._signature()
+        recorded = {source['name']: source for source in manifest['sources']}
+        if [s['name'] for s in signature] != list(recorded):
+            return False
+
+        stale = [s for s in signature if (s['size'], s['mtime_ns']) !=
+                 (recorded[s['name']]['size'], recorded[s['name']]['mtime_ns'])]
+        if not stale:
+            return True
+
+        for source in stale:
+            if _sha256(self.boundaries_file.with_name(source['name'])) != recorded[source['name']]['sha256']:
+                return False
+            recorded[source['name']].update(size=source['size'], mtime_ns=source['mtime_ns'])
+        self._write_manifest(manifest)
+        return True
+
+    @property
+    def source_hash(self) -> str:
+        """Combined SHA-256 of the source files the store was built from."""
+        manifest = self.manifest() or {}
+        return hashlib.sha256(''.join(s['sha256'] for s in manifest.get('sources', [])).encode()).hexdigest()
+
+    def build(self, force: bool = False) -> Path:
+        """
+        Build the store unless it is current.
+
+        Args:
+            force: Rebuild even if the source files are unchanged
+
+        Returns:
+            Path of the GeoParquet store
+        """
+        if not force and self.is_current():
+            return self.path
+
+        start = time.perf_counter()
+        tracts = load_county_tracts(self.boundaries_file, self.county_fp)
+
+        # Centroids in a projected CRS, then back to lon/lat
+        centroids = tracts.geometry.to_crs(epsg=CENTROID_EPSG).centroid.to_crs(epsg=4326)
+        tracts['centroid_lat'] = centroids.y
+        tracts['centroid_lon'] = centroids.x
+        tracts['area_sqkm'] = tracts.geometry.to_crs(epsg=AREA_EPSG).area / 1_000_000
+        tracts = tracts.to_crs(epsg=4326)
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tracts.to_parquet(tmp)
+        tmp.replace(self.path)
+
+        self._write_manifest({
+            'format': STORE_FORMAT,
+            'county': self.county_fp,
+            'tracts': len(tracts),
+            'sources': [dict(source, sha256=_sha256(self.boundaries_file.with_name(source['name'])))
+                        for source in self._signature()],
+            'built': time.strftime('%Y-%m-%dT%H:%M:%S')
+        })
+        self._tracts = None
+        self._tree = None
+
+        logger.info(f"Built tract store {self.path} ({len(tracts)} tracts, "
+                    f"{time.perf_counter() - start:.1f}s)")
+        return self.path
+
+    def open(self) -> gpd.GeoDataFrame:
+        """The county's tracts (built first if missing or stale), memory-mapped."""
+        if self._tracts is None:
+            self.build()
+            self._tracts = gpd.read_parquet(self.path, memory_map=True)
+        return self._tracts
+
+    @property
+    def tree(self) -> shapely.STRtree:
+        """Spatial index over the tract polygons, in row order."""
+        if self._tree is None:
+            geoms = self.open().geometry.values
+            # Prepared polygons make the point-in-polygon tests in locate() fast
+            shapely.prepare(geoms)
+            self._tree = shapely.STRtree(geoms)
+        return self._tree
+
+    def locate(self, lon, lat) -> np.ndarray:
+        """
+        Row of the tract containing each point.
+
+        Points on a shared border go to the first matching tract.
+
+        Args:
+            lon: Longitudes (EPSG:4326)
+            lat: Latitudes (EPSG:4326)
+
+        Returns:
+            Row index per point, -1 for points outside every tract
+        """
+        x = np.asarray(lon, dtype=float)
+        y = np.asarray(lat, dtype=float)
+        rows = np.full(len(x), -1, dtype=np.int64)
+
+        # Bounding-box candidates from the index, then exact tests on the prepared polygons
+        point_idx, tract_idx = self.tree.query(shapely.points(x, y))
+        hits = shapely.intersects_xy(self.tree.geometries[tract_idx], x[point_idx], y[point_idx])
+        point_idx, tract_idx = point_idx[hits], tract_idx[hits]
+
+        # Keep the first tract per point
+        first = np.unique(point_idx, return_index=True)[1]
+        rows[point_idx[first]] = tract_idx[first]
+        return rows
+
+    def tract_geoids(self, lon, lat) -> np.ndarray:
+        """GEOID of the tract containing each point (None outside the county)."""
+        rows = self.locate(lon, lat)
+        geoids = self.open()['GEOID'].to_numpy(dtype=object)
+        return np.where(rows >= 0, geoids[np.maximum(rows, 0)], None)
@@ -3,7 +3,9 @@
 from .policy_recommendations import PolicyRecommendationEngine, PolicyRecommendation
 from .visualize_recommendations import RecommendationVisualizer
 from .community_reports import CommunityReportGenerator
-from .cost_benefit_analysis import CostBenefitAnalyzer, CostEstimate
+from .cost_benefit_analysis import CostBenefitAnalyzer, CostEstimate, CostEstimateTable
+from .facility_siting import FacilitySitingOptimizer
+from .sensitivity import MonteCarloSensitivity, Distribution
 
 __all__ = [
     'PolicyRecommendationEngine',
@@ -11,5 +13,9 @@ __all__ = [
     'RecommendationVisualizer',
     'CommunityReportGenerator',
     'CostBenefitAnalyzer',
-    'CostEstimate'
+    'CostEstimate',
+    'CostEstimateTable',
+    'FacilitySitingOptimizer',
+    'MonteCarloSensitivity',
+    'Distribution'
 ]
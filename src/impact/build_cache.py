@@ -0,0 +1,222 @@
+"""
+Content-addressed cache of pipeline stage results.
+
+A stage's cache key is a digest of everything that determines its
+results: the stage name, the source files of its code, its parameters and
+the content digests of its inputs. A stage whose key is already cached is
+not run again; its artifacts are served from the cache and the files it
+writes are restored if they are missing or differ.
+
+Entries are evicted least-recently-used first once the cache exceeds its
+size limit.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path('outputs/.cache/pipeline')
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+MANIFEST = 'manifest.json'
+
+# Bump to invalidate every entry written by an older cache layout
+CACHE_FORMAT = 1
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def value_digest(value: Any) -> str:
+    """
+    Digest of an input value.
+
+    Paths to existing files are hashed by content, so a stage reading a
+    file reruns when the file changes; other values are hashed by pickle.
+    """
+    if isinstance(value, Path) and value.is_file():
+        return 'file:' + file_digest(value)
+    return 'pickle:' + hashlib.sha256(pickle.dumps(value)).hexdigest()
+
+
+def source_digest(module_names: Iterable[str]) -> Dict[str, str]:
+    """Digest of each module's source file."""
+    digests = {}
+    for name in sorted(set(module_names)):
+        module = sys.modules.get(name)
+        origin = getattr(module, '__file__', None)
+        if origin is None:
+            spec = importlib.util.find_spec(name)
+            origin = spec.origin if spec else None
+        digests[name] = file_digest(Path(origin)) if origin and Path(origin).is_file() else 'unknown'
+    return digests
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+class BuildCache:
+    """On-disk store of stage results keyed by input digest."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Cache directory (created if missing)
+            max_bytes: Size above which least recently used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def stage_key(self, stage_name: str, sources: Dict[str, str], params: Dict[str, Any],
+                  input_digests: Dict[str, str]) -> str:
+        """Cache key for a stage run."""
+        material = json.dumps({
+            'format': CACHE_FORMAT,
+            'stage': stage_name,
+            'sources': sources,
+            'params': params,
+            'inputs': input_digests
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Manifest of a cached entry, or None on a miss.
+
+        A hit marks the entry as recently used.
+        """
+        manifest_path = self._entry(key) / MANIFEST
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        entry = self._entry(key)
+        for name, (kind, stored, digest) in manifest['artifacts'].items():
+            if not (entry / stored).exists():
+                return None
+        for record in manifest['files']:
+            if not (entry / 'files' / record['stored']).exists():
+                return None
+
+        now = time.time()
+        os.utime(manifest_path, (now, now))
+        return manifest
+
+    def store(self, key: str, stage_name: str, artifacts: Dict[str, Tuple[str, Any, str]],
+              files: Iterable[Path]) -> bool:
+        """
+        Save a stage's artifacts and output files under its key.
+
+        Args:
+            key: Stage key from stage_key()
+            stage_name: Stage name (for the status report)
+            artifacts: Artifact refs produced by the stage
+            files: Files the stage wrote
+
+        Returns:
+            True if stored, False if a declared file was missing
+        """
+        entry = self._entry(key)
+        tmp = entry.with_name(entry.name + f'.tmp{os.getpid()}')
+        shutil.rmtree(tmp, ignore_errors=True)
+        (tmp / 'files').mkdir(parents=True)
+
+        manifest = {'stage': stage_name, 'key': key, 'created': time.time(), 'artifacts': {}, 'files': []}
+        for name, (kind, payload, digest) in artifacts.items():
+            if kind == 'arrow':
+                stored = f'{name}.arrow'
+                shutil.copyfile(payload, tmp / stored)
+            else:
+                stored = f'{name}.pkl'
+                with open(tmp / stored, 'wb') as f:
+                    pickle.dump(payload, f)
+            manifest['artifacts'][name] = (kind, stored, digest)
+
+        for i, path in enumerate(files):
+            path = Path(path)
+            if not path.is_file():
+                logger.warning(f"Not caching stage '{stage_name}': it did not write {path}")
+                shutil.rmtree(tmp, ignore_errors=True)
+                return False
+            stored = f'{i}_{path.name}'
+            shutil.copy2(path, tmp / 'files' / stored)
+            manifest['files'].append({'path': str(path), 'stored': stored, 'sha256': file_digest(path)})
+
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2))
+        shutil.rmtree(entry, ignore_errors=True)
+        tmp.replace(entry)
+        return True
+
+    def restore(self, key: str, manifest: Dict[str, Any]) -> Dict[str, Tuple[str, Any, str]]:
+        """
+        Restore a cached stage's output files and return its artifact refs.
+
+        Files already matching the cached digest are left untouched.
+        """
+        entry = self._entry(key)
+        for record in manifest['files']:
+            path = Path(record['path'])
+            if path.is_file() and file_digest(path) == record['sha256']:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(entry / 'files' / record['stored'], path)
+
+        artifacts = {}
+        for name, (kind, stored, digest) in manifest['artifacts'].items():
+            if kind == 'arrow':
+                artifacts[name] = ('arrow', str(entry / stored), digest)
+            else:
+                with open(entry / stored, 'rb') as f:
+                    artifacts[name] = ('value', pickle.load(f), digest)
+        return artifacts
+
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        """(last used, size in bytes, path) of every entry, oldest first."""
+        found = []
+        for manifest_path in self.cache_dir.glob(f'*/*/{MANIFEST}'):
+            entry = manifest_path.parent
+            found.append((manifest_path.stat().st_mtime, _dir_size(entry), entry))
+        return sorted(found)
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} build cache entries ({total / 1e6:.1f} MB kept)")
+        return removed
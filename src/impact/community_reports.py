@@ -10,6 +10,9 @@ from typing import Dict, List
 import logging
 from datetime import datetime
 
+from data_processing.columnar_store import dataset_exists, read_table
+from impact.policy_recommendations import impact_label
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -140,11 +143,12 @@ Our analysis found that some solutions can start RIGHT AWAY:
                 lines.append(f"\nWe identified the TOP {len(locations_df)} LOCATIONS where building new facilities would help the most people:")
                 lines.append("")
 
+                reach = impact_label(locations_df.columns)
                 for idx, row in locations_df.head(10).iterrows():
                     lines.append(f"\n{idx + 1}. {row.get('tract_name', 'Unknown Area')}")
                     lines.append(f"   • Current Situation: Nearest facility is {row['current_distance_km']:.1f} km ({row['current_distance_km'] * 0.621371:.1f} miles) away")
                     lines.append(f"   • Residents Directly Affected: {row['population_served']:,} people")
-                    lines.append(f"   • Total Who Would Benefit (5km radius): {row['estimated_impact']:,} people")
+                    lines.append(f"   • Total Who Would Benefit ({reach}): {row['estimated_impact']:,} people")
                     lines.append(f"   • Why This Area: {row['priority_reason']}")
 
             # Recommendations
@@ -259,20 +263,20 @@ def main():
     locations_file = Path('outputs/policy_recommendations/recommended_facility_locations.csv')
     recommendations_file = Path('outputs/policy_recommendations/recommendations.csv')
 
-    if not census_file.exists():
+    if not dataset_exists(census_file):
         logger.error(f"Census data not found: {census_file}")
         return 1
 
-    census_data = pd.read_csv(census_file)
+    census_data = read_table(census_file)
 
     # Load other data if available
     locations_df = pd.DataFrame()
-    if locations_file.exists():
-        locations_df = pd.read_csv(locations_file)
+    if dataset_exists(locations_file):
+        locations_df = read_table(locations_file)
 
     recommendations = []
-    if recommendations_file.exists():
-        recommendations = pd.read_csv(recommendations_file).to_dict('records')
+    if dataset_exists(recommendations_file):
+        recommendations = read_table(recommendations_file).to_dict('records')
 
     # Generate report
     generator = CommunityReportGenerator()
@@ -4,12 +4,15 @@ Cost-benefit analysis for policy recommendations.
 Provides detailed financial analysis with realistic cost estimates and ROI calculations.
 """
 
+import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+
+from data_processing.columnar_store import dataset_exists, read_table
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +20,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Years over which program-wide totals are projected
+ANALYSIS_HORIZON_YEARS = 10
+
+# Program name -> (CostEstimate category, ROI timeframe in years, model method)
+PROGRAMS = {
+    'New Healthcare Facilities': ('New Healthcare Facility', 10, '_new_facility_model'),
+    'Mobile Clinics': ('Mobile Health Clinics', 5, '_mobile_clinic_model'),
+    'Transportation': ('Transportation Assistance', 5, '_transportation_model'),
+    'Telehealth': ('Telehealth Expansion', 5, '_telehealth_model'),
+}
+
+
+def _break_even_value(years) -> Optional[float]:
+    """Scalar break-even years from a masked value, None if masked."""
+    return None if np.ma.is_masked(years) else float(years)
+
+
+def _format_break_even(years: Optional[float]) -> str:
+    """Break-even years for the text report."""
+    return 'never' if years is None else f"{years:.1f} years"
+
 
 @dataclass
 class CostEstimate:
@@ -27,10 +51,98 @@ class CostEstimate:
     cost_per_person_served: float
     roi_timeframe_years: int
     annual_savings_estimate: float
-    break_even_years: float
+    # None where savings never cover operating costs
+    break_even_years: Optional[float]
     benefit_cost_ratio: float
 
 
+@dataclass
+class CostEstimateTable:
+    """
+    Cost estimates for many populations of one program, one array per field.
+
+    break_even_years is a masked array, masked where the program never
+    breaks even (None in the scalar CostEstimate).
+    """
+    category: str
+    roi_timeframe_years: int
+    population_served: np.ndarray
+    one_time_costs: np.ndarray
+    annual_operating_costs: np.ndarray
+    cost_per_person_served: np.ndarray
+    annual_savings_estimate: np.ndarray
+    break_even_years: np.ma.MaskedArray
+    benefit_cost_ratio: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.population_served)
+
+    def __getitem__(self, i: int) -> CostEstimate:
+        """Row i as a scalar CostEstimate."""
+        return CostEstimate(
+            category=self.category,
+            one_time_costs=float(self.one_time_costs[i]),
+            annual_operating_costs=float(self.annual_operating_costs[i]),
+            cost_per_person_served=float(self.cost_per_person_served[i]),
+            roi_timeframe_years=self.roi_timeframe_years,
+            annual_savings_estimate=float(self.annual_savings_estimate[i]),
+            break_even_years=_break_even_value(self.break_even_years[i]),
+            benefit_cost_ratio=float(self.benefit_cost_ratio[i])
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Estimates as a DataFrame; break_even_years is missing (<NA>) where masked."""
+        break_even = pd.array(self.break_even_years.filled(np.nan), dtype='Float64')
+        break_even[np.ma.getmaskarray(self.break_even_years)] = pd.NA
+        return pd.DataFrame({
+            'population_served': self.population_served,
+            'one_time_costs': self.one_time_costs,
+            'annual_operating_costs': self.annual_operating_costs,
+            'annual_savings_estimate': self.annual_savings_estimate,
+            'cost_per_person_served': self.cost_per_person_served,
+            'break_even_years': break_even,
+            'benefit_cost_ratio': self.benefit_cost_ratio
+        })
+
+
+@dataclass
+class CostBenefitTotals:
+    """Program-wide costs and savings over the analysis horizon."""
+    one_time_costs: float
+    annual_operating_costs: float
+    annual_savings: float
+    horizon_years: int = ANALYSIS_HORIZON_YEARS
+
+    @property
+    def total_investment(self) -> float:
+        return self.one_time_costs + self.annual_operating_costs * self.horizon_years
+
+    @property
+    def total_savings(self) -> float:
+        return self.annual_savings * self.horizon_years
+
+    @property
+    def net_benefit(self) -> float:
+        return self.total_savings - self.total_investment
+
+    @property
+    def roi_percentage(self) -> float:
+        return (self.net_benefit / self.total_investment) * 100 if self.total_investment > 0 else 0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Totals and derived aggregates as plain floats."""
+        return {
+            'one_time_costs': float(self.one_time_costs),
+            'annual_operating_costs': float(self.annual_operating_costs),
+            'annual_savings': float(self.annual_savings),
+            'horizon_years': self.horizon_years,
+            'total_investment': float(self.total_investment),
+            'total_savings': float(self.total_savings),
+            'net_benefit': float(self.net_benefit),
+            'roi_percentage': float(self.roi_percentage)
+        }
+
+
 class CostBenefitAnalyzer:
     """Analyze costs and benefits of policy recommendations."""
 
@@ -65,100 +177,57 @@ class CostBenefitAnalyzer:
         self.CHRONIC_DISEASE_MANAGEMENT_SAVINGS = 1_500  # Per person per year
         self.IMPROVED_ACCESS_DISEASE_MANAGEMENT_RATE = 0.20  # % improvement
 
-    def estimate_new_facility_costs(self, population_served: int) -> CostEstimate:
-        """
-        Estimate costs for building a new healthcare facility.
+    def parameters(self) -> Dict[str, float]:
+        """Cost and savings constants by name (the inputs sensitivity analysis can vary)."""
+        return {name: value for name, value in vars(self).items() if name.isupper()}
 
-        Args:
-            population_served: Number of people who would gain access
+    # Program models. Each takes a parameter source p (the analyzer itself, or
+    # a namespace of sampled arrays) and the population served (scalar or
+    # array), and returns (one_time, annual_operating, annual_savings,
+    # people_served) as NumPy expressions that broadcast over both.
 
-        Returns:
-            CostEstimate with detailed financial analysis
-        """
+    @staticmethod
+    def _new_facility_model(p, population_served):
         # One-time costs
-        construction = self.FACILITY_CONSTRUCTION_COST_PER_SQ_FT * self.TYPICAL_FACILITY_SIZE_SQ_FT
-        one_time = construction + self.FACILITY_LAND_COST + self.FACILITY_EQUIPMENT_COST
+        construction = p.FACILITY_CONSTRUCTION_COST_PER_SQ_FT * p.TYPICAL_FACILITY_SIZE_SQ_FT
+        one_time = construction + p.FACILITY_LAND_COST + p.FACILITY_EQUIPMENT_COST
 
         # Annual operating
-        annual_operating = self.FACILITY_ANNUAL_OPERATING
+        annual_operating = p.FACILITY_ANNUAL_OPERATING
 
         # Savings from improved access
         # 1. ER diversion savings
-        preventable_er_visits = (population_served / 1000) * self.PREVENTABLE_ER_VISITS_PER_1000_WITH_POOR_ACCESS
-        er_savings = preventable_er_visits * (self.ER_VISIT_COST - self.PRIMARY_CARE_VISIT_COST)
+        preventable_er_visits = (population_served / 1000) * p.PREVENTABLE_ER_VISITS_PER_1000_WITH_POOR_ACCESS
+        er_savings = preventable_er_visits * (p.ER_VISIT_COST - p.PRIMARY_CARE_VISIT_COST)
 
         # 2. Chronic disease management savings
         chronic_disease_patients = population_served * 0.40  # 40% have chronic conditions
-        chronic_savings = chronic_disease_patients * self.IMPROVED_ACCESS_DISEASE_MANAGEMENT_RATE * \
-                         self.CHRONIC_DISEASE_MANAGEMENT_SAVINGS
+        chronic_savings = chronic_disease_patients * p.IMPROVED_ACCESS_DISEASE_MANAGEMENT_RATE * \
+                         p.CHRONIC_DISEASE_MANAGEMENT_SAVINGS
 
         annual_savings = er_savings + chronic_savings
+        return one_time, annual_operating, annual_savings, population_served
 
-        # ROI calculation
-        net_annual_benefit = annual_savings - annual_operating
-        if net_annual_benefit > 0:
-            break_even = one_time / net_annual_benefit
-            benefit_cost_ratio = (annual_savings * 10) / (one_time + annual_operating * 10)
-        else:
-            break_even = 999  # Never breaks even
-            benefit_cost_ratio = annual_savings / annual_operating if annual_operating > 0 else 0
-
-        cost_per_person = (one_time + annual_operating * 10) / population_served if population_served > 0 else 0  # 10-year horizon
-
-        return CostEstimate(
-            category='New Healthcare Facility',
-            one_time_costs=one_time,
-            annual_operating_costs=annual_operating,
-            cost_per_person_served=cost_per_person,
-            roi_timeframe_years=10,
-            annual_savings_estimate=annual_savings,
-            break_even_years=break_even,
-            benefit_cost_ratio=benefit_cost_ratio
-        )
-
-    def estimate_mobile_clinic_costs(self, population_served: int) -> CostEstimate:
-        """Estimate costs for mobile clinic program."""
-
+    @staticmethod
+    def _mobile_clinic_model(p, population_served):
         # One-time costs
-        one_time = self.MOBILE_CLINIC_VEHICLE_COST * self.MOBILE_CLINICS_NEEDED
+        one_time = p.MOBILE_CLINIC_VEHICLE_COST * p.MOBILE_CLINICS_NEEDED
 
         # Annual operating
-        annual_operating = self.MOBILE_CLINIC_ANNUAL_OPERATING * self.MOBILE_CLINICS_NEEDED
+        annual_operating = p.MOBILE_CLINIC_ANNUAL_OPERATING * p.MOBILE_CLINICS_NEEDED
 
         # Savings (similar to facility but lower scale)
         preventable_er_visits = (population_served / 1000) * 150  # Lower than facility
-        er_savings = preventable_er_visits * (self.ER_VISIT_COST - self.PRIMARY_CARE_VISIT_COST)
+        er_savings = preventable_er_visits * (p.ER_VISIT_COST - p.PRIMARY_CARE_VISIT_COST)
 
         chronic_disease_patients = population_served * 0.40
         chronic_savings = chronic_disease_patients * 0.10 * 1000  # Lower impact than facility
 
         annual_savings = er_savings + chronic_savings
+        return one_time, annual_operating, annual_savings, population_served
 
-        # ROI
-        net_annual_benefit = annual_savings - annual_operating
-        if net_annual_benefit > 0:
-            break_even = one_time / net_annual_benefit
-            benefit_cost_ratio = (annual_savings * 5) / (one_time + annual_operating * 5)
-        else:
-            break_even = 999
-            benefit_cost_ratio = annual_savings / annual_operating if annual_operating > 0 else 0
-
-        cost_per_person = (one_time + annual_operating * 5) / population_served if population_served > 0 else 0
-
-        return CostEstimate(
-            category='Mobile Health Clinics',
-            one_time_costs=one_time,
-            annual_operating_costs=annual_operating,
-            cost_per_person_served=cost_per_person,
-            roi_timeframe_years=5,
-            annual_savings_estimate=annual_savings,
-            break_even_years=break_even,
-            benefit_cost_ratio=benefit_cost_ratio
-        )
-
-    def estimate_transportation_costs(self, population_served: int) -> CostEstimate:
-        """Estimate costs for transportation assistance program."""
-
+    @staticmethod
+    def _transportation_model(p, population_served):
         # Assume 10% of population uses service
         active_users = population_served * 0.10
 
@@ -166,48 +235,26 @@ class CostBenefitAnalyzer:
         one_time = 50_000  # Program setup
 
         # Annual operating
-        annual_trips = active_users * self.TRANSPORT_TRIPS_PER_PERSON_PER_YEAR
-        annual_operating = annual_trips * self.TRANSPORT_VOUCHER_COST_PER_TRIP * self.TRANSPORT_SUBSIDY_PERCENTAGE
+        annual_trips = active_users * p.TRANSPORT_TRIPS_PER_PERSON_PER_YEAR
+        annual_operating = annual_trips * p.TRANSPORT_VOUCHER_COST_PER_TRIP * p.TRANSPORT_SUBSIDY_PERCENTAGE
 
         # Savings from improved access to care
         preventable_er_visits = (active_users / 1000) * 200
-        er_savings = preventable_er_visits * (self.ER_VISIT_COST - self.PRIMARY_CARE_VISIT_COST)
+        er_savings = preventable_er_visits * (p.ER_VISIT_COST - p.PRIMARY_CARE_VISIT_COST)
 
         # Additional savings from keeping appointments
-        kept_appointments_value = active_users * self.TRANSPORT_TRIPS_PER_PERSON_PER_YEAR * 100
+        kept_appointments_value = active_users * p.TRANSPORT_TRIPS_PER_PERSON_PER_YEAR * 100
 
         annual_savings = er_savings + kept_appointments_value
+        return one_time, annual_operating, annual_savings, active_users
 
-        # ROI
-        net_annual_benefit = annual_savings - annual_operating
-        if net_annual_benefit > 0:
-            break_even = one_time / net_annual_benefit
-            benefit_cost_ratio = (annual_savings * 5) / (one_time + annual_operating * 5)
-        else:
-            break_even = 999
-            benefit_cost_ratio = annual_savings / annual_operating if annual_operating > 0 else 0
-
-        cost_per_person = (one_time + annual_operating * 5) / active_users if active_users > 0 else 0
-
-        return CostEstimate(
-            category='Transportation Assistance',
-            one_time_costs=one_time,
-            annual_operating_costs=annual_operating,
-            cost_per_person_served=cost_per_person,
-            roi_timeframe_years=5,
-            annual_savings_estimate=annual_savings,
-            break_even_years=break_even,
-            benefit_cost_ratio=benefit_cost_ratio
-        )
-
-    def estimate_telehealth_costs(self, population_served: int) -> CostEstimate:
-        """Estimate costs for telehealth expansion."""
-
+    @staticmethod
+    def _telehealth_model(p, population_served):
         # One-time costs
-        one_time = self.TELEHEALTH_SETUP_PER_KIOSK * self.TELEHEALTH_KIOSKS_NEEDED
+        one_time = p.TELEHEALTH_SETUP_PER_KIOSK * p.TELEHEALTH_KIOSKS_NEEDED
 
         # Annual operating
-        annual_operating = self.TELEHEALTH_ANNUAL_OPERATING
+        annual_operating = p.TELEHEALTH_ANNUAL_OPERATING
 
         # Savings
         # Assume 20% of population uses telehealth
@@ -224,29 +271,213 @@ class CostBenefitAnalyzer:
         provider_savings = telehealth_visits * 25  # More efficient scheduling
 
         annual_savings = patient_savings + provider_savings
+        return one_time, annual_operating, annual_savings, users
 
-        # ROI
-        net_annual_benefit = annual_savings - annual_operating
-        if net_annual_benefit > 0:
-            break_even = one_time / net_annual_benefit
-            benefit_cost_ratio = (annual_savings * 5) / (one_time + annual_operating * 5)
-        else:
-            break_even = 999
-            benefit_cost_ratio = annual_savings / annual_operating if annual_operating > 0 else 0
+    def evaluate_program(self, program: str, population_served, p=None) -> Dict[str, np.ndarray]:
+        """
+        Evaluate one program's costs and returns with array arithmetic.
 
-        cost_per_person = (one_time + annual_operating * 5) / users if users > 0 else 0
+        Args:
+            program: Program name, a key of PROGRAMS
+            population_served: Population (scalar or array)
+            p: Parameter source with the analyzer's constants as attributes
+                (scalars or arrays); defaults to the analyzer itself
 
+        Returns:
+            Dict of CostEstimate numeric fields as broadcast float arrays;
+            break_even_years is a masked array, masked where savings never
+            cover operating costs
+        """
+        category, horizon, model = PROGRAMS[program]
+        one_time, annual_operating, annual_savings, people = getattr(self, model)(
+            self if p is None else p, population_served
+        )
+        one_time, annual_operating, annual_savings, people = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (one_time, annual_operating, annual_savings, people))
+        )
+
+        # ROI calculation
+        net_annual_benefit = annual_savings - annual_operating
+        pays_back = net_annual_benefit > 0
+        horizon_cost = one_time + annual_operating * horizon
+        with np.errstate(divide='ignore', invalid='ignore'):
+            break_even = np.ma.masked_where(~pays_back, one_time / net_annual_benefit)
+            benefit_cost_ratio = np.where(
+                pays_back,
+                (annual_savings * horizon) / horizon_cost,
+                np.where(annual_operating > 0, annual_savings / annual_operating, 0.0)
+            )
+            cost_per_person = np.where(people > 0, horizon_cost / people, 0.0)
+
+        return {
+            'one_time_costs': one_time,
+            'annual_operating_costs': annual_operating,
+            'cost_per_person_served': cost_per_person,
+            'annual_savings_estimate': annual_savings,
+            'break_even_years': break_even,
+            'benefit_cost_ratio': benefit_cost_ratio
+        }
+
+    def _estimate(self, program: str, population_served: int) -> CostEstimate:
+        """Scalar CostEstimate for one program."""
+        category, horizon, _ = PROGRAMS[program]
+        values = self.evaluate_program(program, population_served)
+        break_even = values.pop('break_even_years')
         return CostEstimate(
-            category='Telehealth Expansion',
-            one_time_costs=one_time,
-            annual_operating_costs=annual_operating,
-            cost_per_person_served=cost_per_person,
-            roi_timeframe_years=5,
-            annual_savings_estimate=annual_savings,
-            break_even_years=break_even,
-            benefit_cost_ratio=benefit_cost_ratio
+            category=category,
+            roi_timeframe_years=horizon,
+            break_even_years=_break_even_value(break_even),
+            **{field: float(value) for field, value in values.items()}
+        )
+
+    def estimate_costs_batch(self, program: str, populations) -> 'CostEstimateTable':
+        """
+        Estimate one program's costs for many populations at once.
+
+        Args:
+            program: Program name, a key of PROGRAMS
+            populations: Population served per option (e.g. per tract or
+                candidate site)
+
+        Returns:
+            CostEstimateTable with one row per population
+        """
+        category, horizon, _ = PROGRAMS[program]
+        populations = np.atleast_1d(np.asarray(populations, dtype=float))
+        values = self.evaluate_program(program, populations)
+        return CostEstimateTable(
+            category=category,
+            roi_timeframe_years=horizon,
+            population_served=populations,
+            **values
         )
 
+    def estimate_new_facility_costs_batch(self, populations) -> 'CostEstimateTable':
+        """Array version of estimate_new_facility_costs."""
+        return self.estimate_costs_batch('New Healthcare Facilities', populations)
+
+    def estimate_mobile_clinic_costs_batch(self, populations) -> 'CostEstimateTable':
+        """Array version of estimate_mobile_clinic_costs."""
+        return self.estimate_costs_batch('Mobile Clinics', populations)
+
+    def estimate_transportation_costs_batch(self, populations) -> 'CostEstimateTable':
+        """Array version of estimate_transportation_costs."""
+        return self.estimate_costs_batch('Transportation', populations)
+
+    def estimate_telehealth_costs_batch(self, populations) -> 'CostEstimateTable':
+        """Array version of estimate_telehealth_costs."""
+        return self.estimate_costs_batch('Telehealth', populations)
+
+    def estimate_new_facility_costs(self, population_served: int) -> CostEstimate:
+        """
+        Estimate costs for building a new healthcare facility.
+
+        Args:
+            population_served: Number of people who would gain access
+
+        Returns:
+            CostEstimate with detailed financial analysis
+        """
+        return self._estimate('New Healthcare Facilities', population_served)
+
+    def estimate_mobile_clinic_costs(self, population_served: int) -> CostEstimate:
+        """Estimate costs for mobile clinic program."""
+        return self._estimate('Mobile Clinics', population_served)
+
+    def estimate_transportation_costs(self, population_served: int) -> CostEstimate:
+        """Estimate costs for transportation assistance program."""
+        return self._estimate('Transportation', population_served)
+
+    def estimate_telehealth_costs(self, population_served: int) -> CostEstimate:
+        """Estimate costs for telehealth expansion."""
+        return self._estimate('Telehealth', population_served)
+
+    def program_populations(self, recommendations: List[Dict],
+                            locations_df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Population each program would serve.
+
+        Args:
+            recommendations: List of policy recommendations
+            locations_df: Recommended facility locations
+
+        Returns:
+            Population by program name; facilities get the average served per
+            location, and programs without a recommendation are omitted
+        """
+        populations = {}
+        if not locations_df.empty:
+            total_served = locations_df['estimated_impact'].sum()
+            populations['New Healthcare Facilities'] = int(total_served / len(locations_df))
+
+        for program, keyword in [('Mobile Clinics', 'Mobile'), ('Transportation', 'Transportation'),
+                                 ('Telehealth', 'Telehealth')]:
+            population = sum(r.get('Affected_Population', 0) for r in recommendations
+                             if keyword in r.get('Title', ''))
+            if population > 0:
+                populations[program] = population
+        return populations
+
+    def summarize(self, analyses: Dict[str, CostEstimate], n_facilities: int) -> CostBenefitTotals:
+        """
+        Total the program estimates.
+
+        Facility estimates are per facility and are multiplied by the number
+        of recommended locations; other programs are counted once.
+
+        Args:
+            analyses: Cost estimates keyed by program name
+            n_facilities: Number of recommended facility locations
+
+        Returns:
+            CostBenefitTotals over the analysis horizon
+        """
+        one_time = annual = savings = 0.0
+        for name, analysis in analyses.items():
+            units = n_facilities if name == 'New Healthcare Facilities' else 1
+            one_time += analysis.one_time_costs * units
+            annual += analysis.annual_operating_costs * units
+            savings += analysis.annual_savings_estimate * units
+        return CostBenefitTotals(one_time, annual, savings)
+
+    def export_results(self, analyses: Dict[str, CostEstimate], n_facilities: int,
+                       output_file: Path) -> Path:
+        """
+        Write the estimates and totals as JSON for machine consumers (e.g. the API).
+
+        Args:
+            analyses: Cost estimates keyed by program name
+            n_facilities: Number of recommended facility locations
+            output_file: JSON output path
+
+        Returns:
+            Path of the file written
+        """
+        estimates = []
+        for name, analysis in analyses.items():
+            record = {key: float(value) if isinstance(value, (int, float, np.number)) else value
+                      for key, value in asdict(analysis).items()}
+            record['roi_timeframe_years'] = int(analysis.roi_timeframe_years)
+            estimates.append({
+                'program': name,
+                'units': n_facilities if name == 'New Healthcare Facilities' else 1,
+                **record
+            })
+
+        results = {
+            'totals': self.summarize(analyses, n_facilities).to_dict(),
+            'estimates': estimates
+        }
+
+        # Write then rename so readers never see a partial file
+        tmp_file = output_file.with_suffix(output_file.suffix + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        tmp_file.replace(output_file)
+
+        logger.info(f"Cost-benefit results saved to {output_file}")
+        return output_file
+
     def generate_cost_benefit_report(
         self,
         recommendations: List[Dict],
@@ -256,6 +487,9 @@ class CostBenefitAnalyzer:
         """
         Generate comprehensive cost-benefit analysis report.
 
+        The estimates and totals are also written as JSON next to the text
+        report (same stem, '.json' suffix).
+
         Args:
             recommendations: List of policy recommendations
             locations_df: Recommended facility locations
@@ -276,13 +510,13 @@ class CostBenefitAnalyzer:
 
             # Analyze each recommendation type
             analyses = {}
+            populations = self.program_populations(recommendations, locations_df)
 
             # 1. New facilities
             if not locations_df.empty:
                 total_served = locations_df['estimated_impact'].sum()
                 # Calculate costs for ONE average facility, not all combined
-                avg_served_per_facility = total_served / len(locations_df) if len(locations_df) > 0 else 0
-                facility_analysis = self.estimate_new_facility_costs(int(avg_served_per_facility))
+                facility_analysis = self.estimate_new_facility_costs(populations['New Healthcare Facilities'])
                 analyses['New Healthcare Facilities'] = facility_analysis
 
                 lines.append("\n1. NEW HEALTHCARE FACILITIES")
@@ -310,12 +544,12 @@ class CostBenefitAnalyzer:
                 lines.append(f"  TOTAL FOR {len(locations_df)} FACILITIES: ${facility_analysis.annual_savings_estimate * len(locations_df):,.0f}/year")
                 lines.append("")
                 lines.append(f"RETURN ON INVESTMENT:")
-                lines.append(f"  • Break-even timeframe: {facility_analysis.break_even_years:.1f} years")
+                lines.append(f"  • Break-even timeframe: {_format_break_even(facility_analysis.break_even_years)}")
                 lines.append(f"  • 10-year benefit-cost ratio: {facility_analysis.benefit_cost_ratio:.2f}:1")
                 lines.append(f"  • Cost per person served (10-year): ${facility_analysis.cost_per_person_served:,.0f}")
 
             # 2. Mobile clinics
-            mobile_pop = sum(r.get('Affected_Population', 0) for r in recommendations if 'Mobile' in r.get('Title', ''))
+            mobile_pop = populations.get('Mobile Clinics', 0)
             if mobile_pop > 0:
                 mobile_analysis = self.estimate_mobile_clinic_costs(mobile_pop)
                 analyses['Mobile Clinics'] = mobile_analysis
@@ -336,12 +570,12 @@ class CostBenefitAnalyzer:
                 lines.append(f"ESTIMATED ANNUAL SAVINGS: ${mobile_analysis.annual_savings_estimate:,.0f}")
                 lines.append("")
                 lines.append(f"RETURN ON INVESTMENT:")
-                lines.append(f"  • Break-even timeframe: {mobile_analysis.break_even_years:.1f} years")
+                lines.append(f"  • Break-even timeframe: {_format_break_even(mobile_analysis.break_even_years)}")
                 lines.append(f"  • 5-year benefit-cost ratio: {mobile_analysis.benefit_cost_ratio:.2f}:1")
                 lines.append(f"  • Cost per person served (5-year): ${mobile_analysis.cost_per_person_served:,.0f}")
 
             # 3. Transportation
-            transport_pop = sum(r.get('Affected_Population', 0) for r in recommendations if 'Transportation' in r.get('Title', ''))
+            transport_pop = populations.get('Transportation', 0)
             if transport_pop > 0:
                 transport_analysis = self.estimate_transportation_costs(transport_pop)
                 analyses['Transportation'] = transport_analysis
@@ -361,12 +595,12 @@ class CostBenefitAnalyzer:
                 lines.append(f"  • Kept appointments and ER diversion")
                 lines.append("")
                 lines.append(f"RETURN ON INVESTMENT:")
-                lines.append(f"  • Break-even timeframe: {transport_analysis.break_even_years:.1f} years")
+                lines.append(f"  • Break-even timeframe: {_format_break_even(transport_analysis.break_even_years)}")
                 lines.append(f"  • 5-year benefit-cost ratio: {transport_analysis.benefit_cost_ratio:.2f}:1")
                 lines.append(f"  • Cost per active user (5-year): ${transport_analysis.cost_per_person_served:,.0f}")
 
             # 4. Telehealth
-            telehealth_pop = sum(r.get('Affected_Population', 0) for r in recommendations if 'Telehealth' in r.get('Title', ''))
+            telehealth_pop = populations.get('Telehealth', 0)
             if telehealth_pop > 0:
                 telehealth_analysis = self.estimate_telehealth_costs(telehealth_pop)
                 analyses['Telehealth'] = telehealth_analysis
@@ -387,7 +621,7 @@ class CostBenefitAnalyzer:
                 lines.append(f"  • Provider efficiency gains")
                 lines.append("")
                 lines.append(f"RETURN ON INVESTMENT:")
-                lines.append(f"  • Break-even timeframe: {telehealth_analysis.break_even_years:.1f} years")
+                lines.append(f"  • Break-even timeframe: {_format_break_even(telehealth_analysis.break_even_years)}")
                 lines.append(f"  • 5-year benefit-cost ratio: {telehealth_analysis.benefit_cost_ratio:.2f}:1")
                 lines.append(f"  • Cost per user (5-year): ${telehealth_analysis.cost_per_person_served:,.0f}")
 
@@ -396,40 +630,20 @@ class CostBenefitAnalyzer:
             lines.append("SUMMARY OF ALL RECOMMENDATIONS")
             lines.append("=" * 80)
 
-            # Calculate totals correctly: multiply facilities by count, add others as-is
-            total_one_time = 0
-            total_annual = 0
-            total_savings = 0
-
-            # New facilities: multiply by number of facilities
-            if 'New Healthcare Facilities' in analyses:
-                facility = analyses['New Healthcare Facilities']
-                total_one_time += facility.one_time_costs * len(locations_df)
-                total_annual += facility.annual_operating_costs * len(locations_df)
-                total_savings += facility.annual_savings_estimate * len(locations_df)
-
-            # Other programs: add as-is (no multiplication)
-            for name, analysis in analyses.items():
-                if name != 'New Healthcare Facilities':
-                    total_one_time += analysis.one_time_costs
-                    total_annual += analysis.annual_operating_costs
-                    total_savings += analysis.annual_savings_estimate
+            totals = self.summarize(analyses, len(locations_df))
 
             lines.append(f"\nTOTAL INVESTMENT REQUIRED:")
-            lines.append(f"  • One-time costs: ${total_one_time:,.0f}")
-            lines.append(f"  • Annual operating costs: ${total_annual:,.0f}")
-            lines.append(f"  • 10-year total investment: ${total_one_time + total_annual * 10:,.0f}")
+            lines.append(f"  • One-time costs: ${totals.one_time_costs:,.0f}")
+            lines.append(f"  • Annual operating costs: ${totals.annual_operating_costs:,.0f}")
+            lines.append(f"  • 10-year total investment: ${totals.total_investment:,.0f}")
 
             lines.append(f"\nTOTAL ESTIMATED BENEFITS:")
-            lines.append(f"  • Annual savings: ${total_savings:,.0f}")
-            lines.append(f"  • 10-year total savings: ${total_savings * 10:,.0f}")
+            lines.append(f"  • Annual savings: ${totals.annual_savings:,.0f}")
+            lines.append(f"  • 10-year total savings: ${totals.total_savings:,.0f}")
 
             lines.append(f"\nOVERALL ROI:")
-            net_10_year = (total_savings * 10) - (total_one_time + total_annual * 10)
-            roi_percentage = (net_10_year / (total_one_time + total_annual * 10)) * 100 if (total_one_time + total_annual * 10) > 0 else 0
-
-            lines.append(f"  • 10-year net benefit: ${net_10_year:,.0f}")
-            lines.append(f"  • 10-year ROI: {roi_percentage:.1f}%")
+            lines.append(f"  • 10-year net benefit: ${totals.net_benefit:,.0f}")
+            lines.append(f"  • 10-year ROI: {totals.roi_percentage:.1f}%")
 
             # Priority ranking by cost-effectiveness
             lines.append("\n\nPRIORITY RANKING BY COST-EFFECTIVENESS:")
@@ -448,7 +662,7 @@ class CostBenefitAnalyzer:
             for idx, item in enumerate(cost_effectiveness, 1):
                 lines.append(f"{idx}. {item['name']}")
                 lines.append(f"   → Benefit-cost ratio: {item['ratio']:.2f}:1")
-                lines.append(f"   → Break-even: {item['break_even']:.1f} years")
+                lines.append(f"   → Break-even: {_format_break_even(item['break_even'])}")
 
             lines.append("\n" + "=" * 80)
             lines.append("Note: Cost estimates based on 2026 industry standards for LA County.")
@@ -460,6 +674,8 @@ class CostBenefitAnalyzer:
                 f.write('\n'.join(lines))
 
             logger.info(f"Cost-benefit analysis saved to {output_file}")
+
+            self.export_results(analyses, len(locations_df), Path(output_file).with_suffix('.json'))
             return True
 
         except Exception as e:
@@ -477,12 +693,12 @@ def main():
     output_file = Path('outputs/policy_recommendations/COST_BENEFIT_ANALYSIS.txt')
 
     locations_df = pd.DataFrame()
-    if locations_file.exists():
-        locations_df = pd.read_csv(locations_file)
+    if dataset_exists(locations_file):
+        locations_df = read_table(locations_file)
 
     recommendations = []
-    if recommendations_file.exists():
-        recommendations = pd.read_csv(recommendations_file).to_dict('records')
+    if dataset_exists(recommendations_file):
+        recommendations = read_table(recommendations_file).to_dict('records')
 
     analyzer = CostBenefitAnalyzer()
     analyzer.generate_cost_benefit_report(recommendations, locations_df, output_file)
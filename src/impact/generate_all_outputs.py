@@ -7,17 +7,31 @@ Runs the complete pipeline to produce:
 - Community reports
 - Interactive visualizations
 - Impact dashboards
+
+Steps run as an impact.pipeline stage DAG: the recommendations stage runs
+first, then the other stages run in parallel worker processes and receive
+its frames as Arrow IPC files. Stages whose code and inputs are unchanged
+since a previous run are restored from the build cache instead of rerun
+(--force STAGE reruns one anyway).
 """
 
+import argparse
 import logging
 from pathlib import Path
 import sys
 
+from analysis.isochrones import DEFAULT_STORE_DIR as ISOCHRONE_DIR, load_isochrone_engine
+from analysis.road_network import DEFAULT_ROAD_NETWORK_FILE
+from data_processing.columnar_store import dataset_exists, resolve_path, write_table
+from data_processing.tract_store import DEFAULT_BOUNDARIES_FILE
+
 # Import all impact modules
 from impact.policy_recommendations import PolicyRecommendationEngine
 from impact.visualize_recommendations import RecommendationVisualizer
 from impact.community_reports import CommunityReportGenerator
 from impact.cost_benefit_analysis import CostBenefitAnalyzer
+from impact.pipeline import Pipeline, Stage
+from impact.build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache
 import pandas as pd
 
 logging.basicConfig(
@@ -26,100 +40,172 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CENSUS_FILE = Path('outputs/reports/census_with_access_metrics.csv')
+OUTPUT_DIR = Path('outputs/policy_recommendations')
 
-def main():
-    """Generate all policy impact outputs."""
-
-    logger.info("="*80)
-    logger.info("GENERATING COMPREHENSIVE POLICY IMPACT PACKAGE")
-    logger.info("="*80)
-
-    # File paths
-    census_file = Path('outputs/reports/census_with_access_metrics.csv')
-    output_dir = Path('outputs/policy_recommendations')
-
-    # Verify data exists
-    if not census_file.exists():
-        logger.error(f"Census data not found: {census_file}")
-        logger.error("Please run the analysis notebook first to generate access metrics.")
-        return 1
-
-    logger.info(f"\n1/5 Generating policy recommendations...")
-    logger.info("-" * 80)
 
-    # Step 1: Generate Policy Recommendations
-    engine = PolicyRecommendationEngine(census_file, census_file)
+# Pipeline stages. Each runs in its own worker process and receives the
+# frames it needs from earlier stages.
 
+def generate_recommendations(census_file: Path, output_dir: Path, road_network_file: Path,
+                             boundaries_file: Path):
+    """Stage 1: recommendations, executive summary and facility sites."""
+    engine = PolicyRecommendationEngine(census_file, census_file,
+                                        isochrones=load_isochrone_engine(road_network_file, ISOCHRONE_DIR),
+                                        boundaries_file=boundaries_file)
     if not engine.load_data():
-        logger.error("Failed to load data. Exiting.")
-        return 1
+        raise RuntimeError(f"Failed to load {census_file}")
 
     recommendations = engine.generate_all_recommendations()
     output_dir.mkdir(parents=True, exist_ok=True)
 
     engine.generate_executive_summary(output_dir / 'EXECUTIVE_SUMMARY.txt')
-    engine.export_recommendations_csv(output_dir / 'recommendations.csv')
+    recommendations_df = engine.export_recommendations_csv(output_dir / 'recommendations.csv')
 
     locations = engine.recommend_new_facility_locations(n_facilities=10)
     locations_df = pd.DataFrame(locations)
-    locations_df.to_csv(output_dir / 'recommended_facility_locations.csv', index=False)
+    write_table(locations_df, output_dir / 'recommended_facility_locations.csv', export_csv=True)
 
     logger.info(f"✓ Policy recommendations generated: {len(recommendations)} recommendations")
+    return {
+        'census_data': engine.census_data,
+        'recommendations_df': recommendations_df,
+        'locations_df': locations_df
+    }
 
-    # Step 2: Generate Cost-Benefit Analysis
-    logger.info(f"\n2/5 Generating cost-benefit analysis...")
-    logger.info("-" * 80)
 
+def generate_cost_benefit(output_dir: Path, recommendations_df: pd.DataFrame, locations_df: pd.DataFrame):
+    """Cost-benefit text report and JSON results."""
     analyzer = CostBenefitAnalyzer()
-    recommendations_df = pd.read_csv(output_dir / 'recommendations.csv')
-    analyzer.generate_cost_benefit_report(
+    if not analyzer.generate_cost_benefit_report(
         recommendations_df.to_dict('records'),
         locations_df,
         output_dir / 'COST_BENEFIT_ANALYSIS.txt'
-    )
-
+    ):
+        raise RuntimeError("Cost-benefit analysis failed")
     logger.info("✓ Cost-benefit analysis complete")
 
-    # Step 3: Generate Community Report
-    logger.info(f"\n3/5 Generating community report...")
-    logger.info("-" * 80)
 
-    census_data = pd.read_csv(census_file)
+def generate_community_report(output_dir: Path, recommendations_df: pd.DataFrame,
+                              census_data: pd.DataFrame, locations_df: pd.DataFrame):
+    """Plain-language community summary."""
     report_generator = CommunityReportGenerator(output_dir)
     report_generator.generate_community_summary(
         recommendations_df.to_dict('records'),
         census_data,
         locations_df
     )
-
     logger.info("✓ Community report generated")
 
-    # Step 4: Generate Visualizations
-    logger.info(f"\n4/5 Creating interactive visualizations...")
-    logger.info("-" * 80)
-
-    visualizer = RecommendationVisualizer(output_dir)
 
-    # Facility locations map
-    visualizer.create_facility_locations_map(locations_df, census_data)
+def generate_facility_map(output_dir: Path, locations_df: pd.DataFrame, census_data: pd.DataFrame,
+                          road_network_file: Path):
+    """Folium map of recommended facility locations (catchments come from the isochrone cache)."""
+    RecommendationVisualizer(output_dir).create_facility_locations_map(
+        locations_df, census_data, isochrones=load_isochrone_engine(road_network_file, ISOCHRONE_DIR)
+    )
     logger.info("  ✓ Facility locations map created")
 
-    # Access desert heatmap
-    visualizer.create_access_desert_heatmap(census_data)
+
+def generate_access_desert_map(output_dir: Path, census_data: pd.DataFrame):
+    """Folium heat map of access deserts."""
+    RecommendationVisualizer(output_dir).create_access_desert_heatmap(census_data)
     logger.info("  ✓ Access desert heatmap created")
 
-    # Impact dashboard
-    visualizer.create_impact_dashboard(
+
+def generate_dashboard(output_dir: Path, recommendations_df: pd.DataFrame,
+                       locations_df: pd.DataFrame, census_data: pd.DataFrame):
+    """Matplotlib impact dashboard."""
+    RecommendationVisualizer(output_dir).create_impact_dashboard(
         recommendations_df.to_dict('records'),
         locations_df,
         census_data
     )
     logger.info("  ✓ Policy impact dashboard created")
 
-    # Step 5: Summary
-    logger.info(f"\n5/5 Generating summary...")
+
+def _outputs(*names):
+    return tuple(OUTPUT_DIR / name for name in names)
+
+
+# Cache keys cover the in-repo modules each stage function uses (see
+# impact.pipeline.stage_modules)
+STAGES = [
+    Stage('recommendations', generate_recommendations,
+          inputs=('census_file', 'output_dir', 'road_network_file', 'boundaries_file'),
+          outputs=('census_data', 'recommendations_df', 'locations_df'),
+          files=_outputs('EXECUTIVE_SUMMARY.txt', 'recommendations.csv', 'recommendations.feather',
+                         'recommended_facility_locations.csv', 'recommended_facility_locations.feather')),
+    # Everything below only needs the stage 1 frames and runs concurrently
+    Stage('cost_benefit', generate_cost_benefit,
+          inputs=('output_dir', 'recommendations_df', 'locations_df'),
+          files=_outputs('COST_BENEFIT_ANALYSIS.txt', 'COST_BENEFIT_ANALYSIS.json')),
+    Stage('community_report', generate_community_report,
+          inputs=('output_dir', 'recommendations_df', 'census_data', 'locations_df'),
+          files=_outputs('COMMUNITY_SUMMARY.txt')),
+    Stage('facility_map', generate_facility_map,
+          inputs=('output_dir', 'locations_df', 'census_data', 'road_network_file'),
+          files=_outputs('recommended_facility_locations_map.html')),
+    Stage('access_desert_map', generate_access_desert_map,
+          inputs=('output_dir', 'census_data'),
+          files=_outputs('access_desert_heatmap.html')),
+    Stage('dashboard', generate_dashboard,
+          inputs=('output_dir', 'recommendations_df', 'locations_df', 'census_data'),
+          files=_outputs('policy_impact_dashboard.png')),
+]
+
+
+def main(argv=None):
+    """Generate all policy impact outputs."""
+    parser = argparse.ArgumentParser(description="Generate all policy impact outputs")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for independent stages (1 = run sequentially; default: CPU count)')
+    parser.add_argument('--force', action='append', default=[], metavar='STAGE',
+                        help=f"Rerun a stage even if cached (repeatable, or 'all'); "
+                             f"stages: {', '.join(stage.name for stage in STAGES)}")
+    parser.add_argument('--no-cache', action='store_true', help='Run every stage without the build cache')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                        help=f'Build cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help='Evict least recently used cache entries above this size')
+    args = parser.parse_args(argv)
+
+    logger.info("="*80)
+    logger.info("GENERATING COMPREHENSIVE POLICY IMPACT PACKAGE")
+    logger.info("="*80)
+
+    # File paths
+    census_file = CENSUS_FILE
+    output_dir = OUTPUT_DIR
+
+    # Verify data exists
+    if not dataset_exists(census_file):
+        logger.error(f"Census data not found: {census_file}")
+        logger.error("Please run the analysis notebook first to generate access metrics.")
+        return 1
+
+    logger.info(f"\nRunning {len(STAGES)} stages: recommendations first, then cost-benefit, "
+                f"community report, maps and dashboard in parallel...")
     logger.info("-" * 80)
 
+    cache = None if args.no_cache else BuildCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+
+    # Hash the file that will actually be read (the columnar copy when present)
+    result = Pipeline(STAGES).run(
+        initial={'census_file': resolve_path(census_file), 'output_dir': output_dir,
+                 'road_network_file': DEFAULT_ROAD_NETWORK_FILE, 'boundaries_file': DEFAULT_BOUNDARIES_FILE},
+        max_workers=args.workers,
+        cache=cache,
+        force=args.force
+    )
+
+    if not result.ok:
+        failed = [r.name for r in result.reports.values() if r.status != 'ok']
+        logger.error(f"Stages did not complete: {', '.join(failed)}")
+        return 1
+
+    census_data = result.get('census_data')
+
     # Count outputs
     output_files = list(output_dir.glob('*'))
     logger.info(f"✓ Total files generated: {len(output_files)}")
@@ -135,6 +221,7 @@ def main():
     logger.info("  • EXECUTIVE_SUMMARY.txt - 1-page summary for decision makers")
     logger.info("  • recommendations.csv - Structured recommendations dataset")
     logger.info("  • COST_BENEFIT_ANALYSIS.txt - Detailed financial analysis with ROI")
+    logger.info("  • COST_BENEFIT_ANALYSIS.json - Cost estimates and 10-year totals for the API")
     logger.info("  • policy_impact_dashboard.png - Visual dashboard with key metrics")
 
     logger.info("\n🗺️ INTERACTIVE MAPS:")
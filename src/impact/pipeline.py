@@ -0,0 +1,437 @@
+"""
+Stage DAG runner for the output pipeline.
+
+A pipeline is a list of Stages. Each stage names the artifacts it consumes
+and produces, and the runner starts every stage as soon as its inputs exist,
+running independent stages concurrently in a process pool.
+
+DataFrames passed between stages are written once as uncompressed Arrow IPC
+files in a scratch directory and memory-mapped by the stages that read them,
+instead of being round-tripped through CSV or pickled per consumer. Other
+values are pickled.
+
+Each stage reports its wall time and the peak resident set size of the
+process that ran it.
+
+With a BuildCache, a stage whose code, parameters and input digests match
+a cached run is not executed: its artifacts come from the cache and its
+declared files are restored (see impact.build_cache). A stage's code is
+its function's module plus every in-repo module (see SOURCE_PACKAGES) that
+the function uses, followed through their imports.
+"""
+
+import ast
+import importlib
+import importlib.util
+import inspect
+import os
+import sys
+import shutil
+import tempfile
+import time
+import logging
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from impact.build_cache import BuildCache, file_digest, source_digest, value_digest
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Top-level packages whose modules count as stage code for cache keys
+SOURCE_PACKAGES = ('analysis', 'impact', 'data_processing')
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step.
+
+    func is called with one keyword argument per input and returns a dict
+    with one entry per output (or None if it has no outputs). It must be a
+    module-level function so it can run in a worker process.
+
+    For caching, files lists the files the stage writes, sources names
+    modules whose code affects its results without being imported by it
+    (imports are found by stage_modules), and params holds any other
+    settings that should invalidate cached results.
+    """
+    name: str
+    func: Callable[..., Optional[Dict[str, Any]]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    files: Tuple[Path, ...] = ()
+    sources: Tuple[str, ...] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StageReport:
+    """Outcome of one stage."""
+    name: str
+    status: str = 'pending'  # 'ok', 'failed' or 'skipped'
+    wall_s: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    pid: Optional[int] = None
+    error: Optional[str] = None
+    cache: Optional[str] = None  # 'hit', 'miss' or 'forced' when a cache is used
+
+
+@dataclass
+class PipelineResult:
+    """Stage reports plus the artifacts the stages produced."""
+    reports: Dict[str, StageReport]
+    # name -> (kind, payload, digest), kind 'arrow' (payload is a path) or 'value'
+    artifacts: Dict[str, Tuple[str, Any, str]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return all(report.status == 'ok' for report in self.reports.values())
+
+    def get(self, name: str) -> Any:
+        """Load an artifact by name."""
+        return _load_artifact(self.artifacts[name])
+
+    def cache_hits(self) -> List[str]:
+        """Stages served from the build cache."""
+        return [report.name for report in self.reports.values() if report.cache == 'hit']
+
+    def summary(self) -> str:
+        """Per-stage timing and cache status table."""
+        lines = [f"{'stage':<24} {'status':<8} {'cache':<7} {'wall (s)':>9} {'peak RSS (MB)':>14} {'pid':>8}"]
+        for report in self.reports.values():
+            rss = f"{report.peak_rss_mb:.0f}" if report.peak_rss_mb is not None else '-'
+            lines.append(f"{report.name:<24} {report.status:<8} {report.cache or '-':<7} {report.wall_s:>9.2f} "
+                         f"{rss:>14} {report.pid or '-':>8}")
+        cached = [r for r in self.reports.values() if r.cache is not None]
+        if cached:
+            lines.append(f"Build cache: {len(self.cache_hits())} of {len(cached)} stages were hits")
+        return '\n'.join(lines)
+
+
+def module_imports(module_name: str) -> Dict[str, str]:
+    """
+    In-repo modules a module imports, by the name each import binds.
+
+    Names imported from a package __init__ map to the module that defines
+    them rather than to the package.
+
+    Args:
+        module_name: Imported module name
+
+    Returns:
+        Bound name -> module name, for modules under SOURCE_PACKAGES
+    """
+    module = importlib.import_module(module_name)
+    try:
+        tree = ast.parse(inspect.getsource(module))
+    except (OSError, TypeError):  # no source available
+        return {}
+
+    bound = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                bound[alias.asname or alias.name.split('.')[0]] = alias.name
+        elif isinstance(node, ast.ImportFrom):
+            base = importlib.util.resolve_name('.' * node.level + (node.module or ''), module.__package__)
+            if base.split('.')[0] not in SOURCE_PACKAGES:
+                continue
+            package = importlib.import_module(base)
+            for alias in node.names:
+                value = getattr(package, alias.name, None)
+                if inspect.ismodule(value):
+                    target = value.__name__
+                elif hasattr(package, '__path__'):
+                    target = getattr(value, '__module__', None) or base
+                else:
+                    target = base
+                bound[alias.asname or alias.name] = target
+    return {name: target for name, target in bound.items() if target.split('.')[0] in SOURCE_PACKAGES}
+
+
+def stage_modules(stage: Stage) -> Set[str]:
+    """
+    Modules whose code determines a stage's results.
+
+    These are the stage function's own module, the in-repo modules providing
+    the names the function uses, every in-repo module those import
+    (transitively), and the stage's extra sources.
+
+    Args:
+        stage: Pipeline stage
+
+    Returns:
+        Module names
+    """
+    names, code = set(), [stage.func.__code__]
+    while code:
+        current = code.pop()
+        names.update(current.co_names)
+        code.extend(const for const in current.co_consts if inspect.iscode(const))
+
+    pending = [target for name, target in module_imports(stage.func.__module__).items() if name in names]
+    found = {stage.func.__module__, *stage.sources}
+    while pending:
+        module_name = pending.pop()
+        if module_name not in found:
+            found.add(module_name)
+            pending.extend(module_imports(module_name).values())
+    return found
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak RSS of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _store_artifact(name: str, value: Any, scratch_dir: Path) -> Tuple[str, Any, str]:
+    """Write DataFrames to Arrow IPC; keep anything else as a pickled value."""
+    if isinstance(value, pd.DataFrame):
+        try:
+            table = pa.Table.from_pandas(value)
+            path = scratch_dir / f"{name}.arrow"
+            feather.write_feather(table, path, compression='uncompressed')
+            return ('arrow', str(path), 'arrow:' + file_digest(path))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            logger.warning(f"Passing '{name}' by pickle, Arrow conversion failed: {e}")
+    return ('value', value, value_digest(value))
+
+
+def _load_artifact(ref: Tuple[str, Any, str]) -> Any:
+    kind, payload, _ = ref
+    if kind == 'arrow':
+        return feather.read_table(payload, memory_map=True).to_pandas()
+    return payload
+
+
+def _execute_stage(stage: Stage, input_refs: Dict[str, Tuple[str, Any, str]],
+                   scratch_dir: str) -> Tuple[StageReport, Dict[str, Tuple[str, Any, str]]]:
+    """Run one stage (in a worker or in-process) and store its outputs."""
+    report = StageReport(stage.name, pid=os.getpid())
+    start = time.perf_counter()
+    outputs = {}
+    try:
+        kwargs = {name: _load_artifact(ref) for name, ref in input_refs.items()}
+        produced = stage.func(**kwargs) or {}
+
+        missing = set(stage.outputs) - set(produced)
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' did not produce {sorted(missing)}")
+        outputs = {name: _store_artifact(name, produced[name], Path(scratch_dir)) for name in stage.outputs}
+        report.status = 'ok'
+    except Exception as e:
+        report.status = 'failed'
+        report.error = f"{type(e).__name__}: {e}"
+        logger.error(f"Stage '{stage.name}' failed: {report.error}\n{traceback.format_exc()}")
+
+    report.wall_s = time.perf_counter() - start
+    report.peak_rss_mb = _peak_rss_mb()
+    return report, outputs
+
+
+class Pipeline:
+    """Dependency-ordered, process-parallel stage runner."""
+
+    def __init__(self, stages: List[Stage]):
+        """
+        Args:
+            stages: Pipeline stages; every input must be produced by exactly
+                one stage or supplied to run()
+        """
+        self.stages = {}
+        self.producer = {}
+        self._modules: Dict[str, Set[str]] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name '{stage.name}'")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                if output in self.producer:
+                    raise ValueError(f"'{output}' is produced by both '{self.producer[output]}' and '{stage.name}'")
+                self.producer[output] = stage.name
+
+    def order(self, provided: Tuple[str, ...] = ()) -> List[str]:
+        """
+        Topological order of the stages.
+
+        Raises:
+            ValueError: If an input has no producer or the stages form a cycle
+        """
+        for stage in self.stages.values():
+            unknown = [name for name in stage.inputs if name not in self.producer and name not in provided]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' needs {unknown}, which no stage produces")
+
+        order, done = [], set()
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, stage in remaining.items()
+                     if all(self.producer.get(i) in done or i in provided for i in stage.inputs)]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle among {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                done.add(name)
+                del remaining[name]
+        return order
+
+    def run(self, initial: Optional[Dict[str, Any]] = None, max_workers: Optional[int] = None,
+            scratch_dir: Optional[Path] = None, cache: Optional[BuildCache] = None,
+            force: Iterable[str] = ()) -> PipelineResult:
+        """
+        Run every stage once its inputs are available.
+
+        A failed stage does not stop independent stages; stages downstream
+        of it are skipped.
+
+        Args:
+            initial: Artifacts available before any stage runs
+            max_workers: Worker processes; 0 or 1 runs stages sequentially
+                in this process (default: one per CPU)
+            scratch_dir: Directory for Arrow IPC artifacts (a temporary
+                directory removed afterwards if not given)
+            cache: Build cache to skip stages whose inputs are unchanged
+            force: Stages to rerun even on a cache hit ('all' for every stage)
+
+        Returns:
+            PipelineResult with per-stage reports
+        """
+        initial = initial or {}
+        order = self.order(tuple(initial))
+
+        force = set(force)
+        if 'all' in force:
+            force = set(order)
+        unknown = force - set(order)
+        if unknown:
+            raise ValueError(f"Unknown stages to force: {sorted(unknown)}")
+
+        owns_scratch = scratch_dir is None
+        scratch = Path(tempfile.mkdtemp(prefix='pipeline_')) if owns_scratch else Path(scratch_dir)
+        scratch.mkdir(parents=True, exist_ok=True)
+
+        result = PipelineResult({name: StageReport(name) for name in order})
+        result.artifacts.update({name: _store_artifact(name, value, scratch) for name, value in initial.items()})
+
+        try:
+            if max_workers is not None and max_workers <= 1:
+                self._schedule(order, result, scratch, cache, force, pool=None)
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    self._schedule(order, result, scratch, cache, force, pool)
+        finally:
+            if owns_scratch:
+                # Artifacts the caller may still load are materialised before cleanup
+                for name, (kind, payload, digest) in list(result.artifacts.items()):
+                    if kind == 'arrow':
+                        result.artifacts[name] = ('value', _load_artifact((kind, payload, digest)), digest)
+                shutil.rmtree(scratch, ignore_errors=True)
+            if cache is not None:
+                cache.evict()
+
+        logger.info("Pipeline stages:\n" + result.summary())
+        return result
+
+    def _inputs(self, name: str, result: PipelineResult) -> Dict[str, Tuple[str, Any, str]]:
+        return {i: result.artifacts[i] for i in self.stages[name].inputs}
+
+    def _blocked(self, name: str, result: PipelineResult) -> bool:
+        """Mark a stage skipped if an upstream stage did not succeed."""
+        upstream = [self.producer[i] for i in self.stages[name].inputs if i in self.producer]
+        if any(result.reports[u].status in ('failed', 'skipped') for u in upstream):
+            result.reports[name].status = 'skipped'
+            return True
+        return False
+
+    def _ready(self, name: str, result: PipelineResult) -> bool:
+        upstream = {self.producer[i] for i in self.stages[name].inputs if i in self.producer}
+        return all(result.reports[u].status == 'ok' for u in upstream)
+
+    def _cache_key(self, name: str, result: PipelineResult, cache: BuildCache) -> str:
+        stage = self.stages[name]
+        if name not in self._modules:
+            self._modules[name] = stage_modules(stage)
+        sources = source_digest(self._modules[name])
+        input_digests = {i: result.artifacts[i][2] for i in stage.inputs}
+        return cache.stage_key(name, sources, stage.params, input_digests)
+
+    @staticmethod
+    def _record(result: PipelineResult, report: StageReport,
+                outputs: Dict[str, Tuple[str, Any, str]]) -> None:
+        report.cache = result.reports[report.name].cache
+        result.reports[report.name] = report
+        result.artifacts.update(outputs)
+        logger.info(f"Stage '{report.name}' {report.status} in {report.wall_s:.2f}s")
+
+    def _schedule(self, order: List[str], result: PipelineResult, scratch: Path,
+                  cache: Optional[BuildCache], force: set, pool: Optional[ProcessPoolExecutor]) -> None:
+        """Start stages as their inputs become available; without a pool, run them inline."""
+        pending = list(order)
+        running: Dict[Future, Tuple[str, Optional[str]]] = {}
+
+        while pending or running:
+            progressed = False
+            for name in list(pending):
+                if self._blocked(name, result):
+                    pending.remove(name)
+                    progressed = True
+                    continue
+                if not self._ready(name, result):
+                    continue
+                pending.remove(name)
+                progressed = True
+
+                key = None
+                if cache is not None:
+                    key = self._cache_key(name, result, cache)
+                    manifest = None if name in force else cache.lookup(key)
+                    report = result.reports[name]
+                    if manifest is not None:
+                        start = time.perf_counter()
+                        result.artifacts.update(cache.restore(key, manifest))
+                        report.status, report.cache = 'ok', 'hit'
+                        report.wall_s = time.perf_counter() - start
+                        logger.info(f"Stage '{name}' is up to date (cache hit)")
+                        continue
+                    report.cache = 'forced' if name in force else 'miss'
+
+                args = (self.stages[name], self._inputs(name, result), str(scratch))
+                if pool is None:
+                    future = Future()
+                    future.set_result(_execute_stage(*args))
+                else:
+                    future = pool.submit(_execute_stage, *args)
+                running[future] = (name, key)
+
+            if not running:
+                if progressed:
+                    continue
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, key = running.pop(future)
+                try:
+                    report, outputs = future.result()
+                except Exception as e:  # worker died or result could not be pickled
+                    report, outputs = StageReport(name, status='failed', error=f"{type(e).__name__}: {e}"), {}
+                    logger.error(f"Stage '{name}' failed: {e}")
+                self._record(result, report, outputs)
+                if key is not None and report.status == 'ok':
+                    cache.store(key, name, outputs, self.stages[name].files)
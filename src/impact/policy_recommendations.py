@@ -12,12 +12,33 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
+from analysis.areal_interpolation import ArealInterpolator
+from analysis.isochrones import (DEFAULT_ISOCHRONE_MINUTES, IsochroneEngine, catchment_column,
+                                 load_isochrone_engine, site_catchments)
+from data_processing.columnar_store import dataset_exists, read_table, write_table
+from data_processing.tract_store import DEFAULT_BOUNDARIES_FILE, TractStore
+from impact.facility_siting import DEFAULT_COVERAGE_KM, FacilitySitingOptimizer
+from impact.cost_benefit_analysis import CostBenefitAnalyzer
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Travel time (minutes) whose catchment population is a site's estimated impact
+IMPACT_MINUTES = DEFAULT_ISOCHRONE_MINUTES[0]
+
+# Radius (km) of the service area used when there is no road graph
+IMPACT_RADIUS_KM = 5.0
+
+
+def impact_label(columns) -> str:
+    """How estimated_impact was measured, for report and map text."""
+    if catchment_column(IMPACT_MINUTES) in columns:
+        return f"within a {IMPACT_MINUTES:g}-minute drive"
+    return "within 5km"
+
 
 @dataclass
 class PolicyRecommendation:
@@ -38,19 +59,30 @@ class PolicyRecommendation:
 class PolicyRecommendationEngine:
     """Generate evidence-based policy recommendations."""
 
-    def __init__(self, census_data_file: Path, access_metrics_file: Path):
+    def __init__(self, census_data_file: Path, access_metrics_file: Path,
+                 isochrones: Optional[IsochroneEngine] = None,
+                 boundaries_file: Optional[Path] = None):
         """
         Initialize recommendation engine.
 
         Args:
             census_data_file: Path to census data with demographics
             access_metrics_file: Path to calculated access metrics
+            isochrones: Optional road-graph isochrone engine; with
+                boundaries_file, site impact is the population inside the
+                travel-time catchment instead of within 5km
+            boundaries_file: Tract boundaries; when given, site impact and
+                coverage are areal-weighted tract populations instead of a
+                density x area estimate
         """
         self.census_data_file = Path(census_data_file)
         self.access_metrics_file = Path(access_metrics_file)
+        self.isochrones = isochrones
+        self.boundaries_file = Path(boundaries_file) if boundaries_file else None
         self.census_data = None
         self.access_metrics = None
         self.recommendations = []
+        self._areal_interpolator = None
 
     def load_data(self) -> bool:
         """Load necessary data files."""
@@ -60,11 +92,11 @@ class PolicyRecommendationEngine:
             # Check if census_data_file and access_metrics_file are the same (combined file)
             if self.census_data_file == self.access_metrics_file:
                 # Load combined file
-                if not self.census_data_file.exists():
+                if not dataset_exists(self.census_data_file):
                     logger.error(f"Data file not found: {self.census_data_file}")
                     return False
 
-                combined_data = pd.read_csv(self.census_data_file)
+                combined_data = read_table(self.census_data_file)
 
                 # Split into census and access metrics
                 access_cols = ['GEOID', 'nearest_facility_km', 'access_score']
@@ -81,16 +113,16 @@ class PolicyRecommendationEngine:
                 logger.info(f"Loaded {len(self.census_data)} records from combined file")
             else:
                 # Load separate files
-                if not self.census_data_file.exists():
+                if not dataset_exists(self.census_data_file):
                     logger.error(f"Census data not found: {self.census_data_file}")
                     return False
 
-                if not self.access_metrics_file.exists():
+                if not dataset_exists(self.access_metrics_file):
                     logger.error(f"Access metrics not found: {self.access_metrics_file}")
                     return False
 
-                self.census_data = pd.read_csv(self.census_data_file)
-                self.access_metrics = pd.read_csv(self.access_metrics_file)
+                self.census_data = read_table(self.census_data_file)
+                self.access_metrics = read_table(self.access_metrics_file)
 
                 logger.info(f"Loaded {len(self.census_data)} census tracts")
                 logger.info(f"Loaded {len(self.access_metrics)} access metric records")
@@ -180,31 +212,69 @@ class PolicyRecommendationEngine:
 
         return vulnerable
 
-    def recommend_new_facility_locations(self, n_facilities: int = 5) -> List[Dict]:
+    def recommend_new_facility_locations(self, n_facilities: int = 5,
+                                         objective: str = 'p_median') -> List[Dict]:
         """
         Recommend optimal locations for new healthcare facilities.
 
+        Every tract centroid is a candidate site. Sites are chosen together
+        by FacilitySitingOptimizer, so each pick accounts for the people
+        earlier picks already serve.
+
         Args:
             n_facilities: Number of facilities to recommend
+            objective: 'p_median' (minimize population-weighted distance) or
+                'coverage' (maximize population newly within 5km)
 
         Returns:
-            List of recommended locations with details
+            List of recommended locations with details, including each
+            site's estimated annual savings and 10-year benefit-cost ratio
         """
         logger.info(f"Analyzing optimal locations for {n_facilities} new facilities...")
 
-        # Identify underserved areas
-        deserts = self.identify_access_deserts()
-        vulnerable = self.identify_vulnerable_populations()
+        # Check if census_data already has access metrics (combined file)
+        if 'nearest_facility_km' in self.census_data.columns:
+            merged = self.census_data
+        else:
+            merged = self.census_data.merge(
+                self.access_metrics[['GEOID', 'nearest_facility_km', 'access_score']],
+                on='GEOID',
+                how='inner'
+            )
+
+        if 'centroid_lat' not in merged.columns or 'centroid_lon' not in merged.columns:
+            logger.error("Tract centroids are required to site new facilities")
+            return []
+
+        tracts = merged.dropna(subset=['centroid_lat', 'centroid_lon']).reset_index(drop=True)
+        if len(tracts) == 0:
+            return []
+
+        lat = tracts['centroid_lat'].to_numpy()
+        lon = tracts['centroid_lon'].to_numpy()
+
+        # Coverage counts the share of each tract inside a candidate's 5km circle
+        coverage_share = None
+        interpolator = self._interpolator()
+        if objective == 'coverage' and interpolator is not None:
+            coverage_share = interpolator.radius_shares(lat, lon, DEFAULT_COVERAGE_KM, columns=tracts['GEOID'])
+
+        optimizer = FacilitySitingOptimizer(
+            demand_lat=lat,
+            demand_lon=lon,
+            demand_weight=tracts['total_population'].to_numpy(),
+            existing_distance_km=tracts['nearest_facility_km'].to_numpy(),
+            candidate_lat=lat,
+            candidate_lon=lon,
+            coverage_share=coverage_share
+        )
+        selection = optimizer.select(n_facilities, objective=objective)
 
-        # Combine and prioritize
-        priority_areas = pd.concat([deserts, vulnerable]).drop_duplicates(subset=['GEOID'])
-        priority_areas = priority_areas.sort_values(
-            ['severity_score', 'priority_score'],
-            ascending=False
-        ).head(n_facilities)
+        chosen = tracts.iloc[selection.sites]
+        impacts = self._estimate_impacts(chosen)
 
         recommendations = []
-        for idx, row in priority_areas.iterrows():
+        for (_, row), (_, impact) in zip(chosen.iterrows(), impacts.iterrows()):
             recommendations.append({
                 'geoid': row['GEOID'],
                 'tract_name': row.get('tract_name', 'Unknown'),
@@ -214,9 +284,17 @@ class PolicyRecommendationEngine:
                 'current_distance_km': float(row['nearest_facility_km']),
                 'median_income': int(row['median_income']) if pd.notna(row['median_income']) else 0,
                 'priority_reason': self._get_priority_reason(row),
-                'estimated_impact': int(self._estimate_impact(row))
+                **{column: int(value) for column, value in impact.items()}
             })
 
+        # Cost every chosen site in one batch
+        costs = CostBenefitAnalyzer().estimate_new_facility_costs_batch(
+            [rec['estimated_impact'] for rec in recommendations]
+        )
+        for rec, savings, ratio in zip(recommendations, costs.annual_savings_estimate, costs.benefit_cost_ratio):
+            rec['annual_savings_estimate'] = round(float(savings))
+            rec['benefit_cost_ratio'] = round(float(ratio), 2)
+
         logger.info(f"Generated {len(recommendations)} facility placement recommendations")
 
         return recommendations
@@ -243,15 +321,65 @@ class PolicyRecommendationEngine:
 
         return "; ".join(reasons) if reasons else "Access improvement opportunity"
 
+    def _interpolator(self) -> Optional[ArealInterpolator]:
+        """Tract polygons and populations for areal weighting, or None without boundaries."""
+        if self.boundaries_file is None or self.census_data is None:
+            return None
+        if self._areal_interpolator is None:
+            if not self.boundaries_file.exists():
+                logger.warning(f"Boundaries not found: {self.boundaries_file}; using density impact estimates")
+                self.boundaries_file = None
+                return None
+            self._areal_interpolator = ArealInterpolator.from_census(
+                TractStore(self.boundaries_file).open(), self.census_data
+            )
+        return self._areal_interpolator
+
+    def _estimate_impacts(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Estimate the number of people each site would serve, for many sites at once.
+
+        Uses the population inside the IMPACT_MINUTES drive-time catchment
+        when a road graph and boundaries are available, else the
+        areal-weighted population within IMPACT_RADIUS_KM, else the host
+        tract's density times the circle's area.
+
+        Args:
+            rows: Site tracts with centroid_lat/centroid_lon and census columns
+
+        Returns:
+            DataFrame aligned with rows with 'estimated_impact', plus a
+            catchment_population_{m}min column per threshold with isochrones
+        """
+        # Rough estimate: host tract density over a 5km radius
+        # Simplified calculation based on population density
+        if 'pop_density_per_sqkm' in rows.columns:
+            estimated = rows['pop_density_per_sqkm'].to_numpy(dtype=float) * np.pi * IMPACT_RADIUS_KM ** 2
+        else:
+            estimated = rows['total_population'].to_numpy(dtype=float) * 2  # Rough multiplier
+        impacts = pd.DataFrame({'estimated_impact': np.nan_to_num(estimated)}, index=rows.index)
+
+        interpolator = self._interpolator()
+        if interpolator is None or len(rows) == 0:
+            return impacts.astype(int)
+
+        located = rows[['centroid_lat', 'centroid_lon']].notna().all(axis=1).to_numpy()
+        lat = rows['centroid_lat'].to_numpy(dtype=float)[located]
+        lon = rows['centroid_lon'].to_numpy(dtype=float)[located]
+        if self.isochrones is not None:
+            # Residents within each travel-time threshold, from the cached isochrones
+            catchments = site_catchments(self.isochrones, interpolator, lat, lon)
+            for column in catchments.columns:
+                impacts.loc[located, column] = catchments[column].to_numpy()
+            impacts.loc[located, 'estimated_impact'] = catchments[catchment_column(IMPACT_MINUTES)].to_numpy()
+        else:
+            impacts.loc[located, 'estimated_impact'] = interpolator.population_within_radius(lat, lon, IMPACT_RADIUS_KM)
+
+        return impacts.fillna(0).round().astype(int)
+
     def _estimate_impact(self, row: pd.Series) -> int:
         """Estimate number of people who would benefit."""
-        # Rough estimate: people within 5km radius
-        # Simplified calculation based on population density
-        if 'pop_density_per_sqkm' in row:
-            area_served = np.pi * (5 ** 2)  # 5km radius in sq km
-            estimated = row['pop_density_per_sqkm'] * area_served
-            return int(estimated)
-        return int(row['total_population'] * 2)  # Rough multiplier
+        return int(self._estimate_impacts(row.to_frame().T.infer_objects())['estimated_impact'].iloc[0])
 
     def generate_all_recommendations(self) -> List[PolicyRecommendation]:
         """Generate comprehensive policy recommendations."""
@@ -495,8 +623,8 @@ class PolicyRecommendationEngine:
 
         logger.info(f"Executive summary saved to {output_file}")
 
-    def export_recommendations_csv(self, output_file: Path) -> None:
-        """Export recommendations to CSV for further analysis."""
+    def export_recommendations_csv(self, output_file: Path) -> pd.DataFrame:
+        """Export recommendations to CSV for further analysis, returning the exported table."""
         if not self.recommendations:
             self.generate_all_recommendations()
 
@@ -517,9 +645,10 @@ class PolicyRecommendationEngine:
             })
 
         df = pd.DataFrame(records)
-        df.to_csv(output_file, index=False)
+        write_table(df, output_file, export_csv=True)
 
         logger.info(f"Recommendations exported to {output_file}")
+        return df
 
 
 def main():
@@ -531,8 +660,9 @@ def main():
     metrics_file = combined_file
     output_dir = Path('outputs/policy_recommendations')
 
-    # Initialize engine
-    engine = PolicyRecommendationEngine(census_file, metrics_file)
+    # Initialize engine, with road-network catchments when a local graph extract is available
+    engine = PolicyRecommendationEngine(census_file, metrics_file, isochrones=load_isochrone_engine(),
+                                        boundaries_file=DEFAULT_BOUNDARIES_FILE)
 
     # Load data
     if not engine.load_data():
@@ -550,10 +680,7 @@ def main():
 
     # Generate facility location recommendations
     locations = engine.recommend_new_facility_locations(n_facilities=10)
-    pd.DataFrame(locations).to_csv(
-        output_dir / 'recommended_facility_locations.csv',
-        index=False
-    )
+    write_table(pd.DataFrame(locations), output_dir / 'recommended_facility_locations.csv', export_csv=True)
 
     logger.info(f"\n{'='*60}")
     logger.info("POLICY RECOMMENDATIONS GENERATED")
@@ -11,9 +11,13 @@ import folium
 from folium import plugins
 import seaborn as sns
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import logging
 
+from analysis.isochrones import DEFAULT_ISOCHRONE_MINUTES, IsochroneEngine, catchment_column, load_isochrone_engine
+from data_processing.columnar_store import dataset_exists, read_table
+from impact.policy_recommendations import impact_label
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -43,7 +47,9 @@ class RecommendationVisualizer:
         self,
         locations_df: pd.DataFrame,
         census_data: pd.DataFrame,
-        output_file: str = 'recommended_facility_locations_map.html'
+        output_file: str = 'recommended_facility_locations_map.html',
+        isochrones: Optional[IsochroneEngine] = None,
+        minutes: Tuple[float, ...] = DEFAULT_ISOCHRONE_MINUTES
     ) -> bool:
         """
         Create interactive map showing recommended facility locations.
@@ -52,6 +58,9 @@ class RecommendationVisualizer:
             locations_df: DataFrame with recommended facility locations
             census_data: Census data with access metrics
             output_file: Output filename
+            isochrones: Optional isochrone engine; each site's service area is
+                drawn as drive-time catchments instead of a 5km circle
+            minutes: Catchment thresholds to draw, in minutes
 
         Returns:
             True if successful
@@ -103,7 +112,7 @@ class RecommendationVisualizer:
                         <p><strong>Area:</strong> {row.get('tract_name', 'Unknown')}</p>
                         <p><strong>Current Distance:</strong> {row.get('current_distance_km', 0):.1f} km from nearest facility</p>
                         <p><strong>Population Served:</strong> {row.get('population_served', 0):,} residents</p>
-                        <p><strong>Estimated Impact:</strong> {row.get('estimated_impact', 0):,} people within 5km</p>
+                        <p><strong>Estimated Impact:</strong> {row.get('estimated_impact', 0):,} people {impact_label(row.index)}</p>
                         <p><strong>Median Income:</strong> ${row.get('median_income', 0):,}</p>
                         <p><strong>Priority Reason:</strong> {row.get('priority_reason', 'Unknown')}</p>
                         <p style="background-color: #E8F5E9; padding: 5px; margin-top: 10px; border-left: 3px solid #2E7D32;">
@@ -119,20 +128,39 @@ class RecommendationVisualizer:
                         icon=folium.Icon(color='green', icon='hospital-o', prefix='fa')
                     ).add_to(m)
 
-                    # Add circle showing 5km service radius
-                    folium.Circle(
-                        location=[row['latitude'], row['longitude']],
-                        radius=5000,  # 5km in meters
-                        color='green',
-                        fill=True,
-                        fillColor='green',
-                        fillOpacity=0.1,
-                        weight=2,
-                        dashArray='5, 5'
-                    ).add_to(m)
+                    if isochrones is not None:
+                        # Drive-time catchments, largest first so the smaller ones stay on top
+                        catchments = isochrones.isochrones(row['latitude'], row['longitude'], minutes)
+                        for threshold in sorted(minutes, reverse=True):
+                            population = row.get(catchment_column(threshold))
+                            tooltip = f"{threshold:g}-minute drive"
+                            if pd.notna(population):
+                                tooltip += f": {int(population):,} residents"
+                            folium.GeoJson(
+                                catchments[threshold].__geo_interface__,
+                                style_function=lambda _, w=threshold: {
+                                    'color': 'green', 'weight': 1, 'fillColor': 'green',
+                                    'fillOpacity': 0.25 * min(minutes) / w
+                                },
+                                tooltip=tooltip
+                            ).add_to(m)
+                    else:
+                        # Add circle showing 5km service radius
+                        folium.Circle(
+                            location=[row['latitude'], row['longitude']],
+                            radius=5000,  # 5km in meters
+                            color='green',
+                            fill=True,
+                            fillColor='green',
+                            fillOpacity=0.1,
+                            weight=2,
+                            dashArray='5, 5'
+                        ).add_to(m)
 
             # Add compact legend (half size)
-            legend_html = '''
+            service_area = ('/'.join(f'{t:g}' for t in sorted(minutes)) + ' min drive'
+                            if isochrones is not None else '5km Radius')
+            legend_html = f'''
             <div style="position: fixed;
                         bottom: 15px; right: 15px; width: 100px; height: auto;
                         background-color: rgba(255, 255, 255, 0.95); z-index:9999; font-size:8px;
@@ -142,7 +170,7 @@ class RecommendationVisualizer:
                    <i class="fa fa-hospital-o" style="color:green; font-size:10px;"></i> Recommended
                 </p>
                 <p style="margin:2px 0; line-height:1.2;">
-                   <span style="color:green; font-size:12px;">○</span> 5km Radius
+                   <span style="color:green; font-size:12px;">○</span> {service_area}
                 </p>
                 <p style="margin:2px 0; line-height:1.2;">
                    <span style="color:red; font-size:9px;">●</span> Desert (>10km)
@@ -324,7 +352,7 @@ class RecommendationVisualizer:
             • Critical Priority Items: {critical_recs}
             • Total Population Affected by Recommendations: {total_affected:,.0f}
             • Recommended New Facility Locations: {len(locations_df)}
-            • Estimated Additional Population Served: {locations_df['estimated_impact'].sum():,.0f} people within 5km
+            • Estimated Additional Population Served: {locations_df['estimated_impact'].sum():,.0f} people {impact_label(locations_df.columns)}
 
             Expected Impact (if all recommendations implemented):
             • Reduction in Access Deserts: 40-60% improvement in extreme cases
@@ -443,19 +471,19 @@ def main():
     locations_file = Path('outputs/policy_recommendations/recommended_facility_locations.csv')
     recommendations_file = Path('outputs/policy_recommendations/recommendations.csv')
 
-    if not census_file.exists():
+    if not dataset_exists(census_file):
         logger.error(f"Census data not found: {census_file}")
         return 1
 
-    census_data = pd.read_csv(census_file)
+    census_data = read_table(census_file)
 
     # Initialize visualizer
     visualizer = RecommendationVisualizer()
 
     # Create facility locations map
-    if locations_file.exists():
-        locations_df = pd.read_csv(locations_file)
-        visualizer.create_facility_locations_map(locations_df, census_data)
+    if dataset_exists(locations_file):
+        locations_df = read_table(locations_file)
+        visualizer.create_facility_locations_map(locations_df, census_data, isochrones=load_isochrone_engine())
     else:
         logger.warning("Facility locations file not found")
         locations_df = pd.DataFrame()
@@ -464,8 +492,8 @@ def main():
     visualizer.create_access_desert_heatmap(census_data)
 
     # Create impact dashboard
-    if recommendations_file.exists():
-        recommendations = pd.read_csv(recommendations_file).to_dict('records')
+    if dataset_exists(recommendations_file):
+        recommendations = read_table(recommendations_file).to_dict('records')
         visualizer.create_impact_dashboard(recommendations, locations_df, census_data)
     else:
         logger.warning("Recommendations file not found")
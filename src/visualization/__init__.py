@@ -1,5 +1,6 @@
 """Visualization module for creating maps and charts."""
 
 from .create_maps import HealthcareMapper
+from .tiles import GeoJsonTileLayer, TilePyramid
 
-__all__ = ['HealthcareMapper']
+__all__ = ['HealthcareMapper', 'GeoJsonTileLayer', 'TilePyramid']
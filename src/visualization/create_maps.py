@@ -10,12 +10,18 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import folium
+from branca.colormap import StepColormap
+from branca.utilities import color_brewer
 import logging
 import numpy as np
 from pathlib import Path
 from typing import Optional, Union
 import json
 
+from data_processing.columnar_store import dataset_exists, read_table
+from data_processing.geometry_prep import DEFAULT_LEVEL, TractGeometries
+from visualization.tiles import GeoJsonTileLayer
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -61,16 +67,16 @@ class HealthcareMapper:
             logger.info("Loading data for mapping...")
 
             # Load facilities
-            if not self.facilities_file.exists():
+            if not dataset_exists(self.facilities_file):
                 logger.error(f"Facilities file not found: {self.facilities_file}")
                 return False
 
-            self.facilities = pd.read_csv(self.facilities_file)
+            self.facilities = read_table(self.facilities_file)
             logger.info(f"Loaded {len(self.facilities)} facilities")
 
-            # Load boundaries if provided
+            # Load boundaries if provided (LA County only, from the prepared-geometry cache)
             if self.boundaries_file and self.boundaries_file.exists():
-                self.boundaries = gpd.read_file(self.boundaries_file)
+                self.boundaries = TractGeometries(self.boundaries_file).level('full')
                 logger.info(f"Loaded {len(self.boundaries)} geographic boundaries")
             else:
                 logger.info("No boundaries file provided or found, maps will show facilities only")
@@ -108,11 +114,17 @@ class HealthcareMapper:
                     'urgent_care': '#e74c3c',  # Red
                     'hospital': '#3498db',      # Blue
                     'clinic': '#2ecc71',        # Green
+                    'dialysis': '#9b59b6',      # Purple
+                    'mental_health': '#e67e22', # Orange
+                    'pharmacy': '#1abc9c',      # Teal
                     'other': '#95a5a6'          # Gray
                 }
 
+                # Categories added in the rules config without a colour plot as 'other'
+                categories = self.facilities['category'].astype(object)
+                categories = categories.where(categories.isin(list(facility_colors)), 'other')
                 for category, color in facility_colors.items():
-                    subset = self.facilities[self.facilities['category'] == category]
+                    subset = self.facilities[categories == category]
                     if len(subset) > 0:
                         ax.scatter(
                             subset['lon'],
@@ -142,12 +154,17 @@ class HealthcareMapper:
             logger.error(f"Error creating static map: {e}")
             return False
 
-    def create_interactive_map(self, output_file: str = 'interactive_map.html') -> bool:
+    def create_interactive_map(self, output_file: str = 'interactive_map.html',
+                               tile_url: Optional[str] = None) -> bool:
         """
         Create an interactive Folium map.
 
         Args:
             output_file: Output filename
+            tile_url: URL template of the facilities tile layer (e.g.
+                'http://localhost:8000/api/tiles/facilities/{z}/{x}/{y}.geojson');
+                when given, the map fetches facilities tile by tile instead of
+                embedding one marker per facility
 
         Returns:
             True if map created successfully, False otherwise
@@ -164,16 +181,30 @@ class HealthcareMapper:
                 control_scale=True
             )
 
-            # Add facility markers
-            if self.facilities is not None:
-                # Define colors for different facility types
-                color_map = {
-                    'urgent_care': 'red',
-                    'hospital': 'blue',
-                    'clinic': 'green',
-                    'other': 'gray'
-                }
+            # Define colors for different facility types
+            color_map = {
+                'urgent_care': 'red',
+                'hospital': 'blue',
+                'clinic': 'green',
+                'dialysis': 'purple',
+                'mental_health': 'orange',
+                'pharmacy': 'cadetblue',
+                'other': 'gray'
+            }
+
+            if tile_url:
+                GeoJsonTileLayer(
+                    tile_url,
+                    name='Facilities',
+                    color_property='category',
+                    colors=color_map,
+                    popup_fields=[('name', 'Name'), ('category', 'Type'), ('address', 'Address')]
+                ).add_to(m)
+                folium.LayerControl().add_to(m)
+                logger.info(f"Added facility tile layer from {tile_url}")
 
+            # Add facility markers
+            elif self.facilities is not None:
                 # Create feature groups for each category
                 feature_groups = {}
                 for category in color_map.keys():
@@ -184,7 +215,9 @@ class HealthcareMapper:
                 # Add markers to feature groups
                 for idx, facility in self.facilities.iterrows():
                     category = facility.get('category', 'other')
-                    color = color_map.get(category, 'gray')
+                    if category not in feature_groups:
+                        category = 'other'
+                    color = color_map[category]
 
                     # Create popup with facility info
                     popup_html = f"""
@@ -230,7 +263,9 @@ class HealthcareMapper:
     def create_choropleth_map(self, metric_data: pd.DataFrame,
                              metric_col: str,
                              output_file: str = 'access_choropleth.html',
-                             color_scheme: str = 'YlOrRd') -> bool:
+                             color_scheme: str = 'YlOrRd',
+                             tile_url: Optional[str] = None,
+                             simplify_level: Optional[str] = DEFAULT_LEVEL) -> bool:
         """
         Create choropleth map showing access metrics by area.
 
@@ -239,6 +274,11 @@ class HealthcareMapper:
             metric_col: Column name containing the metric to visualize
             output_file: Output filename
             color_scheme: Color scheme for choropleth (e.g., 'YlOrRd', 'RdYlGn_r')
+            tile_url: URL template of the tracts tile layer; when given, tract
+                shapes are fetched tile by tile instead of embedded, and
+                boundaries are not needed (metric_data only sets the color bins)
+            simplify_level: Prepared geometry level embedded in the map (see
+                geometry_prep.SIMPLIFY_LEVELS_M); None embeds the boundaries as loaded
 
         Returns:
             True if map created successfully, False otherwise
@@ -246,6 +286,10 @@ class HealthcareMapper:
         try:
             logger.info(f"Creating choropleth map for {metric_col}...")
 
+            if tile_url:
+                return self._create_tiled_choropleth_map(metric_data, metric_col, output_file,
+                                                         color_scheme, tile_url)
+
             if self.boundaries is None:
                 logger.error("Boundaries data required for choropleth mapping")
                 return False
@@ -255,9 +299,13 @@ class HealthcareMapper:
                 logger.error("Boundaries must be a GeoDataFrame")
                 return False
 
+            boundaries = self.boundaries
+            if simplify_level and self.boundaries_file:
+                boundaries = TractGeometries(self.boundaries_file).level(simplify_level)
+
             # Merge metric data with boundaries
-            if 'GEOID' in metric_data.columns and 'GEOID' in self.boundaries.columns:
-                boundaries_with_metrics = self.boundaries.merge(
+            if 'GEOID' in metric_data.columns and 'GEOID' in boundaries.columns:
+                boundaries_with_metrics = boundaries.merge(
                     metric_data[['GEOID', metric_col]],
                     on='GEOID',
                     how='left'
@@ -318,6 +366,39 @@ class HealthcareMapper:
             logger.error(f"Error creating choropleth map: {e}")
             return False
 
+    def _create_tiled_choropleth_map(self, metric_data: pd.DataFrame, metric_col: str,
+                                     output_file: str, color_scheme: str, tile_url: str) -> bool:
+        """Choropleth whose tract shapes come from the tracts tile layer."""
+        values = metric_data[metric_col].dropna()
+        if values.empty:
+            logger.error(f"No {metric_col} values to color the map by")
+            return False
+
+        # Six equal-width bins, matching folium.Choropleth's default
+        thresholds = np.linspace(values.min(), values.max(), 7)
+        colors = color_brewer(color_scheme, n=6)
+
+        la_center = [34.0522, -118.2437]
+        m = folium.Map(location=la_center, zoom_start=10, tiles='OpenStreetMap')
+
+        label = metric_col.replace('_', ' ').title()
+        GeoJsonTileLayer(
+            tile_url,
+            name=label,
+            color_property=metric_col,
+            colors=colors,
+            thresholds=[float(t) for t in thresholds[:-1]],
+            popup_fields=[('GEOID', 'Census Tract'), (metric_col, label)]
+        ).add_to(m)
+        StepColormap(colors, vmin=float(thresholds[0]), vmax=float(thresholds[-1]),
+                     index=list(thresholds), caption=label).add_to(m)
+        folium.LayerControl().add_to(m)
+
+        output_path = self.output_dir / output_file
+        m.save(str(output_path))
+        logger.info(f"Saved tiled choropleth map to {output_path}")
+        return True
+
     def create_access_score_map(self, scores_file: Union[str, Path],
                                output_file: str = 'access_scores.png') -> bool:
         """
@@ -334,12 +415,12 @@ class HealthcareMapper:
             logger.info("Creating access score map...")
 
             scores_path = Path(scores_file)
-            if not scores_path.exists():
+            if not dataset_exists(scores_path):
                 logger.error(f"Scores file not found: {scores_path}")
                 return False
 
             # Load scores
-            scores_df = pd.read_csv(scores_path)
+            scores_df = read_table(scores_path)
 
             if 'access_score' not in scores_df.columns:
                 logger.error("access_score column not found in scores file")
@@ -501,14 +582,14 @@ def main():
     mapper.create_facility_density_heatmap('facility_density_heatmap.png')
 
     # Create access score map if scores file exists
-    if Path(scores_file).exists():
+    if dataset_exists(scores_file):
         logger.info("\n=== Creating Access Score Map ===")
         mapper.create_access_score_map(scores_file, 'access_scores_map.png')
 
         # Create choropleth if boundaries available
         if mapper.boundaries is not None:
             logger.info("\n=== Creating Choropleth Map ===")
-            scores_df = pd.read_csv(scores_file)
+            scores_df = read_table(scores_file)
             if 'access_score' in scores_df.columns:
                 mapper.create_choropleth_map(
                     scores_df,
@@ -0,0 +1,529 @@
+"""
+Pre-rendered GeoJSON tile pyramid for facility and census tract layers.
+
+Instead of embedding every facility marker and the full tract GeoJSON in a
+single Folium HTML file, layers are cut into standard web-map z/x/y tiles
+(the same scheme as OpenStreetMap) and written to disk as
+
+    <tile_dir>/<layer>/<z>/<x>/<y>.geojson
+
+The backend serves them and Leaflet fetches only the tiles in view.
+
+Each zoom level gets its own copy of the geometries, simplified to about
+half a screen pixel and with coordinates rounded to the zoom's precision,
+so low-zoom tiles stay small. Features are stored whole (not clipped) in
+every tile they touch and carry a stable id, which the browser layer uses
+to draw each feature once regardless of how many loaded tiles contain it.
+
+The pyramid doubles as the tile cache: manifest.json records a digest of
+each layer's input, and a rebuild skips layers whose digest and zoom range
+are unchanged.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import folium
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from jinja2 import Template
+
+from data_processing.columnar_store import dataset_exists, normalize_geoid, read_table
+from data_processing.geometry_prep import HAS_COVERAGE_SIMPLIFY, TractGeometries, quantize, simplify_coverage
+
+logger = logging.getLogger(__name__)
+
+# (west, south, east, north) of Los Angeles County including Catalina Island
+LA_COUNTY_BOUNDS = (-118.95, 33.70, -117.64, 34.83)
+
+DEFAULT_TILE_DIR = Path('outputs/tiles')
+
+DEFAULT_MIN_ZOOM = 8
+DEFAULT_MAX_ZOOM = 14
+
+TILE_SIZE = 256
+
+# Simplification tolerance in screen pixels at the tile's zoom
+SIMPLIFY_PIXELS = 0.5
+
+MANIFEST = 'manifest.json'
+
+# Bump to force a rebuild of pyramids written by an older tile layout
+TILE_FORMAT = 2
+
+FACILITY_PROPERTIES = ['name', 'category', 'address']
+
+TRACT_PROPERTIES = ['GEOID', 'total_population', 'median_income', 'poverty_rate',
+                    'nearest_facility_km', 'access_score']
+
+
+def lonlat_to_tile(lon, lat, z: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Web Mercator tile column and row containing each lon/lat at zoom z."""
+    n = 2 ** z
+    lon = np.asarray(lon, dtype=float)
+    lat = np.clip(np.asarray(lat, dtype=float), -85.0511, 85.0511)
+    x = np.floor((lon + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2.0 * n)
+    return np.clip(x, 0, n - 1).astype(int), np.clip(y, 0, n - 1).astype(int)
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of a tile in degrees."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tiles_covering(bounds: Sequence[float], z: int) -> List[Tuple[int, int]]:
+    """(x, y) of every tile at zoom z intersecting a (west, south, east, north) box."""
+    west, south, east, north = bounds
+    (x0, x1), (y0, y1) = lonlat_to_tile([west, east], [north, south], z)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def pixel_degrees(z: int, lat: float) -> float:
+    """Approximate size of one screen pixel in degrees at zoom z and latitude lat."""
+    return 360.0 / (TILE_SIZE * 2 ** z) * math.cos(math.radians(lat))
+
+
+def _layer_digest(gdf: gpd.GeoDataFrame, properties: List[str], id_column: Optional[str],
+                  coverage: bool) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'format': TILE_FORMAT, 'properties': properties, 'id': id_column,
+                              'coverage': coverage and HAS_COVERAGE_SIMPLIFY, 'simplify': SIMPLIFY_PIXELS}).encode())
+    digest.update(b''.join(shapely.to_wkb(gdf.geometry.values)))
+    digest.update(gdf[properties].to_json(orient='split').encode())
+    return digest.hexdigest()
+
+
+def _feature_strings(gdf: gpd.GeoDataFrame, geoms: np.ndarray, properties: List[str],
+                     ids: Iterable) -> List[str]:
+    """GeoJSON Feature text of each row."""
+    records = gdf[properties].astype(object).where(gdf[properties].notna(), None).to_dict(orient='records')
+    geometry_json = shapely.to_geojson(geoms)
+    return [
+        '{"type":"Feature","id":%s,"geometry":%s,"properties":%s}' % (
+            json.dumps(feature_id), geometry, json.dumps(record, default=str))
+        for feature_id, geometry, record in zip(ids, geometry_json, records)
+    ]
+
+
+def _zoom_geometries(geoms: np.ndarray, z: int, lat: float, coverage: bool = False) -> np.ndarray:
+    """Geometries simplified and quantized for display at zoom z."""
+    pixel = pixel_degrees(z, lat)
+    grid = 10.0 ** -(int(math.ceil(-math.log10(pixel))) + 1)
+    if coverage:
+        simplified = simplify_coverage(geoms, pixel * SIMPLIFY_PIXELS)
+    else:
+        simplified = shapely.simplify(geoms, pixel * SIMPLIFY_PIXELS, preserve_topology=True)
+    return quantize(simplified, grid)
+
+
+class TilePyramid:
+    """On-disk z/x/y GeoJSON tile pyramid."""
+
+    def __init__(self, tile_dir: Union[str, Path] = DEFAULT_TILE_DIR):
+        """
+        Args:
+            tile_dir: Directory holding one sub-directory per layer plus manifest.json
+        """
+        self.tile_dir = Path(tile_dir)
+        self.tile_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.tile_dir / MANIFEST
+
+    def manifest(self) -> Dict:
+        """Layer metadata of the built pyramid."""
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'format': TILE_FORMAT, 'layers': {}}
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        tmp = self.manifest_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(manifest, indent=2))
+        tmp.replace(self.manifest_path)
+
+    def tile_path(self, layer: str, z: int, x: int, y: int) -> Path:
+        return self.tile_dir / layer / str(z) / str(x) / f'{y}.geojson'
+
+    def read_tile(self, layer: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """Tile content, or None if the tile holds no features."""
+        try:
+            return self.tile_path(layer, z, x, y).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def build_layer(self, name: str, gdf: gpd.GeoDataFrame,
+                    properties: Optional[List[str]] = None,
+                    id_column: Optional[str] = None,
+                    min_zoom: int = DEFAULT_MIN_ZOOM,
+                    max_zoom: int = DEFAULT_MAX_ZOOM,
+                    bounds: Optional[Sequence[float]] = LA_COUNTY_BOUNDS,
+                    coverage: bool = False,
+                    force: bool = False) -> int:
+        """
+        Cut a layer into tiles for every zoom in [min_zoom, max_zoom].
+
+        Args:
+            name: Layer name (tile URL path segment)
+            gdf: Features in EPSG:4326 (reprojected if in another CRS)
+            properties: Columns copied into each feature's properties
+                (default: every non-geometry column)
+            id_column: Column holding a unique feature id (default: row number)
+            min_zoom: Lowest zoom level rendered
+            max_zoom: Highest zoom level rendered
+            bounds: Only tiles intersecting this (west, south, east, north)
+                box are written; None for the layer's full extent
+            coverage: Polygons tile the area without overlaps (like census
+                tracts), so shared borders are simplified once for both sides
+            force: Rebuild even if the manifest says the layer is current
+
+        Returns:
+            Number of tiles written (0 if the cached layer was kept)
+        """
+        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        gdf = gdf[gdf.geometry.notna() & ~gdf.geometry.is_empty].reset_index(drop=True)
+        if properties is None:
+            properties = [col for col in gdf.columns if col != gdf.geometry.name]
+        properties = [col for col in properties if col in gdf.columns]
+
+        manifest = self.manifest()
+        digest = _layer_digest(gdf, properties, id_column, coverage)
+        cached = manifest['layers'].get(name)
+        if (not force and cached and cached['digest'] == digest
+                and cached['min_zoom'] == min_zoom and cached['max_zoom'] == max_zoom
+                and (self.tile_dir / name).is_dir()):
+            logger.info(f"Tile layer '{name}' is up to date ({cached['tiles']} tiles)")
+            return 0
+
+        start = time.perf_counter()
+        ids = gdf[id_column].tolist() if id_column else list(range(len(gdf)))
+        geoms = gdf.geometry.values
+        if bounds is None:
+            bounds = tuple(gdf.total_bounds)
+        center_lat = (bounds[1] + bounds[3]) / 2
+
+        tmp_dir = self.tile_dir / f'{name}.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        n_tiles = 0
+        for z in range(min_zoom, max_zoom + 1):
+            features = _feature_strings(gdf, _zoom_geometries(geoms, z, center_lat, coverage), properties, ids)
+            tiles = tiles_covering(bounds, z)
+            boxes = shapely.box(*np.array([tile_bounds(z, x, y) for x, y in tiles]).T)
+
+            # Whole features go to every tile their (unsimplified) geometry touches
+            tile_idx, feature_idx = shapely.STRtree(geoms).query(boxes, predicate='intersects')
+            order = np.argsort(tile_idx, kind='stable')
+            tile_idx, feature_idx = tile_idx[order], feature_idx[order]
+            splits = np.flatnonzero(np.diff(tile_idx)) + 1
+
+            for group_tiles, members in zip(np.split(tile_idx, splits), np.split(feature_idx, splits)):
+                if len(members) == 0:
+                    continue
+                x, y = tiles[group_tiles[0]]
+                path = tmp_dir / str(z) / str(x) / f'{y}.geojson'
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text('{"type":"FeatureCollection","features":['
+                                + ','.join(features[i] for i in members) + ']}')
+                n_tiles += 1
+
+        final_dir = self.tile_dir / name
+        shutil.rmtree(final_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir.replace(final_dir)
+
+        manifest['format'] = TILE_FORMAT
+        manifest['layers'][name] = {
+            'digest': digest,
+            'min_zoom': min_zoom,
+            'max_zoom': max_zoom,
+            'bounds': [round(float(b), 6) for b in bounds],
+            'features': len(gdf),
+            'tiles': n_tiles,
+            'properties': properties,
+            'built': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self._write_manifest(manifest)
+
+        logger.info(f"Built tile layer '{name}': {n_tiles} tiles for {len(gdf)} features, "
+                    f"zooms {min_zoom}-{max_zoom} ({time.perf_counter() - start:.1f}s)")
+        return n_tiles
+
+
+def facility_layer(facilities: pd.DataFrame) -> gpd.GeoDataFrame:
+    """Facility points from a table with lat/lon columns."""
+    facilities = facilities.dropna(subset=['lat', 'lon']).reset_index(drop=True)
+    return gpd.GeoDataFrame(
+        facilities,
+        geometry=gpd.points_from_xy(facilities['lon'], facilities['lat']),
+        crs='EPSG:4326'
+    )
+
+
+def tract_layer(boundaries: gpd.GeoDataFrame,
+                metrics: Optional[pd.DataFrame] = None) -> gpd.GeoDataFrame:
+    """
+    LA County tract polygons joined with their access metrics.
+
+    Args:
+        boundaries: Tract boundaries (a statewide TIGER file is filtered to LA County)
+        metrics: Per-tract metrics with a GEOID column
+
+    Returns:
+        GeoDataFrame with GEOID, the available TRACT_PROPERTIES and geometry
+    """
+    tracts = boundaries
+    if 'COUNTYFP' in tracts.columns:
+        tracts = tracts[tracts['COUNTYFP'].astype(str).str.zfill(3) == '037']
+    tracts = tracts[['GEOID', tracts.geometry.name]].copy()
+    tracts['GEOID'] = normalize_geoid(tracts['GEOID'])
+
+    if metrics is not None and 'GEOID' in metrics.columns:
+        metric_cols = [col for col in TRACT_PROPERTIES if col in metrics.columns and col != 'GEOID']
+        metrics = metrics[['GEOID'] + metric_cols].copy()
+        metrics['GEOID'] = normalize_geoid(metrics['GEOID'])
+        tracts = tracts.merge(metrics.drop_duplicates('GEOID'), on='GEOID', how='left')
+    return tracts
+
+
+def build_pyramid(facilities_file: Union[str, Path],
+                  boundaries_file: Optional[Union[str, Path]] = None,
+                  metrics_file: Optional[Union[str, Path]] = None,
+                  tile_dir: Union[str, Path] = DEFAULT_TILE_DIR,
+                  min_zoom: int = DEFAULT_MIN_ZOOM,
+                  max_zoom: int = DEFAULT_MAX_ZOOM,
+                  force: bool = False) -> Optional[Dict[str, int]]:
+    """
+    Build the 'facilities' and 'tracts' tile layers.
+
+    Args:
+        facilities_file: Cleaned facilities table
+        boundaries_file: Tract boundaries (GeoJSON/Shapefile); the tracts
+            layer is skipped if not given or missing
+        metrics_file: Access metrics joined onto the tracts by GEOID
+        tile_dir: Pyramid directory
+        min_zoom: Lowest zoom level rendered
+        max_zoom: Highest zoom level rendered
+        force: Rebuild layers even if their input is unchanged
+
+    Returns:
+        Tiles written per layer, or None if the facilities could not be loaded
+    """
+    try:
+        if not dataset_exists(facilities_file):
+            logger.error(f"Facilities file not found: {facilities_file}")
+            return None
+
+        pyramid = TilePyramid(tile_dir)
+        facilities = read_table(facilities_file)
+        columns = [col for col in FACILITY_PROPERTIES if col in facilities.columns]
+        written = {
+            'facilities': pyramid.build_layer(
+                'facilities', facility_layer(facilities), properties=columns,
+                min_zoom=min_zoom, max_zoom=max_zoom, force=force)
+        }
+
+        if boundaries_file and Path(boundaries_file).exists():
+            metrics = read_table(metrics_file) if metrics_file and dataset_exists(metrics_file) else None
+            tracts = tract_layer(TractGeometries(boundaries_file).level('full'), metrics)
+            written['tracts'] = pyramid.build_layer(
+                'tracts', tracts, properties=[col for col in tracts.columns if col != 'geometry'],
+                id_column='GEOID', min_zoom=min_zoom, max_zoom=max_zoom, coverage=True, force=force)
+        else:
+            logger.info("No boundaries file provided or found, skipping the tracts layer")
+
+        return written
+
+    except Exception as e:
+        logger.error(f"Error building tile pyramid: {e}")
+        return None
+
+
+class GeoJsonTileLayer(folium.map.Layer):
+    """
+    Leaflet overlay that fetches GeoJSON tiles for the visible area only.
+
+    Points are drawn as circle markers and polygons as filled shapes,
+    colored by one feature property: either a category -> color mapping or,
+    with thresholds, bins of a numeric value (thresholds[i] is the lower
+    bound of colors[i]). Features shared by several tiles are drawn once
+    and removed when the last tile containing them unloads.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function () {
+            var options = {{ this.options|tojson }};
+            var group = L.featureGroup();
+            var drawn = {};
+            var tileFeatures = {};
+
+            function color(value) {
+                if (options.thresholds) {
+                    if (value === null || value === undefined) { return options.nanColor; }
+                    for (var i = options.thresholds.length - 1; i > 0; i--) {
+                        if (value >= options.thresholds[i]) { return options.colors[i]; }
+                    }
+                    return options.colors[0];
+                }
+                return options.colors[value] || options.defaultColor;
+            }
+
+            function popup(properties) {
+                return '<div style="font-family: Arial; width: 200px;">' + options.popupFields.map(function (field) {
+                    var value = properties[field[0]];
+                    return '<p style="margin: 3px 0;"><b>' + field[1] + ':</b> '
+                        + (value === null || value === undefined ? 'N/A' : value) + '</p>';
+                }).join('') + '</div>';
+            }
+
+            function draw(feature) {
+                var fill = color(feature.properties[options.colorProperty]);
+                var layer = L.geoJSON(feature, {
+                    pointToLayer: function (f, latlng) {
+                        return L.circleMarker(latlng, {radius: 6, color: fill, fillColor: fill,
+                                                       fillOpacity: 0.7, weight: 2});
+                    },
+                    style: function () {
+                        return {color: '#555555', weight: 0.5, fillColor: fill, fillOpacity: 0.7};
+                    }
+                });
+                if (options.popupFields.length) {
+                    layer.bindPopup(popup(feature.properties), {maxWidth: 250});
+                }
+                return layer;
+            }
+
+            function addTile(key, z, features) {
+                tileFeatures[key] = features.map(function (feature) {
+                    var id = z + ':' + feature.id;
+                    if (drawn[id]) {
+                        drawn[id][1] += 1;
+                    } else {
+                        drawn[id] = [draw(feature).addTo(group), 1];
+                    }
+                    return id;
+                });
+            }
+
+            function removeTile(key) {
+                (tileFeatures[key] || []).forEach(function (id) {
+                    drawn[id][1] -= 1;
+                    if (drawn[id][1] === 0) {
+                        group.removeLayer(drawn[id][0]);
+                        delete drawn[id];
+                    }
+                });
+                delete tileFeatures[key];
+            }
+
+            var Tiles = L.GridLayer.extend({
+                createTile: function (coords, done) {
+                    var tile = document.createElement('div');
+                    var key = this._tileCoordsToKey(coords);
+                    fetch(L.Util.template(options.url, coords))
+                        .then(function (response) { return response.ok ? response.json() : {features: []}; })
+                        .then(function (data) { addTile(key, coords.z, data.features); done(null, tile); })
+                        .catch(function (error) { done(error, tile); });
+                    return tile;
+                }
+            });
+            var tiles = new Tiles({minNativeZoom: options.minZoom, maxNativeZoom: options.maxZoom});
+            tiles.on('tileunload', function (e) { removeTile(tiles._tileCoordsToKey(e.coords)); });
+            group.on('add', function () { tiles.addTo(group._map); });
+            group.on('remove', function () { tiles.remove(); });
+            return group;
+        })();
+        {% if this.show %}
+        {{ this.get_name() }}.addTo({{ this._parent.get_name() }});
+        {% endif %}
+        {% endmacro %}
+    """)
+
+    def __init__(self, url: str, name: str, color_property: str,
+                 colors: Union[Dict[str, str], List[str]],
+                 thresholds: Optional[List[float]] = None,
+                 popup_fields: Optional[List[Tuple[str, str]]] = None,
+                 default_color: str = 'gray', nan_color: str = 'lightgray',
+                 min_zoom: int = DEFAULT_MIN_ZOOM, max_zoom: int = DEFAULT_MAX_ZOOM,
+                 show: bool = True):
+        """
+        Args:
+            url: Tile URL template with {z}, {x} and {y} placeholders
+            name: Layer name shown in the layer control
+            color_property: Feature property the color is taken from
+            colors: Color per category, or one color per bin with thresholds
+            thresholds: Lower bound of each color bin for numeric properties
+            popup_fields: (property, label) pairs shown in the popup
+            default_color: Color of categories missing from colors
+            nan_color: Color of features without a value (binned colors only)
+            min_zoom: Lowest zoom level in the pyramid
+            max_zoom: Highest zoom level in the pyramid; deeper zooms reuse its tiles
+            show: Whether the layer is visible when the map opens
+        """
+        super().__init__(name=name, overlay=True, control=True, show=show)
+        self._name = 'GeoJsonTileLayer'
+        self.options = {
+            'url': url,
+            'colorProperty': color_property,
+            'colors': colors,
+            'thresholds': thresholds,
+            'popupFields': [list(field) for field in popup_fields or []],
+            'defaultColor': default_color,
+            'nanColor': nan_color,
+            'minZoom': min_zoom,
+            'maxZoom': max_zoom
+        }
+
+
+def main(argv=None):
+    """Pre-render the facility and tract tile pyramid."""
+    parser = argparse.ArgumentParser(description="Build the GeoJSON tile pyramid for the web maps")
+    parser.add_argument('--facilities', type=Path, default=Path('data/processed/facilities_cleaned.csv'),
+                        help='Cleaned facilities table')
+    parser.add_argument('--boundaries', type=Path,
+                        default=Path('data/external/tl_2023_06_tract.shp'),
+                        help='Census tract boundaries (GeoJSON/Shapefile)')
+    parser.add_argument('--metrics', type=Path, default=Path('outputs/reports/census_with_access_metrics.csv'),
+                        help='Per-tract access metrics joined onto the tracts')
+    parser.add_argument('--tile-dir', type=Path, default=DEFAULT_TILE_DIR,
+                        help=f'Pyramid directory (default: {DEFAULT_TILE_DIR})')
+    parser.add_argument('--min-zoom', type=int, default=DEFAULT_MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=DEFAULT_MAX_ZOOM)
+    parser.add_argument('--force', action='store_true', help='Rebuild layers even if their input is unchanged')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    written = build_pyramid(args.facilities, args.boundaries, args.metrics, args.tile_dir,
+                            args.min_zoom, args.max_zoom, args.force)
+    if written is None:
+        return 1
+
+    logger.info(f"Tile pyramid in {args.tile_dir}: " +
+                ', '.join(f"{layer} ({n} tiles written)" for layer, n in written.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -4,16 +4,24 @@ Tests for analysis and visualization modules.
 Tests for calculate_access_metrics.py and create_maps.py
 """
 
+import json
 import pytest
 import pandas as pd
 import numpy as np
+import geopandas as gpd
 from pathlib import Path
+from shapely.geometry import Point
 import tempfile
 import shutil
 
 # Import modules to test
+from analysis.accessibility import decay_weights
 from analysis.calculate_access_metrics import AccessMetricsCalculator
+from analysis.demand_points import DemandPoints, load_blocks, weighted_group_percentiles
+from analysis.incremental import IncrementalAccessModel
+from analysis.spatial_index import SpatialIndex, project_points
 from visualization.create_maps import HealthcareMapper
+from visualization.tiles import TilePyramid, facility_layer, lonlat_to_tile, tile_bounds, tract_layer
 
 
 @pytest.fixture
@@ -122,6 +130,41 @@ class TestAccessMetricsCalculator:
         # All distances should be very small (facilities and tracts at same locations)
         assert all(distances < 10)  # Less than 10 km
 
+    def test_calculate_nearest_facilities_batch(self, temp_data_dir):
+        """Test batch k-nearest query returns distances and indices together."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+
+        nearest = calculator.calculate_nearest_facilities(k=3)
+
+        assert nearest is not None
+        assert nearest.distances_km.shape == (3, 3)
+        # Each tract is co-located with the facility in the same row
+        assert list(nearest.nearest_index) == [0, 1, 2]
+        assert np.allclose(nearest.nearest_km, 0.0)
+        assert all(nearest.mean_km >= nearest.nearest_km)
+
+    def test_calculate_nearest_facilities_missing_coordinates(self, temp_data_dir):
+        """Test tracts without centroids get NaN instead of failing the batch."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+        calculator.census_tracts.loc[1, 'centroid_lat'] = np.nan
+
+        distances = calculator.calculate_nearest_facility_distance()
+
+        assert np.isnan(distances[1])
+        assert distances.drop(1).notna().all()
+
     def test_calculate_facilities_within_radius(self, temp_data_dir):
         """Test facilities within radius calculation."""
         temp_dir, facilities_file, census_file = temp_data_dir
@@ -138,6 +181,33 @@ class TestAccessMetricsCalculator:
         assert len(counts) == 3
         assert all(counts >= 0)
 
+    def test_calculate_facilities_within_radii(self, temp_data_dir):
+        """Test multi-radius sweep matches single-radius counts and splits by category."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+
+        counts = calculator.calculate_facilities_within_radii((0.5, 2.0, 5.0), by_category=True)
+
+        assert list(counts.columns[:3]) == [
+            'facilities_within_0.5km', 'facilities_within_2km', 'facilities_within_5km'
+        ]
+        # Neighbouring sample facilities are ~1.4 km apart
+        assert list(counts['facilities_within_0.5km']) == [1, 1, 1]
+        assert list(counts['facilities_within_2km']) == [2, 3, 2]
+        assert list(counts['facilities_within_5km']) == [3, 3, 3]
+        assert list(counts['hospital_within_2km']) == [1, 1, 0]
+        for r in ('0.5', '2', '5'):
+            per_category = counts[[f'{c}_within_{r}km' for c in ('clinic', 'hospital', 'urgent_care')]]
+            assert (per_category.sum(axis=1) == counts[f'facilities_within_{r}km']).all()
+
+        single = calculator.calculate_facilities_within_radius(radius_km=2.0)
+        assert list(single) == list(counts['facilities_within_2km'])
+
     def test_calculate_facilities_per_capita(self, temp_data_dir):
         """Test per capita facilities calculation."""
         temp_dir, facilities_file, census_file = temp_data_dir
@@ -156,6 +226,29 @@ class TestAccessMetricsCalculator:
         assert 'per_100k' in result
         assert result['total_facilities'] == 3
         assert result['total_population'] == 4500  # Sum of census populations
+        # No tract_geoid on the facilities: county-wide ratio only
+        assert 'tracts_without_facility' not in result
+
+    def test_facilities_per_capita_by_tract(self, temp_data_dir, sample_facilities_df):
+        """Test exact per-tract counts from the facilities' assigned tract."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        facilities = sample_facilities_df.assign(tract_geoid=['06037110100', '06037110100', None])
+        facilities.to_csv(facilities_file, index=False)
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+
+        by_tract = calculator.calculate_facilities_by_tract()
+        assert list(by_tract['facilities_in_tract']) == [2, 0, 0]
+        assert by_tract['facilities_per_10k'].iloc[0] == pytest.approx(20.0)  # 2 per 1,000 residents
+
+        result = calculator.calculate_facilities_per_capita()
+        assert result['tracts_with_facility'] == 1
+        assert result['tracts_without_facility'] == 2
+        assert result['population_in_tracts_without_facility'] == 3500
 
     def test_identify_coverage_gaps(self, temp_data_dir):
         """Test coverage gap identification."""
@@ -191,6 +284,42 @@ class TestAccessMetricsCalculator:
         assert all(scores >= 0)
         assert all(scores <= 100)
 
+    def test_calculate_e2sfca(self, temp_data_dir):
+        """Test E2SFCA shares facility capacity between competing tracts."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+
+        # 1 km catchment: each tract only reaches the facility at its centroid
+        local = calculator.calculate_e2sfca(catchment_km=1.0, kernel='uniform')
+        assert list(local) == pytest.approx([1.0, 0.5, 1000 / 1500])
+
+        # 20 km catchment: all 4,500 residents compete for all 3 facilities
+        shared = calculator.calculate_e2sfca(catchment_km=20.0, kernel='uniform')
+        assert list(shared) == pytest.approx([3000 / 4500] * 3)
+
+    def test_composite_access_score_with_e2sfca(self, temp_data_dir):
+        """Test the E2SFCA component only changes scores when weighted in."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+
+        default_scores = calculator.calculate_composite_access_score()
+        weighted_scores = calculator.calculate_composite_access_score(
+            weights={'distance': 40, 'nearby': 20, 'density': 20, 'e2sfca': 20}
+        )
+
+        assert not np.allclose(default_scores, weighted_scores)
+        assert all(weighted_scores <= 100)
+
     def test_save_metrics(self, temp_data_dir):
         """Test metrics saving."""
         temp_dir, facilities_file, census_file = temp_data_dir
@@ -212,6 +341,242 @@ class TestAccessMetricsCalculator:
         saved_data = pd.read_csv(Path(temp_dir) / output_file)
         assert len(saved_data) == 3
 
+    def test_metric_cache_builds_one_tree_per_run(self, temp_data_dir):
+        """Test the full report reuses one KD-tree and one distance query."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file,
+            output_dir=temp_dir
+        )
+        calculator.load_data()
+
+        calculator.generate_summary_report()
+        calculator.save_metrics('cached_metrics.csv')
+        calculator.identify_coverage_gaps(threshold_km=5.0)
+
+        stats = calculator.cache.stats()
+        assert stats['index']['misses'] == 1
+        assert stats['nearest']['misses'] == 1
+        assert stats['nearest']['hits'] >= 4
+
+    def test_metric_cache_invalidated_by_new_inputs(self, temp_data_dir):
+        """Test reloading or swapping input frames does not serve stale results."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+        calculator.calculate_nearest_facility_distance()
+
+        calculator.load_data()
+        assert len(calculator.cache) == 0
+
+        # Replacing the facility frame directly is also detected
+        calculator.facilities = calculator.facilities.iloc[[0]].copy()
+        distances = calculator.calculate_nearest_facility_distance()
+        assert distances[0] == pytest.approx(0.0)
+        assert distances[2] > 2.0
+
+
+class TestSpatialIndex:
+    """Tests for the projected-coordinate spatial index."""
+
+    def test_east_west_distance_is_metric(self):
+        """Test 0.1 degrees of longitude at LA's latitude measures ~9.2 km, not 11.1 km."""
+        index = SpatialIndex(np.array([34.05]), np.array([-118.24]))
+        query = project_points(np.array([34.05]), np.array([-118.34]))
+
+        distances, labels = index.nearest(query)
+
+        assert labels[0, 0] == 0
+        assert 9.0 < distances[0, 0] / 1000 < 9.4
+
+    def test_count_within_radius_is_exact(self):
+        """Test radius counts use true metres in both directions."""
+        # Facilities ~9.2 km east and ~11.1 km north of the query point
+        index = SpatialIndex(np.array([34.05, 34.15]), np.array([-118.14, -118.24]))
+        query = project_points(np.array([34.05, np.nan]), np.array([-118.24, -118.24]))
+
+        assert list(index.count_within(query, 10_000)) == [1, 0]
+        assert list(index.count_within(query, 12_000)) == [2, 0]
+
+
+class TestAccessibility:
+    """Tests for E2SFCA distance-decay kernels."""
+
+    def test_decay_kernels(self):
+        """Test every kernel weighs nearby pairs fully and decays with distance."""
+        distance_m = np.array([0.0, 5_000.0, 10_000.0])
+
+        for kernel in ['uniform', 'stepwise', 'gaussian', 'gravity']:
+            weights = decay_weights(distance_m, 10_000.0, kernel)
+            assert weights[0] == pytest.approx(1.0)
+            assert np.all(np.diff(weights) <= 0)
+
+        assert decay_weights(distance_m, 10_000.0, 'gaussian')[2] == pytest.approx(0.0)
+        assert list(decay_weights(distance_m, 10_000.0, 'stepwise')) == [1.0, 0.68, 0.22]
+
+    def test_unknown_kernel(self):
+        """Test an unknown kernel name fails loudly."""
+        with pytest.raises(ValueError):
+            decay_weights(np.array([1.0]), 10.0, 'cubic')
+
+
+class TestDemandPoints:
+    """Tests for block-level demand points and population-weighted metrics."""
+
+    @pytest.fixture
+    def blocks_file(self, temp_data_dir):
+        """Blocks in PL 94-171 column names; tract 110300 has a town far from its centre."""
+        temp_dir, _, _ = temp_data_dir
+        blocks = pd.DataFrame({
+            'GEOID20': ['060371101001000', '060371101001001', '060371102001000',
+                        '060371103001000', '060371103001001', '060371103001002', '060590001001000'],
+            'P1_001N': [600, 400, 2000, 1400, 100, 0, 500],
+            'INTPTLAT20': [34.05, 34.05, 34.06, 34.20, 34.07, 34.07, 33.70],
+            'INTPTLON20': [-118.24, -118.22, -118.25, -118.26, -118.26, -118.26, -117.90]
+        })
+        path = Path(temp_dir) / 'blocks.csv'
+        blocks.to_csv(path, index=False)
+        return path
+
+    def test_load_blocks(self, blocks_file):
+        """Test blocks are filtered to the county and populated blocks, keyed by tract."""
+        blocks = load_blocks(blocks_file)
+
+        assert len(blocks) == 5
+        assert list(blocks['tract_geoid'].unique()) == ['06037110100', '06037110200', '06037110300']
+        assert blocks['population'].sum() == 4500
+
+    def test_population_weighted_centroids(self, blocks_file):
+        """Test centroids are pulled towards where residents live."""
+        centroids = DemandPoints.from_file(blocks_file).centroids()
+
+        assert centroids.loc['06037110100', 'pw_centroid_lon'] == pytest.approx(-118.232, abs=1e-3)
+        assert centroids.loc['06037110300', 'pw_centroid_lat'] == pytest.approx(34.191, abs=1e-3)
+        assert centroids.loc['06037110300', 'block_population'] == 1500
+
+    def test_weighted_group_percentiles(self):
+        """Test grouped weighted percentiles match a per-group reference."""
+        rng = np.random.default_rng(0)
+        values = rng.uniform(0, 10, 1000)
+        weights = rng.integers(1, 50, 1000).astype(float)
+        groups = rng.integers(0, 7, 1000)
+
+        result = weighted_group_percentiles(values, weights, groups, 8, [50, 90])
+
+        for group in range(7):
+            mask = groups == group
+            order = np.argsort(values[mask])
+            cdf = np.cumsum(weights[mask][order]) / weights[mask].sum()
+            expected = [values[mask][order][np.searchsorted(cdf, q)] for q in (0.5, 0.9)]
+            assert result[group] == pytest.approx(expected)
+        assert np.isnan(result[7]).all()
+
+    def test_calculator_demand_distances(self, temp_data_dir, blocks_file):
+        """Test block distances are aggregated to tracts and centroids replace geometric ones."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        calculator = AccessMetricsCalculator(facilities_file, census_file, output_dir=temp_dir,
+                                             demand_points=DemandPoints.from_file(blocks_file))
+        calculator.load_data()
+
+        demand = calculator.calculate_demand_distances()
+
+        assert list(demand.columns) == ['demand_mean_km', 'demand_p50_km', 'demand_p90_km', 'demand_max_km']
+        # 1,400 of 1,500 residents of the last tract live ~14.5 km north of the nearest facility
+        assert demand['demand_p50_km'].iloc[2] == pytest.approx(14.5, abs=0.3)
+        assert demand['demand_p90_km'].iloc[2] >= demand['demand_p50_km'].iloc[2]
+        assert demand['demand_p50_km'].iloc[1] == pytest.approx(0.0, abs=1e-6)
+        assert calculator.calculate_nearest_facility_distance().iloc[2] > 10
+
+        assert calculator.save_metrics('metrics.csv')
+        saved = pd.read_csv(Path(temp_dir) / 'metrics.csv')
+        assert {'pw_centroid_lat', 'demand_p90_km'} <= set(saved.columns)
+
+
+class TestIncrementalAccessModel:
+    """Tests for incremental facility add/remove re-scoring."""
+
+    def test_baseline_matches_calculator(self, temp_data_dir):
+        """Test the model starts from the calculator's scores."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+
+        model = IncrementalAccessModel.from_calculator(calculator)
+
+        pd.testing.assert_series_equal(model.access_scores(), calculator.calculate_composite_access_score(),
+                                       check_names=False)
+        pd.testing.assert_series_equal(model.nearest_km, calculator.calculate_nearest_facility_distance(),
+                                       check_names=False)
+
+    def test_edits_match_full_recalculation(self):
+        """Test nearest distances and counts track a brute-force recomputation."""
+        rng = np.random.default_rng(7)
+
+        def random_points(n):
+            return project_points(34.0 + rng.uniform(0, 0.4, n), -118.5 + rng.uniform(0, 0.5, n))
+
+        tract_xy = random_points(300)
+        facility_xy = random_points(20)
+        model = IncrementalAccessModel(tract_xy, facility_xy, np.arange(20), pd.RangeIndex(300))
+
+        open_facilities = {i: facility_xy[i] for i in range(20)}
+        for step in range(30):
+            before = model.nearest_km.copy()
+            if step % 3 == 2:
+                facility_id = int(rng.choice(list(open_facilities)))
+                edit = model.remove_facility(facility_id)
+                del open_facilities[facility_id]
+            else:
+                lat, lon = 34.0 + rng.uniform(0, 0.4), -118.5 + rng.uniform(0, 0.5)
+                edit = model.add_facility(lat, lon)
+                assert len(edit.affected_tracts) < 300
+                open_facilities[edit.facility_id] = project_points(np.array([lat]), np.array([lon]))[0]
+
+            points = np.array(list(open_facilities.values()))
+            dist = np.sort(np.linalg.norm(tract_xy[:, None] - points[None], axis=2), axis=1)
+            assert np.allclose(model.nearest_km, dist[:, 0] / 1000)
+            assert np.allclose(model.second_nearest_km, dist[:, 1] / 1000)
+            assert list(model.facilities_nearby) == list((dist <= 5000).sum(axis=1))
+
+            # Only reported tracts changed
+            changed = before.index[~np.isclose(before, model.nearest_km)]
+            assert set(changed) <= set(edit.affected_tracts)
+
+    def test_add_then_remove_restores_scores(self, temp_data_dir):
+        """Test opening and closing a clinic returns scores and deserts to baseline."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+
+        calculator = AccessMetricsCalculator(
+            facilities_file=facilities_file,
+            census_file=census_file
+        )
+        calculator.load_data()
+        model = IncrementalAccessModel.from_calculator(calculator, desert_threshold_km=1.0)
+        baseline = model.access_scores()
+        assert model.desert_count == 0
+
+        model.remove_facility(0)
+        assert model.desert_count == 1
+        assert model.desert_population == 1000
+
+        edit = model.add_facility(34.05, -118.24, facility_id='new clinic')
+        assert list(edit.affected_tracts) == [0, 1, 2]
+        assert edit.desert_count == 0
+        pd.testing.assert_series_equal(model.access_scores(), baseline)
+
+        with pytest.raises(KeyError):
+            model.remove_facility(0)
+
 
 class TestHealthcareMapper:
     """Tests for HealthcareMapper class."""
@@ -288,6 +653,21 @@ class TestHealthcareMapper:
             content = f.read()
             assert 'folium' in content.lower() or 'map' in content.lower()
 
+    def test_interactive_map_accepts_new_categories(self, temp_data_dir):
+        """Test categories from the rules config, known to the map or not, do not break it."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        facilities = pd.read_csv(facilities_file)
+        facilities['category'] = ['dialysis', 'veterinary', np.nan]
+        facilities.to_csv(facilities_file, index=False)
+
+        mapper = HealthcareMapper(facilities_file=facilities_file, output_dir=temp_dir)
+        mapper.load_data()
+
+        assert mapper.create_interactive_map('categories.html') is True
+        assert mapper.create_static_map('categories.png') is True
+        content = (Path(temp_dir) / 'categories.html').read_text()
+        assert 'Dialysis' in content and 'purple' in content
+
     def test_create_facility_density_heatmap(self, temp_data_dir):
         """Test density heatmap creation."""
         temp_dir, facilities_file, census_file = temp_data_dir
@@ -328,6 +708,88 @@ class TestHealthcareMapper:
         assert (Path(temp_dir) / output_file).exists()
 
 
+class TestTilePyramid:
+    """Tests for the GeoJSON tile pyramid."""
+
+    def test_tile_math(self):
+        """Test a point falls inside the bounds of the tile computed for it."""
+        x, y = lonlat_to_tile(-118.2437, 34.0522, 12)
+        west, south, east, north = tile_bounds(12, int(x), int(y))
+
+        assert west <= -118.2437 < east
+        assert south <= 34.0522 < north
+
+    def test_build_facility_tiles(self, temp_data_dir, sample_facilities_df):
+        """Test every facility appears in exactly one tile per zoom, with its properties."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        pyramid = TilePyramid(Path(temp_dir) / 'tiles')
+
+        written = pyramid.build_layer('facilities', facility_layer(sample_facilities_df),
+                                      properties=['name', 'category'], min_zoom=8, max_zoom=10)
+
+        assert written > 0
+        for z in (8, 9, 10):
+            xs, ys = lonlat_to_tile(sample_facilities_df['lon'], sample_facilities_df['lat'], z)
+            names = []
+            for x, y in set(zip(xs, ys)):
+                tile = json.loads(pyramid.read_tile('facilities', z, x, y))
+                names += [feature['properties']['name'] for feature in tile['features']]
+            assert sorted(names) == sorted(sample_facilities_df['name'])
+
+        # Tiles outside the data are not written
+        assert pyramid.read_tile('facilities', 8, 0, 0) is None
+
+    def test_unchanged_layer_is_not_rebuilt(self, temp_data_dir, sample_facilities_df):
+        """Test the manifest digest skips rebuilding an unchanged layer."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        pyramid = TilePyramid(Path(temp_dir) / 'tiles')
+        layer = facility_layer(sample_facilities_df)
+
+        assert pyramid.build_layer('facilities', layer, min_zoom=8, max_zoom=9) > 0
+        assert pyramid.build_layer('facilities', layer, min_zoom=8, max_zoom=9) == 0
+        assert pyramid.build_layer('facilities', layer, min_zoom=8, max_zoom=9, force=True) > 0
+
+        layer.loc[0, 'name'] = 'Renamed Hospital'
+        assert pyramid.build_layer('facilities', layer, min_zoom=8, max_zoom=9) > 0
+        assert pyramid.manifest()['layers']['facilities']['features'] == 3
+
+    def test_tract_tiles_are_simplified_per_zoom(self, temp_data_dir):
+        """Test low zooms carry fewer vertices than high zooms and keep tract metrics."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        boundaries = gpd.GeoDataFrame(
+            {'GEOID': ['06037110100'], 'COUNTYFP': ['037']},
+            geometry=[Point(-118.24, 34.05).buffer(0.02, quad_segs=64)],
+            crs='EPSG:4326'
+        )
+        metrics = pd.DataFrame({'GEOID': [6037110100], 'access_score': [42.0]})
+        pyramid = TilePyramid(Path(temp_dir) / 'tiles')
+
+        pyramid.build_layer('tracts', tract_layer(boundaries, metrics), id_column='GEOID',
+                            min_zoom=8, max_zoom=14)
+
+        def ring_length(z):
+            x, y = lonlat_to_tile(-118.24, 34.05, z)
+            feature = json.loads(pyramid.read_tile('tracts', z, x, y))['features'][0]
+            assert feature['id'] == '06037110100'
+            assert feature['properties']['access_score'] == 42.0
+            return len(feature['geometry']['coordinates'][0])
+
+        assert ring_length(8) < ring_length(14)
+
+    def test_create_tiled_interactive_map(self, temp_data_dir):
+        """Test a tile URL replaces the embedded facility markers."""
+        temp_dir, facilities_file, census_file = temp_data_dir
+        mapper = HealthcareMapper(facilities_file=facilities_file, output_dir=temp_dir)
+        mapper.load_data()
+
+        url = '/api/tiles/facilities/{z}/{x}/{y}.geojson'
+        assert mapper.create_interactive_map('tiled.html', tile_url=url) is True
+
+        content = (Path(temp_dir) / 'tiled.html').read_text()
+        assert url in content
+        assert 'Hospital A' not in content
+
+
 class TestIntegration:
     """Integration tests for analysis and visualization."""
 
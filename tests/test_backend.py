@@ -0,0 +1,172 @@
+"""
+Tests for the API's cached outputs.
+
+Tests for backend/dataset_cache.py and the conditional responses in backend/main.py
+"""
+
+import os
+import sys
+import pytest
+import pandas as pd
+from pathlib import Path
+import tempfile
+import shutil
+
+pytest.importorskip('pyarrow')
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# The backend runs from its own directory and imports dataset_cache as a top-level module
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from dataset_cache import DatasetRegistry, read_dataset
+
+
+@pytest.fixture
+def temp_dir():
+    """Temporary directory removed after the test."""
+    path = tempfile.mkdtemp()
+    yield Path(path)
+    shutil.rmtree(path)
+
+
+def touch_later(path: Path, seconds: int = 10):
+    """Move a file's mtime forward so a rewrite is seen as a change."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def write_feather(df: pd.DataFrame, path: Path):
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+class TestReadDataset:
+    """Tests for choosing between an output's Feather and CSV copies."""
+
+    def test_prefers_newer_feather(self, temp_dir):
+        """Test the Feather copy is read when it is at least as new as the CSV."""
+        csv_path = temp_dir / 'recommendations.csv'
+        pd.DataFrame({'value': [1]}).to_csv(csv_path, index=False)
+        write_feather(pd.DataFrame({'value': [2]}), csv_path.with_suffix('.feather'))
+        touch_later(csv_path.with_suffix('.feather'))
+
+        assert read_dataset(csv_path)['value'].tolist() == [2]
+
+    def test_falls_back_to_newer_csv(self, temp_dir):
+        """Test a CSV rewritten after the Feather copy wins."""
+        csv_path = temp_dir / 'recommendations.csv'
+        write_feather(pd.DataFrame({'value': [2]}), csv_path.with_suffix('.feather'))
+        pd.DataFrame({'value': [1]}).to_csv(csv_path, index=False)
+        touch_later(csv_path)
+
+        assert read_dataset(csv_path)['value'].tolist() == [1]
+
+    def test_feather_without_csv(self, temp_dir):
+        """Test a Feather copy is read when there is no CSV export."""
+        csv_path = temp_dir / 'recommendations.csv'
+        write_feather(pd.DataFrame({'value': [2]}), csv_path.with_suffix('.feather'))
+
+        assert read_dataset(csv_path)['value'].tolist() == [2]
+
+
+class TestDatasetRegistry:
+    """Tests for snapshot loading and hot reload."""
+
+    def test_reloads_after_mtime_change(self, temp_dir):
+        """Test a rewritten output replaces its snapshot, and unchanged files are not reloaded."""
+        csv_path = temp_dir / 'facilities.csv'
+        pd.DataFrame({'name': ['A']}).to_csv(csv_path, index=False)
+        registry = DatasetRegistry(temp_dir)
+        registry.register_table('facilities', 'facilities.csv', lambda df: {'count': len(df)})
+
+        assert registry.refresh() == ['facilities']
+        first = registry.get('facilities')
+        assert first.payload == {'count': 1}
+        assert registry.refresh() == []
+
+        pd.DataFrame({'name': ['A', 'B']}).to_csv(csv_path, index=False)
+        touch_later(csv_path)
+
+        assert registry.refresh() == ['facilities']
+        second = registry.get('facilities')
+        assert second.payload == {'count': 2}
+        assert second.etag != first.etag
+
+    def test_failed_reload_keeps_previous_snapshot(self, temp_dir):
+        """Test a half-written output keeps the previous version in service."""
+        json_path = temp_dir / 'results.json'
+        json_path.write_text('{"total": 1}')
+        registry = DatasetRegistry(temp_dir)
+        registry.register_json('results', 'results.json', lambda results: results)
+        registry.refresh()
+        previous = registry.get('results')
+
+        json_path.write_text('{"total": ')
+        touch_later(json_path)
+
+        assert registry.refresh() == []
+        assert registry.get('results') is previous
+
+        json_path.write_text('{"total": 2}')
+        touch_later(json_path, seconds=20)
+        assert registry.refresh() == ['results']
+        assert registry.get('results').payload == {'total': 2}
+
+    def test_missing_output(self, temp_dir):
+        """Test an output whose file does not exist has no snapshot."""
+        registry = DatasetRegistry(temp_dir)
+        registry.register_text('executive', 'EXECUTIVE_SUMMARY.txt', lambda content: {'content': content})
+
+        registry.refresh()
+
+        assert registry.get('executive') is None
+
+
+class TestCachedResponses:
+    """Tests for ETag and conditional GET handling in the API."""
+
+    @pytest.fixture
+    def client(self, temp_dir, monkeypatch):
+        """API client serving a registry over a temporary outputs directory."""
+        pytest.importorskip('httpx')
+        testclient = pytest.importorskip('fastapi.testclient')
+        import main
+
+        (temp_dir / 'EXECUTIVE_SUMMARY.txt').write_text('Summary')
+        registry = DatasetRegistry(temp_dir)
+        registry.register_text('executive', 'EXECUTIVE_SUMMARY.txt', main.text_content)
+        registry.refresh()
+        monkeypatch.setattr(main, 'registry', registry)
+        # Not used as a context manager, so startup does not start the output watcher
+        return testclient.TestClient(main.app)
+
+    def test_etag_then_not_modified(self, client):
+        """Test a 200 carries an ETag and a request with If-None-Match gets a 304."""
+        response = client.get('/api/reports/executive')
+        assert response.status_code == 200
+        assert response.json() == {'content': 'Summary'}
+        etag = response.headers['etag']
+
+        cached = client.get('/api/reports/executive', headers={'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.content == b''
+        assert cached.headers['etag'] == etag
+
+    def test_stale_etag_gets_full_response(self, client):
+        """Test an ETag from an older version gets the current body."""
+        response = client.get('/api/reports/executive', headers={'If-None-Match': '"stale"'})
+
+        assert response.status_code == 200
+        assert response.json() == {'content': 'Summary'}
+
+    def test_if_modified_since(self, client):
+        """Test If-Modified-Since at the output's Last-Modified gets a 304."""
+        last_modified = client.get('/api/reports/executive').headers['last-modified']
+
+        response = client.get('/api/reports/executive', headers={'If-Modified-Since': last_modified})
+
+        assert response.status_code == 304
+
+    def test_missing_output_is_404(self, client):
+        """Test an output without a snapshot is a 404."""
+        assert client.get('/api/reports/community').status_code == 404
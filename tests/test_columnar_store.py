@@ -0,0 +1,99 @@
+"""
+Tests for the columnar processed-data store.
+
+Tests for data_processing.columnar_store
+"""
+
+import os
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import tempfile
+import shutil
+
+from data_processing.columnar_store import (
+    normalize_geoid,
+    read_table,
+    resolve_path,
+    write_table,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Temporary directory removed after the test."""
+    path = tempfile.mkdtemp()
+    yield Path(path)
+    shutil.rmtree(path)
+
+
+@pytest.fixture
+def sample_metrics_df():
+    """Access metrics as they come out of a CSV parse (GEOIDs lost their leading zero)."""
+    return pd.DataFrame({
+        'GEOID': [6037101110, 6037101220, 6037980003],
+        'category': ['clinic', 'hospital', 'clinic'],
+        'centroid_lat': [34.0512345678, 34.06, 34.07],
+        'nearest_facility_km': [1.25, 8.5, 12.0],
+        'access_score': [80.0, 35.5, 20.25],
+        'total_population': [2000, 3000, 1500]
+    })
+
+
+class TestColumnarStore:
+    """Tests for typed columnar reads and writes."""
+
+    def test_normalize_geoid(self):
+        """Test numeric and string GEOIDs become 11-character strings."""
+        assert list(normalize_geoid(pd.Series([6037101110, 6037101220]))) == ['06037101110', '06037101220']
+        assert list(normalize_geoid(pd.Series(['6037101110', None]))) == ['06037101110', None]
+
+    def test_round_trip_types(self, temp_dir, sample_metrics_df):
+        """Test the stored schema: string GEOID, categorical category, float32 metrics."""
+        path = write_table(sample_metrics_df, temp_dir / 'metrics.feather')
+        loaded = read_table(path)
+
+        assert list(loaded['GEOID']) == ['06037101110', '06037101220', '06037980003']
+        assert isinstance(loaded['category'].dtype, pd.CategoricalDtype)
+        assert loaded['nearest_facility_km'].dtype == np.float32
+        assert loaded['access_score'].dtype == np.float32
+        # Coordinates keep full precision
+        assert loaded['centroid_lat'].dtype == np.float64
+        assert loaded['centroid_lat'].iloc[0] == 34.0512345678
+
+    def test_column_projection(self, temp_dir, sample_metrics_df):
+        """Test only requested columns are read."""
+        path = write_table(sample_metrics_df, temp_dir / 'metrics.feather')
+
+        loaded = read_table(path, columns=['GEOID', 'access_score'])
+
+        assert list(loaded.columns) == ['GEOID', 'access_score']
+
+    def test_parquet_format(self, temp_dir, sample_metrics_df):
+        """Test Parquet paths are written and read as Parquet."""
+        path = write_table(sample_metrics_df, temp_dir / 'metrics.parquet')
+
+        assert path.suffix == '.parquet'
+        assert list(read_table(path)['GEOID'])[0] == '06037101110'
+
+    def test_csv_path_writes_columnar_sibling_and_export(self, temp_dir, sample_metrics_df):
+        """Test a CSV path writes the Feather file plus a CSV export, and reads prefer Feather."""
+        path = write_table(sample_metrics_df, temp_dir / 'metrics.csv', export_csv=True)
+
+        assert path == temp_dir / 'metrics.feather'
+        assert (temp_dir / 'metrics.csv').exists()
+        assert resolve_path(temp_dir / 'metrics.csv') == path
+        assert read_table(temp_dir / 'metrics.csv')['access_score'].dtype == np.float32
+
+    def test_newer_csv_wins(self, temp_dir, sample_metrics_df):
+        """Test a CSV edited after the Feather file was written is read instead."""
+        write_table(sample_metrics_df, temp_dir / 'metrics.csv', export_csv=True)
+        feather_mtime = (temp_dir / 'metrics.feather').stat().st_mtime
+        os.utime(temp_dir / 'metrics.csv', (feather_mtime + 10, feather_mtime + 10))
+
+        assert resolve_path(temp_dir / 'metrics.csv') == temp_dir / 'metrics.csv'
+        # The CSV compatibility path applies the same types
+        loaded = read_table(temp_dir / 'metrics.csv')
+        assert loaded['GEOID'].iloc[0] == '06037101110'
+        assert loaded['nearest_facility_km'].dtype == np.float32
@@ -6,6 +6,7 @@ Run with: pytest tests/test_data_collection.py -v
 
 import pytest
 import pandas as pd
+import numpy as np
 from pathlib import Path
 import sys
 
@@ -14,6 +15,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from data_collection.fetch_facilities import FacilityDataCollector
 from data_collection.fetch_census_data import CensusDataCollector
+from data_processing.clean_facilities import FacilityDataCleaner
+from data_processing.categorize import FacilityCategorizer
+from data_processing.deduplication import deduplicate, normalize_names, pair_similarity, trigram_matrix
 
 
 class TestFacilityDataCollector:
@@ -82,6 +86,97 @@ class TestFacilityDataCollector:
         assert all('Los Angeles' in str(county) for county in result['county_name'])
 
 
+class TestStreamingIngestion:
+    """Tests for chunked LA County filtering of the statewide facility file."""
+
+    @staticmethod
+    def statewide_csv(path, n_rows=2500):
+        """CHHS-like file with the county code column before the county name."""
+        counties = np.array(['Los Angeles', 'San Diego', 'Orange', 'LOS ANGELES'])[np.arange(n_rows) % 4]
+        pd.DataFrame({
+            'FACILITY_NAME': [f'Facility {i}' for i in range(n_rows)],
+            'COUNTY_CODE': np.arange(n_rows) % 58,
+            'COUNTY_NAME': counties,
+            'LATITUDE': 34.0 + np.arange(n_rows) * 1e-4,
+            'LONGITUDE': -118.2,
+            'LICENSE_NUM': np.arange(n_rows)
+        }).to_csv(path, index=False)
+        return path
+
+    def test_local_file_streams_in_chunks(self, tmp_path):
+        """Test chunked filtering matches a full read and projects the requested columns."""
+        source = self.statewide_csv(tmp_path / 'statewide.csv')
+        collector = FacilityDataCollector(output_dir=tmp_path / 'raw')
+
+        streamed = collector.stream_la_county_facilities(source, columns=['facility_name', 'LATITUDE', 'LONGITUDE'],
+                                                         chunksize=300)
+
+        full = pd.read_csv(source)
+        expected = full[full['COUNTY_NAME'].str.lower() == 'los angeles'].reset_index(drop=True)
+        assert list(streamed.columns) == ['FACILITY_NAME', 'COUNTY_CODE', 'COUNTY_NAME', 'LATITUDE', 'LONGITUDE']
+        pd.testing.assert_frame_equal(streamed, expected[streamed.columns])
+
+        saved = pd.read_csv(tmp_path / 'raw' / f'la_health_facilities_{collector.timestamp}.csv')
+        assert len(saved) == len(expected)
+        assert not list((tmp_path / 'raw').glob('ca_health_facilities_*'))
+        assert not list((tmp_path / 'raw').glob('*.part'))
+
+    def test_url_source_streams_response_body(self, tmp_path, monkeypatch):
+        """Test a URL source is read from the streamed response body, retrying failures."""
+        import io
+        import requests
+        body = self.statewide_csv(tmp_path / 'statewide.csv').read_bytes()
+        calls = []
+
+        class Response:
+            def __init__(self):
+                self.raw = io.BytesIO(body)
+
+            def raise_for_status(self):
+                if len(calls) == 1:
+                    raise requests.exceptions.HTTPError('503')
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        def get(url, **kwargs):
+            calls.append(kwargs)
+            return Response()
+
+        monkeypatch.setattr(requests, 'get', get)
+        monkeypatch.setattr('time.sleep', lambda seconds: None)
+        collector = FacilityDataCollector(output_dir=tmp_path / 'raw')
+
+        streamed = collector.stream_la_county_facilities('https://example.org/facilities.csv', chunksize=500)
+
+        assert len(calls) == 2 and all(call['stream'] for call in calls)
+        assert len(streamed) == 1250
+
+    def test_cli_keeps_cleaner_columns(self, tmp_path, monkeypatch):
+        """Test the command line ingest drops statewide columns the cleaner does not use."""
+        from data_collection.fetch_facilities import main
+        source = self.statewide_csv(tmp_path / 'statewide.csv')
+        monkeypatch.chdir(tmp_path)
+
+        assert main(['--source', str(source), '--chunk-rows', '500']) == 0
+
+        saved = pd.read_csv(next((tmp_path / 'data' / 'raw').glob('la_health_facilities_*.csv')))
+        assert list(saved.columns) == ['FACILITY_NAME', 'COUNTY_CODE', 'COUNTY_NAME', 'LATITUDE', 'LONGITUDE']
+        assert len(saved) == 1250
+
+    def test_missing_county_column(self, tmp_path):
+        """Test a file without a county column fails cleanly and leaves no output."""
+        source = tmp_path / 'no_county.csv'
+        pd.DataFrame({'name': ['A'], 'lat': [34.0], 'lon': [-118.2]}).to_csv(source, index=False)
+        collector = FacilityDataCollector(output_dir=tmp_path / 'raw')
+
+        assert collector.stream_la_county_facilities(source) is None
+        assert not list((tmp_path / 'raw').iterdir())
+
+
 class TestCensusDataCollector:
     """Test suite for census data collection."""
 
@@ -179,5 +274,99 @@ class TestDataQuality:
             assert 0 < pop < 50000  # Very broad range, but catches obvious errors
 
 
+class TestFacilityDeduplication:
+    """Tests for fuzzy facility deduplication."""
+
+    def test_name_similarity_ignores_formatting(self):
+        """Test abbreviations, punctuation and legal suffixes do not affect name matching."""
+        names = normalize_names(pd.Series(['St. Mary Med. Ctr', 'ST MARY MEDICAL CENTER, INC',
+                                           'Downey Urgent Care', None]))
+        assert names[0] == names[1] == 'st mary medical center'
+
+        similarity = pair_similarity(trigram_matrix(names), np.array([0, 0, 0]), np.array([1, 2, 3]))
+        assert similarity[0] == 1.0
+        assert similarity[1] < 0.2
+        assert np.isnan(similarity[2])
+
+    def test_duplicates_need_proximity_and_similar_names(self):
+        """Test nearby records merge only with similar names, keeping the most complete one."""
+        df = pd.DataFrame({
+            'name': ['St. Mary Med. Ctr', 'ST MARY MEDICAL CENTER, INC', 'St Mary Medical Center',
+                     'Dental Office', 'Eye Clinic', None, 'Northside Clinic'],
+            # ~55 m apart across a 4-decimal rounding boundary; the third copy is ~5 km away
+            'lat': [34.00005, 33.99955, 34.045, 34.1, 34.1, 34.2, 34.20003],
+            'lon': [-118.2, -118.2, -118.2, -118.3, -118.3, -118.4, -118.4],
+            'type': [None, 'hospital', 'hospital', 'dental', 'eye', 'clinic', None]
+        })
+
+        result = deduplicate(df)
+
+        assert result['name'].tolist()[:4] == ['ST MARY MEDICAL CENTER, INC', 'St Mary Medical Center',
+                                               'Dental Office', 'Eye Clinic']
+        assert len(result) == 5 and result['type'].iloc[-1] == 'clinic'
+
+    def test_cleaner_scales_to_statewide_file(self, tmp_path):
+        """Test a statewide-sized file finds every planted copy (timing: benchmark_deduplication.py)."""
+        rng = np.random.default_rng(0)
+        n = 12000
+        letters = rng.choice(list('abcdefghijklmnopqrstuvwxyz'), size=(n, 10))
+        originals = pd.DataFrame({
+            'name': [''.join(word) + ' Health Center' for word in letters],
+            'lat': rng.uniform(32.5, 42.0, n),
+            'lon': rng.uniform(-124.4, -114.1, n)
+        })
+        copies = originals.sample(1000, random_state=1)
+        copies = copies.assign(name=copies['name'].str.upper() + ', INC',
+                               lat=copies['lat'] + 0.0003)
+        df = pd.concat([originals, copies], ignore_index=True)
+
+        cleaner = FacilityDataCleaner(input_dir=tmp_path, output_dir=tmp_path, boundaries_file=None)
+        result = cleaner.remove_duplicates(df)
+
+        assert len(result) == n
+
+
+class TestFacilityCategorizer:
+    """Tests for config-driven facility categorization."""
+
+    def test_default_rules(self):
+        """Test rule priority, case-insensitivity and the new categories."""
+        types = pd.Series(['General Acute Care Hospital', 'URGENT CARE - WALK IN', 'Hospital Urgent Care',
+                           'Chronic Dialysis Clinic', 'Community Mental Health Center', 'Rite Aid Pharmacy',
+                           'Primary Care Clinic', 'Dentist', None])
+
+        categories = FacilityCategorizer.from_file().categorize(types)
+
+        assert categories.tolist() == ['hospital', 'urgent_care', 'urgent_care', 'dialysis', 'mental_health',
+                                       'pharmacy', 'clinic', 'other', 'other']
+
+    def test_rules_from_config_and_memoised(self, tmp_path):
+        """Test a new category needs only a config entry and each distinct type is matched once."""
+        rules = tmp_path / 'rules.json'
+        rules.write_text('{"default": "unknown", "categories": ['
+                         '{"name": "vision", "keywords": ["optometr", "eye"]}, '
+                         '{"name": "clinic", "keywords": ["clinic"]}]}')
+        categorizer = FacilityCategorizer.from_file(rules)
+        types = pd.Series(['Eye Clinic', 'Optometrist', 'Clinic', 'Lab'] * 500, index=range(10, 2010))
+
+        matched = []
+        original = categorizer._match
+        categorizer._match = lambda values: matched.append(len(values)) or original(values)
+        first = categorizer.categorize(types)
+        categorizer.categorize(types.iloc[:4])
+
+        assert first.index.equals(types.index)
+        assert first.iloc[:4].tolist() == ['vision', 'vision', 'clinic', 'unknown']
+        assert matched == [4]
+        assert categorizer.categories == ['vision', 'clinic', 'unknown']
+
+    def test_cleaner_uses_rules(self, tmp_path):
+        """Test the cleaner categorizes through the configured rules."""
+        cleaner = FacilityDataCleaner(input_dir=tmp_path, output_dir=tmp_path, boundaries_file=None)
+        df = pd.DataFrame({'type': ['Kidney Dialysis Center', 'Hospital'], 'lat': [34.0, 34.1], 'lon': [-118.2, -118.3]})
+
+        assert cleaner.categorize_facilities(df)['category'].tolist() == ['dialysis', 'hospital']
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,206 @@
+"""
+Tests for prepared tract geometries.
+
+Tests for data_processing.tract_store and data_processing.geometry_prep
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from pathlib import Path
+import tempfile
+import shutil
+
+from data_processing.clean_facilities import FacilityDataCleaner
+from data_processing.geometry_prep import TractGeometries, grid_for_tolerance, simplify_tracts
+from data_processing.tract_store import TractStore, load_county_tracts
+
+
+@pytest.fixture
+def temp_dir():
+    """Temporary directory removed after the test."""
+    path = tempfile.mkdtemp()
+    yield Path(path)
+    shutil.rmtree(path)
+
+
+@pytest.fixture
+def tracts_file(temp_dir):
+    """
+    Shapefile of a 3x3 tract grid with wiggly shared borders, plus one
+    tract in another county.
+    """
+    rng = np.random.default_rng(0)
+    # Border lines shared by neighbouring tracts, densified with small noise
+    n = 200
+    xs = [-118.30, -118.25, -118.20, -118.15]
+    ys = [34.00, 34.05, 34.10, 34.15]
+    noise = 0.0005
+
+    def wiggle(line, axis):
+        coords = shapely.get_coordinates(shapely.segmentize(line, 0.05 / n))
+        coords[1:-1, axis] += rng.uniform(-noise, noise, len(coords) - 2)
+        return coords
+
+    verticals = {i: wiggle(shapely.LineString([(x, ys[0]), (x, ys[-1])]), 0) if 0 < i < 3 else
+                 shapely.get_coordinates(shapely.LineString([(x, ys[0]), (x, ys[-1])]))
+                 for i, x in enumerate(xs)}
+    lines = [shapely.LineString(c) for c in verticals.values()] + \
+        [shapely.LineString([(xs[0], y), (xs[-1], y)]) for y in ys]
+    # Node the lines where they cross so neighbouring cells share vertices
+    grid = shapely.polygonize(shapely.get_parts(shapely.union_all(lines)))
+    cells = list(shapely.get_parts(grid))
+    other_county = shapely.box(-117.0, 34.0, -116.9, 34.1)
+
+    tracts = gpd.GeoDataFrame({
+        'GEOID': [f'0603700{i:04d}' for i in range(len(cells))] + ['06071000100'],
+        'COUNTYFP': ['037'] * len(cells) + ['071'],
+    }, geometry=cells + [other_county], crs='EPSG:4269')
+    path = temp_dir / 'tracts.shp'
+    tracts.to_file(path)
+    return path
+
+
+def rewrite_without_first_tract(tracts_file):
+    """Change the source file's content by dropping its first tract."""
+    tracts = gpd.read_file(tracts_file)
+    tracts.iloc[1:].to_file(tracts_file)
+
+
+class TestTractStore:
+    """Tests for the prepared county tract store."""
+
+    def test_load_county_tracts(self, tracts_file):
+        """Test only the requested county's tracts are read."""
+        tracts = load_county_tracts(tracts_file)
+
+        assert len(tracts) == 9
+        assert set(tracts['COUNTYFP']) == {'037'}
+
+    def test_store_columns(self, tracts_file, temp_dir):
+        """Test the store holds the county's tracts with centroids and areas in EPSG:4326."""
+        tracts = TractStore(tracts_file, store_dir=temp_dir / 'store').open()
+
+        assert len(tracts) == 9
+        assert tracts.crs.to_epsg() == 4326
+        # Roughly 4.6 km x 5.6 km cells
+        assert tracts['area_sqkm'].between(20, 32).all()
+        assert tracts['centroid_lat'].between(34.0, 34.15).all()
+        assert tracts['centroid_lon'].between(-118.30, -118.15).all()
+
+    def test_rebuilds_only_when_content_changes(self, tracts_file, temp_dir):
+        """Test a touched but identical source keeps the store; changed content rebuilds it."""
+        store = TractStore(tracts_file, store_dir=temp_dir / 'store')
+        store.build()
+        built = store.path.stat().st_mtime_ns
+
+        stat = tracts_file.stat()
+        os.utime(tracts_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert store.is_current()
+        store.build()
+        assert store.path.stat().st_mtime_ns == built
+
+        rewrite_without_first_tract(tracts_file)
+        assert not store.is_current()
+        assert len(TractStore(tracts_file, store_dir=temp_dir / 'store').open()) == 8
+
+    def test_locate_points(self, tracts_file, temp_dir):
+        """Test points map to the tract containing them, and -1 outside the county."""
+        store = TractStore(tracts_file, store_dir=temp_dir / 'store')
+        tracts = store.open()
+        inside = tracts.geometry.representative_point()
+
+        rows = store.locate(list(inside.x) + [-117.5], list(inside.y) + [34.05])
+
+        assert list(rows) == list(range(len(tracts))) + [-1]
+        assert list(store.tract_geoids(inside.x, inside.y)) == list(tracts['GEOID'])
+
+    def test_cleaner_assigns_tracts(self, tracts_file, temp_dir):
+        """Test cleaning records the tract each facility sits in."""
+        tracts = TractStore(tracts_file, store_dir=temp_dir / 'processed' / 'geometry').open()
+        inside = tracts.geometry.representative_point()
+        facilities = pd.DataFrame({
+            'name': ['A', 'B', 'Outside'],
+            'type': ['clinic', 'hospital', 'clinic'],
+            'lat': [inside.y[0], inside.y[4], 34.5],
+            'lon': [inside.x[0], inside.x[4], -117.8]
+        })
+
+        cleaner = FacilityDataCleaner(input_dir=temp_dir, output_dir=temp_dir / 'processed',
+                                      boundaries_file=tracts_file)
+        cleaned = cleaner.clean_dataset(facilities, source='test')
+
+        assert list(cleaned['tract_geoid'][:2]) == [tracts['GEOID'][0], tracts['GEOID'][4]]
+        assert pd.isna(cleaned['tract_geoid'][2])
+
+
+class TestGeometryPrep:
+    """Tests for coverage simplification and the prepared-level cache."""
+
+    def test_simplify_keeps_shared_borders(self, tracts_file):
+        """Test simplification drops vertices without gaps or overlaps between tracts."""
+        tracts = load_county_tracts(tracts_file)
+
+        simplified = simplify_tracts(tracts, tolerance_m=100.0)
+
+        vertices = shapely.get_num_coordinates(simplified.geometry.values).sum()
+        assert vertices < shapely.get_num_coordinates(tracts.geometry.values).sum() / 5
+        assert simplified.is_valid.all()
+        assert simplified.crs.to_epsg() == 4326
+
+        total = simplified.to_crs(epsg=3310)
+        union_area = total.union_all().area
+        assert total.area.sum() == pytest.approx(union_area, rel=1e-9)
+        # The outer boundary is simplified too, but the county keeps its area
+        assert union_area == pytest.approx(tracts.to_crs(epsg=3310).union_all().area, rel=1e-3)
+
+    def test_simplify_without_coverage_simplify(self, tracts_file, monkeypatch):
+        """Test shapely < 2.1 falls back to per-polygon simplification instead of failing."""
+        import data_processing.geometry_prep as geometry_prep
+        monkeypatch.setattr(geometry_prep, 'HAS_COVERAGE_SIMPLIFY', False)
+        monkeypatch.delattr(shapely, 'coverage_simplify', raising=False)
+        tracts = load_county_tracts(tracts_file)
+
+        simplified = simplify_tracts(tracts, tolerance_m=100.0)
+
+        assert len(simplified) == len(tracts)
+        assert simplified.is_valid.all()
+        assert (shapely.get_num_coordinates(simplified.geometry.values).sum()
+                < shapely.get_num_coordinates(tracts.geometry.values).sum() / 5)
+
+    def test_quantization_grid(self, tracts_file):
+        """Test coordinates are snapped to the level's grid."""
+        grid = grid_for_tolerance(100.0)
+        simplified = simplify_tracts(load_county_tracts(tracts_file), tolerance_m=100.0)
+
+        coords = shapely.get_coordinates(simplified.geometry.values)
+        assert grid == 1e-5
+        assert np.allclose(coords / grid, np.round(coords / grid))
+
+    def test_levels_are_cached(self, tracts_file, temp_dir):
+        """Test prepared levels are reused until the source file changes."""
+        geometries = TractGeometries(tracts_file, cache_dir=temp_dir / 'cache',
+                                     levels={'full': 0.0, 'coarse': 100.0})
+
+        paths = geometries.prepare()
+        assert all(path.exists() for path in paths.values())
+        assert paths['full'] == geometries.store.path
+        assert list(geometries.level('coarse')['GEOID']) == list(load_county_tracts(tracts_file)['GEOID'])
+
+        mtime = paths['coarse'].stat().st_mtime_ns
+        geometries.prepare()
+        assert paths['coarse'].stat().st_mtime_ns == mtime
+
+        # New source content invalidates the cache and replaces the old files
+        rewrite_without_first_tract(tracts_file)
+        new_paths = geometries.prepare()
+        assert new_paths['coarse'] != paths['coarse']
+        assert not paths['coarse'].exists()
+
+    def test_unknown_level(self, tracts_file, temp_dir):
+        """Test asking for an undefined level raises."""
+        with pytest.raises(ValueError):
+            TractGeometries(tracts_file, cache_dir=temp_dir).prepare(['tiny'])
@@ -0,0 +1,385 @@
+"""
+Tests for road-network access metrics.
+
+Tests for analysis.road_network, analysis.isochrones and the network mode of
+calculate_access_metrics.py
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import geopandas as gpd
+import shapely
+from pathlib import Path
+import tempfile
+import shutil
+
+from analysis.calculate_access_metrics import AccessMetricsCalculator
+from analysis.areal_interpolation import ArealInterpolator
+from analysis.isochrones import IsochroneEngine, IsochroneStore
+from analysis.road_network import RoadNetwork
+from analysis.spatial_index import project_points
+from impact.policy_recommendations import PolicyRecommendationEngine
+from impact.visualize_recommendations import RecommendationVisualizer
+
+# Eleven nodes along a straight east-west road, 0.01 degrees (~920 m) apart
+ROAD_LAT = 34.05
+ROAD_LONS = [-118.30 + 0.01 * i for i in range(11)]
+
+
+def build_graphml(oneway_segment=None):
+    """Build a small GraphML road in the layout OSMnx writes."""
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">',
+        '<key id="d0" for="node" attr.name="y" attr.type="string"/>',
+        '<key id="d1" for="node" attr.name="x" attr.type="string"/>',
+        '<key id="d2" for="edge" attr.name="length" attr.type="string"/>',
+        '<key id="d3" for="edge" attr.name="speed_kph" attr.type="string"/>',
+        '<graph edgedefault="directed">',
+    ]
+    for i, lon in enumerate(ROAD_LONS):
+        lines.append(f'<node id="n{i}"><data key="d0">{ROAD_LAT}</data><data key="d1">{lon}</data></node>')
+    for i in range(len(ROAD_LONS) - 1):
+        directions = [(i, i + 1)] if oneway_segment == i else [(i, i + 1), (i + 1, i)]
+        for u, v in directions:
+            lines.append(
+                f'<edge source="n{u}" target="n{v}">'
+                f'<data key="d2">1000</data><data key="d3">60</data></edge>'
+            )
+    lines += ['</graph>', '</graphml>']
+    return '\n'.join(lines)
+
+
+@pytest.fixture
+def temp_dir():
+    """Temporary directory removed after the test."""
+    path = tempfile.mkdtemp()
+    yield Path(path)
+    shutil.rmtree(path)
+
+
+@pytest.fixture
+def road_network(temp_dir):
+    """Two-way road network loaded from GraphML."""
+    graphml_file = temp_dir / 'roads.graphml'
+    graphml_file.write_text(build_graphml())
+    return RoadNetwork.from_graphml(graphml_file)
+
+
+@pytest.fixture
+def network_data_files(temp_dir):
+    """Facilities at both ends of the road and tracts along it."""
+    facilities = pd.DataFrame({
+        'name': ['West Clinic', 'East Hospital'],
+        'lat': [ROAD_LAT, ROAD_LAT],
+        'lon': [ROAD_LONS[0], ROAD_LONS[10]],
+        'category': ['clinic', 'hospital']
+    })
+    census = pd.DataFrame({
+        'GEOID': ['06037000100', '06037000200', '06037000300'],
+        'Total Population': [1000, 2000, 1500],
+        'centroid_lat': [ROAD_LAT, ROAD_LAT, np.nan],
+        'centroid_lon': [ROAD_LONS[2], ROAD_LONS[7], ROAD_LONS[5]],
+        'area_sqkm': [1.0, 1.0, 1.0]
+    })
+
+    facilities_file = temp_dir / 'facilities.csv'
+    census_file = temp_dir / 'census.csv'
+    facilities.to_csv(facilities_file, index=False)
+    census.to_csv(census_file, index=False)
+    return facilities_file, census_file
+
+
+class TestRoadNetwork:
+    """Tests for RoadNetwork loading and routing."""
+
+    def test_from_graphml(self, road_network):
+        """Test GraphML nodes and both edge directions are loaded."""
+        assert road_network.n_nodes == 11
+        assert road_network.graph('length').nnz == 20
+        assert road_network.graph('travel_time')[0, 1] == pytest.approx(60.0)  # 1 km at 60 km/h
+
+    def test_snap_to_nearest_node(self, road_network):
+        """Test points snap to the closest node."""
+        nodes, snap_m = road_network.snap(np.array([ROAD_LAT + 0.001, np.nan]),
+                                          np.array([ROAD_LONS[3], ROAD_LONS[3]]))
+
+        assert nodes[0] == 3
+        assert 100 < snap_m[0] < 120
+        assert nodes[1] == -1
+
+    def test_multi_source_costs(self, road_network):
+        """Test every node gets the cost to its cheapest source in one pass."""
+        costs, sources = road_network.nearest_source_costs(np.array([0, 10]), weight='length')
+
+        assert list(costs) == pytest.approx([0, 1000, 2000, 3000, 4000, 5000, 4000, 3000, 2000, 1000, 0])
+        assert list(sources[:5]) == [0] * 5
+        assert list(sources[6:]) == [10] * 5
+
+    def test_one_way_streets_respected(self, temp_dir):
+        """Test travel towards a source cannot use a one-way street backwards."""
+        graphml_file = temp_dir / 'oneway.graphml'
+        graphml_file.write_text(build_graphml(oneway_segment=4))
+        network = RoadNetwork.from_graphml(graphml_file)
+
+        # Node 5 can only travel east (4 -> 5 is one-way), so it must route to node 10
+        costs, sources = network.nearest_source_costs(np.array([0, 10]), weight='length')
+
+        assert costs[5] == pytest.approx(5000)
+        assert sources[5] == 10
+        assert costs[4] == pytest.approx(4000)
+
+    def test_route_length_follows_fastest_route(self):
+        """Test route lengths belong to the fastest route, not the shortest road."""
+        # Node 0 reaches source 1 over 1 km of slow road (6 min) or source 2 over
+        # 3 km of freeway (1.5 min); node 3 sits 500 m behind node 0.
+        network = RoadNetwork(np.full(4, 34.05), np.array([-118.25, -118.24, -118.22, -118.255]),
+                              edge_from=[0, 0, 3, 0], edge_to=[1, 2, 0, 2],
+                              length_m=[1000, 3000, 500, 900], travel_time_s=[360, 90, 30, 600])
+
+        travel_s, length_m, sources = network.nearest_source_routes(np.array([1, 2]))
+
+        assert sources[0] == 2 and sources[3] == 2
+        assert travel_s[0] == pytest.approx(90) and length_m[0] == pytest.approx(3000)
+        assert travel_s[3] == pytest.approx(120) and length_m[3] == pytest.approx(3500)
+        assert length_m[1] == 0 and length_m[2] == 0
+
+    def test_route_lengths_on_long_chain(self, road_network):
+        """Test lengths summed up the route tree match length costs on a plain chain."""
+        travel_s, length_m, _ = road_network.nearest_source_routes(np.array([0, 10]))
+        costs, _ = road_network.nearest_source_costs(np.array([0, 10]), weight='length')
+
+        assert list(length_m) == pytest.approx(list(costs))
+
+    def test_unknown_weight(self, road_network):
+        """Test requesting an unknown weight fails loudly."""
+        with pytest.raises(ValueError):
+            road_network.graph('toll')
+
+
+class TestNetworkAccessMetrics:
+    """Tests for AccessMetricsCalculator network mode."""
+
+    def test_calculate_network_access(self, network_data_files, road_network, temp_dir):
+        """Test network distance, travel time and facility index per tract."""
+        facilities_file, census_file = network_data_files
+
+        calculator = AccessMetricsCalculator(facilities_file, census_file,
+                                             output_dir=temp_dir, road_network=road_network)
+        calculator.load_data()
+
+        access = calculator.calculate_network_access()
+
+        assert access['nearest_facility_km'].iloc[0] == pytest.approx(2.0, abs=0.01)
+        assert access['nearest_facility_km'].iloc[1] == pytest.approx(3.0, abs=0.01)
+        assert access['nearest_facility_minutes'].iloc[1] == pytest.approx(3.0, abs=0.05)
+        assert list(access['nearest_facility_index'].iloc[:2]) == [0, 1]
+        # Tract without a centroid cannot be routed
+        assert np.isnan(access['nearest_facility_km'].iloc[2])
+
+    def test_network_distances_feed_policy_columns(self, network_data_files, road_network, temp_dir):
+        """Test save_metrics writes network values into the columns the policy engine reads."""
+        facilities_file, census_file = network_data_files
+
+        calculator = AccessMetricsCalculator(facilities_file, census_file,
+                                             output_dir=temp_dir, road_network=road_network)
+        calculator.load_data()
+
+        assert calculator.save_metrics('network_metrics.csv') is True
+
+        saved = pd.read_csv(temp_dir / 'network_metrics.csv')
+        assert saved['nearest_facility_km'].iloc[1] == pytest.approx(3.0, abs=0.01)
+        assert 'nearest_facility_minutes' in saved.columns
+        assert 'straight_line_km' in saved.columns
+        assert 'straight_line_avg_3_km' in saved.columns
+        assert 'avg_3_nearest_km' not in saved.columns
+        assert 'access_score' in saved.columns
+
+
+def grid_network(size=21, spacing=0.01, speed_kph=60.0):
+    """Two-way street grid centred on downtown LA, 0.01 degrees between intersections."""
+    lat0, lon0 = 34.05 - spacing * (size // 2), -118.25 - spacing * (size // 2)
+    rows, cols = np.divmod(np.arange(size * size), size)
+    lat, lon = lat0 + rows * spacing, lon0 + cols * spacing
+
+    right = np.flatnonzero(cols < size - 1)
+    up = np.flatnonzero(rows < size - 1)
+    u = np.concatenate([right, right + 1, up, up + size])
+    v = np.concatenate([right + 1, right, up + size, up])
+    xy = project_points(lat, lon)
+    length = np.linalg.norm(xy[u] - xy[v], axis=1)
+    return RoadNetwork(lat, lon, u, v, length, length / (speed_kph / 3.6))
+
+
+class TestIsochrones:
+    """Tests for drive-time catchments and their cache."""
+
+    def test_catchments_follow_travel_time_and_nest(self):
+        """Test larger budgets reach further along the grid and contain smaller ones."""
+        engine = IsochroneEngine(grid_network())
+
+        catchments = engine.isochrones(34.05, -118.25, minutes=(5, 10))
+
+        # About 1 minute per block, so 3 blocks out is inside 5 minutes and 8 is not
+        near, far = shapely.Point(-118.22, 34.05), shapely.Point(-118.17, 34.05)
+        assert catchments[5].contains(near) and not catchments[5].contains(far)
+        assert catchments[10].contains(far)
+        assert catchments[10].contains(catchments[5])
+
+    def test_unknown_mode(self):
+        """Test an unknown travel mode fails loudly."""
+        with pytest.raises(ValueError):
+            IsochroneEngine(grid_network(size=3)).isochrones(34.05, -118.25, mode='fly')
+
+    def test_store_reuses_and_evicts_least_recently_used(self, temp_dir):
+        """Test cached polygons are served without routing and the oldest unused ones evicted."""
+        store = IsochroneStore(temp_dir / 'isochrones', max_entries=3)
+        engine = IsochroneEngine(grid_network(size=5), store)
+        sites = {'a': (34.05, -118.25), 'b': (34.06, -118.25), 'c': (34.05, -118.24)}
+
+        first = engine.isochrones(*sites['a'], minutes=(2, 4))
+        engine.isochrones(*sites['b'], minutes=(2,))
+        engine._compute = None  # any further routing would fail
+        assert engine.isochrones(*sites['a'], minutes=(2, 4))[4].equals(first[4])
+
+        del engine._compute
+        engine.isochrones(*sites['c'], minutes=(2,))
+
+        assert len(store) == 3
+        key = IsochroneStore.key(engine.network.digest, *sites['b'], 'drive', 2, engine.ratio, engine.buffer_m)
+        assert store.get(key) is None
+
+    def test_store_only_scans_when_full(self, temp_dir):
+        """Test puts below the limit do not rescan the store, and eviction leaves headroom."""
+        store = IsochroneStore(temp_dir / 'isochrones', max_entries=10)
+        scans = []
+        evict = store.evict
+        store.evict = lambda: scans.append(1) or evict()
+        polygon = shapely.box(0, 0, 1, 1)
+
+        for i in range(10):
+            store.put(f'{i:064x}', polygon)
+        store.put(f'{0:064x}', polygon)  # overwriting adds no entry
+        assert scans == []
+
+        store.put(f'{10:064x}', polygon)
+        assert len(scans) == 1
+        assert len(store) == 9
+
+        store.put(f'{11:064x}', polygon)
+        assert len(scans) == 1
+
+    def test_catchment_population_is_area_weighted(self):
+        """Test tracts count by the share of their area inside the catchment."""
+        tracts = gpd.GeoDataFrame({'GEOID': ['06037000100', '06037000200']},
+                                  geometry=[shapely.box(-118.30, 34.00, -118.20, 34.10),
+                                            shapely.box(-118.20, 34.00, -118.10, 34.10)], crs=4326)
+        census = pd.DataFrame({'GEOID': [6037000100, 6037000200], 'total_population': [1000, 4000]})
+        population = ArealInterpolator.from_census(tracts, census)
+
+        counts = population.population_within([shapely.box(-118.25, 34.00, -118.15, 34.10),
+                                               shapely.box(-117.0, 34.0, -116.9, 34.1)])
+
+        assert counts[0] == pytest.approx(2500, rel=0.01)
+        assert counts[1] == 0
+
+    @staticmethod
+    def write_tracts(temp_dir):
+        """Four 0.1 degree tracts in a 2x2 block, as a shapefile and a census CSV."""
+        geoids = [f'0603700{i:04d}' for i in range(4)]
+        cells = [shapely.box(-118.35 + 0.1 * (i % 2), 33.95 + 0.1 * (i // 2),
+                             -118.25 + 0.1 * (i % 2), 34.05 + 0.1 * (i // 2)) for i in range(4)]
+        gpd.GeoDataFrame({'GEOID': geoids, 'COUNTYFP': '037'}, geometry=cells, crs=4269).to_file('tracts.shp')
+        centroids = gpd.GeoSeries(cells, crs=4269).to_crs(epsg=3310).centroid.to_crs(epsg=4326)
+        census = pd.DataFrame({
+            'GEOID': geoids, 'total_population': [1000, 2000, 3000, 4000],
+            'median_income': [40000, 50000, 60000, 70000],
+            'centroid_lat': centroids.y, 'centroid_lon': centroids.x,
+            'nearest_facility_km': [12.0, 8.0, 6.0, 3.0], 'access_score': [20, 40, 60, 80]
+        })
+        census.to_csv('census.csv', index=False)
+        return census
+
+    def test_recommendations_use_catchment_population(self, temp_dir, monkeypatch):
+        """Test site impact and the locations map come from drive-time catchments."""
+        monkeypatch.chdir(temp_dir)
+        census = self.write_tracts(temp_dir)
+
+        engine = PolicyRecommendationEngine(Path('census.csv'), Path('census.csv'),
+                                            isochrones=IsochroneEngine(grid_network(), IsochroneStore('iso')),
+                                            boundaries_file=Path('tracts.shp'))
+        assert engine.load_data()
+        locations = pd.DataFrame(engine.recommend_new_facility_locations(n_facilities=2))
+
+        assert {'catchment_population_10min', 'catchment_population_30min'} <= set(locations.columns)
+        assert (locations['estimated_impact'] == locations['catchment_population_10min']).all()
+        assert (locations['catchment_population_10min'] <= locations['catchment_population_30min']).all()
+        assert locations['catchment_population_30min'].max() <= census['total_population'].sum()
+
+        visualizer = RecommendationVisualizer(temp_dir / 'maps')
+        assert visualizer.create_facility_locations_map(locations, engine.census_data,
+                                                        isochrones=engine.isochrones)
+        html = (temp_dir / 'maps' / 'recommended_facility_locations_map.html').read_text()
+        assert '10-minute drive' in html and 'radius": 5000' not in html
+
+
+class TestArealInterpolation:
+    """Tests for areal-weighted populations of arbitrary polygons."""
+
+    def test_bulk_shares_match_pairwise_intersection(self):
+        """Test the two-query bulk path gives the same shares as intersecting every pair."""
+        rng = np.random.default_rng(7)
+        points = shapely.MultiPoint(np.column_stack([rng.uniform(-118.5, -118.0, 60),
+                                                     rng.uniform(33.8, 34.3, 60)]))
+        extent = shapely.box(-118.5, 33.8, -118.0, 34.3)
+        cells = shapely.intersection(shapely.get_parts(shapely.voronoi_polygons(points, extend_to=extent)), extent)
+        tracts = gpd.GeoDataFrame(geometry=cells, crs=4326)
+        interpolator = ArealInterpolator(tracts, rng.integers(100, 5000, len(tracts)))
+        circles = gpd.GeoSeries(shapely.points(rng.uniform(-118.5, -118.0, 25), rng.uniform(33.8, 34.3, 25)),
+                                crs=4326).to_crs(epsg=3310).buffer(rng.uniform(500, 15000, 25))
+
+        shares = interpolator.shares(circles.values, crs=3310, chunk_size=7).toarray()
+
+        tracts_3310 = tracts.to_crs(epsg=3310).geometry.values
+        expected = np.array([shapely.area(shapely.intersection(tracts_3310, circle)) / shapely.area(tracts_3310)
+                             for circle in circles.values])
+        np.testing.assert_allclose(shares, expected, atol=1e-9)
+        assert (shares == 1.0).any()
+
+    def test_radius_population_and_column_order(self):
+        """Test radius counts are area weighted and share columns follow the requested GEOIDs."""
+        tracts = gpd.GeoDataFrame({'GEOID': ['06037000100', '06037000200']},
+                                  geometry=[shapely.box(-118.30, 34.00, -118.20, 34.10),
+                                            shapely.box(-118.20, 34.00, -118.10, 34.10)], crs=4326)
+        census = pd.DataFrame({'GEOID': ['06037000100', '06037000200'], 'total_population': [1000, 4000]})
+        interpolator = ArealInterpolator.from_census(tracts, census)
+
+        # A 1 km circle on the shared edge takes half its area from each tract
+        circle_km2 = np.pi
+        tract_km2 = interpolator.areas / 1e6
+        counts = interpolator.population_within_radius([34.05, np.nan], [-118.20, -118.20], 1.0)
+        assert counts[0] == pytest.approx((1000 / tract_km2[0] + 4000 / tract_km2[1]) * circle_km2 / 2, rel=0.01)
+        assert counts[1] == 0
+
+        shares = interpolator.radius_shares([34.05], [-118.25], 1.0,
+                                            columns=['06037000200', '06037000100', '06037999999'])
+        assert shares.shape == (1, 3)
+        assert shares[0, 0] == 0 and shares[0, 1] > 0 and shares[0, 2] == 0
+
+    def test_recommendations_use_areal_population_without_road_graph(self, temp_dir, monkeypatch):
+        """Test boundaries alone replace the density guess with tract populations inside 5km."""
+        monkeypatch.chdir(temp_dir)
+        census = TestIsochrones.write_tracts(temp_dir)
+
+        engine = PolicyRecommendationEngine(Path('census.csv'), Path('census.csv'),
+                                            boundaries_file=Path('tracts.shp'))
+        assert engine.load_data()
+        locations = pd.DataFrame(engine.recommend_new_facility_locations(n_facilities=2, objective='coverage'))
+
+        assert 'catchment_population_10min' not in locations.columns
+        assert (locations['estimated_impact'] > 0).all()
+        assert locations['estimated_impact'].max() <= census['total_population'].sum()
+        sites = census.set_index('GEOID').loc[locations['geoid']]
+        expected = engine._interpolator().population_within_radius(sites['centroid_lat'], sites['centroid_lon'], 5.0)
+        np.testing.assert_array_equal(locations['estimated_impact'], expected.round().astype(int))
@@ -0,0 +1,193 @@
+"""
+Tests for the output pipeline stage runner.
+
+Tests for impact.pipeline
+"""
+
+import pytest
+import pandas as pd
+from pathlib import Path
+import tempfile
+import shutil
+
+from impact.build_cache import BuildCache
+from impact.pipeline import Pipeline, Stage, module_imports, stage_modules
+
+
+def make_frame(n):
+    return {'frame': pd.DataFrame({'x': range(n)})}
+
+
+def total(frame):
+    return {'total': int(frame['x'].sum())}
+
+
+def double(frame):
+    return {'doubled': frame.assign(x=frame['x'] * 2)}
+
+
+def write_report(frame, out_dir):
+    (out_dir / 'report.txt').write_text(f"rows: {len(frame)}")
+
+
+def fail(frame):
+    raise RuntimeError("boom")
+
+
+def after_failure(broken):
+    return {'never': 1}
+
+
+STAGES = [
+    Stage('make', make_frame, inputs=('n',), outputs=('frame',)),
+    Stage('total', total, inputs=('frame',), outputs=('total',)),
+    Stage('double', double, inputs=('frame',), outputs=('doubled',)),
+]
+
+
+class TestPipeline:
+    """Tests for DAG ordering and execution."""
+
+    def test_order_respects_dependencies(self):
+        """Test producers come before their consumers."""
+        order = Pipeline(list(reversed(STAGES))).order(provided=('n',))
+
+        assert order[0] == 'make'
+        assert set(order[1:]) == {'total', 'double'}
+
+    def test_missing_input_and_cycle(self):
+        """Test unknown inputs and cycles are rejected before running."""
+        with pytest.raises(ValueError):
+            Pipeline(STAGES).order()
+        cyclic = [Stage('a', total, inputs=('y',), outputs=('x',)),
+                  Stage('b', total, inputs=('x',), outputs=('y',))]
+        with pytest.raises(ValueError):
+            Pipeline(cyclic).order()
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_frames_flow_between_stages(self, workers):
+        """Test DataFrames pass between stages, sequentially and in worker processes."""
+        result = Pipeline(STAGES).run(initial={'n': 5}, max_workers=workers)
+
+        assert result.ok
+        assert result.get('total') == 10
+        assert list(result.get('doubled')['x']) == [0, 2, 4, 6, 8]
+        assert all(report.wall_s >= 0 for report in result.reports.values())
+
+    def test_failure_skips_downstream_only(self):
+        """Test a failed stage skips its dependents while independent stages still run."""
+        stages = STAGES + [
+            Stage('fail', fail, inputs=('frame',), outputs=('broken',)),
+            Stage('after', after_failure, inputs=('broken',), outputs=('never',)),
+        ]
+
+        result = Pipeline(stages).run(initial={'n': 3}, max_workers=1)
+
+        assert not result.ok
+        assert result.reports['fail'].status == 'failed'
+        assert 'boom' in result.reports['fail'].error
+        assert result.reports['after'].status == 'skipped'
+        assert result.reports['total'].status == 'ok'
+
+
+@pytest.fixture
+def temp_dir():
+    """Temporary directory removed after the test."""
+    path = tempfile.mkdtemp()
+    yield Path(path)
+    shutil.rmtree(path)
+
+
+class TestBuildCache:
+    """Tests for skipping unchanged stages."""
+
+    @staticmethod
+    def stages(out_dir):
+        return STAGES + [Stage('report', write_report, inputs=('frame', 'out_dir'),
+                               files=(out_dir / 'report.txt',))]
+
+    def test_unchanged_stages_are_hits(self, temp_dir):
+        """Test a second run is served from the cache and restores deleted files."""
+        out_dir = temp_dir / 'out'
+        out_dir.mkdir()
+        cache = BuildCache(temp_dir / 'cache')
+        pipeline = Pipeline(self.stages(out_dir))
+
+        first = pipeline.run(initial={'n': 4, 'out_dir': out_dir}, max_workers=1, cache=cache)
+        (out_dir / 'report.txt').unlink()
+        second = pipeline.run(initial={'n': 4, 'out_dir': out_dir}, max_workers=1, cache=cache)
+
+        assert first.cache_hits() == []
+        assert sorted(second.cache_hits()) == ['double', 'make', 'report', 'total']
+        assert second.get('total') == 6
+        assert (out_dir / 'report.txt').read_text() == 'rows: 4'
+
+    def test_changed_input_and_force(self, temp_dir):
+        """Test changed inputs rerun their stages and forced stages rerun regardless."""
+        out_dir = temp_dir / 'out'
+        out_dir.mkdir()
+        cache = BuildCache(temp_dir / 'cache')
+        pipeline = Pipeline(self.stages(out_dir))
+        pipeline.run(initial={'n': 4, 'out_dir': out_dir}, max_workers=1, cache=cache)
+
+        changed = pipeline.run(initial={'n': 5, 'out_dir': out_dir}, max_workers=1, cache=cache)
+        forced = pipeline.run(initial={'n': 5, 'out_dir': out_dir}, max_workers=1, cache=cache,
+                              force=['total'])
+
+        assert changed.cache_hits() == []
+        assert (out_dir / 'report.txt').read_text() == 'rows: 5'
+        assert forced.reports['total'].cache == 'forced'
+        assert sorted(forced.cache_hits()) == ['double', 'make', 'report']
+
+    def test_lru_eviction(self, temp_dir):
+        """Test the least recently used entries go first when over the size limit."""
+        cache = BuildCache(temp_dir / 'cache')
+        pipeline = Pipeline(STAGES)
+        pipeline.run(initial={'n': 3}, max_workers=1, cache=cache)
+        pipeline.run(initial={'n': 4}, max_workers=1, cache=cache)
+        # Using the n=3 entries again makes the n=4 ones the least recently used
+        pipeline.run(initial={'n': 3}, max_workers=1, cache=cache)
+
+        entries = cache.entries()
+        assert len(entries) == 6
+        cache.max_bytes = sum(size for _, size, _ in entries[3:])
+        cache.evict()
+
+        assert pipeline.run(initial={'n': 3}, max_workers=1, cache=cache).cache_hits() != []
+        assert pipeline.run(initial={'n': 4}, max_workers=1, cache=cache).cache_hits() == []
+
+
+class TestStageModules:
+    """Tests for finding the code behind a stage's cache key."""
+
+    def test_package_reexports_resolve_to_defining_module(self):
+        """Test names imported through a package __init__ map to the module defining them."""
+        imports = module_imports('impact.generate_all_outputs')
+
+        assert imports['PolicyRecommendationEngine'] == 'impact.policy_recommendations'
+        assert imports['ISOCHRONE_DIR'] == 'analysis.isochrones'
+        assert 'pd' not in imports
+
+    def test_output_stages_cover_transitive_imports(self):
+        """Test a stage covers modules reached only through its function's imports."""
+        from impact.generate_all_outputs import STAGES as OUTPUT_STAGES
+        stages = {stage.name: stage for stage in OUTPUT_STAGES}
+
+        recommendations = stage_modules(stages['recommendations'])
+        assert {'impact.generate_all_outputs', 'impact.policy_recommendations',
+                'analysis.areal_interpolation', 'impact.facility_siting',
+                'data_processing.tract_store'} <= recommendations
+        assert 'impact.visualize_recommendations' not in recommendations
+
+        facility_map = stage_modules(stages['facility_map'])
+        assert {'impact.visualize_recommendations', 'impact.policy_recommendations',
+                'analysis.isochrones', 'analysis.road_network'} <= facility_map
+
+        assert stage_modules(stages['cost_benefit']) == {
+            'impact.generate_all_outputs', 'impact.cost_benefit_analysis', 'data_processing.columnar_store'}
+
+    def test_extra_sources(self):
+        """Test declared sources are added to the imported modules."""
+        stage = Stage('make', make_frame, inputs=('n',), outputs=('frame',), sources=('impact.build_cache',))
+
+        assert stage_modules(stage) == {make_frame.__module__, 'impact.build_cache'}
@@ -10,9 +10,13 @@ import numpy as np
 from pathlib import Path
 import tempfile
 import shutil
+import warnings
 
 # Import module to test
 from impact.policy_recommendations import PolicyRecommendationEngine, PolicyRecommendation
+from impact.facility_siting import FacilitySitingOptimizer
+from impact.cost_benefit_analysis import CostBenefitAnalyzer
+from impact.sensitivity import Distribution, MonteCarloSensitivity
 
 
 @pytest.fixture
@@ -156,6 +160,7 @@ class TestPolicyRecommendationEngine:
             assert 'current_distance_km' in location
             assert 'priority_reason' in location
             assert 'estimated_impact' in location
+            assert 'benefit_cost_ratio' in location
 
     def test_generate_all_recommendations(self, temp_data_files):
         """Test comprehensive recommendation generation."""
@@ -263,6 +268,233 @@ class TestPolicyRecommendationEngine:
         assert impact > 0
 
 
+class TestFacilitySitingOptimizer:
+    """Tests for lazy-greedy facility siting."""
+
+    @staticmethod
+    def two_clusters():
+        """Two tight clusters of tracts ~20 km apart, both far from any facility."""
+        lat = np.array([34.05, 34.051, 34.052, 34.25, 34.251])
+        lon = np.array([-118.24, -118.241, -118.242, -118.24, -118.241])
+        population = np.array([3000, 2500, 2000, 1000, 1000])
+        return lat, lon, population, np.full(5, 15.0)
+
+    def test_sites_spread_across_clusters(self):
+        """Test the second site serves new people instead of the neighbouring tract."""
+        lat, lon, population, existing = self.two_clusters()
+        optimizer = FacilitySitingOptimizer(lat, lon, population, existing, lat, lon)
+
+        for objective in ['coverage', 'p_median']:
+            result = optimizer.select(2, objective=objective)
+            assert result.sites[0] in (0, 1, 2)
+            assert result.sites[1] in (3, 4)
+
+    def test_coverage_stops_when_everyone_is_covered(self):
+        """Test no site is added once it would not cover anyone new."""
+        lat, lon, population, existing = self.two_clusters()
+        optimizer = FacilitySitingOptimizer(lat, lon, population, existing, lat, lon)
+
+        result = optimizer.select(5, objective='coverage')
+
+        assert len(result.sites) == 2
+        assert result.gains == [7500, 2000]
+
+    def test_lazy_greedy_matches_plain_greedy(self):
+        """Test lazy evaluation picks the same sites as re-scoring every candidate."""
+        rng = np.random.default_rng(3)
+        lat = rng.uniform(33.9, 34.3, 400)
+        lon = rng.uniform(-118.5, -118.1, 400)
+        population = rng.integers(500, 5000, 400)
+        existing = rng.uniform(0, 12, 400)
+        optimizer = FacilitySitingOptimizer(lat, lon, population, existing, lat[:150], lon[:150])
+
+        result = optimizer.select(10, objective='p_median')
+
+        current = optimizer.existing_m.copy()
+        for site in result.sites:
+            gains = [optimizer._gain('p_median', j, current) for j in range(150)]
+            assert gains[site] == pytest.approx(max(gains))
+            span = slice(optimizer.indptr[site], optimizer.indptr[site + 1])
+            cols = optimizer.indices[span]
+            current[cols] = np.minimum(current[cols], optimizer.distances[span])
+        assert result.evaluations < 150 * 10
+
+    def test_fractional_coverage_counts_uncovered_shares(self):
+        """Test area-share coverage credits only the share not already covered."""
+        from scipy.sparse import csr_matrix
+        lat, lon, population, existing = self.two_clusters()
+        share = np.zeros((5, 5))
+        share[0, :3] = [1.0, 0.5, 0.0]
+        share[1, :3] = [0.5, 1.0, 1.0]
+        share[3, 3:] = [1.0, 1.0]
+        optimizer = FacilitySitingOptimizer(lat, lon, population, existing, lat, lon,
+                                            coverage_share=csr_matrix(share))
+
+        result = optimizer.select(5, objective='coverage')
+
+        # 1.0*2500 + 1.0*2000 + 0.5*3000, then the far cluster, then the rest of tract 0
+        assert result.sites == [1, 3, 0]
+        assert result.gains == pytest.approx([6000, 2000, 1500])
+
+        with pytest.raises(ValueError):
+            FacilitySitingOptimizer(lat, lon, population, existing, lat, lon,
+                                    coverage_share=csr_matrix((5, 4)))
+
+    def test_unknown_objective(self):
+        """Test an unknown objective fails loudly."""
+        lat, lon, population, existing = self.two_clusters()
+        optimizer = FacilitySitingOptimizer(lat, lon, population, existing, lat, lon)
+
+        with pytest.raises(ValueError):
+            optimizer.select(1, objective='fastest')
+
+
+class TestCostBenefitAnalyzer:
+    """Tests for the cost-benefit report outputs."""
+
+    def test_report_writes_json_results(self):
+        """Test the JSON companion holds every estimate and totals matching the text report."""
+        import json
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            locations_df = pd.DataFrame({'estimated_impact': [8000, 12000]})
+            recommendations = [
+                {'Title': 'Mobile Health Clinics', 'Affected_Population': 50000},
+                {'Title': 'Transportation Assistance', 'Affected_Population': 20000}
+            ]
+            output_file = temp_dir / 'COST_BENEFIT_ANALYSIS.txt'
+
+            assert CostBenefitAnalyzer().generate_cost_benefit_report(recommendations, locations_df, output_file)
+
+            results = json.loads(output_file.with_suffix('.json').read_text())
+            programs = {e['program']: e for e in results['estimates']}
+            assert set(programs) == {'New Healthcare Facilities', 'Mobile Clinics', 'Transportation'}
+            assert programs['New Healthcare Facilities']['units'] == 2
+
+            totals = results['totals']
+            expected_one_time = sum(e['one_time_costs'] * e['units'] for e in results['estimates'])
+            assert totals['one_time_costs'] == pytest.approx(expected_one_time)
+            assert totals['total_investment'] == pytest.approx(
+                totals['one_time_costs'] + 10 * totals['annual_operating_costs'])
+            assert f"10-year ROI: {totals['roi_percentage']:.1f}%" in output_file.read_text()
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_report_marks_programs_that_never_break_even(self):
+        """Test never breaking even is null in the JSON and 'never' in the text report."""
+        import json
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            locations_df = pd.DataFrame({'estimated_impact': [100]})
+            output_file = temp_dir / 'COST_BENEFIT_ANALYSIS.txt'
+
+            assert CostBenefitAnalyzer().generate_cost_benefit_report([], locations_df, output_file)
+
+            results = json.loads(output_file.with_suffix('.json').read_text())
+            assert results['estimates'][0]['break_even_years'] is None
+            report = output_file.read_text()
+            assert "Break-even timeframe: never" in report
+            assert "999" not in report
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestCostEstimateTable:
+    """Tests for batch cost estimation."""
+
+    def test_batch_matches_scalar_estimates(self):
+        """Test each row of a batch equals the scalar estimate for that population."""
+        analyzer = CostBenefitAnalyzer()
+        populations = [0, 1000, 25000, 400000]
+
+        table = analyzer.estimate_telehealth_costs_batch(populations)
+
+        assert len(table) == 4
+        for i, population in enumerate(populations):
+            assert table[i] == analyzer.estimate_telehealth_costs(population)
+
+    def test_never_breaking_even_is_masked(self):
+        """Test programs whose savings never cover operating costs get a masked break-even."""
+        analyzer = CostBenefitAnalyzer()
+
+        table = analyzer.estimate_new_facility_costs_batch(np.array([100, 50000]))
+
+        assert list(np.ma.getmaskarray(table.break_even_years)) == [True, False]
+        frame = table.to_frame()
+        assert pd.isna(frame['break_even_years'].iloc[0])
+        assert frame['break_even_years'].iloc[1] == pytest.approx(table.break_even_years[1])
+        # Scalar view reports it as None
+        assert table[0].break_even_years is None
+        assert table[1].break_even_years == pytest.approx(table.break_even_years[1])
+
+
+class TestMonteCarloSensitivity:
+    """Tests for vectorized cost-benefit sensitivity analysis."""
+
+    populations = {'New Healthcare Facilities': 30000, 'Mobile Clinics': 50000,
+                   'Transportation': 20000, 'Telehealth': 40000}
+
+    def test_array_models_match_scalar_estimates(self):
+        """Test evaluating a population array gives the same numbers as the scalar methods."""
+        analyzer = CostBenefitAnalyzer()
+        population = np.array([0, 500, 30000, 250000])
+
+        values = analyzer.evaluate_program('Mobile Clinics', population)
+
+        break_even = values['break_even_years']
+        for i, pop in enumerate(population):
+            estimate = analyzer.estimate_mobile_clinic_costs(int(pop))
+            if np.ma.is_masked(break_even[i]):
+                assert estimate.break_even_years is None
+            else:
+                assert break_even[i] == pytest.approx(estimate.break_even_years)
+            assert values['benefit_cost_ratio'][i] == pytest.approx(estimate.benefit_cost_ratio)
+            assert values['cost_per_person_served'][i] == pytest.approx(estimate.cost_per_person_served)
+
+    def test_fixed_distributions_reproduce_point_estimates(self):
+        """Test scenarios without uncertainty collapse to the point estimate."""
+        analyzer = CostBenefitAnalyzer()
+        fixed = {'ER_VISIT_COST': Distribution('fixed', (analyzer.ER_VISIT_COST,))}
+
+        result = MonteCarloSensitivity(analyzer, fixed, seed=0).run(self.populations, n_scenarios=100)
+
+        expected = analyzer.estimate_new_facility_costs(30000).benefit_cost_ratio
+        row = result.bands.loc[('New Healthcare Facilities', 'benefit_cost_ratio')]
+        assert row['p5'] == pytest.approx(expected, rel=1e-6)
+        assert row['p95'] == pytest.approx(expected, rel=1e-6)
+
+    def test_chunked_run_bands(self):
+        """Test chunked runs report ordered bands for every program and the portfolio."""
+        result = MonteCarloSensitivity(seed=1).run(self.populations, n_facilities=3,
+                                                   n_scenarios=10_000, chunk_size=3_000)
+
+        assert result.n_scenarios == 10_000
+        roi = result.bands.loc[('Portfolio', 'roi_percentage')]
+        assert roi['p5'] < roi['p50'] < roi['p95']
+        assert set(result.prob_breaks_even) == set(self.populations)
+        assert 0.0 <= result.prob_positive_roi <= 1.0
+
+    def test_program_that_never_breaks_even(self):
+        """Test bands and mean report inf rather than NaN when savings never cover costs."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            never = MonteCarloSensitivity(seed=0).run({'Mobile Clinics': 500}, n_scenarios=20_000)
+            rarely = MonteCarloSensitivity(seed=0).run({'Mobile Clinics': 4805}, n_scenarios=20_000)
+
+        assert never.prob_breaks_even['Mobile Clinics'] == 0.0
+        assert np.isinf(never.bands.loc[('Mobile Clinics', 'break_even_years')]).all()
+
+        row = rarely.bands.loc[('Mobile Clinics', 'break_even_years')]
+        assert 0.0 < rarely.prob_breaks_even['Mobile Clinics'] < 0.05
+        assert not row.isna().any()
+        assert np.isinf(row['p5']) and np.isinf(row['mean'])
+
+    def test_unknown_parameter(self):
+        """Test a distribution for a parameter the analyzer does not have is rejected."""
+        with pytest.raises(ValueError):
+            MonteCarloSensitivity(distributions={'NOT_A_COST': Distribution('fixed', (1,))})
+
+
 class TestIntegration:
     """Integration tests for policy recommendations."""
 